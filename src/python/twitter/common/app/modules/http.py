@@ -18,6 +18,7 @@ import threading
 from twitter.common.http.server import HttpServer
 from twitter.common.http.diagnostics import DiagnosticsEndpoints
 from twitter.common import app, options
+from twitter.common.metrics import RootMetrics
 
 class RootServer(HttpServer, app.Module):
   """
@@ -54,7 +55,8 @@ class RootServer(HttpServer, app.Module):
           type='string',
           metavar='FRAMEWORK',
           dest='twitter_common_http_root_server_framework',
-          help='The framework that will be running the integrated http server.')
+          help='The framework that will be running the integrated http server, e.g. wsgiref or '
+               'threaded.')
   }
 
   def __init__(self):
@@ -67,7 +69,7 @@ class RootServer(HttpServer, app.Module):
     options = app.get_options()
     parent = self
 
-    self.mount_routes(DiagnosticsEndpoints())
+    self.mount_routes(DiagnosticsEndpoints(metrics=RootMetrics()))
 
     class RootServerThread(threading.Thread):
       def run(self):
@@ -18,6 +18,13 @@
 # word in Python.  All characters appearing in this work are fictitious.
 # Any resemblance to real persons, living or dead, is purely coincidental.
 
+import bisect
+import operator
+import threading
+import time
+from json.encoder import encode_basestring_ascii
+
+import bottle
 from twitter.common import app, options
 from twitter.common.http import HttpServer
 from twitter.common.quantity import Amount, Time
@@ -57,6 +64,70 @@ class VarsSubsystem(app.Module):
       rs.mount_routes(varz)
       register_diagnostics()
 
+class SampleJson(object):
+  """
+    The JSON serialization of the most recent sample of a MetricSampler.
+
+    The sample is serialized once per sampler version and shared by every request for it,
+    and responses are streamed in chunks of entries rather than joined into one string.
+    Entries are sorted by name so that a prefix filter selects a contiguous range of them.
+  """
+  CHUNK_SIZE = 1000
+
+  def __init__(self, sampler):
+    self._sampler = sampler
+    self._lock = threading.Lock()
+    self._epoch = int(time.time())
+    self._version = None
+    self._names = []
+    self._keys = []
+    self._entries = []
+
+  def snapshot(self):
+    """
+      Return (etag, names, entries) for the most recent sample, serializing it if it has
+      changed.  Concurrent callers wait for a single serialization.
+    """
+    version, sample = self._sampler.versioned_sample()
+    with self._lock:
+      if version != self._version:
+        values = None
+        if len(sample) == len(self._names):
+          try:
+            values = list(map(sample.__getitem__, self._names))
+          except KeyError:
+            pass
+        if values is None:
+          # Names change far less often than values, so only sort and encode them then.
+          self._names = sorted(sample)
+          self._keys = [encode_basestring_ascii(name) + ': ' for name in self._names]
+          values = list(map(sample.__getitem__, self._names))
+        # Sampled values are strings, so the C string encoder serializes them as json.dumps.
+        self._entries = list(map(operator.add, self._keys, map(encode_basestring_ascii, values)))
+        self._version = version
+      return '"%x-%x"' % (self._epoch, self._version), self._names, self._entries
+
+  @staticmethod
+  def _range(names, prefix):
+    start = bisect.bisect_left(names, prefix)
+    if not prefix:
+      return start, len(names)
+    # Every name with the prefix sorts before the prefix with its last character incremented.
+    return start, bisect.bisect_left(names, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+
+  @classmethod
+  def stream(cls, names, entries, prefix=''):
+    """
+      Generate the JSON object of the entries whose names start with prefix.
+    """
+    start, stop = cls._range(names, prefix)
+    yield '{'
+    for offset in range(start, stop, cls.CHUNK_SIZE):
+      chunk = ', '.join(entries[offset:min(offset + cls.CHUNK_SIZE, stop)])
+      yield chunk if offset == start else ', ' + chunk
+    yield '}'
+
+
 class VarsEndpoint(object):
   """
     Wrap a MetricSampler to export the /vars endpoint for applications that register
@@ -70,6 +141,7 @@ class VarsEndpoint(object):
     else:
       self._monitor = MetricSampler(self._metrics)
     self._monitor.start()
+    self._json = SampleJson(self._monitor)
 
   @HttpServer.route("/vars")
   @HttpServer.route("/vars/:var")
@@ -88,7 +160,19 @@ class VarsEndpoint(object):
 
   @HttpServer.route("/vars.json")
   def handle_vars_json(self, var = None, value = None):
-    return self._monitor.sample()
+    """
+      Stream the most recent sample as JSON, restricted to names starting with the filter
+      query parameter if given.  Scrapers sending the ETag of an unchanged sample back as
+      If-None-Match receive 304 Not Modified.
+    """
+    etag, names, entries = self._json.snapshot()
+    bottle.response.set_header('ETag', etag)
+    if etag in [tag.strip() for tag in
+                bottle.request.headers.get('If-None-Match', '').split(',')]:
+      bottle.response.status = 304
+      return ''
+    bottle.response.content_type = 'application/json'
+    return SampleJson.stream(names, entries, bottle.request.query.get('filter', ''))
 
   def shutdown(self):
     self._monitor.shutdown()
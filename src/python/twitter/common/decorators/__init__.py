@@ -29,11 +29,14 @@ except ImportError:
     print(msg, file=sys.stderr)
 
 from .lru_cache import lru_cache
+from .segmented_cache import SegmentedCache, segmented_cache
 
 __all__ = (
   'deprecated',
   'deprecated_with_warning',
-  'lru_cache'
+  'lru_cache',
+  'segmented_cache',
+  'SegmentedCache',
 )
 
 def _deprecated_wrap_fn(fn, message=None):
@@ -0,0 +1,280 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from collections import namedtuple
+from functools import update_wrapper
+import threading
+import time
+
+from twitter.common.collections import OrderedDict
+
+_CacheStats = namedtuple('CacheStats',
+    ['hits', 'misses', 'evictions', 'expirations', 'size', 'weight'])
+
+
+class _Flight(object):
+  """
+    An in-progress computation of a missing key that concurrent misses wait upon.
+  """
+  def __init__(self):
+    self.event = threading.Event()
+    self.value = None
+    self.error = None
+
+
+class _Segment(object):
+  def __init__(self, max_weight):
+    self.lock = threading.Lock()
+    self.entries = OrderedDict()  # key => (value, weight, expiry), least recently used first
+    self.flights = {}
+    self.max_weight = max_weight
+    self.weight = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+
+
+class SegmentedCache(object):
+  """
+    A thread-safe LRU cache split into independently locked segments, with optional
+    per-entry expiry and a size limit by total weight rather than entry count.
+
+    Keys are assigned to one of segments segments by hash, so threads touching different
+    keys rarely contend.  max_weight (if not None) is divided evenly among segments and
+    each segment evicts its least recently used entries to stay within its share.  The
+    weight of an entry is weigher(key, value), 1 by default.
+
+    get_or_compute() coalesces concurrent misses on the same key, so the value is only
+    computed once however many threads ask for it.
+  """
+
+  _MISSING = object()
+
+  def __init__(self, segments=16, max_weight=None, ttl=None, weigher=None, clock=time,
+               on_eviction=None):
+    """
+      segments: number of independently locked segments.
+      max_weight: maximum total weight of the cache, or None for unbounded.
+      ttl: default time to live of entries in seconds, or None to never expire.
+      weigher: function of (key, value) returning the weight of an entry.
+      on_eviction: function applied to each value evicted or expired from the cache, called
+        without holding any lock of the cache.
+    """
+    if segments < 1:
+      raise ValueError('SegmentedCache must have at least one segment.')
+    segment_weight = None if max_weight is None else max(1, -(-max_weight // segments))
+    self._segments = [_Segment(segment_weight) for _ in range(segments)]
+    self._max_weight = max_weight
+    self._ttl = ttl
+    self._weigher = weigher or (lambda key, value: 1)
+    self._clock = clock
+    self._on_eviction = on_eviction
+
+  def _segment(self, key):
+    return self._segments[hash(key) % len(self._segments)]
+
+  def _evicted(self, values):
+    if self._on_eviction is not None:
+      for value in values:
+        self._on_eviction(value)
+
+  def _lookup(self, segment, key, evicted):
+    """
+      Return the unexpired value of key in segment or _MISSING, appending an expired value
+      to evicted.  Must hold segment.lock.
+    """
+    entry = segment.entries.get(key)
+    if entry is None:
+      segment.misses += 1
+      return self._MISSING
+    value, weight, expiry = entry
+    if expiry is not None and expiry <= self._clock.time():
+      del segment.entries[key]
+      segment.weight -= weight
+      segment.expirations += 1
+      segment.misses += 1
+      evicted.append(value)
+      return self._MISSING
+    segment.entries.move_to_end(key)
+    segment.hits += 1
+    return value
+
+  def _store(self, segment, key, value, ttl, evicted):
+    """
+      Store value under key, appending the values it evicts to evicted.  Must hold
+      segment.lock.
+    """
+    self._remove(segment, key)
+    weight = self._weigher(key, value)
+    if segment.max_weight is not None and weight > segment.max_weight:
+      return
+    ttl = self._ttl if ttl is None else ttl
+    expiry = None if ttl is None else self._clock.time() + ttl
+    segment.entries[key] = (value, weight, expiry)
+    segment.weight += weight
+    while segment.max_weight is not None and segment.weight > segment.max_weight:
+      _, (evicted_value, evicted_weight, _) = segment.entries.popitem(last=False)
+      segment.weight -= evicted_weight
+      segment.evictions += 1
+      evicted.append(evicted_value)
+
+  def _remove(self, segment, key):
+    entry = segment.entries.pop(key, None)
+    if entry is not None:
+      segment.weight -= entry[1]
+    return entry
+
+  def get(self, key, default=None):
+    segment, evicted = self._segment(key), []
+    with segment.lock:
+      value = self._lookup(segment, key, evicted)
+    self._evicted(evicted)
+    return default if value is self._MISSING else value
+
+  def put(self, key, value, ttl=None):
+    """
+      Cache value under key, expiring after ttl seconds (or the cache default ttl.)
+    """
+    segment, evicted = self._segment(key), []
+    with segment.lock:
+      self._store(segment, key, value, ttl, evicted)
+    self._evicted(evicted)
+
+  def get_or_compute(self, key, function, ttl=None):
+    """
+      Return the cached value of key, or compute it with function() and cache it.  If other
+      threads miss on key while it is being computed, they wait for and share its result
+      (or exception) rather than computing it again.
+    """
+    segment, evicted = self._segment(key), []
+    with segment.lock:
+      value = self._lookup(segment, key, evicted)
+      if value is self._MISSING:
+        flight = segment.flights.get(key)
+        leader = flight is None
+        if leader:
+          flight = segment.flights[key] = _Flight()
+    self._evicted(evicted)
+    if value is not self._MISSING:
+      return value
+
+    if not leader:
+      flight.event.wait()
+      if flight.error is not None:
+        raise flight.error
+      return flight.value
+
+    try:
+      flight.value = function()
+    except BaseException as e:
+      # Not just Exception: a KeyboardInterrupt or SystemExit must not leave waiters (and
+      # the cache) with a value of None.
+      flight.error = e
+      raise
+    finally:
+      evicted = []
+      with segment.lock:
+        del segment.flights[key]
+        if flight.error is None:
+          self._store(segment, key, flight.value, ttl, evicted)
+      flight.event.set()
+      self._evicted(evicted)
+    return flight.value
+
+  def invalidate(self, key):
+    segment = self._segment(key)
+    with segment.lock:
+      entry = self._remove(segment, key)
+    if entry is not None:
+      self._evicted([entry[0]])
+
+  def clear(self):
+    """
+      Remove every entry and reset statistics.
+    """
+    for segment in self._segments:
+      with segment.lock:
+        values = [entry[0] for entry in segment.entries.values()]
+        segment.entries.clear()
+        segment.weight = 0
+        segment.hits = segment.misses = segment.evictions = segment.expirations = 0
+      self._evicted(values)
+
+  def __len__(self):
+    return sum(len(segment.entries) for segment in self._segments)
+
+  def stats(self):
+    """
+      Report cache statistics as a (hits, misses, evictions, expirations, size, weight)
+      named tuple.  Segments are read without locking, so the totals are approximate
+      under concurrent use.
+    """
+    return _CacheStats(*[sum(getattr(segment, field) for segment in self._segments)
+                         for field in ('hits', 'misses', 'evictions', 'expirations')] +
+                       [len(self), sum(segment.weight for segment in self._segments)])
+
+  def export(self, scope):
+    """
+      Register gauges of the cache statistics with the twitter.common.metrics scope.
+    """
+    from twitter.common.metrics import LambdaGauge
+    for index, field in enumerate(_CacheStats._fields):
+      scope.register(LambdaGauge(field, lambda index=index: self.stats()[index]))
+    return scope
+
+
+def _make_key(args, kwds, typed, kwd_mark=(object(),)):
+  key = args
+  if kwds:
+    sorted_items = tuple(sorted(kwds.items()))
+    key += kwd_mark + sorted_items
+  if typed:
+    key += tuple(type(v) for v in args)
+    if kwds:
+      key += tuple(type(v) for k, v in sorted_items)
+  return key
+
+
+def segmented_cache(segments=16, max_weight=128, ttl=None, weigher=None, typed=False,
+                    clock=time, on_eviction=None):
+  """Segmented, expiring cache decorator.
+
+  Caches results in a SegmentedCache (see its documentation for the meaning of the
+  arguments.)  Concurrent calls with the same missing arguments compute the result once.
+
+  If *typed* is True, arguments of different types will be cached separately.
+
+  Arguments to the cached function must be hashable.
+
+  The SegmentedCache is available as f.cache, its statistics as f.cache_info() and it may
+  be cleared with f.cache_clear().  Access the underlying function with f.__wrapped__.
+  """
+  def decorating_function(user_function):
+    cache = SegmentedCache(segments=segments, max_weight=max_weight, ttl=ttl, weigher=weigher,
+        clock=clock, on_eviction=on_eviction)
+
+    def wrapper(*args, **kwds):
+      key = _make_key(args, kwds, typed) if kwds or typed else args
+      return cache.get_or_compute(key, lambda: user_function(*args, **kwds))
+
+    wrapper.__wrapped__ = user_function
+    wrapper.cache = cache
+    wrapper.cache_info = cache.stats
+    wrapper.cache_clear = cache.clear
+    return update_wrapper(wrapper, user_function)
+
+  return decorating_function
@@ -17,10 +17,12 @@
 __author__ = 'Brian Wickman'
 
 import fcntl
+import json
 import os
 import shutil
 import stat
 import errno
+import tempfile
 
 def safe_mkdir(directory, clean=False):
   """
@@ -133,17 +135,53 @@ def unlock_file(fp, close=False):
   return True
 
 
-from twitter.common.dirutil.du import du
+def load_json_cache(filename, version):
+  """
+    Load a dict saved by save_json_cache with the same version.  Returns an empty dict if
+    the file is missing or unreadable, or was saved with a different version.
+  """
+  try:
+    with open(filename) as fp:
+      cache = json.load(fp)
+  except (IOError, OSError, ValueError):
+    return {}
+  if not isinstance(cache, dict) or cache.get('version') != version:
+    return {}
+  entries = cache.get('entries')
+  return entries if isinstance(entries, dict) else {}
+
+
+def save_json_cache(filename, version, entries):
+  """
+    Atomically write the dict entries to filename as JSON, tagged with version.  Readers
+    see either the previous file or the complete new one.
+  """
+  fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)),
+                             prefix=os.path.basename(filename) + '.')
+  try:
+    with os.fdopen(fd, 'w') as fp:
+      json.dump({'version': version, 'entries': entries}, fp)
+    os.rename(tmp, filename)
+  except:
+    os.unlink(tmp)
+    raise
+
+
+from twitter.common.dirutil.du import DiskUsage, du
 from twitter.common.dirutil.lock import Lock
-from twitter.common.dirutil.tail import tail_f
+from twitter.common.dirutil.tail import Follower, tail_f
 
 __all__ = [
   'chmod_plus_x',
+  'DiskUsage',
   'du',
+  'load_json_cache',
   'lock_file',
   'safe_mkdir',
   'safe_open',
+  'save_json_cache',
   'tail_f',
+  'Follower',
   'unlock_file',
   'Lock'
 ]
@@ -1,7 +1,165 @@
+import errno
 import os
+import stat
+import threading
+
+try:
+  from Queue import Queue
+except ImportError:
+  from queue import Queue
+
+from . import load_json_cache, save_json_cache
+
 
 def du(directory):
   size = 0
   for root, _, files in os.walk(directory):
     size += sum(os.path.getsize(os.path.join(root, file)) for file in files)
   return size
+
+
+class DiskUsage(object):
+  """
+    Measure the disk usage of directory trees like du -s: the blocks allocated to every
+    file, directory and symlink, counting each hard linked inode once.
+
+    Directories are listed and their entries lstat'ed by a pool of threads.  If cache is
+    given, the usage of the files directly in each directory is persisted to that file
+    and reused by later scans while the directory's mtime is unchanged, so an unchanged
+    directory is neither listed nor are its files stat'ed; its subdirectories are still
+    visited.  As the mtime of a directory only changes when entries are added, removed or
+    renamed, files rewritten in place are not seen again until their directory changes.
+  """
+
+  BLOCK_SIZE = 512
+
+  # Bump whenever the format of cache entries changes.
+  CACHE_VERSION = 1
+
+  def __init__(self, threads=8, cache=None, apparent=False):
+    """
+      threads: number of threads listing directories.
+      cache: filename of the persistent cache, or None to always scan everything.
+      apparent: measure file sizes rather than allocated blocks.
+    """
+    self._threads = threads
+    self._cache_file = cache
+    self._apparent = apparent
+    self._cache = self._load() if cache else {}
+
+  def _load(self):
+    return load_json_cache(self._cache_file, self.CACHE_VERSION)
+
+  def save(self):
+    """
+      Atomically write the cache of the last scan, if a cache file was given.
+    """
+    if self._cache_file:
+      save_json_cache(self._cache_file, self.CACHE_VERSION, self._cache)
+
+  def _usage(self, st):
+    return st.st_size if self._apparent else st.st_blocks * self.BLOCK_SIZE
+
+  def _list(self, directory):
+    """
+      Return (usage, links, subdirectories) of the entries of directory: the usage of
+      entries with one link, (dev, ino, usage) of those with several and (name, stat) of
+      the subdirectories.
+    """
+    usage, links, subdirectories = 0, [], []
+    for name in os.listdir(directory):
+      try:
+        st = os.lstat(os.path.join(directory, name))
+      except OSError as e:
+        if e.errno == errno.ENOENT:
+          continue
+        raise
+      if stat.S_ISDIR(st.st_mode):
+        subdirectories.append((name, st))
+      elif st.st_nlink > 1:
+        links.append((st.st_dev, st.st_ino, self._usage(st)))
+      else:
+        usage += self._usage(st)
+    return usage, links, subdirectories
+
+  def _visit(self, directory, st, old_cache, new_cache):
+    key = [st.st_mtime, st.st_ino]
+    cached = old_cache.get(directory)
+    if cached is not None and cached[0] == key:
+      _, usage, links, names = cached
+      subdirectories = []
+      for name in names:
+        try:
+          subdirectories.append((name, os.lstat(os.path.join(directory, name))))
+        except OSError as e:
+          if e.errno != errno.ENOENT:
+            raise
+    else:
+      usage, links, subdirectories = self._list(directory)
+    if self._cache_file:
+      new_cache[directory] = [key, usage, links, [name for name, _ in subdirectories]]
+    return usage + self._usage(st), links, [
+        (os.path.join(directory, name), subdirectory_st)
+        for name, subdirectory_st in subdirectories]
+
+  def scan(self, directory):
+    """
+      Return the disk usage of directory in bytes.  Entries that cannot be read, e.g. for
+      lack of permission, are skipped.
+    """
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+      return self._usage(st)
+
+    root = os.path.abspath(directory)
+    old_cache, new_cache = self._cache, {}
+    lock = threading.Lock()
+    queue = Queue()
+    seen = set()
+    total = [0]
+    errors = []
+
+    def work():
+      while True:
+        item = queue.get()
+        if item is None:
+          return
+        try:
+          usage, links, subdirectories = self._visit(item[0], item[1], old_cache, new_cache)
+        except (IOError, OSError):
+          pass
+        except Exception as e:
+          errors.append(e)
+        else:
+          for subdirectory in subdirectories:
+            queue.put(subdirectory)
+          with lock:
+            total[0] += usage
+            for dev, ino, link_usage in links:
+              if (dev, ino) not in seen:
+                seen.add((dev, ino))
+                total[0] += link_usage
+        finally:
+          queue.task_done()
+
+    workers = [threading.Thread(target=work, name='DiskUsage worker %d' % k)
+               for k in range(max(1, self._threads))]
+    for worker in workers:
+      worker.daemon = True
+      worker.start()
+    queue.put((root, st))
+    queue.join()
+    for _ in workers:
+      queue.put(None)
+    for worker in workers:
+      worker.join()
+    if errors:
+      raise errors[0]
+
+    if self._cache_file:
+      # Replace the entries of the scanned tree, dropping those of removed directories.
+      prefix = os.path.join(root, '')
+      self._cache = dict((path, entry) for path, entry in old_cache.items()
+                         if path != root and not path.startswith(prefix))
+      self._cache.update(new_cache)
+    return total[0]
@@ -0,0 +1,139 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+"""
+  A minimal ctypes binding of the Linux inotify API.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+
+
+class Inotify(object):
+  """
+    An inotify instance.  Watches are added with add_watch and their events returned by
+    read(); fileno() may be passed to select to wait for events.
+  """
+
+  class Unavailable(Exception): pass
+
+  IN_MODIFY = 0x00000002
+  IN_ATTRIB = 0x00000004
+  IN_MOVED_FROM = 0x00000040
+  IN_MOVED_TO = 0x00000080
+  IN_CREATE = 0x00000100
+  IN_DELETE = 0x00000200
+  IN_DELETE_SELF = 0x00000400
+  IN_MOVE_SELF = 0x00000800
+  IN_Q_OVERFLOW = 0x00004000
+  IN_IGNORED = 0x00008000
+
+  IN_CLOEXEC = 0o2000000
+  IN_NONBLOCK = 0o0004000
+
+  EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+  READ_SIZE = 64 * 1024
+
+  _LIBC = None
+
+  @classmethod
+  def _libc(cls):
+    if cls._LIBC is None:
+      if not sys.platform.startswith('linux'):
+        raise cls.Unavailable('inotify requires Linux.')
+      try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+      except (OSError, AttributeError) as e:
+        raise cls.Unavailable('inotify is unavailable: %s' % e)
+      cls._LIBC = libc
+    return cls._LIBC
+
+  @classmethod
+  def available(cls):
+    try:
+      cls._libc()
+      return True
+    except cls.Unavailable:
+      return False
+
+  def __init__(self):
+    """
+      May raise:
+        Inotify.Unavailable if the platform or process cannot create an inotify instance.
+    """
+    self._fd = self._libc().inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+    if self._fd < 0:
+      raise self.Unavailable('inotify_init1 failed: %s' % os.strerror(ctypes.get_errno()))
+
+  def fileno(self):
+    return self._fd
+
+  def add_watch(self, path, mask):
+    """
+      Watch path for events in mask, returning the watch descriptor.  Watching a path
+      already watched returns its existing descriptor and replaces its mask.
+
+      May raise:
+        OSError
+    """
+    if not isinstance(path, bytes):
+      path = path.encode(sys.getfilesystemencoding() or 'utf-8')
+    wd = self._libc().inotify_add_watch(self._fd, path, mask)
+    if wd < 0:
+      code = ctypes.get_errno()
+      raise OSError(code, os.strerror(code), path)
+    return wd
+
+  def rm_watch(self, wd):
+    """
+      Remove a watch, ignoring watches the kernel has already removed.
+    """
+    if self._libc().inotify_rm_watch(self._fd, wd) < 0 and ctypes.get_errno() != errno.EINVAL:
+      code = ctypes.get_errno()
+      raise OSError(code, os.strerror(code))
+
+  def read(self):
+    """
+      Return the pending events as a list of (wd, mask, name) without blocking.  name is
+      the name of the affected entry for events on watched directories, '' otherwise.
+    """
+    events = []
+    while True:
+      try:
+        data = os.read(self._fd, self.READ_SIZE)
+      except OSError as e:
+        if e.errno in (errno.EAGAIN, errno.EINTR):
+          return events
+        raise
+      offset = 0
+      while offset + self.EVENT.size <= len(data):
+        wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+        offset += self.EVENT.size
+        name = data[offset:offset + length].rstrip(b'\0')
+        offset += length
+        events.append((wd, mask, name.decode(sys.getfilesystemencoding() or 'utf-8')))
+
+  def close(self):
+    if self._fd >= 0:
+      os.close(self._fd)
+      self._fd = -1
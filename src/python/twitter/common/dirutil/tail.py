@@ -18,8 +18,13 @@ __author__ = 'Brian Wickman'
 
 import os
 import errno
+import select
 import time
 
+from twitter.common.lang import Compatibility
+
+from .inotify import Inotify
+
 def _tail_lines(fd, linesback=10):
   if fd is None:
     return
@@ -41,18 +46,14 @@ def _tail_lines(fd, linesback=10):
 
     avgcharsperline = avgcharsperline * 1.3
 
-  if len(lines) > linesback:
-    start = len(lines) - linesback - 1
-  else:
-    start = 0
-
-  return lines[start:start+linesback]
+  # Unless read from the start of the file, lines[0] may be partial and is never returned.
+  return lines[-linesback:] if linesback > 0 else []
 
 def wait_until_opened(filename, forever=True, clock=time):
   while True:
     try:
       return open(filename, 'r')
-    except OSError as e:
+    except (IOError, OSError) as e:
       if e.errno == errno.ENOENT:
         if forever:
           clock.sleep(1)
@@ -68,7 +69,260 @@ def tail(filename, lines=10):
       yield line
 
 
+class _Followed(object):
+  def __init__(self, filename, lines):
+    self.filename = filename
+    self.fp = None
+    self.inode = None
+    self.partial = b''
+    self.lines = lines
+    self.wd = None
+    self.directory_wd = None
+
+
+class Follower(object):
+  """
+    Follow the lines appended to many files from one thread.
+
+    Lines are read in blocks of block_size bytes and split by the follower; a trailing
+    line without a newline is held back until it is completed (or the file is rotated.)
+    Files are followed by name: when a file is truncated it is read from its start, and
+    when it is renamed or replaced the old file is drained before the new one is read.
+    Files that do not exist yet are followed from when they are created.
+
+    With inotify (Linux) wait() only wakes when a followed file or its directory changes.
+    Otherwise, or if inotify is False, every file is polled each interval seconds of clock.
+    A file whose directory does not exist yet (and so cannot be watched) is polled until
+    its directory can be watched.
+  """
+
+  FILE_EVENTS = Inotify.IN_MODIFY | Inotify.IN_MOVE_SELF | Inotify.IN_DELETE_SELF
+  DIRECTORY_EVENTS = Inotify.IN_CREATE | Inotify.IN_MOVED_TO
+
+  def __init__(self, block_size=64 * 1024, interval=1, clock=time, inotify=True):
+    self._block_size = block_size
+    self._interval = interval
+    self._clock = clock
+    self._followed = {}
+    self._watches = {}  # wd => set of followed files (of a directory) or the followed file
+    self._dirty = set()
+    self._polled = set()  # followed files whose directory could not be watched
+    self._inotify = None
+    if inotify:
+      try:
+        self._inotify = Inotify()
+      except Inotify.Unavailable:
+        pass
+
+  @property
+  def uses_inotify(self):
+    return self._inotify is not None
+
+  def _watch(self, path, mask, followed):
+    try:
+      wd = self._inotify.add_watch(path, mask)
+    except OSError:
+      return None
+    self._watches.setdefault(wd, set()).add(followed)
+    return wd
+
+  def _unwatch(self, wd, followed):
+    if wd is None:
+      return
+    watchers = self._watches.get(wd, set())
+    watchers.discard(followed)
+    if not watchers:
+      self._watches.pop(wd, None)
+      try:
+        self._inotify.rm_watch(wd)
+      except OSError:
+        pass
+
+  def _watch_directory(self, followed):
+    followed.directory_wd = self._watch(os.path.dirname(os.path.abspath(followed.filename)),
+                                        self.DIRECTORY_EVENTS, followed)
+    if followed.directory_wd is None:
+      self._polled.add(followed)
+    else:
+      self._polled.discard(followed)
+
+  def add(self, filename, lines=10):
+    """
+      Follow filename, first returning up to its last lines lines if it exists.
+    """
+    if filename in self._followed:
+      return
+    followed = self._followed[filename] = _Followed(filename, lines)
+    if self._inotify:
+      self._watch_directory(followed)
+    self._dirty.add(followed)
+
+  def remove(self, filename):
+    followed = self._followed.pop(filename, None)
+    if followed is None:
+      return
+    self._dirty.discard(followed)
+    self._polled.discard(followed)
+    if self._inotify:
+      self._unwatch(followed.wd, followed)
+      self._unwatch(followed.directory_wd, followed)
+    if followed.fp:
+      followed.fp.close()
+
+  def _open(self, followed):
+    try:
+      fp = open(followed.filename, 'rb')
+    except (IOError, OSError) as e:
+      if e.errno == errno.ENOENT:
+        return []
+      raise
+    last_lines = []
+    if followed.lines:
+      last_lines = _tail_lines(fp, followed.lines)
+      end = fp.tell()
+      if last_lines:
+        fp.seek(end - 1)
+        if fp.read(1) != b'\n':
+          # The last line is still being written: hold it back like any partial line.
+          followed.partial = last_lines.pop()
+      last_lines = [line + b'\n' for line in last_lines]
+      # Only the first file opened is wound back; later ones are read from their start.
+      followed.lines = 0
+    else:
+      fp.seek(0)
+    followed.fp = fp
+    followed.inode = os.fstat(fp.fileno()).st_ino
+    if self._inotify:
+      followed.wd = self._watch(followed.filename, self.FILE_EVENTS, followed)
+    return last_lines
+
+  def _read(self, followed):
+    lines = []
+    while True:
+      data = followed.fp.read(self._block_size)
+      if not data:
+        return lines
+      data = followed.partial + data
+      end = data.rfind(b'\n') + 1
+      if end:
+        lines.extend(line + b'\n' for line in data[:end - 1].split(b'\n'))
+      followed.partial = data[end:]
+
+  def _close(self, followed):
+    lines = [followed.partial] if followed.partial else []
+    followed.partial = b''
+    followed.fp.close()
+    followed.fp = None
+    if self._inotify:
+      self._unwatch(followed.wd, followed)
+      followed.wd = None
+    return lines
+
+  def _update(self, followed):
+    if followed.fp is None:
+      lines = self._open(followed)
+      if followed.fp is None:
+        return lines
+    else:
+      lines = []
+    if os.fstat(followed.fp.fileno()).st_size < followed.fp.tell():
+      # Truncated, read again from the start.
+      followed.fp.seek(0)
+      followed.partial = b''
+    lines.extend(self._read(followed))
+    try:
+      inode = os.stat(followed.filename).st_ino
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
+      # Removed: keep reading the old file until the name is reused.
+      return lines
+    if inode != followed.inode:
+      lines.extend(self._close(followed))
+      lines.extend(self._update(followed))
+    return lines
+
+  def _wait_for_events(self, timeout):
+    try:
+      readable, _, _ = select.select([self._inotify], [], [], timeout)
+    except select.error as e:
+      if e.args[0] == errno.EINTR:
+        return
+      raise
+    if not readable:
+      return
+    for wd, mask, name in self._inotify.read():
+      if mask & Inotify.IN_Q_OVERFLOW:
+        self._dirty.update(self._followed.values())
+        continue
+      for followed in self._watches.get(wd, ()):
+        if not name or os.path.basename(followed.filename) == name:
+          self._dirty.add(followed)
+
+  def wait(self, timeout=None):
+    """
+      Wait up to timeout seconds (forever if None) for lines to be appended to the followed
+      files, returning them as a list of (filename, line) in the order read.
+    """
+    deadline = None if timeout is None else self._clock.time() + timeout
+    while True:
+      if not self._inotify:
+        self._dirty.update(self._followed.values())
+      elif self._polled:
+        self._dirty.update(self._polled)
+        for followed in list(self._polled):
+          self._watch_directory(followed)
+      dirty, self._dirty = self._dirty, set()
+      lines = []
+      for followed in dirty:
+        lines.extend((followed.filename, _decode(line)) for line in self._update(followed))
+      if lines:
+        return lines
+      remaining = None if deadline is None else deadline - self._clock.time()
+      if remaining is not None and remaining <= 0:
+        return []
+      if self._inotify:
+        if self._polled:
+          remaining = self._interval if remaining is None else min(self._interval, remaining)
+        self._wait_for_events(remaining)
+      else:
+        self._clock.sleep(self._interval if remaining is None else min(self._interval, remaining))
+
+  def close(self):
+    for filename in list(self._followed):
+      self.remove(filename)
+    if self._inotify:
+      self._inotify.close()
+
+
+def _decode(line):
+  return line.decode('utf-8', 'replace') if Compatibility.PY3 else line
+
+
 def tail_f(filename, forever=True, include_last=False, clock=time):
+  """
+    Generate the lines of filename, starting with its last lines and then following it as
+    it is appended to, truncated or rotated.  If forever is False, stop when the file does
+    not exist.
+
+    Lines are followed with a Follower, using inotify if available unless clock is not the
+    time module, in which case the file is polled each second of clock.
+  """
+  if not forever:
+    for line in _tail_f_polling(filename, forever, clock):
+      yield line
+    return
+  follower = Follower(clock=clock, inotify=clock is time)
+  follower.add(filename)
+  try:
+    while True:
+      for _, line in follower.wait():
+        yield line
+  finally:
+    follower.close()
+
+
+def _tail_f_polling(filename, forever=True, clock=time):
   fd = wait_until_opened(filename, forever, clock)
 
   # wind back to near the end of the file...
@@ -16,8 +16,12 @@
 
 __author__ = 'Brian Wickman'
 
+from .sampling_profiler import SamplingProfiler
 from .server import HttpServer
+from .threaded_server import ThreadedServer
 
 __all__ = [
   'HttpServer',
+  'SamplingProfiler',
+  'ThreadedServer',
 ]
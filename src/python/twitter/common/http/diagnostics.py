@@ -22,7 +22,10 @@ try:
   import cStringIO as StringIO
 except ImportError:
   import StringIO
+
+import bottle
 from twitter.common.http import HttpServer
+from twitter.common.http.sampling_profiler import SamplingProfiler
 
 try:
   from twitter.common import app
@@ -32,8 +35,12 @@ except:
 
 class DiagnosticsEndpoints(object):
   """
-    Export the thread stacks of the running process.
+    Export the thread stacks and profiles of the running process.  The sampling profiler's
+    gauges are only exported if a metrics registry is given.
   """
+  def __init__(self, metrics=None):
+    self._sampling_profiler = SamplingProfiler(metrics=metrics)
+
   @staticmethod
   def generate_stacks():
     threads = dict([(th.ident, th) for th in threading.enumerate()])
@@ -65,6 +72,27 @@ class DiagnosticsEndpoints(object):
     else:
       return 'Profiling is disabled'
 
+  @HttpServer.route("/profile/sample")
+  def handle_profile_sample(self):
+    """
+      Sample the stacks of all threads for ?seconds= (default 10) at ?hz= (default 100.)
+      Returns the ?limit= (default 50) functions with the most samples, or with
+      ?format=collapsed every stack in the input format of flamegraph.pl.  The request
+      occupies its server thread while sampling, see ThreadedServer.
+    """
+    query = bottle.request.query
+    try:
+      seconds = float(query.get('seconds', 10))
+      hz = float(query.get('hz', 100))
+      limit = int(query.get('limit', 50))
+      profile = self._sampling_profiler.profile(seconds, hz)
+    except ValueError as e:
+      HttpServer.abort(400, str(e))
+    bottle.response.content_type = 'text/plain'
+    if query.get('format') == 'collapsed':
+      return profile.collapsed()
+    return profile.format_top(limit)
+
   @HttpServer.route("/health")
   def handle_health(self):
     return 'OK'
@@ -0,0 +1,190 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import os
+import sys
+import threading
+import time
+
+from twitter.common.metrics import LambdaGauge
+
+
+class Profile(object):
+  """
+    The stacks sampled by a SamplingProfiler and the number of times each was seen.
+  """
+
+  def __init__(self, counts, names, duration, samples):
+    """
+      counts: map from (thread ident, (code, ...)) stacks, outermost frame first, to counts.
+      names: map from thread ident to thread name.
+    """
+    self._counts = counts
+    self._names = names
+    self.duration = duration
+    self.samples = samples
+
+  @staticmethod
+  def label(code):
+    return '%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+  def collapsed(self):
+    """
+      The stacks in the collapsed format of flamegraph.pl: one line per distinct stack of
+      ;-separated frames rooted at the thread name, followed by its count.
+    """
+    lines = []
+    for (ident, stack), count in self._counts.items():
+      frames = [self._names.get(ident, 'Thread-%d' % ident)]
+      frames.extend(self.label(code) for code in stack)
+      lines.append('%s %d' % (';'.join(frame.replace(';', ':') for frame in frames), count))
+    return '\n'.join(sorted(lines)) + '\n' if lines else ''
+
+  def top(self, limit=None):
+    """
+      Return [(self, total, label)] of the functions sampled, most samples first: self
+      counts samples with the function running, total those with it anywhere on the stack.
+    """
+    own, total = {}, {}
+    for (_, stack), count in self._counts.items():
+      if not stack:
+        continue
+      own[stack[-1]] = own.get(stack[-1], 0) + count
+      for code in set(stack):
+        total[code] = total.get(code, 0) + count
+    rows = sorted(((own.get(code, 0), count, self.label(code)) for code, count in total.items()),
+                  key=lambda row: (-row[0], -row[1], row[2]))
+    return rows[:limit] if limit is not None else rows
+
+  def format_top(self, limit=None):
+    """The top functions as a text table."""
+    stacks = sum(self._counts.values()) or 1
+    threads = len(set(ident for ident, _ in self._counts))
+    lines = ['%d samples of %d threads over %.1fs' % (self.samples, threads, self.duration),
+             '%8s %7s %8s %7s  %s' % ('self', '%', 'total', '%', 'function')]
+    for own, total, label in self.top(limit):
+      lines.append('%8d %6.2f%% %8d %6.2f%%  %s' % (
+          own, 100.0 * own / stacks, total, 100.0 * total / stacks, label))
+    return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler(object):
+  """
+    A statistical profiler of every thread of the process.
+
+    While profile() runs, the stacks of all other threads are read from
+    sys._current_frames() hz times a second; the profiled threads themselves are not
+    slowed, unlike under a deterministic profiler such as cProfile.  Only code objects are
+    recorded while sampling, they are formatted once the profile is complete.
+
+    If a metrics registry is given, the time spent sampling is exported to it as gauges
+    under name: overhead_ratio, the fraction of the last profile's duration spent sampling,
+    and sampling_seconds and samples, totals over all profiles.
+  """
+
+  MAX_SECONDS = 600
+  MAX_HZ = 1000
+
+  class InvalidArgument(ValueError): pass
+
+  def __init__(self, name='sampling_profiler', metrics=None, clock=time):
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._overhead_ratio = 0.0
+    self._sampling_seconds = 0.0
+    self._samples = 0
+    if metrics is not None:
+      scope = metrics.scope(name)
+      scope.register(LambdaGauge('overhead_ratio', lambda: self._overhead_ratio))
+      scope.register(LambdaGauge('sampling_seconds', lambda: self._sampling_seconds))
+      scope.register(LambdaGauge('samples', lambda: self._samples))
+
+  @staticmethod
+  def _thread_names():
+    return dict((thread.ident, thread.name) for thread in threading.enumerate())
+
+  def sample(self, counts, names, last, exclude):
+    """
+      Count the current stack of every thread but exclude and add its name to names.
+
+      counts maps (thread ident, ids of the stack's code objects) to [count, code objects]:
+      code objects hash slowly, their ids do not.  last maps each thread to its innermost
+      frame and counts entry when last sampled.  A thread still in the same frame, as idle
+      threads usually are, has the same stack, so it is only walked again once it has moved
+      on.  Holding the frame also keeps its id from being reused by another.
+    """
+    for ident, frame in sys._current_frames().items():
+      if ident == exclude:
+        continue
+      previous = last.get(ident)
+      if previous is not None and previous[0] is frame:
+        previous[1][0] += 1
+        continue
+      if ident not in names:
+        names.update(self._thread_names())
+      innermost = frame
+      stack = []
+      while frame is not None:
+        stack.append(frame.f_code)
+        frame = frame.f_back
+      key = (ident, tuple(map(id, stack)))
+      entry = counts.get(key)
+      if entry is None:
+        stack.reverse()
+        entry = counts[key] = [0, tuple(stack)]
+      entry[0] += 1
+      last[ident] = (innermost, entry)
+
+  def profile(self, seconds, hz=100):
+    """
+      Sample all other threads hz times a second for seconds and return the Profile.
+      Concurrent calls are serialized.
+
+      May raise:
+        SamplingProfiler.InvalidArgument if seconds or hz are out of range.
+    """
+    if not 0 < seconds <= self.MAX_SECONDS:
+      raise self.InvalidArgument('seconds must be in (0, %d]' % self.MAX_SECONDS)
+    if not 0 < hz <= self.MAX_HZ:
+      raise self.InvalidArgument('hz must be in (0, %d]' % self.MAX_HZ)
+    me = threading.current_thread().ident
+    interval = 1.0 / hz
+    counts, last = {}, {}
+    with self._lock:
+      names = self._thread_names()
+      start = self._clock.time()
+      deadline = start + seconds
+      sampling = 0.0
+      samples = 0
+      now = start
+      while now < deadline:
+        self.sample(counts, names, last, me)
+        samples += 1
+        sampled = self._clock.time()
+        sampling += sampled - now
+        # Sample on a fixed schedule, skipping ticks missed rather than bunching up.
+        now = start + interval * (int((sampled - start) / interval) + 1)
+        if now >= deadline:
+          break
+        self._clock.sleep(now - sampled)
+        now = self._clock.time()
+      duration = self._clock.time() - start
+      last.clear()
+      self._samples += samples
+      self._sampling_seconds += sampling
+      self._overhead_ratio = sampling / duration if duration > 0 else 0.0
+    return Profile(dict(((ident, stack), count) for (ident, _), (count, stack) in counts.items()),
+                   names, duration, samples)
@@ -0,0 +1,301 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import os
+import signal
+import threading
+import time
+from io import BytesIO
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer
+
+try:
+  from Queue import Queue
+except ImportError:
+  from queue import Queue
+
+import bottle
+from twitter.common import log
+from twitter.common.metrics import Histogram, LambdaGauge, ShardedCounter
+from twitter.common.quantity import Amount, Time
+
+
+class _ResponseHandler(ServerHandler):
+  http_version = '1.1'
+
+  def cleanup_headers(self):
+    ServerHandler.cleanup_headers(self)
+    # Without a Content-Length the end of the response is marked by closing the connection.
+    if 'Content-Length' not in self.headers or self.request_handler.close_connection:
+      self.request_handler.close_connection = 1
+      self.headers['Connection'] = 'close'
+
+
+class _RequestHandler(WSGIRequestHandler):
+  """
+    Serve WSGI requests over an HTTP/1.1 connection until the client closes it, it idles
+    past the server timeout or the server needs the worker for a waiting connection.
+  """
+  protocol_version = 'HTTP/1.1'
+  MAX_REQUEST_LINE = 65536
+  # Buffer each response into one send: written piecemeal, the body of a response on a
+  # kept-alive connection waits out the client's delayed ACK of its headers.
+  wbufsize = -1
+
+  def setup(self):
+    self.timeout = self.server.adapter.timeout
+    WSGIRequestHandler.setup(self)
+
+  def handle(self):
+    self.close_connection = 1
+    self.handle_one_request()
+    while not self.close_connection:
+      self.handle_one_request()
+
+  def handle_one_request(self):
+    self.raw_requestline = self.rfile.readline(self.MAX_REQUEST_LINE + 1)
+    if not self.raw_requestline:
+      self.close_connection = 1
+      return
+    start = time.time()
+    if len(self.raw_requestline) > self.MAX_REQUEST_LINE:
+      self.requestline = self.request_version = self.command = ''
+      self.close_connection = 1
+      self.send_error(414)
+      return
+    if not self.parse_request():
+      self.close_connection = 1
+      return
+    adapter = self.server.adapter
+    if not adapter.keepalive or adapter.busy:
+      self.close_connection = 1
+    if self.headers.get('Transfer-Encoding'):
+      # The application reads a chunked body from the connection itself, so it cannot be reused.
+      self.close_connection = 1
+      body = self.rfile
+    else:
+      # Read the body up front so that the next request on the connection starts cleanly
+      # however much of it the application consumes.
+      length = int(self.headers.get('Content-Length') or 0)
+      body = BytesIO(self.rfile.read(length) if length > 0 else b'')
+    handler = _ResponseHandler(body, self.wfile, self.get_stderr(), self.get_environ(),
+        multithread=True, multiprocess=adapter.processes > 1)
+    handler.request_handler = self
+    handler.run(self.server.get_app())
+    self.wfile.flush()
+    adapter.record_request(time.time() - start)
+
+  def log_message(self, format, *args):
+    log.debug('%s - %s' % (self.address_string(), format % args))
+
+
+class _PooledServer(WSGIServer):
+  """
+    A WSGIServer that hands accepted connections to the adapter's worker pool rather than
+    serving them on the accepting thread.
+  """
+  allow_reuse_address = True
+
+  def __init__(self, adapter, server_address):
+    self.adapter = adapter
+    self.request_queue_size = adapter.backlog
+    WSGIServer.__init__(self, server_address, _RequestHandler)
+
+  def process_request(self, request, client_address):
+    self.adapter.enqueue(request, client_address)
+
+
+class ThreadedServer(bottle.ServerAdapter):
+  """
+    A bottle server adapter that serves from a bounded pool of worker threads using only the
+    standard library, so that a slow endpoint does not block every other one.
+
+    Accepted connections wait in a queue of at most queue_size connections for one of
+    threads workers; when the queue is full the server stops accepting and further
+    connections wait in the listen backlog.  Connections are kept alive between HTTP/1.1
+    requests unless other connections are waiting for a worker.  timeout bounds every
+    socket read and write, including the wait for the next request on an idle connection,
+    but not the time an application takes to respond.
+
+    With processes > 1 the listening socket is shared with processes - 1 forked children,
+    each with its own worker pool (and metrics.)  Fork early: the children inherit only
+    the thread calling run().
+
+    Like QuittableServer, shutdown() stops a running server:
+      server = ThreadedServer(port=8888, threads=32)
+      threading.Thread(target=http_server.run, args=('localhost', 8888),
+                       kwargs={'server': server}).start()
+      ...
+      server.shutdown()
+
+    The adapter is also registered with bottle as 'threaded', e.g. --http_framework=threaded.
+  """
+
+  DEFAULT_TIMEOUT = Amount(30, Time.SECONDS)
+
+  def __init__(self, host='127.0.0.1', port=8080, threads=16, queue_size=64, backlog=128,
+               timeout=DEFAULT_TIMEOUT, keepalive=True, processes=1, name='http_server',
+               metrics=None, **options):
+    """
+      threads: number of worker threads per process.
+      queue_size: maximum number of accepted connections waiting for a worker.
+      backlog: listen backlog of connections not yet accepted.
+      timeout: socket timeout in seconds (or Amount), None to block.
+      keepalive: whether to serve several requests per connection.
+      processes: number of processes serving the socket, including this one.
+      name: scope of the exported metrics.
+      metrics: registry (e.g. RootMetrics()) to export metrics to, or None not to.
+    """
+    bottle.ServerAdapter.__init__(self, host, port, **options)
+    if threads < 1 or processes < 1:
+      raise ValueError('ThreadedServer needs at least one thread and process.')
+    self.threads = threads
+    self.backlog = backlog
+    self.timeout = timeout.as_(Time.SECONDS) if isinstance(timeout, Amount) else timeout
+    self.keepalive = keepalive
+    self.processes = processes
+    self._queue = Queue(maxsize=queue_size)
+    self._lock = threading.Condition()
+    self._srv = None
+    self._run = False
+    self._running = False
+    self._children = []
+    self._active = ShardedCounter('active')
+    self._connections = 0  # Only counted by the thread accepting connections.
+    self._requests = ShardedCounter('requests')
+    self._queue_wait_ms = Histogram('queue_wait_ms')
+    self._latency_ms = Histogram('latency_ms')
+    if metrics is not None:
+      scope = metrics.scope(name)
+      scope.register(self._queue_wait_ms)
+      scope.register(self._latency_ms)
+      scope.register(LambdaGauge('queued', lambda: self._queue.qsize()))
+      scope.register(self._active)
+      scope.register(LambdaGauge('threads', lambda: self.threads))
+      scope.register(LambdaGauge('connections', lambda: self._connections))
+      scope.register(self._requests)
+
+  @property
+  def busy(self):
+    """Whether accepted connections are waiting for a worker."""
+    return not self._queue.empty()
+
+  def enqueue(self, request, client_address):
+    self._connections += 1
+    self._queue.put((request, client_address, time.time()))
+
+  def record_request(self, seconds):
+    self._requests.increment()
+    self._latency_ms.update(1000.0 * seconds)
+
+  def _work(self):
+    while True:
+      item = self._queue.get()
+      if item is None:
+        return
+      request, client_address, accepted = item
+      self._queue_wait_ms.update(1000.0 * (time.time() - accepted))
+      self._active.increment()
+      try:
+        self._srv.finish_request(request, client_address)
+      except Exception:
+        self._srv.handle_error(request, client_address)
+      finally:
+        self._active.decrement()
+        self._srv.shutdown_request(request)
+
+  def _fork(self):
+    for _ in range(self.processes - 1):
+      pid = os.fork()
+      if pid == 0:
+        self._children = []
+        try:
+          self._serve()
+        finally:
+          os._exit(0)
+      self._children.append(pid)
+
+  def _serve(self):
+    workers = [threading.Thread(target=self._work, name='ThreadedServer worker %d' % k)
+               for k in range(self.threads)]
+    for worker in workers:
+      worker.daemon = True
+      worker.start()
+    try:
+      self._srv.serve_forever()
+    finally:
+      # Idle workers exit at once; busy ones after their connection, which closes
+      # as soon as its current request completes.
+      self.keepalive = False
+      for _ in workers:
+        self._queue.put(None)
+
+  def run(self, handler):
+    self._run = True
+    try:
+      srv = _PooledServer(self, (self.host, self.port))
+    except Exception:
+      # Wake a shutdown() waiting for the bind, it has nothing to stop.
+      with self._lock:
+        self._run = False
+        self._lock.notify_all()
+      raise
+    srv.set_app(handler)
+    with self._lock:
+      self._srv = srv
+      self.port = srv.server_port
+      self._running = True
+      self._lock.notify_all()
+    try:
+      if self.processes > 1:
+        self._fork()
+      self._serve()
+    finally:
+      srv.server_close()
+      for pid in self._children:
+        try:
+          os.kill(pid, signal.SIGTERM)
+          os.waitpid(pid, 0)
+        except OSError:
+          pass
+      self._children = []
+
+  def wait_started(self, timeout=None):
+    """
+      Wait for run() to start listening.  Returns True if it has.
+    """
+    with self._lock:
+      if not self._running:
+        self._lock.wait(timeout)
+      return self._running
+
+  def shutdown(self):
+    """
+      Stop a server that has had its run() method called, including any forked children.
+    """
+    if not self._run:
+      return
+    # run() may not have bound its socket yet if it was just started in another thread.
+    with self._lock:
+      while self._run and not self._running:
+        self._lock.wait()
+      if not self._running:
+        return
+      self._running = False
+      self._run = False
+    self._srv.shutdown()
+
+
+bottle.server_names['threaded'] = ThreadedServer
@@ -30,15 +30,15 @@ class AttributeInfo(object):
       u1 info[attribute_length];
     }
   """
-  def __init__(self, data, constants):
-    self._parse_header(data, constants)
+  def __init__(self, data, constants, offset=0):
+    self._parse_header(data, constants, offset)
 
-  def _parse_header(self, data, constants):
-    self._attribute_name_index = u2(data[0:2]).get()
+  def _parse_header(self, data, constants, offset):
+    (self._attribute_name_index, self._attribute_length), self._info_offset = \
+      JavaNativeType.parse_from(data, offset, u2, u4)
     self._attribute_name       = constants[self._attribute_name_index]
-    self._attribute_length     = u4(data[2:6]).get()
     self._size                 = 6 + self._attribute_length
-    self._info_data            = data[6:self._size]
+    self._data                 = data
 
   def name(self):
     return self._attribute_name
@@ -52,7 +52,7 @@ class AttributeInfo(object):
 
   def bytes(self):
     """Attribute-specific data for subclasses."""
-    return self._info_data
+    return self._data[self._info_offset:self._info_offset + self._attribute_length]
 
   def __str__(self):
     return 'AttributeInfo(name:%s, size=%d)' % (self._attribute_name, self.size())
@@ -81,26 +81,25 @@ class Code(AttributeInfo):
   def name():
     return 'Code'
 
-  def __init__(self, data, constants):
-    AttributeInfo.__init__(self, data, constants)
-    bytes = self.bytes()
+  def __init__(self, data, constants, offset=0):
+    AttributeInfo.__init__(self, data, constants, offset)
+    offset = self._info_offset
 
-    (max_stack, max_locals, code_length), bytes = JavaNativeType.parse(bytes, u2, u2, u4)
+    (max_stack, max_locals, code_length), offset = JavaNativeType.parse_from(
+      data, offset, u2, u2, u4)
     self._code_length = code_length
 
-    bytecode = bytes[0:code_length]
-    bytes = bytes[code_length:]
-    (exception_table_length,), bytes = JavaNativeType.parse(bytes, u2)
+    # skip the bytecode
+    offset += code_length
+    (exception_table_length,), offset = JavaNativeType.parse_from(data, offset, u2)
 
-    # gobble up stuff
-    for k in range(exception_table_length):
-      _, bytes = JavaNativeType.parse(bytes, u2, u2, u2, u2)
+    # skip the exception table of (start_pc, end_pc, handler_pc, catch_type)
+    offset += exception_table_length * 4 * u2.size()
 
-    (attributes_count,), bytes = JavaNativeType.parse(bytes, u2)
+    (attributes_count,), offset = JavaNativeType.parse_from(data, offset, u2)
     attributes = []
-    offset = 0
     for k in range(attributes_count):
-      attribute = Attribute.parse(bytes[offset:], constants)
+      attribute = Attribute.parse(data, constants, offset)
       offset += attribute.size()
       attributes.append(attribute)
     self._attributes = attributes
@@ -128,10 +127,9 @@ class SourceFile(AttributeInfo):
   def name():
     return 'SourceFile'
 
-  def __init__(self, data, constants):
-    AttributeInfo.__init__(self, data, constants)
-    bytes = self.bytes()
-    self._sourcefile_index     = u2(bytes[0:2]).get()
+  def __init__(self, data, constants, offset=0):
+    AttributeInfo.__init__(self, data, constants, offset)
+    (self._sourcefile_index,), _ = JavaNativeType.parse_from(data, self._info_offset, u2)
     self._sourcefile           = constants[self._sourcefile_index]
 
   def __str__(self):
@@ -151,14 +149,15 @@ class Exceptions(AttributeInfo):
   def name():
     return 'Exceptions'
 
-  def __init__(self, data, constants):
-    AttributeInfo.__init__(self, data, constants)
-    bytes = self.bytes()
+  def __init__(self, data, constants, offset=0):
+    AttributeInfo.__init__(self, data, constants, offset)
 
-    self._number_of_exceptions = u2(bytes[0:2]).get()
+    (self._number_of_exceptions,), offset = JavaNativeType.parse_from(
+      data, self._info_offset, u2)
+    constant_indices, _ = JavaNativeType.parse_from(
+      data, offset, *[u2]*self._number_of_exceptions)
     self._exceptions = []
-    for index in range(self._number_of_exceptions):
-      constant_index = u2(bytes[2*(index+1):]).get()
+    for constant_index in constant_indices:
       self._exceptions.append(constants[constant_index](constants))
 
   def __str__(self):
@@ -179,24 +178,16 @@ class Signature(AttributeInfo):
   def name():
     return 'Signature'
 
-  def __init__(self, data, constants):
-    AttributeInfo.__init__(self, data, constants)
-    bytes = self.bytes()
+  def __init__(self, data, constants, offset=0):
+    AttributeInfo.__init__(self, data, constants, offset)
 
-    self._signature_index = u2(bytes[0:2]).get()
+    (self._signature_index,), _ = JavaNativeType.parse_from(data, self._info_offset, u2)
     self._signature = constants[self._signature_index]
     self._parsed = None
     self._parse_signature()
 
   def _parse_signature(self):
-    class_signature, _ = signature_parser.ClassSignature.match(self._signature.bytes())
-    if class_signature:
-      self._parsed = class_signature
-      return
-
-    method_signature, _ = signature_parser.MethodTypeSignature.match(self._signature.bytes())
-    if method_signature:
-      self._parsed = method_signature
+    self._parsed = signature_parser.SignatureParser.parse(self._signature.bytes())
 
   def __str__(self):
     return 'Signature(%s)' % (
@@ -272,9 +263,10 @@ class InnerClassFlags(object):
     return ' '.join(verbs)
 
 class InnerClass(object):
-  def __init__(self, data, constants):
+  def __init__(self, data, constants, offset=0):
     (inner_class_info_index, outer_class_info_index,
-     inner_name_index, inner_class_flags), data = JavaNativeType.parse(data, u2, u2, u2, u2)
+     inner_name_index, inner_class_flags), _ = JavaNativeType.parse_from(
+       data, offset, u2, u2, u2, u2)
 
     debug = """
     print 'constant pool size, inner, outer, name, flags = %s, %s, %s, %s, %s => %s' % (
@@ -334,15 +326,13 @@ class InnerClasses(AttributeInfo):
   def name():
     return 'InnerClasses'
 
-  def __init__(self, data, constants):
-    AttributeInfo.__init__(self, data, constants)
-    bytes = self.bytes()
+  def __init__(self, data, constants, offset=0):
+    AttributeInfo.__init__(self, data, constants, offset)
 
-    self._number_of_classes = u2(bytes[0:2]).get()
+    (self._number_of_classes,), offset = JavaNativeType.parse_from(data, self._info_offset, u2)
     self._classes = []
-    offset = 2
     for index in range(self._number_of_classes):
-      klass = InnerClass(data[offset:], constants)
+      klass = InnerClass(data, constants, offset)
       self._classes.append(klass)
       offset += 4 * u2.size()
 
@@ -363,17 +353,18 @@ class Attribute(object):
   }
 
   @staticmethod
-  def parse(data, constants):
+  def parse(data, constants, offset=0):
     """Parse the Attribute_info
 
       @data: The data stream from which to deserialize the blob
       @constants: The constant pool of the class file.
+      @offset: The offset of the attribute_info in data.
     """
-    attribute_name_index = u2(data[0:2]).get()
+    (attribute_name_index,), _ = JavaNativeType.parse_from(data, offset, u2)
     attribute_name       = constants[attribute_name_index]
 
     attribute_class = Attribute._KNOWN_ATTRIBUTE_MAP.get(attribute_name.bytes(), None)
     if attribute_class is not None:
-      return attribute_class(data, constants)
+      return attribute_class(data, constants, offset)
     else:
-      return AttributeInfo(data, constants)
+      return AttributeInfo(data, constants, offset)
@@ -27,17 +27,19 @@ from .signature_parser import PackageSpecifier
 from hashlib import md5
 
 class ClassDecoders:
+  """Decoders of the sections of a class file, each taking the data and the offset of the
+     section and returning the decoded section and the offset following it."""
+
   @staticmethod
-  def decode_constant_pool(data, count):
+  def decode_constant_pool(data, offset, count):
     # 0th entry is a sentinel, since constants are indexed 1..constant_pool_size
     constants = [None]
-    offset = 0
     skip = False
     for k in range(1, count):
       if skip:
         skip = False
         continue
-      constant = Constant.parse(data[offset:])
+      constant = Constant.parse(data, offset)
       constants.append(constant)
       offset += constant.size()
       # special cases for Long/Double constants!
@@ -45,46 +47,48 @@ class ClassDecoders:
       if isinstance(constant, (LongConstant, DoubleConstant)):
         constants.append(None)  # append a sentinel
         skip = True
-    return constants, data[offset:]
+    return constants, offset
 
   @staticmethod
-  def decode_interfaces(data, count, constants):
-    interfaces, data = JavaNativeType.parse(data, *[u2]*count)
-    interfaces = map(lambda offset: constants[offset], interfaces)
-    return interfaces, data
+  def decode_interfaces(data, offset, count, constants):
+    interfaces, offset = JavaNativeType.parse_from(data, offset, *[u2]*count)
+    interfaces = [constants[index] for index in interfaces]
+    return interfaces, offset
 
   @staticmethod
-  def decode_fields(data, count, constants):
+  def decode_fields(data, offset, count, constants):
     fields = []
-    offset = 0
     for k in range(count):
-      field = FieldInfo(data[offset:], constants)
+      field = FieldInfo(data, constants, offset)
       offset += field.size()
       fields.append(field)
-    return fields, data[offset:]
+    return fields, offset
 
   @staticmethod
-  def decode_methods(data, count, constants):
+  def decode_methods(data, offset, count, constants):
     methods = []
-    offset = 0
     for k in range(count):
-      method = MethodInfo(data[offset:], constants)
+      method = MethodInfo(data, constants, offset)
       offset += method.size()
       methods.append(method)
-    return methods, data[offset:]
+    return methods, offset
 
   @staticmethod
-  def decode_attributes(data, count, constants):
+  def decode_attributes(data, offset, count, constants):
     attributes = []
-    offset = 0
     for k in range(count):
-      attribute = Attribute.parse(data[offset:], constants)
+      attribute = Attribute.parse(data, constants, offset)
       offset += attribute.size()
       attributes.append(attribute)
-    return attributes, data[offset:]
+    return attributes, offset
 
 class ClassFile(object):
   """Wrapper for a .class file.
+
+     The class file is decoded in place from offsets into its data.  A lazy ClassFile
+     decodes only the version, constant pool, access flags, this_class, super_class and
+     interfaces up front, and its fields, methods, attributes and external references when
+     first asked for, so that scanning many classes for their names and linkage is cheap.
   """
 
   _LINKAGE_CONSTANT_TYPES = (
@@ -92,10 +96,14 @@ class ClassFile(object):
     InterfaceMethodrefConstant,
     MethodrefConstant)
 
-  def __init__(self, data):
+  def __init__(self, data, lazy=False):
     self._data = data
+    self._members_offset = None
+    self._external_references = None
     self._decode()
-    self._track_dependencies()
+    if not lazy:
+      self._decode_members()
+      self._track_dependencies()
 
   def _linkage_constants(self):
     return [
@@ -112,72 +120,90 @@ class ClassFile(object):
     self._external_references = set(
       c(self._constant_pool) for c in self._linkage_constants())
 
+  def external_references(self):
+    if self._external_references is None:
+      self._track_dependencies()
+    return self._external_references
+
   @staticmethod
-  def from_fp(fp):
-    return ClassFile(fp.read())
+  def from_fp(fp, lazy=False):
+    return ClassFile(fp.read(), lazy=lazy)
 
   @staticmethod
-  def from_file(filename):
+  def from_file(filename, lazy=False):
     with open(filename, 'rb') as fp:
-      return ClassFile.from_fp(fp)
+      return ClassFile.from_fp(fp, lazy=lazy)
 
   def _decode(self):
     data = self._data
 
-    (self._magic, self._minor_version, self._major_version), data = \
-      JavaNativeType.parse(data, u4, u2, u2)
+    (self._magic, self._minor_version, self._major_version), offset = \
+      JavaNativeType.parse_from(data, 0, u4, u2, u2)
     assert self._magic == 0xCAFEBABE
 
     # constant pool
-    (self._constant_pool_count,), data = JavaNativeType.parse(data, u2)
-    self._constant_pool, data = ClassDecoders.decode_constant_pool(
-      data, self._constant_pool_count)
+    (self._constant_pool_count,), offset = JavaNativeType.parse_from(data, offset, u2)
+    self._constant_pool, offset = ClassDecoders.decode_constant_pool(
+      data, offset, self._constant_pool_count)
 
-    (access_flags, this_class, super_class), data = JavaNativeType.parse(data, u2, u2, u2)
+    (access_flags, this_class, super_class), offset = \
+      JavaNativeType.parse_from(data, offset, u2, u2, u2)
     self._access_flags  = ClassFlags(access_flags)
     self._this_class    = self._constant_pool[this_class]
     self._super_class   = self._constant_pool[super_class]
 
     # interfaces
-    (self._interfaces_count,), data = JavaNativeType.parse(data, u2)
-    self._interfaces, data = ClassDecoders.decode_interfaces(
-      data, self._interfaces_count, self._constant_pool)
+    (self._interfaces_count,), offset = JavaNativeType.parse_from(data, offset, u2)
+    self._interfaces, offset = ClassDecoders.decode_interfaces(
+      data, offset, self._interfaces_count, self._constant_pool)
+    self._members_offset = offset
+
+  def _decode_members(self):
+    if self._members_offset is None:
+      return
+    data, offset = self._data, self._members_offset
 
     # fields
-    (self._fields_count,), data = JavaNativeType.parse(data, u2)
-    self._fields, data = ClassDecoders.decode_fields(
-      data, self._fields_count, self._constant_pool)
+    (self._fields_count,), offset = JavaNativeType.parse_from(data, offset, u2)
+    self._fields, offset = ClassDecoders.decode_fields(
+      data, offset, self._fields_count, self._constant_pool)
 
     # methods
-    (self._methods_count,), data = JavaNativeType.parse(data, u2)
-    self._methods, data = ClassDecoders.decode_methods(
-      data, self._methods_count, self._constant_pool)
+    (self._methods_count,), offset = JavaNativeType.parse_from(data, offset, u2)
+    self._methods, offset = ClassDecoders.decode_methods(
+      data, offset, self._methods_count, self._constant_pool)
 
     # attributes
-    (self._attributes_count,), data = JavaNativeType.parse(data, u2)
-    self._attributes, data = ClassDecoders.decode_attributes(
-      data, self._attributes_count, self._constant_pool)
+    (self._attributes_count,), offset = JavaNativeType.parse_from(data, offset, u2)
+    self._attributes, offset = ClassDecoders.decode_attributes(
+      data, offset, self._attributes_count, self._constant_pool)
+
+    self._members_offset = None
 
   def version(self):
     return self._major_version, self._minor_version
 
   def methods(self):
+    self._decode_members()
     return self._methods
 
   def attributes(self):
+    self._decode_members()
     return self._attributes
 
   def interfaces(self):
     return self._interfaces
 
   def fields(self):
+    self._decode_members()
     return self._fields
 
   def this_class(self):
     return self._this_class(self._constant_pool)
 
   def super_class(self):
-    return self._super_class(self._constant_pool)
+    """The name of the superclass, or None for java/lang/Object."""
+    return self._super_class(self._constant_pool) if self._super_class else None
 
   def constants(self):
     return self._constant_pool
@@ -189,11 +215,13 @@ class ClassFile(object):
     return self._access_flags
 
   def __str__(self):
+    self._decode_members()
+    self.external_references()
     const = self._constant_pool
     output = []
     output.append("class version: (%d, %d)" % (self._major_version, self._minor_version))
     output.append("this: %s" % self._this_class(const))
-    output.append("super: %s" % self._super_class(const))
+    output.append("super: %s" % self.super_class())
     output.append("access flags: %s" % self._access_flags)
     if self._interfaces:
       output.append("interfaces: ")
@@ -0,0 +1,234 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import multiprocessing
+import os
+import zipfile
+from collections import namedtuple
+
+from twitter.common.dirutil import load_json_cache, save_json_cache
+
+from .class_file import ClassFile
+from .constant import ClassConstant
+
+
+class ClassSummary(namedtuple('ClassSummary',
+    'name super_class interfaces references linkage_signature')):
+  """
+    What a ClasspathScanner records of a class: its name, its superclass (None for
+    java/lang/Object), its interfaces, the other classes named by its constant pool and its
+    ClassFile.linkage_signature.  Classes are named in internal form, e.g. java/lang/String.
+  """
+
+  @staticmethod
+  def _element_class(name):
+    """The class of a class constant naming an array type, or None for primitive arrays."""
+    name = name.lstrip('[')
+    if name.startswith('L') and name.endswith(';'):
+      return name[1:-1]
+    return None
+
+  @classmethod
+  def from_class_file(cls, class_file):
+    constants = class_file.constants()
+    name = class_file.this_class()
+    references = set()
+    for constant in constants:
+      if isinstance(constant, ClassConstant):
+        reference = constant(constants)
+        if reference.startswith('['):
+          reference = cls._element_class(reference)
+        if reference and reference != name:
+          references.add(reference)
+    return cls(name,
+               class_file.super_class(),
+               tuple(interface(constants) for interface in class_file.interfaces()),
+               tuple(sorted(references)),
+               class_file.linkage_signature())
+
+  @classmethod
+  def from_json(cls, entry):
+    name, super_class, interfaces, references, linkage_signature = entry
+    return cls(name, super_class, tuple(interfaces), tuple(references), linkage_signature)
+
+  def to_json(self):
+    return [self.name, self.super_class, list(self.interfaces), list(self.references),
+            self.linkage_signature]
+
+
+def _summarize(task):
+  """
+    Summarize a chunk of the classes of a jar or directory in a ClasspathScanner worker,
+    returning (path, [(entry, summary, error)]) with the summary or error of each entry.
+  """
+  path, is_jar, entries = task
+  results = []
+  jar = zipfile.ZipFile(path) if is_jar else None
+  try:
+    for entry in entries:
+      try:
+        if jar:
+          data = jar.read(entry)
+        else:
+          with open(os.path.join(path, entry), 'rb') as fp:
+            data = fp.read()
+        summary = ClassSummary.from_class_file(ClassFile(data, lazy=True))
+        results.append((entry, summary.to_json(), None))
+      except Exception as e:
+        results.append((entry, None, '%s: %s' % (e.__class__.__name__, e)))
+  finally:
+    if jar:
+      jar.close()
+  return path, results
+
+
+class ClasspathScanner(object):
+  """
+    Summarize the classes of a classpath of jars and directories, parsing class files
+    across a pool of worker processes.
+
+    If cache is given, summaries are persisted to that file and reused by later scans: a
+    jar whose size and mtime are unchanged is not even opened, and only the entries of a
+    changed jar whose CRC changed are parsed again.  Class files in directories are reused
+    while their size and mtime are unchanged.
+
+      scanner = ClasspathScanner(cache='.classpath.cache')
+      summaries = scanner.scan(['lib/guava.jar', 'target/classes'])
+      scanner.save()
+  """
+
+  CHUNK_SIZE = 64
+
+  # Bump whenever ClassSummary, the cache entries or what the class file parser extracts
+  # change, so that caches written by older versions are discarded rather than trusted.
+  CACHE_VERSION = 1
+
+  def __init__(self, processes=None, cache=None, chunk_size=CHUNK_SIZE):
+    """
+      processes: number of worker processes, by default one per cpu.  With one process,
+        classes are parsed in this process.
+      cache: filename of the persistent cache, or None to always parse everything.
+      chunk_size: number of classes parsed per task handed to a worker.
+    """
+    self._processes = processes or multiprocessing.cpu_count()
+    self._cache_file = cache
+    self._chunk_size = chunk_size
+    self._cache = self._load() if cache else {}
+    self.failures = []
+
+  def _load(self):
+    return load_json_cache(self._cache_file, self.CACHE_VERSION)
+
+  def save(self):
+    """
+      Atomically write the cache of the scanned classpaths, if a cache file was given.
+    """
+    if self._cache_file:
+      save_json_cache(self._cache_file, self.CACHE_VERSION, self._cache)
+
+  @staticmethod
+  def _list_directory(directory):
+    """Map the class files under directory to their [size, mtime]."""
+    stamps = {}
+    for root, _, files in os.walk(directory):
+      for filename in files:
+        if filename.endswith('.class'):
+          filename = os.path.join(root, filename)
+          st = os.stat(filename)
+          stamps[os.path.relpath(filename, directory)] = [st.st_size, st.st_mtime]
+    return stamps
+
+  @staticmethod
+  def _list_jar(jar):
+    """Map the class files in jar to their CRCs."""
+    with zipfile.ZipFile(jar) as zf:
+      return dict((info.filename, info.CRC) for info in zf.infolist()
+                  if info.filename.endswith('.class'))
+
+  def _run(self, tasks):
+    if self._processes == 1 or len(tasks) <= 1:
+      return map(_summarize, tasks)
+    pool = multiprocessing.Pool(processes=min(self._processes, len(tasks)))
+    try:
+      results = pool.map(_summarize, tasks, chunksize=1)
+      pool.close()
+      return results
+    finally:
+      pool.terminate()
+      pool.join()
+
+  def scan(self, classpath):
+    """
+      Return a dict mapping the name of every class on classpath to its ClassSummary.  As
+      on a JVM classpath, the first of several classes of the same name wins.  Missing
+      classpath elements are skipped; classes that fail to parse are listed in failures as
+      (path, entry, error).
+    """
+    old_cache = self._cache
+    scanned, tasks, seen = [], [], set()
+    self.failures = []
+    for path in classpath:
+      path = os.path.abspath(path)
+      if path in seen:
+        continue
+      seen.add(path)
+      if os.path.isdir(path):
+        key, is_jar = None, False
+      elif os.path.isfile(path):
+        st = os.stat(path)
+        key, is_jar = [st.st_size, st.st_mtime], True
+      else:
+        continue
+      cached = old_cache.get(path)
+      if cached is not None and key is not None and cached[0] == key:
+        scanned.append((path, key, cached[1]))
+        continue
+      try:
+        stamps = self._list_jar(path) if is_jar else self._list_directory(path)
+      except (IOError, OSError, zipfile.BadZipfile) as e:
+        self.failures.append((path, None, '%s: %s' % (e.__class__.__name__, e)))
+        continue
+      cached_entries = cached[1] if cached is not None else {}
+      entries, stale = {}, []
+      for entry, stamp in stamps.items():
+        old = cached_entries.get(entry)
+        if old is not None and old[0] == stamp:
+          entries[entry] = old
+        else:
+          entries[entry] = [stamp, None, None]
+          stale.append(entry)
+      stale.sort()
+      for start in range(0, len(stale), self._chunk_size):
+        tasks.append((path, is_jar, stale[start:start + self._chunk_size]))
+      scanned.append((path, key, entries))
+
+    parsed = dict((path, entries) for path, _, entries in scanned)
+    for path, results in self._run(tasks):
+      for entry, summary, error in results:
+        parsed[path][entry][1:] = [summary, error]
+
+    summaries = {}
+    for path, key, entries in scanned:
+      for entry in sorted(entries):
+        _, summary, error = entries[entry]
+        if error is not None:
+          self.failures.append((path, entry, error))
+        elif summary is not None:
+          summary = ClassSummary.from_json(summary)
+          summaries.setdefault(summary.name, summary)
+      if self._cache_file:
+        self._cache[path] = [key, entries]
+    return summaries
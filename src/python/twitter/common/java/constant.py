@@ -26,23 +26,22 @@ class ConstantBase(object):
   def __call__(self, constants):
     return 'AnonymousConstant()'
 
-  def parse(self, data):
-    elements, _ = JavaNativeType.parse(data, *self.__class__.TYPES)
+  def parse(self, data, offset=0):
+    elements, _ = JavaNativeType.parse_from(data, offset, *self.__class__.TYPES)
     return elements
 
   def size(self):
-    return sum(map(lambda typ: typ.size(), self.__class__.TYPES))
+    return JavaNativeType._struct(self.__class__.TYPES).size
 
 class ClassConstant(ConstantBase):
   """
     u1 tag
     u2 name_index
   """
-  TYPES = [u1, u2]
+  TYPES = (u1, u2)
 
-  def __init__(self, data):
-    self._tag = u1(data[0:1]).get()
-    self._name_index = u2(data[1:3]).get()
+  def __init__(self, data, offset=0):
+    self._tag, self._name_index = self.parse(data, offset)
 
   def __call__(self, constants):
     return str(constants[self._name_index].bytes())
@@ -54,10 +53,10 @@ class FieldrefConstant(ConstantBase):
     u2 name_and_type_index
   """
 
-  TYPES = [u1, u2, u2]
+  TYPES = (u1, u2, u2)
 
-  def __init__(self, data):
-    self._tag, self._class_index, self._name_and_type_index = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._class_index, self._name_and_type_index = self.parse(data, offset)
 
   def __call__(self, constants):
     return '%s.%s' % (
@@ -71,10 +70,10 @@ class MethodrefConstant(ConstantBase):
     u2 name_and_type_index
   """
 
-  TYPES = [u1, u2, u2]
+  TYPES = (u1, u2, u2)
 
-  def __init__(self, data):
-    self._tag, self._class_index, self._name_and_type_index = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._class_index, self._name_and_type_index = self.parse(data, offset)
 
   def __call__(self, constants):
     return '%s.%s' % (
@@ -88,10 +87,10 @@ class InterfaceMethodrefConstant(ConstantBase):
     u2 name_and_type_index
   """
 
-  TYPES = [u1, u2, u2]
+  TYPES = (u1, u2, u2)
 
-  def __init__(self, data):
-    self._tag, self._class_index, self._name_and_type_index = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._class_index, self._name_and_type_index = self.parse(data, offset)
 
   def __call__(self, constants):
     return '%s.%s' % (
@@ -103,30 +102,30 @@ class StringConstant(ConstantBase):
     u1 tag
     u2 string_index
   """
-  TYPES = [u1, u2]
+  TYPES = (u1, u2)
 
-  def __init__(self, data):
-    self._tag, self._string_index = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._string_index = self.parse(data, offset)
 
 class IntegerConstant(ConstantBase):
   """
     u1 tag
     u4 bytes
   """
-  TYPES = [u1, u4]
+  TYPES = (u1, u4)
 
-  def __init__(self, data):
-    self._tag, self._bytes = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._bytes = self.parse(data, offset)
 
 class FloatConstant(ConstantBase):
   """
     u1 tag
     u4 bytes
   """
-  TYPES = [u1, u4]
+  TYPES = (u1, u4)
 
-  def __init__(self, data):
-    self._tag, self._bytes = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._bytes = self.parse(data, offset)
 
 class LongConstant(ConstantBase):
   """
@@ -134,10 +133,10 @@ class LongConstant(ConstantBase):
     u4 high_bytes
     u4 low_bytes
   """
-  TYPES = [u1, u4, u4]
+  TYPES = (u1, u4, u4)
 
-  def __init__(self, data):
-    self._tag, self._high_bytes, self._low_bytes = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._high_bytes, self._low_bytes = self.parse(data, offset)
 
 class DoubleConstant(ConstantBase):
   """
@@ -145,10 +144,10 @@ class DoubleConstant(ConstantBase):
     u4 high_bytes
     u4 low_bytes
   """
-  TYPES = [u1, u4, u4]
+  TYPES = (u1, u4, u4)
 
-  def __init__(self, data):
-    self._tag, self._high_bytes, self._low_bytes = self.parse(data)
+  def __init__(self, data, offset=0):
+    self._tag, self._high_bytes, self._low_bytes = self.parse(data, offset)
 
 class NameAndTypeConstant(ConstantBase):
   """
@@ -156,13 +155,10 @@ class NameAndTypeConstant(ConstantBase):
     u2 name_index
     u2 descriptor_index
   """
-  TYPES = [u1, u2, u2]
+  TYPES = (u1, u2, u2)
 
-  def __init__(self, data):
-    self._tag, self._name_index, self._descriptor_index = self.parse(data)
-
-  def size(self):
-    return u1.size() + u2.size() + u2.size()
+  def __init__(self, data, offset=0):
+    self._tag, self._name_index, self._descriptor_index = self.parse(data, offset)
 
   def __call__(self, constants):
     return '%s.%s' % (
@@ -175,9 +171,9 @@ class Utf8Constant(ConstantBase):
     u2 length
     u1 bytes[length]
   """
-  def __init__(self, data):
-    (self._tag, self._length), data = JavaNativeType.parse(data, u1, u2)
-    self._bytes = data[0:self._length]
+  def __init__(self, data, offset=0):
+    (self._tag, self._length), offset = JavaNativeType.parse_from(data, offset, u1, u2)
+    self._bytes = data[offset:offset + self._length]
 
   def size(self):
     return u1.size() + u2.size() + self._length
@@ -217,8 +213,7 @@ class Constant(object):
   }
 
   @staticmethod
-  def parse(data):
-    print('parse data[0] = %s' % data[0])
-    tag = u1(data[0]).get()
-    constant = Constant._BASE_TYPES[tag](data)
+  def parse(data, offset=0):
+    (tag,), _ = JavaNativeType.parse_from(data, offset, u1)
+    constant = Constant._BASE_TYPES[tag](data, offset)
     return constant
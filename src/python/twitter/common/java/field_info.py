@@ -33,8 +33,8 @@ class FieldInfoFlags(object):
   ACC_VOLATILE	 = 0x0040
   ACC_TRANSIENT	 = 0x0080
 
-  def __init__(self, data):
-    self._flags = u2(data).get()
+  def __init__(self, flags):
+    self._flags = flags
 
   def public(self):
     return self._flags & FieldInfoFlags.ACC_PUBLIC
@@ -129,20 +129,20 @@ class FieldType(object):
     return _UNPARSED
 
 class FieldInfo(object):
-  def __init__(self, data, constants):
-    self._access_flags = FieldInfoFlags(data[0:2])
-    (self._name_index, self._descriptor_index, self._attributes_count), data = \
-      JavaNativeType.parse(data[2:], u2, u2, u2)
+  def __init__(self, data, constants, offset=0):
+    start = offset
+    (access_flags, self._name_index, self._descriptor_index, self._attributes_count), offset = \
+      JavaNativeType.parse_from(data, offset, u2, u2, u2, u2)
+    self._access_flags = FieldInfoFlags(access_flags)
     self._name = constants[self._name_index] # synthesized
     self._descriptor = constants[self._descriptor_index] # synthesized
     self._parsed_descriptor, _ = FieldDescriptor.match(self._descriptor.bytes())
     self._attributes = []
-    offset = 0
     for k in range(self._attributes_count):
-      attribute = Attribute.parse(data[offset:], constants)
+      attribute = Attribute.parse(data, constants, offset)
       offset += attribute.size()
       self._attributes.append(attribute)
-    self._size = offset + 8
+    self._size = offset - start
 
   def size(self):
     return self._size
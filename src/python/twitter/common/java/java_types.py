@@ -35,24 +35,38 @@ class JavaNativeType(object):
   def size():
     raise Exception("Unimplemented!")
 
+  _STRUCTS = {}
+
   @staticmethod
-  def parse(data, *type_args):
-    offset = 0
-    parsed_types = []
-    total_size = 0
-    for t in type_args:
-      if not issubclass(t, JavaNativeType):
-        raise JavaNativeType.ParseException("Not a valid JavaNativeType: %s" % t)
-      total_size += t.size()
-    if total_size > len(data):
+  def _struct(type_args):
+    layout = JavaNativeType._STRUCTS.get(type_args)
+    if layout is None:
+      for t in type_args:
+        if not (isinstance(t, type) and issubclass(t, JavaNativeType)):
+          raise JavaNativeType.ParseException("Not a valid JavaNativeType: %s" % t)
+      layout = JavaNativeType._STRUCTS[type_args] = struct.Struct(
+          '>' + ''.join(t.FORMAT for t in type_args))
+    return layout
+
+  @staticmethod
+  def parse_from(data, offset, *type_args):
+    """
+      Deserialize type_args from data at offset without copying it.  Returns the list of
+      values and the offset following them.
+    """
+    layout = JavaNativeType._struct(type_args)
+    if offset + layout.size > len(data):
       raise JavaNativeType.ParseException("Not enough data to deserialize %s" % repr(type_args))
-    for t in type_args:
-      parsed_type = t(data[slice(offset, offset + t.size())]).value()
-      parsed_types.append(parsed_type)
-      offset += t.size()
-    return parsed_types, data[total_size:]
+    return list(layout.unpack_from(data, offset)), offset + layout.size
+
+  @staticmethod
+  def parse(data, *type_args):
+    parsed_types, offset = JavaNativeType.parse_from(data, 0, *type_args)
+    return parsed_types, data[offset:]
 
 class u1(JavaNativeType):
+  FORMAT = 'B'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack('>B', data[0:1])[0]
@@ -62,6 +76,8 @@ class u1(JavaNativeType):
     return 1
 
 class u2(JavaNativeType):
+  FORMAT = 'H'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack(">H", data[0:2])[0]
@@ -71,6 +87,8 @@ class u2(JavaNativeType):
     return 2
 
 class s2(JavaNativeType):
+  FORMAT = 'h'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack(">h", data[0:2])[0]
@@ -80,6 +98,8 @@ class s2(JavaNativeType):
     return 2
 
 class u4(JavaNativeType):
+  FORMAT = 'L'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack(">L", data[0:4])[0]
@@ -89,6 +109,8 @@ class u4(JavaNativeType):
     return 4
 
 class s4(JavaNativeType):
+  FORMAT = 'l'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack(">l", data[0:4])[0]
@@ -98,6 +120,8 @@ class s4(JavaNativeType):
     return 4
 
 class s8(JavaNativeType):
+  FORMAT = 'q'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack(">q", data[0:8])[0]
@@ -107,6 +131,8 @@ class s8(JavaNativeType):
     return 8
 
 class f4(JavaNativeType):
+  FORMAT = 'f'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack(">f", data[0:4])[0]
@@ -116,6 +142,8 @@ class f4(JavaNativeType):
     return 4
 
 class f8(JavaNativeType):
+  FORMAT = 'd'
+
   def __init__(self, data):
     JavaNativeType.__init__(self, data)
     self._value = struct.unpack(">d", data[0:8])[0]
@@ -30,6 +30,8 @@
 #
 # Fix it!
 
+import re
+
 
 _UNPARSED = (None, 0)
 
@@ -39,6 +41,18 @@ def _list_if_none(variable):
   else:
     return []
 
+def _match(production, data):
+  """
+    Match production at the start of data, returning (result, bytes read) or _UNPARSED.
+
+    Productions match at an index into the signature rather than on slices of it: each
+    match_at(data, offset) returns (result, offset following the match) or _UNPARSED.
+  """
+  try:
+    return production.match_at(data, 0)
+  except IndexError:
+    return _UNPARSED
+
 class ParseException(Exception):
   pass
 
@@ -63,11 +77,14 @@ class BaseType(object):
 
   @staticmethod
   def match(data):
-    if data[0] in BaseType._CHAR_MAP:
-      return BaseType._CHAR_MAP[data[0]], 1
-    else:
-      #print '  BaseType(_UNPARSED @ %d, data = %s)' % (0, data)
+    return _match(BaseType, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    base_type = BaseType._CHAR_MAP.get(data[offset])
+    if base_type is None:
       return _UNPARSED
+    return base_type, offset + 1
 
 # ------- signature parsing ---------
 
@@ -78,19 +95,22 @@ class ClassSignature(object):
   """
   @staticmethod
   def match(data):
-    offset = 0
-    ftp, bytes_read = FormalTypeParameters.match(data[offset:])
-    offset += bytes_read
-    scs, bytes_read = ClassTypeSignature.match(data[offset:])
+    return _match(ClassSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    ftp, end = FormalTypeParameters.match_at(data, offset)
+    if ftp is not None:
+      offset = end
+    scs, offset = ClassTypeSignature.match_at(data, offset)
     if scs is None:
       return _UNPARSED
-    offset += bytes_read
     super_sigs = []
     while offset < len(data):
-      sis, bytes_read = ClassTypeSignature.match(data[offset:])
+      sis, end = ClassTypeSignature.match_at(data, offset)
       if sis is None:
         break
-      offset += bytes_read
+      offset = end
       super_sigs.append(sis)
     return ClassSignature(ftp, scs, super_sigs), offset
 
@@ -117,28 +137,49 @@ class ClassTypeSignature(object):
        "L" {Ident "/"} Ident OptTypeArguments {"." Ident OptTypeArguments} ";".
              ^ package specifier
 
+    Signatures without type arguments, e.g. Ljava/lang/String;, are interned: each is
+    parsed once and its ClassTypeSignature shared by every signature naming it.
   """
+  MAX_INTERNED = 8192
+  _INTERNED = {}
+
   @staticmethod
   def match(data):
-    if data[0] != 'L':
+    return _match(ClassTypeSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] != 'L':
       return _UNPARSED
-    offset = 1
+    # A signature ending at the first ';' has no type arguments naming other classes.
+    end = data.find(';', offset) + 1
+    text = data[offset:end]
+    interned = ClassTypeSignature._INTERNED.get(text)
+    if interned is not None:
+      return interned, end
+    signature, offset = ClassTypeSignature._parse(data, offset + 1)
+    if signature is not None and offset == end:
+      if len(ClassTypeSignature._INTERNED) >= ClassTypeSignature.MAX_INTERNED:
+        ClassTypeSignature._INTERNED.clear()
+      ClassTypeSignature._INTERNED[text] = signature
+    return signature, offset
 
-    package_class, bytes_read = PackageSpecifier.match(data[offset:])
+  @staticmethod
+  def _parse(data, offset):
+    package_class, offset = PackageSpecifier.match_at(data, offset)
     if package_class is None:
       return _UNPARSED
-    offset += bytes_read
 
-    package_arguments, bytes_read = TypeArguments.match(data[offset:])
-    offset += bytes_read
+    package_arguments, end = TypeArguments.match_at(data, offset)
+    if package_arguments is not None:
+      offset = end
 
     suffixes = []
     while data[offset] != ';':
-      suffix, bytes_read = ClassTypeSignatureSuffix.match(data[offset:])
+      suffix, offset = ClassTypeSignatureSuffix.match_at(data, offset)
       if not suffix:
         return _UNPARSED
       suffixes.append(suffix)
-      offset += bytes_read
     return ClassTypeSignature(package_class, package_arguments, suffixes), offset + 1
 
   def __init__(self, package=None, package_arguments=None, suffixes=None):
@@ -170,21 +211,19 @@ class Identifier(object):
       '/'
 
   """
+  _IDENTIFIER = re.compile(r'[^.;\[/<>:]+'  # documented bad characters, and inferred ':'
+                           r'|<init>|<clinit>')
+
   @staticmethod
   def match(data):
-    _BAD_CHARACTERS = ('.', ';', '[', '/', '<', '>', # documented
-                      ':')                           # inferred
-    if data.startswith('<init>'):
-      return Identifier('<init>'), len('<init>')
-    elif data.startswith('<clinit>'):
-      return Identifier('<clinit>'), len('<clinit>')
-    offset = 0
-    while data[offset] not in _BAD_CHARACTERS:
-      offset += 1
-    if offset > 0:
-      return Identifier(data[0:offset]), offset
-    else:
+    return _match(Identifier, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    match = Identifier._IDENTIFIER.match(data, offset)
+    if match is None:
       return _UNPARSED
+    return Identifier(match.group()), match.end()
 
   def __init__(self, ident):
     self._identifier = ident
@@ -198,11 +237,14 @@ class ClassBound(object):
   """
   @staticmethod
   def match(data):
-    if data[0] != ':':
+    return _match(ClassBound, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] != ':':
       return _UNPARSED
-    offset = 1
-    fieldsig, bytes_read = FieldTypeSignature.match(data[offset:])
-    return ClassBound(fieldsig), offset + bytes_read
+    fieldsig, end = FieldTypeSignature.match_at(data, offset + 1)
+    return ClassBound(fieldsig), end if fieldsig is not None else offset + 1
 
   def __init__(self, signature=None):
     self._signature = signature
@@ -220,11 +262,14 @@ class InterfaceBound(object):
   """
   @staticmethod
   def match(data):
-    if data[0] != ':':
+    return _match(InterfaceBound, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] != ':':
       return _UNPARSED
-    offset = 1
-    fieldsig, bytes_read = FieldTypeSignature.match(data[offset:])
-    return InterfaceBound(fieldsig), offset + bytes_read
+    fieldsig, end = FieldTypeSignature.match_at(data, offset + 1)
+    return InterfaceBound(fieldsig), end if fieldsig is not None else offset + 1
 
   def __init__(self, signature=None):
     self._signature = signature
@@ -241,41 +286,35 @@ class FieldTypeSignature(object):
   """
   @staticmethod
   def match(data):
-    cls, offset = ClassTypeSignature.match(data)
-    if cls is not None:
-      return cls, offset
-
-    array, offset = ArrayTypeSignature.match(data)
-    if array is not None:
-      return array, offset
+    return _match(FieldTypeSignature, data)
 
-    typev, offset = TypeVariableSignature.match(data)
-    if typev is not None:
-      return typev, offset
-
-    return _UNPARSED
+  @staticmethod
+  def match_at(data, offset):
+    # Each alternative is told apart by its first character.
+    production = FieldTypeSignature._PRODUCTIONS.get(data[offset])
+    if production is None:
+      return _UNPARSED
+    return production.match_at(data, offset)
 
 class PackageSpecifier(object):
   """
     Identifier '/' PackageSpecifier*
   """
+  _PACKAGE = re.compile(r'[^.;\[<>:]+')
+
   @staticmethod
   def match(data):
-    package_sequence = []
-    offset = 0
-    while True:
-      ident, bytes_read = Identifier.match(data[offset:])
-      if ident is None:
-        if len(package_sequence) == 0:
-          return _UNPARSED
-      else:
-        offset += bytes_read
-        package_sequence.append(ident)
+    return _match(PackageSpecifier, data)
 
-      if data[offset] != '/':
-        return PackageSpecifier(package_sequence), offset
-      else:
-        offset += 1
+  @staticmethod
+  def match_at(data, offset):
+    # Match every identifier and '/' at once: the only identifiers containing the
+    # characters that end the match, <init> and <clinit>, are not package or class names.
+    match = PackageSpecifier._PACKAGE.match(data, offset)
+    if match is None or data[offset] == '/':
+      return _UNPARSED
+    return PackageSpecifier(
+      [Identifier(ident) for ident in match.group().split('/') if ident]), match.end()
 
   def __init__(self, package_id):
     self._package = package_id
@@ -296,11 +335,15 @@ class SimpleClassTypeSignature(object):
   """
   @staticmethod
   def match(data):
-    ident, offset = Identifier.match(data)
+    return _match(SimpleClassTypeSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    ident, offset = Identifier.match_at(data, offset)
     if ident is None:
       return _UNPARSED
-    type_args, bytes_read = TypeArguments.match(data[offset:])
-    return SimpleClassTypeSignature(ident, type_args), offset + bytes_read
+    type_args, end = TypeArguments.match_at(data, offset)
+    return SimpleClassTypeSignature(ident, type_args), end if type_args is not None else offset
 
   def __init__(self, identifier, type_args=None):
     self._identifier = identifier
@@ -319,12 +362,16 @@ class ClassTypeSignatureSuffix(object):
   """
   @staticmethod
   def match(data):
-    if data[0] != '.':
+    return _match(ClassTypeSignatureSuffix, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] != '.':
       return _UNPARSED
-    scts, bytes_read = SimpleClassTypeSignature.match(data[1:])
+    scts, offset = SimpleClassTypeSignature.match_at(data, offset + 1)
     if scts is None:
       return _UNPARSED
-    return ClassTypeSignatureSuffix(scts), bytes_read + 1
+    return ClassTypeSignatureSuffix(scts), offset
 
   def __init__(self, signature):
     self._signature = signature
@@ -338,11 +385,16 @@ class TypeVariableSignature(object):
   """
   @staticmethod
   def match(data):
-    if data[0] != 'T':
+    return _match(TypeVariableSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] != 'T':
       return _UNPARSED
-    offset = 1
-    ident, bytes_read = Identifier.match(data[offset:])
-    offset += bytes_read
+    offset += 1
+    ident, end = Identifier.match_at(data, offset)
+    if ident is not None:
+      offset = end
     if data[offset] != ';':
       return _UNPARSED
     return TypeVariableSignature(ident), offset + 1
@@ -359,17 +411,21 @@ class TypeArguments(object):
   """
   @staticmethod
   def match(data):
-    if data[0] != '<':
+    return _match(TypeArguments, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] != '<':
       return _UNPARSED
-    offset = 1
+    offset += 1
 
     type_args = []
     while data[offset] != '>':
-      type_arg, bytes_read = TypeArgument.match(data[offset:])
+      type_arg, end = TypeArgument.match_at(data, offset)
       if type_arg is None:
         break
       type_args.append(type_arg)
-      offset += bytes_read
+      offset = end
     if len(type_args) == 0:
       return _UNPARSED
     return type_args, offset + 1
@@ -385,16 +441,20 @@ class TypeArgument(object):
   """
   @staticmethod
   def match(data):
-    if data[0] == '*':
-      return TypeArgument(data[0], sig=None), 1
+    return _match(TypeArgument, data)
 
-    offset = 0
-    wildcard, bytes_read = WildcardIndicator.match(data[offset:])
-    offset += bytes_read
-    field_signature, bytes_read = FieldTypeSignature.match(data[offset:])
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] == '*':
+      return TypeArgument('*', sig=None), offset + 1
+
+    wildcard, end = WildcardIndicator.match_at(data, offset)
+    if wildcard is not None:
+      offset = end
+    field_signature, offset = FieldTypeSignature.match_at(data, offset)
     if field_signature is None:
       return _UNPARSED
-    return TypeArgument(wildcard, field_signature), offset + bytes_read
+    return TypeArgument(wildcard, field_signature), offset
 
   def __init__(self, wildcard_indicator=None, sig=None):
     self._wildcard = wildcard_indicator
@@ -420,8 +480,12 @@ class WildcardIndicator(object):
   """
   @staticmethod
   def match(data):
-    if data[0] == '+' or data[0] == '-':
-      return data[0], 1
+    return _match(WildcardIndicator, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] == '+' or data[offset] == '-':
+      return data[offset], offset + 1
     return _UNPARSED
 
 class ArrayTypeSignature(object):
@@ -430,13 +494,16 @@ class ArrayTypeSignature(object):
   """
   @staticmethod
   def match(data):
-    if data[0] != '[':
+    return _match(ArrayTypeSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] != '[':
       return _UNPARSED
-    offset = 1
-    sig, bytes_read = TypeSignature.match(data[offset:])
+    sig, offset = TypeSignature.match_at(data, offset + 1)
     if sig is None:
       return _UNPARSED
-    return ArrayTypeSignature(sig), offset + bytes_read
+    return ArrayTypeSignature(sig), offset
 
   def __init__(self, sig):
     self._signature = sig
@@ -447,8 +514,12 @@ class ArrayTypeSignature(object):
 class VoidSignature(object):
   @staticmethod
   def match(data):
-    if data[0] == 'V':
-      return VoidSignature(), 1
+    return _match(VoidSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    if data[offset] == 'V':
+      return VoidSignature(), offset + 1
     return _UNPARSED
 
 
@@ -466,11 +537,14 @@ class TypeSignature(object):
   """
   @staticmethod
   def match(data):
-    offset = 0
-    sig, bytes_read = FieldTypeSignature.match(data[offset:])
-    if sig: return TypeSignature(sig), offset + bytes_read
-    base, bytes_read = BaseType.match(data[offset:])
-    if base: return TypeSignature(base), offset + bytes_read
+    return _match(TypeSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    sig, end = FieldTypeSignature.match_at(data, offset)
+    if sig: return TypeSignature(sig), end
+    base, end = BaseType.match_at(data, offset)
+    if base: return TypeSignature(base), end
     return _UNPARSED
 
   def __init__(self, sig):
@@ -491,34 +565,36 @@ class MethodTypeSignature(object):
   """
   @staticmethod
   def match(data):
-    formal_type, offset = FormalTypeParameters.match(data)
+    return _match(MethodTypeSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    formal_type, end = FormalTypeParameters.match_at(data, offset)
+    if formal_type is not None:
+      offset = end
     if data[offset] != '(':
       return _UNPARSED
     offset += 1
     type_sigs = []
     while True:
-      type_sig, bytes_read = TypeSignature.match(data[offset:])
-      if type_sig is not None:
-        type_sigs.append(type_sig)
-        offset += bytes_read
-        continue
-      else:
-        if data[offset] != ')':
-          return _UNPARSED
-        else:
-          break
+      type_sig, end = TypeSignature.match_at(data, offset)
+      if type_sig is None:
+        break
+      type_sigs.append(type_sig)
+      offset = end
+    if data[offset] != ')':
+      return _UNPARSED
     offset += 1
-    return_type, bytes_read = ReturnType.match(data[offset:])
+    return_type, offset = ReturnType.match_at(data, offset)
     if return_type is None:
       return _UNPARSED
-    offset += bytes_read
     throws = []
     while offset < len(data):
-      throw_sig, bytes_read = ThrowsSignature.match(data[offset:])
+      throw_sig, end = ThrowsSignature.match_at(data, offset)
       if throw_sig is None:
         break
       throws.append(throw_sig)
-      offset += bytes_read
+      offset = end
     return MethodTypeSignature(formal_type, type_sigs, return_type, throws), offset
 
   def __init__(self, formal_type=None, type_sigs=None, return_type=None, throws=None):
@@ -546,11 +622,14 @@ class ReturnType(object):
   """
   @staticmethod
   def match(data):
-    offset = 0
-    type_sig, bytes_read = TypeSignature.match(data)
-    if type_sig: return ReturnType(type_sig), bytes_read
-    void_sig, bytes_read = VoidSignature.match(data)
-    if void_sig: return ReturnType(void_sig), bytes_read
+    return _match(ReturnType, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    type_sig, end = TypeSignature.match_at(data, offset)
+    if type_sig: return ReturnType(type_sig), end
+    void_sig, end = VoidSignature.match_at(data, offset)
+    if void_sig: return ReturnType(void_sig), end
     return _UNPARSED
 
   def __init__(self, sig):
@@ -566,14 +645,17 @@ class ThrowsSignature(object):
   """
   @staticmethod
   def match(data):
-    offset = 0
+    return _match(ThrowsSignature, data)
+
+  @staticmethod
+  def match_at(data, offset):
     if data[offset] != '^':
       return _UNPARSED
     offset += 1
-    cls_sig, bytes_read = ClassTypeSignature.match(data[offset:])
-    if cls_sig: return cls_sig, bytes_read
-    type_sig, bytes_read = TypeVariableSignature.match(data[offset:])
-    if type_sig: return type_sig, bytes_read
+    cls_sig, end = ClassTypeSignature.match_at(data, offset)
+    if cls_sig: return cls_sig, end
+    type_sig, end = TypeVariableSignature.match_at(data, offset)
+    if type_sig: return type_sig, end
     return _UNPARSED
 
 class FormalTypeParameter(object):
@@ -582,24 +664,23 @@ class FormalTypeParameter(object):
   """
   @staticmethod
   def match(data):
-    offset = 0
-    identifier, bytes_read = Identifier.match(data[offset:])
+    return _match(FormalTypeParameter, data)
+
+  @staticmethod
+  def match_at(data, offset):
+    identifier, offset = Identifier.match_at(data, offset)
     if identifier is None:
       return _UNPARSED
-    else:
-      pass
-    offset += bytes_read
 
-    class_bound, bytes_read = ClassBound.match(data[offset:])
+    class_bound, offset = ClassBound.match_at(data, offset)
     if class_bound is None:
       return _UNPARSED
-    offset += bytes_read
     interfaces = []
     while True:
-      interface, bytes_read = InterfaceBound.match(data[offset:])
+      interface, end = InterfaceBound.match_at(data, offset)
       if interface is None:
         break
-      offset += bytes_read
+      offset = end
       interfaces.append(interface)
     return FormalTypeParameter(identifier, class_bound, interfaces), offset
 
@@ -623,17 +704,70 @@ class FormalTypeParameters(object):
   """
   @staticmethod
   def match(data):
-    offset = 0
+    return _match(FormalTypeParameters, data)
+
+  @staticmethod
+  def match_at(data, offset):
     if data[offset] != '<': return _UNPARSED
     offset += 1
     parameters = []
     while data[offset] != '>':
-      parameter, bytes_read = FormalTypeParameter.match(data[offset:])
+      parameter, offset = FormalTypeParameter.match_at(data, offset)
       if parameter is None:
         return _UNPARSED
       parameters.append(parameter)
-      offset += bytes_read
     # raise exception if len(parameters) == 0
     if len(parameters) == 0:
       raise ParseException('FormalTypeParameters requires >= 1 FormalTypeParameter')
     return parameters, offset + 1
+
+FieldTypeSignature._PRODUCTIONS = {
+  'L': ClassTypeSignature,
+  '[': ArrayTypeSignature,
+  'T': TypeVariableSignature,
+}
+
+class SignatureParser(object):
+  """
+    Parse the signatures of Signature attributes.  Results are memoized by signature, so
+    the signatures shared by many classes, fields and methods are parsed once; they are
+    shared and must not be modified.
+  """
+  MAX_CACHE = 8192
+  _CACHE = {}
+
+  @staticmethod
+  def _parse(signature):
+    for production in (ClassSignature, MethodTypeSignature):
+      try:
+        parsed, _ = production.match_at(signature, 0)
+      except IndexError:
+        continue
+      if parsed is not None:
+        return parsed
+    return None
+
+  @staticmethod
+  def parse(signature):
+    """
+      Parse a signature, returning a ClassSignature or MethodTypeSignature, or None if it
+      is neither.
+    """
+    try:
+      return SignatureParser._CACHE[signature]
+    except KeyError:
+      pass
+    parsed = SignatureParser._parse(signature)
+    if len(SignatureParser._CACHE) >= SignatureParser.MAX_CACHE:
+      SignatureParser._CACHE.clear()
+    SignatureParser._CACHE[signature] = parsed
+    return parsed
+
+  @staticmethod
+  def parse_all(signatures):
+    """
+      Parse each of signatures, returning a list of their parses.
+    """
+    cache, parse = SignatureParser._CACHE, SignatureParser.parse
+    return [cache[signature] if signature in cache else parse(signature)
+            for signature in signatures]
@@ -1,6 +1,35 @@
+import logging
+
+_FORMATTED = '_twitter_common_log_formatted'
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
 def format_message(record):
   try:
     record_message = '%s' % (record.msg % record.args)
   except TypeError:
     record_message = record.msg
   return record_message
+
+
+def format_once(scheme, record, format_fn):
+  """
+    Return format_fn(record) followed by any exception or stack of record, as
+    logging.Formatter would append them.  The result is cached on the record by scheme so
+    that every handler sharing a scheme formats the record only once.
+  """
+  formatted = record.__dict__.get(_FORMATTED)
+  if formatted is None:
+    formatted = record.__dict__[_FORMATTED] = {}
+  text = formatted.get(scheme)
+  if text is None:
+    text = format_fn(record)
+    record.message = text
+    if record.exc_info and not record.exc_text:
+      record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+    if record.exc_text:
+      text = text + '\n' + record.exc_text if text[-1:] != '\n' else text + record.exc_text
+    if getattr(record, 'stack_info', None):
+      text = text + '\n' + _EXCEPTION_FORMATTER.formatStack(record.stack_info)
+    formatted[scheme] = text
+  return text
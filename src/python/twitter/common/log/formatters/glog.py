@@ -16,12 +16,14 @@
 
 import time
 import logging
-from twitter.common.log.formatters.base import format_message
+from twitter.common.log.formatters.base import format_message, format_once
 
 class GlogFormatter(logging.Formatter):
   """
     Format a log in Google style format:
     [DIWEF]mmdd hh:mm:ss.uuuuuu threadid file:line] msg
+
+    The date and time to the second is computed once per second rather than per record.
   """
   SCHEME = 'google'
 
@@ -35,19 +37,27 @@ class GlogFormatter(logging.Formatter):
 
   def __init__(self):
     logging.Formatter.__init__(self)
+    self._second = (None, None)
 
-  def format(self, record):
-    try:
-      level = GlogFormatter.LEVEL_MAP[record.levelno]
-    except:
-      level = '?'
-    date = time.localtime(record.created)
-    date_usec = (record.created - int(record.created)) * 1e6
-    record_message = '%c%02d%02d %02d:%02d:%02d.%06d %s %s:%d] %s' % (
-       level, date.tm_mon, date.tm_mday, date.tm_hour, date.tm_min, date.tm_sec, date_usec,
+  def _date(self, created):
+    second = int(created)
+    cached_second, date = self._second
+    if cached_second != second:
+      date = time.localtime(second)
+      date = '%02d%02d %02d:%02d:%02d' % (
+          date.tm_mon, date.tm_mday, date.tm_hour, date.tm_min, date.tm_sec)
+      self._second = (second, date)
+    return date
+
+  def _format(self, record):
+    return '%s%s.%06d %s %s:%d] %s' % (
+       GlogFormatter.LEVEL_MAP.get(record.levelno, '?'),
+       self._date(record.created),
+       (record.created - int(record.created)) * 1e6,
        record.process if record.process is not None else '?????',
        record.filename,
        record.lineno,
        format_message(record))
-    record.getMessage = lambda: record_message
-    return logging.Formatter.format(self, record)
+
+  def format(self, record):
+    return format_once(GlogFormatter.SCHEME, record, self._format)
@@ -15,7 +15,7 @@
 # ==================================================================================================
 
 import logging
-from twitter.common.log.formatters.base import format_message
+from twitter.common.log.formatters.base import format_message, format_once
 
 class PlainFormatter(logging.Formatter):
   """
@@ -35,11 +35,9 @@ class PlainFormatter(logging.Formatter):
   def __init__(self):
     logging.Formatter.__init__(self)
 
+  def _format(self, record):
+    return '%s] %s' % (PlainFormatter.LEVEL_MAP.get(record.levelno, '?????'),
+        format_message(record))
+
   def format(self, record):
-    try:
-      level = PlainFormatter.LEVEL_MAP[record.levelno]
-    except:
-      level = '?????'
-    record_message = '%s] %s' % (level, format_message(record))
-    record.getMessage = lambda: record_message
-    return logging.Formatter.format(self, record)
+    return format_once(PlainFormatter.SCHEME, record, self._format)
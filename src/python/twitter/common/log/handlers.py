@@ -0,0 +1,199 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+"""
+Asynchronous logging handlers.
+"""
+
+from collections import deque
+import logging
+import threading
+
+from twitter.common.log.formatters.base import format_message
+
+
+class AsyncFanoutHandler(logging.Handler):
+  """
+    A handler that writes records to several streams from a background thread.
+
+    Logging threads only copy the record onto a bounded queue.  The writer thread formats
+    each record once and appends it to every stream whose level function accepts the
+    record's level, writing each stream once per batch of queued records.
+
+    When the queue is full, logging threads either block until there is room (the
+    default) or drop the record, see OVERFLOW_POLICIES.  flush() waits for the queued
+    records to be written and close(), which logging calls at interpreter exit, drains
+    the queue before closing the streams.
+  """
+
+  BLOCK = 'block'
+  DROP = 'drop'
+  OVERFLOW_POLICIES = (BLOCK, DROP)
+
+  DEFAULT_CAPACITY = 10000
+  DEFAULT_BATCH_SIZE = 1000
+  DEFAULT_BATCH_INTERVAL = 0.01
+
+  def __init__(self, capacity=DEFAULT_CAPACITY, overflow=BLOCK, batch_size=DEFAULT_BATCH_SIZE,
+               batch_interval=DEFAULT_BATCH_INTERVAL):
+    """
+      capacity: maximum number of records queued.
+      overflow: BLOCK or DROP records when the queue is full.
+      batch_size: maximum number of records written at once.
+      batch_interval: seconds the writer waits for more records to batch with the first.
+    """
+    if overflow not in self.OVERFLOW_POLICIES:
+      raise ValueError('Unknown overflow policy %r, expected one of %s' % (
+          overflow, ', '.join(self.OVERFLOW_POLICIES)))
+    logging.Handler.__init__(self)
+    self._capacity = capacity
+    self._overflow = overflow
+    self._batch_size = batch_size
+    self._batch_interval = batch_interval
+    self._targets = []
+    self._queue = deque()
+    self._lock = threading.Lock()
+    self._not_empty = threading.Condition(self._lock)
+    self._not_full = threading.Condition(self._lock)
+    self._written_cond = threading.Condition(self._lock)
+    self._flushing = 0
+    self._enqueued = 0
+    self._written = 0
+    self._dropped = 0
+    self._closing = False
+    self._writer = threading.Thread(target=self._run, name='AsyncFanoutHandler writer')
+    self._writer.daemon = True
+    self._writer.start()
+
+  @property
+  def dropped(self):
+    """The number of records dropped because the queue was full."""
+    return self._dropped
+
+  def add_target(self, stream, levelfn=lambda record_level: True):
+    """
+      Write records whose level satisfies levelfn to stream.  The handler takes ownership
+      of stream and closes it on close().
+    """
+    with self._lock:
+      self._targets.append((stream, levelfn))
+
+  def _prepare(self, record):
+    """
+      Copy record so that other handlers and the caller may not change it before it is
+      written, interpolating its arguments now since they may be mutated later.
+    """
+    prepared = logging.LogRecord.__new__(record.__class__)
+    prepared.__dict__.update(record.__dict__)
+    record = prepared
+    if record.args:
+      # Escaped so that the twitter.common.log formatters, which apply msg % args, leave the
+      # interpolated message as is.
+      record.msg = ('%s' % (format_message(record),)).replace('%', '%%')
+      record.args = ()
+    return record
+
+  def emit(self, record):
+    # Neither copy nor interpolate records that no target will write.
+    for _, levelfn in self._targets:
+      if levelfn(record.levelno):
+        break
+    else:
+      return
+    try:
+      record = self._prepare(record)
+    except Exception:
+      self.handleError(record)
+      return
+    with self._lock:
+      while len(self._queue) >= self._capacity and not self._closing:
+        if self._overflow == self.DROP:
+          self._dropped += 1
+          return
+        self._not_full.wait()
+      if self._closing:
+        return
+      self._queue.append(record)
+      self._enqueued += 1
+      if len(self._queue) == 1:
+        self._not_empty.notify()
+
+  def _format_batch(self, batch):
+    lines = []
+    for record in batch:
+      try:
+        lines.append((record.levelno, self.format(record) + '\n'))
+      except Exception:
+        self.handleError(record)
+    return lines
+
+  def _write(self, batch):
+    lines = self._format_batch(batch)
+    for stream, levelfn in self._targets:
+      accepted = dict((level, levelfn(level)) for level in set(level for level, _ in lines))
+      data = ''.join(line for level, line in lines if accepted[level])
+      if not data:
+        continue
+      try:
+        stream.write(data)
+        stream.flush()
+      except Exception:
+        self.handleError(batch[-1])
+
+  def _run(self):
+    while True:
+      with self._lock:
+        while not self._queue and not self._closing:
+          self._not_empty.wait()
+        if not self._queue:
+          return
+        if (len(self._queue) < self._batch_size and not self._closing and not self._flushing
+            and self._batch_interval):
+          # Give logging threads a moment to add to the batch.
+          self._not_empty.wait(self._batch_interval)
+        batch = [self._queue.popleft() for _ in range(min(self._batch_size, len(self._queue)))]
+        self._not_full.notify_all()
+      self._write(batch)
+      with self._lock:
+        self._written += len(batch)
+        self._written_cond.notify_all()
+
+  def flush(self):
+    """
+      Wait until every record queued before the call has been written.
+    """
+    with self._lock:
+      target = self._enqueued
+      self._flushing += 1
+      self._not_empty.notify()
+      try:
+        while self._written < target and self._writer.is_alive():
+          self._written_cond.wait(0.1)
+      finally:
+        self._flushing -= 1
+
+  def close(self):
+    with self._lock:
+      self._closing = True
+      self._not_empty.notify_all()
+      self._not_full.notify_all()
+    self._writer.join()
+    for stream, _ in self._targets:
+      try:
+        stream.close()
+      except Exception:
+        pass
+    logging.Handler.close(self)
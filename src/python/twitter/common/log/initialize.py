@@ -47,6 +47,7 @@ import getpass
 from socket import gethostname
 
 from twitter.common.log.formatters import glog, plain
+from twitter.common.log.handlers import AsyncFanoutHandler
 from twitter.common.log.options import LogOptions
 from twitter.common.dirutil import safe_mkdir
 
@@ -55,6 +56,9 @@ class GenericFilter(logging.Filter):
     self._levelfn = levelfn
     logging.Filter.__init__(self)
 
+  def filter_level(self, record_level):
+    return self._levelfn(record_level)
+
   def filter(self, record):
     if self._levelfn(record.levelno):
       return 1
@@ -71,12 +75,17 @@ class ProxyFormatter(logging.Formatter):
   def __init__(self, scheme_fn):
     logging.Formatter.__init__(self)
     self._scheme_fn = scheme_fn
+    self._formatter = (None, None)
 
   def format(self, record):
     scheme = self._scheme_fn()
-    if scheme not in ProxyFormatter._SCHEME_TO_FORMATTER:
-      raise ProxyFormatter.UnknownSchemeException("Unknown logging scheme: %s" % scheme)
-    return ProxyFormatter._SCHEME_TO_FORMATTER[scheme].format(record)
+    cached_scheme, formatter = self._formatter
+    if scheme != cached_scheme:
+      if scheme not in ProxyFormatter._SCHEME_TO_FORMATTER:
+        raise ProxyFormatter.UnknownSchemeException("Unknown logging scheme: %s" % scheme)
+      formatter = ProxyFormatter._SCHEME_TO_FORMATTER[scheme]
+      self._formatter = (scheme, formatter)
+    return formatter.format(record)
 
 _FILTER_TYPES = {
   logging.DEBUG: 'DEBUG',
@@ -130,16 +139,25 @@ def _setup_disk_logging(filebase):
       'pid': pid
     }
 
+  if LogOptions.disk_log_async():
+    # One handler formats each record once and writes it to every matching level file.
+    async_handler = AsyncFanoutHandler(overflow=LogOptions.disk_log_overflow())
+    async_handler.setFormatter(ProxyFormatter(LogOptions.disk_log_scheme))
+    handlers.append(async_handler)
+
   for filter_type, filter_name in _FILTER_TYPES.items():
     formatter = ProxyFormatter(LogOptions.disk_log_scheme)
     filter = gen_filter(filter_type)
     full_filebase = os.path.join(logroot, filebase)
     logfile_link = gen_link_filename(full_filebase, filter_name)
     logfile_full = gen_verbose_filename(full_filebase, filter_name)
-    file_handler = logging.FileHandler(logfile_full)
-    file_handler.setFormatter(formatter)
-    file_handler.addFilter(filter)
-    handlers.append(file_handler)
+    if LogOptions.disk_log_async():
+      async_handler.add_target(open(logfile_full, 'a'), filter.filter_level)
+    else:
+      file_handler = logging.FileHandler(logfile_full)
+      file_handler.setFormatter(formatter)
+      file_handler.addFilter(filter)
+      handlers.append(file_handler)
     _safe_setup_link(logfile_link, logfile_full)
   return handlers
 
@@ -166,6 +184,7 @@ def teardown_disk_logging():
   global _DISK_LOGGERS
   for handler in _DISK_LOGGERS:
     root_logger.removeHandler(handler)
+    handler.close()
   _DISK_LOGGERS = []
 
 def init(filebase=None):
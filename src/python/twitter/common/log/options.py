@@ -32,7 +32,9 @@ _DISK_LOG_LEVEL_OPTION = 'twitter_common_log_disk_log_level'
 _DEFAULT_LOG_OPTS = {
   'twitter_common_log_stderr_log_level': 'ERROR',
   _DISK_LOG_LEVEL_OPTION: 'INFO',
-  'twitter_common_log_log_dir': '/var/tmp'
+  'twitter_common_log_log_dir': '/var/tmp',
+  'twitter_common_log_disk_log_async': False,
+  'twitter_common_log_disk_log_overflow': 'block',
 }
 
 try:
@@ -73,10 +75,17 @@ class LogOptions(object):
     'plain'
   ]
 
+  _OVERFLOW_POLICIES = [
+    'block',
+    'drop'
+  ]
+
   _STDERR_LOG_LEVEL = None
   _STDOUT_LOG_SCHEME = None
   _DISK_LOG_LEVEL = None
   _DISK_LOG_SCHEME = None
+  _DISK_LOG_ASYNC = None
+  _DISK_LOG_OVERFLOW = None
   _LOG_DIR = None
 
   @staticmethod
@@ -176,6 +185,42 @@ class LogOptions(object):
       LogOptions.set_disk_log_level(app.get_options().twitter_common_log_disk_log_level)
     return LogOptions._DISK_LOG_SCHEME
 
+  @staticmethod
+  def set_disk_log_async(value):
+    """
+      Set whether disk logging is done from a background thread.  Must be called before
+      log.init() for changes to take effect.
+    """
+    LogOptions._DISK_LOG_ASYNC = bool(value)
+
+  @staticmethod
+  def disk_log_async():
+    """
+      Get whether disk logging is done from a background thread.
+    """
+    if LogOptions._DISK_LOG_ASYNC is None:
+      LogOptions.set_disk_log_async(app.get_options().twitter_common_log_disk_log_async)
+    return LogOptions._DISK_LOG_ASYNC
+
+  @staticmethod
+  def set_disk_log_overflow(policy):
+    """
+      Set what asynchronous disk logging does when its queue is full: 'block' the logging
+      thread until there is room or 'drop' the record.
+    """
+    if policy not in LogOptions._OVERFLOW_POLICIES:
+      raise LogOptionsException('Unknown overflow policy: %s' % policy)
+    LogOptions._DISK_LOG_OVERFLOW = policy
+
+  @staticmethod
+  def disk_log_overflow():
+    """
+      Get the overflow policy of asynchronous disk logging.
+    """
+    if LogOptions._DISK_LOG_OVERFLOW is None:
+      LogOptions.set_disk_log_overflow(app.get_options().twitter_common_log_disk_log_overflow)
+    return LogOptions._DISK_LOG_OVERFLOW
+
   @staticmethod
   def set_log_dir(dir):
     """
@@ -271,3 +316,18 @@ if HAVE_APP:
               metavar='DIR',
               dest='twitter_common_log_log_dir',
               help="The directory into which log files will be generated [default: %default].")
+
+  app.add_option('--log_disk_async',
+              default=_DEFAULT_LOG_OPTS['twitter_common_log_disk_log_async'],
+              action='store_true',
+              dest='twitter_common_log_disk_log_async',
+              help="Write disk logs from a background thread.")
+
+  app.add_option('--log_disk_overflow',
+              type='choice',
+              choices=LogOptions._OVERFLOW_POLICIES,
+              default=_DEFAULT_LOG_OPTS['twitter_common_log_disk_log_overflow'],
+              metavar='POLICY',
+              dest='twitter_common_log_disk_log_overflow',
+              help="What to do when the asynchronous disk log queue is full: block the "
+                   "logging thread or drop the record [default: %default].")
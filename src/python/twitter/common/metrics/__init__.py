@@ -17,6 +17,7 @@
 __author__ = 'Brian Wickman'
 
 from .gauge import *
-from .rate import Rate
-from .metrics import RootMetrics
+from .histogram import Histogram
+from .rate import EWMA, Rate, WindowedRates
+from .metrics import Metrics, RootMetrics
 from .sampler import MetricSampler
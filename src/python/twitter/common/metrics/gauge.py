@@ -14,6 +14,8 @@
 # limitations under the License.
 # ==================================================================================================
 
+import threading
+import weakref
 
 from twitter.common.lang import Compatibility
 
@@ -58,10 +60,13 @@ class NamedGauge(Gauge):
 class MutableGauge(Gauge):
   """
     Mutable gauge.
+
+    version is bumped on every mutation, so samplers may skip re-reading a gauge whose
+    version has not changed.
   """
   def __init__(self, value=None):
-    import threading
     self._lock = threading.Lock()
+    self.version = 0
     Gauge.__init__(self, value)
 
   def read(self):
@@ -71,6 +76,7 @@ class MutableGauge(Gauge):
   def write(self, value):
     with self.lock():
       self._value = value
+      self.version += 1
       return self._value
 
   def lock(self):
@@ -84,11 +90,11 @@ class Label(NamedGauge):
   """
   def __init__(self, name, value):
     NamedGauge.__init__(self, name, value)
+    self.version = 0
 
 
 class LambdaGauge(NamedGauge):
   def __init__(self, name, fn):
-    import threading
     if not callable(fn):
       raise TypeError("A LambdaGauge must be supplied with a callable, got %s" % type(fn))
     NamedGauge.__init__(self, name, fn)
@@ -124,6 +130,7 @@ class AtomicGauge(NamedGauge, MutableGauge):
       raise TypeError('AtomicGauge.add must be called with an integer.')
     with self.lock():
       self._value += delta
+      self.version += 1
       return self._value
 
   def increment(self):
@@ -137,3 +144,84 @@ class AtomicGauge(NamedGauge, MutableGauge):
       Decrement metric and return updated metric.
     """
     return self.add(-1)
+
+
+class _Shards(object):
+  """
+    A set of per-thread shards.  Each thread only ever mutates its own shard so updates
+    need no lock; readers aggregate over a snapshot of all shards.
+
+    When a thread exits its shard is folded into a base shard with merge(base, shard),
+    which must return a new shard rather than mutate base, so that a reader holding an
+    earlier snapshot counts the dead shard exactly once.
+  """
+  class _Owner(object):
+    """Held only by a thread's slot of the thread-local, so it dies with the thread."""
+    __slots__ = ('__weakref__',)
+
+  def __init__(self, factory, merge):
+    self._factory = factory
+    self._merge = merge
+    self._local = threading.local()
+    self._base = factory()
+    self._shards = {}
+    self._lock = threading.Lock()
+
+  def get(self):
+    """
+      Return the calling thread's shard, creating it on first use.
+    """
+    try:
+      return self._local.shard
+    except AttributeError:
+      shard = self._local.shard = self._factory()
+      owner = self._local.owner = self._Owner()
+      with self._lock:
+        self._shards[weakref.ref(owner, self._reclaim)] = shard
+      return shard
+
+  def _reclaim(self, owner):
+    with self._lock:
+      shard = self._shards.pop(owner, None)
+      if shard is not None:
+        self._base = self._merge(self._base, shard)
+
+  def __len__(self):
+    with self._lock:
+      return len(self._shards)
+
+  def __iter__(self):
+    with self._lock:
+      shards = [self._base]
+      shards.extend(self._shards.values())
+    return iter(shards)
+
+
+class ShardedCounter(NamedGauge):
+  """
+    An integer counter sharded per thread.  Unlike AtomicGauge, add/increment/decrement
+    take no lock and do not return the updated value; shards are summed on read.
+  """
+  def __init__(self, name, initial_value=0):
+    if not isinstance(initial_value, Compatibility.integer):
+      raise TypeError('ShardedCounter must be initialized with an integer.')
+    NamedGauge.__init__(self, name)
+    self._initial_value = initial_value
+    self._shards = _Shards(lambda: [0], lambda base, shard: [base[0] + shard[0]])
+
+  def add(self, delta):
+    """
+      Add delta to metric.
+    """
+    if not isinstance(delta, Compatibility.integer):
+      raise TypeError('ShardedCounter.add must be called with an integer.')
+    self._shards.get()[0] += delta
+
+  def increment(self):
+    self._shards.get()[0] += 1
+
+  def decrement(self):
+    self._shards.get()[0] -= 1
+
+  def read(self):
+    return self._initial_value + sum(shard[0] for shard in self._shards)
@@ -0,0 +1,149 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import math
+
+from twitter.common.lang import Compatibility
+from .gauge import _Shards
+from .metrics import MetricProvider
+
+
+class Histogram(MetricProvider):
+  """
+    A histogram of non-negative numeric samples with approximate percentiles.
+
+    Samples are counted in log-linear buckets (in the style of HDR histograms): each power
+    of two is split into 2**PRECISION equal sub-buckets, so reported percentiles are within
+    a relative error of 2**-(PRECISION + 1).  Updates go to per-thread shards and take no
+    lock.
+
+    Registering a histogram named 'latency' with Metrics exports latency.count,
+    latency.sum and latency.<p> for each of PERCENTILES.
+  """
+  PRECISION = 5
+  PERCENTILES = (
+    ('p50', 50),
+    ('p90', 90),
+    ('p99', 99),
+    ('p999', 99.9),
+  )
+
+  _SUBBUCKETS = 1 << PRECISION
+  _ZERO = float('-inf')
+
+  class _Shard(object):
+    __slots__ = ('count', 'sum', 'buckets')
+
+    def __init__(self):
+      self.count = 0
+      self.sum = 0
+      self.buckets = {}
+
+    @classmethod
+    def merge(cls, base, shard):
+      merged = cls()
+      merged.count = base.count + shard.count
+      merged.sum = base.sum + shard.sum
+      merged.buckets = base.buckets.copy()
+      for bucket, bucket_count in shard.buckets.items():
+        merged.buckets[bucket] = merged.buckets.get(bucket, 0) + bucket_count
+      return merged
+
+  def __init__(self, name):
+    if not isinstance(name, str):
+      raise TypeError('Histogram must be named by a string, got %s' % type(name))
+    self._name = name
+    self._shards = _Shards(Histogram._Shard, Histogram._Shard.merge)
+
+  def name(self):
+    return self._name
+
+  @classmethod
+  def _bucket(cls, value):
+    if value <= 0:
+      return cls._ZERO
+    mantissa, exponent = math.frexp(value)
+    return (exponent << cls.PRECISION) + int((mantissa - 0.5) * 2 * cls._SUBBUCKETS)
+
+  @classmethod
+  def _midpoint(cls, bucket):
+    if bucket == cls._ZERO:
+      return 0
+    exponent, sub = bucket >> cls.PRECISION, bucket & (cls._SUBBUCKETS - 1)
+    return math.ldexp(0.5 + (sub + 0.5) / (2.0 * cls._SUBBUCKETS), exponent)
+
+  def update(self, value):
+    """
+      Add a sample to the histogram.
+    """
+    if not isinstance(value, Compatibility.numeric):
+      raise TypeError('Histogram.update must be called with a number.')
+    shard = self._shards.get()
+    bucket = self._bucket(value)
+    shard.buckets[bucket] = shard.buckets.get(bucket, 0) + 1
+    shard.count += 1
+    shard.sum += value
+
+  def snapshot(self):
+    """
+      Return (count, sum, buckets) aggregated over all threads, where buckets is a sorted
+      list of (bucket, count).
+    """
+    count, total, buckets = 0, 0, {}
+    for shard in self._shards:
+      count += shard.count
+      total += shard.sum
+      for bucket, bucket_count in shard.buckets.copy().items():
+        buckets[bucket] = buckets.get(bucket, 0) + bucket_count
+    return count, total, sorted(buckets.items())
+
+  @classmethod
+  def _percentiles(cls, buckets, percentiles):
+    total = sum(bucket_count for _, bucket_count in buckets)
+    results = []
+    for percentile in percentiles:
+      if total == 0:
+        results.append(0)
+        continue
+      rank = max(1, int(math.ceil(total * percentile / 100.0)))
+      seen = 0
+      for bucket, bucket_count in buckets:
+        seen += bucket_count
+        if seen >= rank:
+          results.append(cls._midpoint(bucket))
+          break
+    return results
+
+  def percentile(self, percentile):
+    """
+      Return the approximate value at percentile (0-100), or 0 if there are no samples.
+    """
+    _, _, buckets = self.snapshot()
+    return self._percentiles(buckets, [percentile])[0]
+
+  def sample_values(self, sample_prefix=''):
+    count, total, buckets = self.snapshot()
+    samples = {
+      sample_prefix + 'count': count,
+      sample_prefix + 'sum': total,
+    }
+    values = self._percentiles(buckets, [percentile for _, percentile in self.PERCENTILES])
+    for (label, _), value in zip(self.PERCENTILES, values):
+      samples[sample_prefix + label] = value
+    return samples
+
+  def sample(self, sample_prefix=''):
+    return dict((name, str(value)) for name, value in self.sample_values(sample_prefix).items())
@@ -14,12 +14,14 @@
 # limitations under the License.
 # ==================================================================================================
 
+import threading
 
 from twitter.common.lang import Compatibility
 from .gauge import (
   Gauge,
   MutatorGauge,
   NamedGauge,
+  namable,
   namablegauge)
 
 
@@ -52,6 +54,99 @@ class MetricRegistry(object):
     raise NotImplementedError
 
 
+class FlatRegistry(object):
+  """
+    Every gauge registered beneath a root Metrics, indexed by fully qualified name.  Names
+    are qualified once at registration rather than on every sample, and generation is
+    bumped on each registration so that incremental samplers know when to re-index.
+
+    Gauges and providers are also indexed by every scope prefix of their names, so that
+    sampling a scope only visits what is registered beneath it.  An unregistered gauge
+    leaves None in its slot, which is reused if the name is registered again.
+  """
+  def __init__(self):
+    self.names = []
+    self.gauges = []
+    self.index = {}
+    self.providers = {}
+    self.generation = 0
+    self._scoped_gauges = {}
+    self._scoped_providers = {}
+    self._lock = threading.Lock()
+
+  @staticmethod
+  def _scopes(name):
+    """The prefix of every scope that name may be sampled from, e.g. '', 'a.' and 'a.b.'."""
+    end = name.find('.')
+    yield ''
+    while end != -1:
+      yield name[:end + 1]
+      end = name.find('.', end + 1)
+
+  def register(self, name, gauge):
+    with self._lock:
+      if name in self.index:
+        self.gauges[self.index[name]] = gauge
+      else:
+        index = self.index[name] = len(self.names)
+        self.names.append(name)
+        self.gauges.append(gauge)
+        for scope in self._scopes(name):
+          self._scoped_gauges.setdefault(scope, []).append(index)
+      self.generation += 1
+
+  def register_provider(self, prefix, provider):
+    with self._lock:
+      if prefix not in self.providers:
+        for scope in self._scopes(prefix):
+          self._scoped_providers.setdefault(scope, []).append(prefix)
+      self.providers[prefix] = provider
+      self.generation += 1
+
+  def unregister(self, name):
+    """
+      Remove the gauge or provider registered under name, returning whether there was one.
+    """
+    with self._lock:
+      if name + '.' in self.providers:
+        prefix = name + '.'
+        del self.providers[prefix]
+        for scope in self._scopes(prefix):
+          self._scoped_providers[scope].remove(prefix)
+      elif self.index.get(name) is not None and self.gauges[self.index[name]] is not None:
+        self.gauges[self.index[name]] = None
+      else:
+        return False
+      self.generation += 1
+      return True
+
+  def scoped(self, prefix):
+    """
+      Return [(name, gauge)] of the gauges whose names start with the scope prefix.
+    """
+    with self._lock:
+      return [(self.names[index], self.gauges[index])
+              for index in self._scoped_gauges.get(prefix, ())
+              if self.gauges[index] is not None]
+
+  def scoped_providers(self, prefix):
+    """
+      Return [(provider_prefix, provider)] of the providers beneath the scope prefix.
+    """
+    with self._lock:
+      return [(provider_prefix, self.providers[provider_prefix])
+              for provider_prefix in self._scoped_providers.get(prefix, ())]
+
+
+def sample_values(provider, sample_prefix=''):
+  """
+    Sample typed values from provider, falling back to its (stringified) sample().
+  """
+  if hasattr(provider, 'sample_values'):
+    return provider.sample_values(sample_prefix)
+  return provider.sample(sample_prefix)
+
+
 class Metrics(MetricRegistry, MetricProvider):
   """
     Metric collector.
@@ -59,34 +154,66 @@ class Metrics(MetricRegistry, MetricProvider):
 
   class Error(Exception): pass
 
-  def __init__(self):
-    self._metrics = {}
+  def __init__(self, prefix='', registry=None):
+    self._prefix = prefix
+    self._registry = registry if registry is not None else FlatRegistry()
     self._children = {}
 
+  def prefix(self):
+    """
+      The prefix of the fully qualified names of metrics registered with this scope.
+    """
+    return self._prefix
+
+  def registry(self):
+    """
+      The FlatRegistry shared by this scope, its root and all of its children.
+    """
+    return self._registry
+
   def scope(self, name):
     if not isinstance(name, Compatibility.string):
       raise TypeError('Scope names must be strings, got: %s' % type(name))
     if name not in self._children:
-      self._children[name] = Metrics()
+      self._children[name] = Metrics(self._prefix + name + '.', self._registry)
     return self._children[name]
 
   def register(self, gauge):
+    if isinstance(gauge, MetricProvider) and namable(gauge):
+      # Providers of several samples (e.g. Histogram) are sampled like a child scope.
+      self._registry.register_provider(self._prefix + gauge.name() + '.', gauge)
+      return gauge
     if isinstance(gauge, Compatibility.string):
       gauge = MutatorGauge(gauge)
     if not isinstance(gauge, NamedGauge) and not namablegauge(gauge):
       raise Metrics.Error('Must register either a string or a Gauge-like object! Got %s' % gauge)
-    self._metrics[gauge.name()] = gauge
+    self._registry.register(self._prefix + gauge.name(), gauge)
     return gauge
 
-  def sample(self, sample_prefix=''):
+  def unregister(self, name):
+    """
+      Unregister the gauge or provider registered as name in this scope, returning whether
+      there was one.
+    """
+    return self._registry.unregister(self._prefix + name)
+
+  def sample_values(self, sample_prefix=''):
+    """
+      Returns a dictionary
+        string (metric) => value
+      of the typed values of every metric in this scope.
+    """
+    registry, strip = self._registry, len(self._prefix)
     samples = {}
-    for name, metric in self._metrics.items():
-      samples[sample_prefix + name] = str(metric.read())
-    for scope_name in self._children:
-      samples.update(self.scope(scope_name)
-                         .sample(sample_prefix=sample_prefix + scope_name + '.'))
+    for name, gauge in registry.scoped(self._prefix):
+      samples[sample_prefix + name[strip:]] = gauge.read()
+    for provider_prefix, provider in registry.scoped_providers(self._prefix):
+      samples.update(sample_values(provider, sample_prefix + provider_prefix[strip:]))
     return samples
 
+  def sample(self, sample_prefix=''):
+    return dict((name, str(value)) for name, value in self.sample_values(sample_prefix).items())
+
 
 class RootMetrics(Metrics):
   """
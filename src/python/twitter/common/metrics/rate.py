@@ -14,15 +14,80 @@
 # limitations under the License.
 # ==================================================================================================
 
+
+import math
 import time
 
 from twitter.common.quantity import Amount, Time
 from .gauge import NamedGauge, gaugelike, namablegauge
+from .metrics import MetricProvider
+
+
+class TimeSeries(object):
+  """
+    A fixed-capacity ring buffer of (time, value) samples appended in time order.
+
+    Samples are addressed by a monotonically increasing sequence number; once more than
+    capacity samples have been appended the oldest are overwritten.
+  """
+  def __init__(self, capacity):
+    if capacity < 1:
+      raise ValueError('TimeSeries capacity must be positive.')
+    self._capacity = capacity
+    self._times = [0] * capacity
+    self._values = [None] * capacity
+    self._head = 0
+    self._tail = 0
+
+  @property
+  def head(self):
+    """
+      The sequence number of the next sample to be appended.
+    """
+    return self._head
+
+  @property
+  def tail(self):
+    """
+      The sequence number of the oldest retained sample.
+    """
+    return self._tail
+
+  def __len__(self):
+    return self._head - self._tail
+
+  def __getitem__(self, seq):
+    if not self._tail <= seq < self._head:
+      raise IndexError('sample %d is not retained' % seq)
+    index = seq % self._capacity
+    return self._times[index], self._values[index]
+
+  def append(self, when, value):
+    index = self._head % self._capacity
+    self._times[index] = when
+    self._values[index] = value
+    self._head += 1
+    if self._head - self._tail > self._capacity:
+      self._tail = self._head - self._capacity
+
+  def advance(self, seq, newer_than):
+    """
+      Return the sequence number of the first retained sample at or after seq whose time
+      is at least newer_than (or head if there is none.)  Amortized O(1) when called with
+      a non-decreasing seq and newer_than.
+    """
+    seq = max(seq, self._tail)
+    while seq < self._head and self._times[seq % self._capacity] < newer_than:
+      seq += 1
+    return seq
+
 
 class Rate(NamedGauge):
   """
     Gauge that computes a windowed rate.
   """
+  DEFAULT_CAPACITY = 1024
+
   @staticmethod
   def of(gauge, name = None, window = None, clock = None):
     kw = {}
@@ -37,17 +102,21 @@ class Rate(NamedGauge):
         raise TypeError('Rate.of must take a namable Gauge-like object if no name specified!')
       return Rate(gauge.name(), gauge, **kw)
 
-  def __init__(self, name, gauge, window = Amount(1, Time.SECONDS), clock = time):
+  def __init__(self, name, gauge, window = Amount(1, Time.SECONDS), clock = time,
+               capacity = DEFAULT_CAPACITY):
     """
       Create a gauge using name as a base for a <name>_per_<window> sampling gauge.
 
         name: The base name of the gauge.
         gauge: The gauge to sample
         window: The window over which the samples should be measured (default 1 second.)
+        capacity: The maximum number of samples retained.  If the gauge is read more often
+                  than this per window, the rate is measured over the most recent samples.
     """
     self._clock = clock
     self._gauge = gauge
-    self._samples = []
+    self._samples = TimeSeries(capacity)
+    self._oldest = 0
     self._window = window
     NamedGauge.__init__(self, '%s_per_%s%s' % (name, window.amount(), window.unit()))
 
@@ -57,16 +126,111 @@ class Rate(NamedGauge):
     """
     if newer_than is None:
       newer_than = self._clock.time() - self._window.as_(Time.SECONDS)
-    self._samples = [sample for sample in self._samples if sample[0] >= newer_than]
+    self._oldest = self._samples.advance(self._oldest, newer_than)
 
   def read(self):
     now = self._clock.time()
     self.filter(now - self._window.as_(Time.SECONDS))
     new_sample = self._gauge.read()
-    self._samples.insert(0, (now, new_sample))
-    if len(self._samples) == 1:
+    self._samples.append(now, new_sample)
+    self._oldest = max(self._oldest, self._samples.tail)
+    if self._oldest == self._samples.head - 1:
       return 0
-    last_sample = self._samples[-1]
-    dy = new_sample - last_sample[1]
-    dt = now - last_sample[0]
+    last_time, last_sample = self._samples[self._oldest]
+    dy = new_sample - last_sample
+    dt = now - last_time
     return 0 if dt == 0 else dy / dt
+
+
+class EWMA(NamedGauge):
+  """
+    Gauge that computes an exponentially weighted moving average of the rate of change of
+    another gauge, decaying with a time constant of window.  Unlike Rate it keeps no
+    history.
+  """
+  def __init__(self, name, gauge, window = Amount(1, Time.MINUTES), clock = time):
+    self._clock = clock
+    self._gauge = gauge
+    self._average = _Average(window.as_(Time.SECONDS))
+    self._last = None
+    NamedGauge.__init__(self, '%s_ewma_%s%s' % (name, window.amount(), window.unit()))
+
+  def read(self):
+    now, value = self._clock.time(), self._gauge.read()
+    if self._last is not None:
+      self._average.update(self._last, (now, value))
+    self._last = (now, value)
+    return self._average.value
+
+
+class _Average(object):
+  def __init__(self, window):
+    self._window = window
+    self.value = 0.0
+
+  def update(self, previous, current):
+    dt = current[0] - previous[0]
+    if dt <= 0:
+      return
+    instantaneous = (current[1] - previous[1]) / float(dt)
+    self.value += (1 - math.exp(-dt / self._window)) * (instantaneous - self.value)
+
+
+class WindowedRates(MetricProvider):
+  """
+    Windowed rates and EWMAs of a gauge over several windows (by default 1, 5 and 15
+    minutes), computed from a single read of the gauge per sample and one shared
+    TimeSeries.
+
+    Registering WindowedRates('requests', gauge) with Metrics exports requests.per_1mins,
+    requests.ewma_1mins and so on for each window.
+  """
+  DEFAULT_WINDOWS = (
+    Amount(1, Time.MINUTES),
+    Amount(5, Time.MINUTES),
+    Amount(15, Time.MINUTES),
+  )
+
+  def __init__(self, name, gauge, windows = DEFAULT_WINDOWS, clock = time,
+               capacity = Rate.DEFAULT_CAPACITY):
+    if not gaugelike(gauge):
+      raise TypeError('WindowedRates must take a Gauge-like object!  Got %s' % type(gauge))
+    self._name = name
+    self._gauge = gauge
+    self._clock = clock
+    self._samples = TimeSeries(capacity)
+    self._labels = ['%s%s' % (window.amount(), window.unit()) for window in windows]
+    self._windows = [window.as_(Time.SECONDS) for window in windows]
+    self._oldest = [0] * len(windows)
+    self._averages = [_Average(window) for window in self._windows]
+
+  def name(self):
+    return self._name
+
+  def read(self):
+    """
+      Sample the gauge and return a list of (window label, rate, ewma) for each window.
+    """
+    now, value = self._clock.time(), self._gauge.read()
+    previous = self._samples[self._samples.head - 1] if len(self._samples) else None
+    self._samples.append(now, value)
+    results = []
+    for k, window in enumerate(self._windows):
+      oldest = self._oldest[k] = self._samples.advance(self._oldest[k], now - window)
+      last_time, last_value = self._samples[oldest]
+      dt = now - last_time
+      if previous is not None:
+        self._averages[k].update(previous, (now, value))
+      results.append((self._labels[k], 0 if dt == 0 else (value - last_value) / dt,
+                      self._averages[k].value))
+    return results
+
+  def sample_values(self, sample_prefix=''):
+    samples = {}
+    for label, rate, ewma in self.read():
+      samples[sample_prefix + 'per_' + label] = rate
+      samples[sample_prefix + 'ewma_' + label] = ewma
+    return samples
+
+  def sample(self, sample_prefix=''):
+    return dict((name, str(value)) for name, value in self.sample_values(sample_prefix).items())
@@ -16,7 +16,9 @@
 
 import time
 import threading
-from .metrics import MetricProvider
+from .gauge import AtomicGauge, Label, MutatorGauge
+from .metrics import MetricProvider, sample_values
+from twitter.common.lang import Compatibility
 from twitter.common.quantity import Amount, Time
 
 try:
@@ -28,26 +30,113 @@ class MetricSampler(threading.Thread, MetricProvider):
   """
     A thread that periodically samples from a MetricProvider and caches the
     samples.
+
+    If the provider is a Metrics scope, sampling is incremental: gauges are tracked by
+    their position in its FlatRegistry, gauges of VERSIONED_TYPES whose version is unchanged
+    are not re-read and values are only stringified when they change.
   """
+  # Gauges of exactly these types bump version on every change of the value read() returns;
+  # subclasses may override read() and so are always re-read.
+  VERSIONED_TYPES = (AtomicGauge, Label, MutatorGauge)
+
+  # Values of these types may be compared to decide whether to re-stringify.
+  IMMUTABLE_TYPES = Compatibility.numeric + Compatibility.string + (bool, type(None))
+
   def __init__(self, metric_registry, period = Amount(1, Time.SECONDS)):
     self._registry = metric_registry
     self._period = period
-    self._last_sample = self._registry.sample()
+    self._generation = None
+    self._tracked = []
+    self._versions = []
+    self._providers = []
+    self._last_values = {}
+    self._last_sample = {}
+    self._version = 0
     self._lock = threading.Lock()
     self._shutdown = False
+    self._take_sample()
     threading.Thread.__init__(self)
 
+  def _reindex(self, registry):
+    prefix = self._registry.prefix()
+    strip = len(prefix)
+    self._generation = registry.generation
+    self._tracked = [(name[strip:], gauge) for name, gauge in registry.scoped(prefix)]
+    self._versions = [None] * len(self._tracked)
+    self._providers = [(provider_prefix[strip:], provider)
+                       for provider_prefix, provider in registry.scoped_providers(prefix)]
+
+  def _take_sample(self):
+    if not hasattr(self._registry, 'registry'):
+      new_sample = self._registry.sample()
+      self._publish(new_sample, new_sample, new_sample != self._last_sample)
+      return
+
+    registry = self._registry.registry()
+    if registry.generation != self._generation:
+      self._reindex(registry)
+      values, strings = {}, {}
+      changed = True
+    else:
+      values, strings = dict(self._last_values), dict(self._last_sample)
+      changed = False
+
+    versions = self._versions
+    for k, (name, gauge) in enumerate(self._tracked):
+      version = gauge.version if type(gauge) in self.VERSIONED_TYPES else None
+      if version is not None and version == versions[k]:
+        continue
+      versions[k] = version
+      value = gauge.read()
+      if name in values and isinstance(value, self.IMMUTABLE_TYPES) and (
+          type(value) is type(values[name]) and value == values[name]):
+        continue
+      values[name] = value
+      string = str(value)
+      if strings.get(name) != string:
+        strings[name] = string
+        changed = True
+
+    for provider_prefix, provider in self._providers:
+      for name, value in sample_values(provider, provider_prefix).items():
+        values[name] = value
+        string = str(value)
+        if strings.get(name) != string:
+          strings[name] = string
+          changed = True
+
+    self._publish(values, strings, changed)
+
+  def _publish(self, values, strings, changed):
+    with self._lock:
+      self._last_values, self._last_sample = values, strings
+      if changed:
+        self._version += 1
+
   def sample(self):
     with self._lock:
       return self._last_sample
 
+  def versioned_sample(self):
+    """
+      Return (version, sample) of the most recent sample.  The version only changes when
+      some sampled string does, so it can identify a serialization of the sample.
+    """
+    with self._lock:
+      return self._version, self._last_sample
+
+  def sample_values(self):
+    """
+      Return the most recent sample as typed values rather than strings.
+    """
+    with self._lock:
+      return self._last_values
+
   def run(self):
     if log: log.debug('Starting metric sampler.')
     while not self._shutdown:
       time.sleep(self._period.as_(Time.SECONDS))
-      new_sample = self._registry.sample()
-      with self._lock:
-        self._last_sample = new_sample
+      self._take_sample()
 
   def shutdown(self):
     if log: log.debug('Shutting down metric sampler.')
@@ -2,6 +2,7 @@ __author__ = 'Brian Wickman'
 
 from process_provider_ps import ProcessProvider_PS
 from process_provider_procfs import ProcessProvider_Procfs
+from procfs_snapshot import ProcfsSnapshot, ProcfsSnapshotter
 
 class ProcessProviderFactory(object):
   """
@@ -59,7 +59,7 @@ class ProcessHandleParser(ScanfParser):
   def parse(self, line):
     d = {}
     try:
-      so = ScanfParser.parse(self, ' '.join(line.split()), True)
+      so = self.parse_fields(line.split(), True)
       for attr, value in zip(self._attrs, so.ungrouped()):
         d[attr] = self._handlers[attr](attr, value) if attr in self._handlers else value
     except ScanfParser.ParseError as e:
@@ -100,6 +100,18 @@ class ProcessHandleParserBase(object):
     proc._realize_from_line(line)
     return proc
 
+  @classmethod
+  def from_attrs(cls, attrs):
+    """
+      Construct a handle from attributes already parsed (and post-processed) from a line.
+    """
+    proc = cls()
+    proc._attrs = attrs
+    if attrs:
+      proc._pid = attrs['pid']
+      proc._exists = True
+    return proc
+
   @classmethod
   def init_class(cls):
     if not hasattr(cls, 'PARSER'):
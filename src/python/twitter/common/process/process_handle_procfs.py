@@ -68,6 +68,28 @@ class ProcessHandleProcfs(ProcessHandleParserBase):
     'rss': ProcessHandlersProcfs.handle_mem
   }
 
+  @classmethod
+  def parse_stat(cls, line):
+    """
+      Parse a /proc/<pid>/stat line into the attributes PARSER would, splitting on whitespace
+      after the parenthesized comm rather than matching a regular expression.  Unlike PARSER
+      this also handles a comm containing whitespace.  Returns {} if the line is malformed.
+    """
+    try:
+      head, tail = line.rsplit(')', 1)
+      pid, comm = head.split('(', 1)
+      values = [int(pid), '(%s)' % comm] + tail.split()
+      if len(values) < len(cls.ATTRS):
+        return {}
+      attrs = {}
+      for attr, value in zip(cls.ATTRS, values):
+        if cls.TYPE_MAP[attr] not in ('%s', '%c'):
+          value = int(value)
+        attrs[attr] = cls.HANDLERS[attr](attr, value) if attr in cls.HANDLERS else value
+      return attrs
+    except ValueError:
+      return {}
+
   def _produce(self):
     try:
       with open("/proc/%s/stat" % self._pid) as fp:
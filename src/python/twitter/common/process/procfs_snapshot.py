@@ -0,0 +1,241 @@
+import os
+import time
+from collections import defaultdict
+
+from process_handle_procfs import ProcessHandleProcfs
+from process_provider import ProcessProvider
+
+
+class ProcfsSnapshot(object):
+  """
+    The /proc/<pid>/stat (and optionally statm and status) of every process at one time, as
+    read by a ProcfsSnapshotter, and what changed since the previous snapshot:
+
+      added: pids of processes new since the previous snapshot
+      changed: pids whose stat changed (e.g. they were scheduled)
+      removed: pids of processes gone since the previous snapshot
+
+    A pid reused by a new process is both removed and added.  Only the stat lines of new
+    and changed processes are parsed, and only for the few fields needed to track cpu time
+    and the process tree.  Handles are materialized on request, and the handle of a process
+    whose stat is unchanged is that of the previous snapshot: like any ProcessHandleProcfs
+    its wall_time is as of when it was created.
+  """
+
+  # Offsets of fields in the split remainder of a stat line following "pid (comm)".
+  PPID = 1
+  UTIME = 11
+  STIME = 12
+  STARTTIME = 19
+
+  CLK_TCK = os.sysconf('SC_CLK_TCK')
+
+  @classmethod
+  def _parse(cls, line):
+    """Return (ppid, utime + stime ticks, starttime) of a stat line, or None."""
+    try:
+      fields = line[line.rindex(')') + 2:].split()
+      return (int(fields[cls.PPID]), int(fields[cls.UTIME]) + int(fields[cls.STIME]),
+              int(fields[cls.STARTTIME]))
+    except (ValueError, IndexError):
+      return None
+
+  def __init__(self, timestamp, stats, statms=None, statuses=None, previous=None):
+    """
+      stats, statms and statuses map pids to the contents of their stat, statm and status
+      files.  previous is the prior snapshot of the same processes, if any.
+    """
+    self.timestamp = timestamp
+    self.elapsed = timestamp - previous.timestamp if previous else None
+    self._statms = statms
+    self._statuses = statuses
+    self._fields = {}
+    self._handles = {}
+    self._deltas = {}
+    self._children = None
+    self.added, self.changed = set(), set()
+    previous_stats = previous._stats if previous else {}
+    for pid, stat in stats.items():
+      old = previous_stats.get(pid)
+      if old == stat:
+        self._fields[pid] = previous._fields[pid]
+        if pid in previous._handles:
+          self._handles[pid] = previous._handles[pid]
+        continue
+      fields = self._parse(stat)
+      if fields is None:
+        continue
+      self._fields[pid] = fields
+      old_fields = previous._fields.get(pid) if old is not None else None
+      if old_fields is not None and old_fields[2] == fields[2]:
+        self.changed.add(pid)
+        self._deltas[pid] = fields[1] - old_fields[1]
+      else:
+        self.added.add(pid)
+        # The whole life of a process started since the previous snapshot is new.
+        if previous is not None:
+          self._deltas[pid] = fields[1]
+    self._stats = dict((pid, stats[pid]) for pid in self._fields)
+    self.removed = set(pid for pid in previous_stats if pid not in self._fields or (
+        pid in self.added))
+
+  def _raise_unless_has_pid(self, pid):
+    if pid not in self._fields:
+      raise ProcessProvider.UnknownPidError('Process %s not in snapshot.' % pid)
+
+  def pids(self):
+    """The set of pids in the snapshot."""
+    return set(self._fields)
+
+  def __contains__(self, pid):
+    return pid in self._fields
+
+  def __len__(self):
+    return len(self._fields)
+
+  def ppid(self, pid):
+    self._raise_unless_has_pid(pid)
+    return self._fields[pid][0]
+
+  def children_of(self, pid, all=False):
+    """
+      The set of pids of the children of pid, or with all=True of all its descendants.
+    """
+    self._raise_unless_has_pid(pid)
+    if self._children is None:
+      children = defaultdict(set)
+      for child, fields in self._fields.items():
+        children[fields[0]].add(child)
+      self._children = children
+    if not all:
+      return set(self._children.get(pid, ()))
+    descendants, parents = set(), [pid]
+    while parents:
+      for child in self._children.get(parents.pop(), ()):
+        if child not in descendants:
+          descendants.add(child)
+          parents.append(child)
+    return descendants
+
+  def cpu_time(self, pid):
+    """The user and system cpu seconds used by pid."""
+    self._raise_unless_has_pid(pid)
+    return 1.0 * self._fields[pid][1] / self.CLK_TCK
+
+  def cpu_delta(self, pid):
+    """
+      The cpu seconds used by pid since the previous snapshot, or None for every process of
+      the first snapshot.
+    """
+    self._raise_unless_has_pid(pid)
+    if self.elapsed is None:
+      return None
+    return 1.0 * self._deltas.get(pid, 0) / self.CLK_TCK
+
+  def cpu_deltas(self):
+    """
+      Map the pids that used cpu since the previous snapshot to the seconds they used.
+    """
+    return dict((pid, 1.0 * ticks / self.CLK_TCK) for pid, ticks in self._deltas.items()
+                if ticks)
+
+  def get_handle(self, pid):
+    """A ProcessHandleProcfs of pid as of this snapshot."""
+    self._raise_unless_has_pid(pid)
+    handle = self._handles.get(pid)
+    if handle is None:
+      handle = self._handles[pid] = ProcessHandleProcfs.from_attrs(
+          ProcessHandleProcfs.parse_stat(self._stats[pid]))
+    return handle
+
+  def statm(self, pid):
+    """
+      The (size, resident, shared, text, lib, data, dt) of pid in pages, or None if not
+      collected.
+    """
+    self._raise_unless_has_pid(pid)
+    statm = self._statms.get(pid) if self._statms is not None else None
+    return tuple(map(int, statm.split())) if statm else None
+
+  def status(self, pid):
+    """
+      The fields of the status of pid as a dict of strings, or None if not collected.
+    """
+    self._raise_unless_has_pid(pid)
+    status = self._statuses.get(pid) if self._statuses is not None else None
+    if not status:
+      return None
+    fields = {}
+    for line in status.splitlines():
+      key, _, value = line.partition(':')
+      fields[key] = value.strip()
+    return fields
+
+
+class ProcfsSnapshotter(object):
+  """
+    Takes successive ProcfsSnapshots of all processes, e.g. for a monitoring loop:
+
+      snapshotter = ProcfsSnapshotter()
+      while True:
+        snapshot = snapshotter.snapshot()
+        for pid, seconds in snapshot.cpu_deltas().items():
+          ...
+        time.sleep(5)
+
+    Files are read with a single os.read of a fixed size each rather than through Python
+    file objects.
+  """
+
+  READ_SIZE = 4096
+
+  def __init__(self, root='/proc', statm=False, status=False, clock=time):
+    """
+      root: the procfs mount point.
+      statm, status: also read each process' statm or status.
+    """
+    self._root = root
+    self._statm = statm
+    self._status = status
+    self._clock = clock
+    self._last = None
+
+  def _read(self, path):
+    try:
+      fd = os.open(path, os.O_RDONLY)
+    except OSError:
+      return None
+    try:
+      data = os.read(fd, self.READ_SIZE)
+      if len(data) == self.READ_SIZE:
+        chunks = [data]
+        while data:
+          data = os.read(fd, self.READ_SIZE)
+          chunks.append(data)
+        data = ''.join(chunks)
+      return data
+    except OSError:
+      return None
+    finally:
+      os.close(fd)
+
+  def _pids(self):
+    return [int(name) for name in os.listdir(self._root) if name.isdigit()]
+
+  def snapshot(self):
+    """Read all processes and return a ProcfsSnapshot diffed against the previous one."""
+    timestamp = self._clock.time()
+    read = self._read
+    stats, statms, statuses = {}, {} if self._statm else None, {} if self._status else None
+    for pid in self._pids():
+      directory = '%s/%d/' % (self._root, pid)
+      stat = read(directory + 'stat')
+      if stat is None:
+        continue
+      stats[pid] = stat
+      if statms is not None:
+        statms[pid] = read(directory + 'statm')
+      if statuses is not None:
+        statuses[pid] = read(directory + 'status')
+    self._last = ProcfsSnapshot(timestamp, stats, statms, statuses, previous=self._last)
+    return self._last
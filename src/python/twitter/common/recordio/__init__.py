@@ -17,15 +17,20 @@
 __author__ = 'Brian Wickman'
 
 from .recordio import *
+from .mmap_recordio import MmapRecordReader, RecordIndex
 
 __all__ = [
   'RecordIO',
   'RecordWriter',
   'RecordReader',
+  'BufferedRecordReader',
+  'CompressedRecordWriter',
+  'MmapRecordReader',
+  'RecordIndex',
 ]
 
 try:
   from .thrift_recordio import *
-  __all__ += [ 'ThriftRecordReader', 'ThriftRecordWriter' ]
+  __all__ += [ 'ThriftRecordReader', 'ThriftRecordWriter', 'ParallelThriftRecordReader' ]
 except ImportError:
   pass
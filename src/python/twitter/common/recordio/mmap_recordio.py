@@ -0,0 +1,309 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+from twitter.common import log
+
+from .recordio import RecordIO
+
+try:
+  # Python 2.x: mmap objects do not support the new buffer protocol, so memoryview is unavailable.
+  _view = buffer
+except NameError:
+  def _view(data, offset, size):
+    return memoryview(data)[offset:offset + size]
+
+
+class RecordIndex(object):
+  """
+    A sidecar index mapping record number to byte offset for a RecordIO file.
+
+    The index is stored next to the data file as <filename>.idx and consists of a header
+    identifying the indexed data followed by big-endian 64-bit offsets: the start of each
+    complete record, followed by the offset just past the last indexed record.  The header
+    holds the inode of the data file and a CRC32 of the CHECK_BYTES of data preceding the
+    end of the index, so that a data file replaced or rewritten with other contents is not
+    misframed by a stale index.  The index is extended incrementally as the data file grows
+    and rebuilt from scratch if it is missing, malformed, describes more data than the file
+    holds or no longer matches it.
+  """
+  SUFFIX = '.idx'
+  HEADER = struct.Struct('>QL')  # inode, crc32
+  ENTRY = struct.Struct('>Q')
+  CHECK_BYTES = 4096
+
+  @classmethod
+  def index_filename(cls, filename):
+    return filename + cls.SUFFIX
+
+  def __init__(self, filename):
+    self._filename = filename
+    self._reset()
+    self._load()
+
+  def _reset(self):
+    self._entries = bytearray(self.ENTRY.pack(0))
+    self._inode = None
+    self._checksum = 0
+
+  def _load(self):
+    try:
+      with open(RecordIndex.index_filename(self._filename), 'rb') as fp:
+        data = fp.read()
+    except (IOError, OSError):
+      return
+    entries = len(data) - self.HEADER.size
+    if entries < self.ENTRY.size or entries % self.ENTRY.size != 0:
+      return
+    inode, self._checksum = self.HEADER.unpack_from(data)
+    self._inode = inode or None
+    self._entries = bytearray(data[self.HEADER.size:])
+
+  def _checksum_of(self, data, end):
+    return zlib.crc32(bytes(data[max(0, end - self.CHECK_BYTES):end])) & 0xFFFFFFFF
+
+  def _matches(self, data, size, inode):
+    end = self.end
+    if end > size:
+      return False
+    if inode is not None and self._inode is not None and inode != self._inode:
+      return False
+    return end == 0 or self._checksum_of(data, end) == self._checksum
+
+  def __len__(self):
+    return len(self._entries) // self.ENTRY.size - 1
+
+  @property
+  def end(self):
+    """
+      The offset just past the last indexed record.
+    """
+    return self.ENTRY.unpack_from(self._entries, len(self._entries) - self.ENTRY.size)[0]
+
+  def span(self, index):
+    """
+      Return (offset, length) of the payload of record number index.
+    """
+    start, end = struct.unpack_from('>QQ', self._entries, index * self.ENTRY.size)
+    return start + 4, end - start - 4
+
+  def offset(self, index):
+    """
+      Return the byte offset of the frame of record number index.  The offset of
+      record len(self) is the end of the indexed data.
+    """
+    return self.ENTRY.unpack_from(self._entries, index * self.ENTRY.size)[0]
+
+  def update(self, data, size, inode=None):
+    """
+      Extend the index with any complete records in the first size bytes of data (an mmap
+      or string of the file contents) past the current end of the index, rebuilding it if
+      it does not match data or the inode of the data file.
+
+      Returns True if the index changed.
+
+      May raise:
+        RecordIO.RecordSizeExceeded, after indexing the records preceding the oversized
+          frame.
+    """
+    changed = False
+    if not self._matches(data, size, inode):
+      log.debug('Index of %s does not match the file, rebuilding.' % self._filename)
+      self._reset()
+      changed = True
+    if inode is not None:
+      self._inode = inode
+    end = self.end
+    offsets = []
+    try:
+      while end + 4 <= size:
+        blob_len = struct.unpack_from('>L', data, end)[0]
+        if blob_len > RecordIO.SANITY_CHECK_BYTES:
+          raise RecordIO.RecordSizeExceeded()
+        if end + 4 + blob_len > size:
+          break
+        end += 4 + blob_len
+        offsets.append(end)
+    finally:
+      if offsets:
+        self._entries.extend(struct.pack('>%dQ' % len(offsets), *offsets))
+        self._checksum = self._checksum_of(data, end)
+        changed = True
+    return changed
+
+  def write(self):
+    """
+      Atomically persist the index alongside the data file.  Failure to write the index
+      (e.g. in a read-only directory) is logged and otherwise ignored.
+    """
+    index_filename = RecordIndex.index_filename(self._filename)
+    try:
+      fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_filename)),
+                                 prefix=os.path.basename(index_filename) + '.')
+      try:
+        with os.fdopen(fd, 'wb') as fp:
+          fp.write(self.HEADER.pack(self._inode or 0, self._checksum))
+          fp.write(self._entries)
+        os.rename(tmp, index_filename)
+      except:
+        os.unlink(tmp)
+        raise
+    except (IOError, OSError) as e:
+      log.debug('Failed to write record index %s: %s' % (index_filename, e))
+
+
+class MmapRecordReader(RecordIO.Reader):
+  """
+    Read framed records from a memory-mapped RecordIO file with O(1) random access.
+
+    Records are located through a RecordIndex sidecar that is kept up to date with the
+    file, and view() returns payloads as zero-copy slices of the mapping.  A reader may
+    be restricted to the records [start, stop) so that one file can be split across
+    several workers, see ranges().
+
+    Only version 1 streams can be indexed by record: version 2 streams (see
+    CompressedRecordWriter) are rejected.
+  """
+
+  def __init__(self, fp, codec=None, start=0, stop=None):
+    """
+      Initialize a MmapRecordReader from the file pointer fp of a file on disk, decoding
+      records with codec (RecordIO.StringCodec by default.)
+
+      May raise:
+        RecordIO.InvalidFileHandle if fp is a version 2 stream.
+    """
+    RecordIO.Reader.__init__(self, fp, codec or RecordIO.StringCodec())
+    self._index = RecordIndex(self._fp.name)
+    self._data = None
+    self._size = 0
+    self._start = start
+    self._stop = stop
+    self._cursor = start
+    self.refresh()
+
+  def refresh(self):
+    """
+      Remap the file and extend the index with any records appended since the last
+      refresh.
+    """
+    st = os.fstat(self._fp.fileno())
+    size = st.st_size
+    if size != self._size or self._data is None:
+      # The previous mapping is left to be reclaimed once no outstanding views refer to it.
+      self._data = mmap.mmap(self._fp.fileno(), size, access=mmap.ACCESS_READ) if size else b''
+      self._size = size
+      magic = RecordIO.Blocks.FILE_MAGIC
+      if self._data[:len(magic)] == magic:
+        raise RecordIO.InvalidFileHandle(
+            '%s is a version 2 stream, which cannot be memory mapped by record.' % self._fp.name)
+    if self._index.update(self._data, self._size, st.st_ino):
+      self._index.write()
+
+  def close(self):
+    if self._data:
+      try:
+        self._data.close()
+      except BufferError:
+        pass
+    self._data = None
+    RecordIO.Reader.close(self)
+
+  @property
+  def stop(self):
+    return len(self._index) if self._stop is None else min(self._stop, len(self._index))
+
+  def __len__(self):
+    return max(0, self.stop - self._start)
+
+  def _locate(self, index):
+    if index < 0:
+      index += len(self)
+    if not 0 <= index < len(self):
+      raise IndexError('record index out of range')
+    return self._start + index
+
+  def view(self, index):
+    """
+      Return the payload of record number index as a zero-copy view of the file.  The view
+      is only valid until the reader is closed.
+    """
+    return _view(self._data, *self._index.span(self._locate(index)))
+
+  def __getitem__(self, index):
+    return self._codec.decode(bytes(self.view(index)))
+
+  def views(self):
+    """
+      Iterate over zero-copy views of every record in this reader's range.
+    """
+    for index in range(len(self)):
+      yield self.view(index)
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield self[index]
+
+  def seek_record(self, index):
+    """
+      Position the reader so that the next read() returns record number index.
+    """
+    self._cursor = self._start + max(0, min(index, len(self)))
+
+  def tell_record(self):
+    return self._cursor - self._start
+
+  def read(self):
+    """
+      Read the next record from this reader's range.
+
+      Returns the decoded record or None if no data is available.
+    """
+    if self._cursor >= self.stop:
+      self.refresh()
+      if self._cursor >= self.stop:
+        return None
+    record = self[self._cursor - self._start]
+    self._cursor += 1
+    return record
+
+  def try_read(self):
+    return self.read()
+
+  def byte_range(self, start, stop):
+    """
+      Return the (start, end) byte offsets in the file spanning the frames of the records
+      [start, stop) of this reader's range.
+    """
+    start = self._start + max(0, min(start, len(self)))
+    stop = self._start + max(0, min(stop, len(self)))
+    return self._index.offset(start), self._index.offset(max(start, stop))
+
+  def ranges(self, count):
+    """
+      Split this reader's records into at most count contiguous, balanced (start, stop)
+      ranges suitable for constructing a MmapRecordReader per worker.
+    """
+    total = len(self)
+    count = max(1, min(count, total))
+    return [(self._start + total * k // count, self._start + total * (k + 1) // count)
+            for k in range(count)]
+
@@ -14,9 +14,17 @@
 # limitations under the License.
 # ==================================================================================================
 
+from collections import deque
 import os
 import struct
 import errno
+import time
+import zlib
+
+try:
+  import bz2
+except ImportError:
+  bz2 = None
 
 from twitter.common import log
 from twitter.common.lang import Compatibility
@@ -29,6 +37,7 @@ class RecordIO(object):
   class InvalidArgument(Exception): pass
   class UnimplementedException(Exception): pass
   class InvalidCodec(Exception): pass
+  class CorruptBlock(Exception): pass
 
   # Maximum record size
   SANITY_CHECK_BYTES = 64 * 1024 * 1024
@@ -105,6 +114,8 @@ class RecordIO(object):
       if ('w' in self._fp.mode or 'a' in self._fp.mode) and '+' not in self._fp.mode:
         raise RecordIO.InvalidFileHandle(
           'Filehandle supplied to RecordReader does not appear to be readable!')
+      self._version = None
+      self._pending = deque()
 
     def __iter__(self):
       """
@@ -125,15 +136,46 @@ class RecordIO(object):
         return
 
       try:
-        while True:
-          blob = RecordIO.Reader.do_read(cur_fp, self._codec)
-          if blob:
-            yield blob
-          else:
-            break
+        for blob in self._iter_records(cur_fp):
+          yield blob
       finally:
         cur_fp.close()
 
+    def _iter_records(self, fp):
+      if RecordIO.Reader.detect_version(fp) == 2:
+        for blob in RecordIO.Blocks.iter_payloads(fp):
+          yield self._codec.decode(blob)
+        return
+      while True:
+        blob = RecordIO.Reader.do_read(fp, self._codec)
+        if blob:
+          yield blob
+        else:
+          break
+
+    @staticmethod
+    def detect_version(fp):
+      """
+        Detect the framing version of the stream fp.  If fp is at the start of a version 2
+        stream, its header is consumed.
+
+        Returns 2 for a version 2 stream, 1 for a version 1 stream and None if there is
+        not yet enough data to tell.
+      """
+      if fp.tell() != 0:
+        return 1
+      magic = fp.read(len(RecordIO.Blocks.FILE_MAGIC))
+      if magic == RecordIO.Blocks.FILE_MAGIC:
+        return 2
+      fp.seek(0)
+      if RecordIO.Blocks.FILE_MAGIC.startswith(magic):
+        return None
+      return 1
+
+    def _detect(self):
+      if self._version is None:
+        self._version = RecordIO.Reader.detect_version(self._fp)
+
     @staticmethod
     def do_read(fp, decoder):
       blob = fp.read(4)
@@ -169,45 +211,409 @@ class RecordIO(object):
           RecordIO.PrematureEndOfStream if the stream is truncated in the middle of
             and expected message
           RecordIO.RecordSizeExceeded if the message exceeds RecordIO.SANITY_CHECK_BYTES
+          RecordIO.CorruptBlock if a version 2 block fails its checksum
       """
-      return RecordIO.Reader.do_read(self._fp, self._codec)
+      self._detect()
+      if self._version != 2:
+        return RecordIO.Reader.do_read(self._fp, self._codec)
+      while not self._pending:
+        payloads = RecordIO.Blocks.read_block(self._fp)
+        if payloads is None:
+          return None
+        self._pending.extend(payloads)
+      return self._codec.decode(self._pending.popleft())
 
     def try_read(self):
       """
         Attempt to read a single record from the stream.  Only updates the file position
-        if a read was successful.
+        if a read was successful.  Corrupt version 2 blocks are skipped by scanning ahead
+        for the next valid block header.
+
+        Returns string blob or None if no data available.
+
+        May raise:
+          RecordIO.RecordSizeExceeded
+      """
+      self._detect()
+      while True:
+        pos = self._fp.tell()
+        read_blob = None
+        try:
+          read_blob = self.read()
+        except RecordIO.PrematureEndOfStream as e:
+          log.debug('Got premature end of stream [%s], skipping - %s' % (self._fp.name, e))
+          self._fp.seek(pos)
+          return None
+        except RecordIO.CorruptBlock as e:
+          log.warning('Corrupt block at %s:%d, resyncing - %s' % (self._fp.name, pos, e))
+          if not RecordIO.Blocks.resync(self._fp, pos):
+            return None
+          continue
+        return read_blob
+
+    def read_batch(self, n):
+      """
+        Read up to n records from this stream.  Stops early if no more data is available,
+        so the returned list may be shorter than n (or empty.)
+
+        May raise:
+          RecordIO.PrematureEndOfStream
+          RecordIO.RecordSizeExceeded
+      """
+      records = []
+      while len(records) < n:
+        blob = self.read()
+        if blob is None:
+          break
+        records.append(blob)
+      return records
+
+  class FrameBuffer(object):
+    """
+      Frames records out of large block reads of an underlying file pointer rather than
+      issuing two small reads per record.
+
+      Bytes are only consumed from the buffer once a complete frame is available, so a
+      truncated trailing record is left in place and may be completed by later appends.
+    """
+    def __init__(self, fp, buffer_size):
+      self._fp = fp
+      self._buffer_size = buffer_size
+      self._buffer = b''
+      self._offset = 0
+
+    def tell(self):
+      """
+        The logical position of the next unconsumed frame in the underlying file.
+      """
+      return self._fp.tell() - (len(self._buffer) - self._offset)
+
+    def _fill(self, length):
+      available = len(self._buffer) - self._offset
+      if available >= length:
+        return True
+      chunks = [self._buffer[self._offset:]]
+      while available < length:
+        chunk = self._fp.read(max(self._buffer_size, length - available))
+        if not chunk:
+          # Reset EOF so that subsequent reads see data appended after this point.
+          self._fp.seek(self._fp.tell())
+          break
+        chunks.append(chunk)
+        available += len(chunk)
+      self._buffer = b''.join(chunks)
+      self._offset = 0
+      return available >= length
+
+    def next_frame(self):
+      """
+        Return the payload of the next frame, or None if no data is available.
+
+        May raise:
+          RecordIO.PrematureEndOfStream
+          RecordIO.RecordSizeExceeded
+      """
+      if not self._fill(4):
+        available = len(self._buffer) - self._offset
+        if available == 0:
+          return None
+        raise RecordIO.PrematureEndOfStream("Expected 4 bytes, got %d" % available)
+      blob_len = struct.unpack_from('>L', self._buffer, self._offset)[0]
+      if blob_len > RecordIO.SANITY_CHECK_BYTES:
+        raise RecordIO.RecordSizeExceeded()
+      if not self._fill(4 + blob_len):
+        raise RecordIO.PrematureEndOfStream()
+      start = self._offset + 4
+      self._offset = start + blob_len
+      return self._buffer[start:self._offset]
+
+  class BufferedReader(Reader):
+    DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, fp, codec, buffer_size=DEFAULT_BUFFER_SIZE):
+      """
+        Initialize a Reader from the file pointer fp that reads buffer_size blocks at a
+        time and frames records out of them.  Version 2 streams are detected and read by
+        block as RecordIO.Reader does.
+
+        Since data is read ahead of the records returned, the position of fp is not
+        meaningful while reading; use tell() for the offset of the next record.
+      """
+      RecordIO.Reader.__init__(self, fp, codec)
+      self._buffer_size = buffer_size
+      self._frames = RecordIO.FrameBuffer(self._fp, buffer_size)
+
+    def _iter_records(self, fp):
+      if RecordIO.Reader.detect_version(fp) == 2:
+        for blob in RecordIO.Blocks.iter_payloads(fp):
+          yield self._codec.decode(blob)
+        return
+      frames = RecordIO.FrameBuffer(fp, self._buffer_size)
+      while True:
+        blob = frames.next_frame()
+        if blob:
+          yield self._codec.decode(blob)
+        else:
+          break
+
+    def tell(self):
+      if self._version == 2:
+        return self._fp.tell()
+      return self._frames.tell()
+
+    def read(self):
+      """
+        Read a single record from this stream.  Unlike RecordIO.Reader.read, the stream
+        position of a version 1 stream is only advanced on success.
 
         Returns string blob or None if no data available.
 
         May raise:
+          RecordIO.PrematureEndOfStream
           RecordIO.RecordSizeExceeded
+          RecordIO.CorruptBlock if a version 2 block fails its checksum
       """
-      pos = self._fp.tell()
-      read_blob = None
+      self._detect()
+      if self._version is None:
+        # Fewer bytes than a version 2 header, hence no complete version 1 frame either.
+        return None
+      if self._version == 2:
+        return RecordIO.Reader.read(self)
+      blob = self._frames.next_frame()
+      if blob is None:
+        return None
+      return self._codec.decode(blob)
+
+    def try_read(self):
+      self._detect()
+      if self._version == 2:
+        return RecordIO.Reader.try_read(self)
       try:
-        read_blob = self.read()
+        return self.read()
       except RecordIO.PrematureEndOfStream as e:
         log.debug('Got premature end of stream [%s], skipping - %s' % (self._fp.name, e))
-        self._fp.seek(pos)
         return None
-      return read_blob
+
+  class Blocks(object):
+    """
+      Version 2 framing.
+
+      A version 2 stream starts with FILE_MAGIC and is followed by blocks, each a HEADER
+      of (BLOCK_MAGIC, compression, record count, payload length, payload crc32, header
+      crc32) and then the payload: the version 1 frames of its records, compressed as a
+      unit.  The first byte of FILE_MAGIC makes it an invalid version 1 frame length, so
+      readers tell the versions apart on their own.
+    """
+    FILE_MAGIC = b'RIO\x02'
+    BLOCK_MAGIC = b'\xb1\x0cK\x02'
+    HEADER = struct.Struct('>4sBLLLL')
+    SCAN_BYTES = 1024 * 1024
+
+    NONE, ZLIB, BZ2 = range(3)
+    COMPRESSION = {
+      'none': NONE,
+      'zlib': ZLIB,
+      'bz2': BZ2,
+    }
+
+    @staticmethod
+    def _crc(data):
+      return zlib.crc32(data) & 0xffffffff
+
+    @staticmethod
+    def compression(name):
+      """
+        Return the compression identifier for name, one of the keys of COMPRESSION.
+
+        May raise:
+          RecordIO.InvalidArgument if the compression is unknown or unavailable.
+      """
+      if name not in RecordIO.Blocks.COMPRESSION:
+        raise RecordIO.InvalidArgument('Unknown compression: %s' % name)
+      if name == 'bz2' and bz2 is None:
+        raise RecordIO.InvalidArgument('bz2 compression is unavailable.')
+      return RecordIO.Blocks.COMPRESSION[name]
+
+    @staticmethod
+    def encode(compression, frames, count):
+      """
+        Given the concatenated version 1 frames of count records, return the encoded block.
+      """
+      if compression == RecordIO.Blocks.ZLIB:
+        payload = zlib.compress(frames)
+      elif compression == RecordIO.Blocks.BZ2:
+        payload = bz2.compress(frames)
+      else:
+        payload = frames
+      header = RecordIO.Blocks.HEADER.pack(RecordIO.Blocks.BLOCK_MAGIC, compression, count,
+          len(payload), RecordIO.Blocks._crc(payload), 0)
+      header = header[:-4] + struct.pack('>L', RecordIO.Blocks._crc(header[:-4]))
+      return header + payload
+
+    @staticmethod
+    def parse_header(header):
+      """
+        Returns (compression, count, length, crc) of the block header.
+
+        May raise:
+          RecordIO.CorruptBlock
+      """
+      magic, compression, count, length, crc, header_crc = RecordIO.Blocks.HEADER.unpack(header)
+      if magic != RecordIO.Blocks.BLOCK_MAGIC:
+        raise RecordIO.CorruptBlock('Bad block magic.')
+      if RecordIO.Blocks._crc(header[:-4]) != header_crc:
+        raise RecordIO.CorruptBlock('Block header checksum mismatch.')
+      if compression not in RecordIO.Blocks.COMPRESSION.values():
+        raise RecordIO.CorruptBlock('Unknown block compression %d.' % compression)
+      if length > RecordIO.SANITY_CHECK_BYTES:
+        raise RecordIO.RecordSizeExceeded()
+      return compression, count, length, crc
+
+    @staticmethod
+    def decode(compression, count, payload):
+      """
+        Return the list of record payloads in the decoded block.
+
+        May raise:
+          RecordIO.CorruptBlock
+      """
+      try:
+        if compression == RecordIO.Blocks.ZLIB:
+          frames = zlib.decompress(payload)
+        elif compression == RecordIO.Blocks.BZ2:
+          if bz2 is None:
+            raise RecordIO.InvalidCodec('bz2 compression is unavailable.')
+          frames = bz2.decompress(payload)
+        else:
+          frames = payload
+      except (IOError, ValueError, zlib.error) as e:
+        raise RecordIO.CorruptBlock('Failed to decompress block: %s' % e)
+      payloads = []
+      offset = 0
+      for _ in range(count):
+        if offset + 4 > len(frames):
+          raise RecordIO.CorruptBlock('Block truncated.')
+        blob_len = struct.unpack_from('>L', frames, offset)[0]
+        offset += 4
+        payloads.append(frames[offset:offset + blob_len])
+        offset += blob_len
+      if offset != len(frames):
+        raise RecordIO.CorruptBlock('Block length mismatch.')
+      return payloads
+
+    @staticmethod
+    def read_block(fp):
+      """
+        Read the next block from fp.
+
+        Returns the list of record payloads in the block, or None if no data available.
+
+        May raise:
+          RecordIO.PrematureEndOfStream
+          RecordIO.CorruptBlock
+      """
+      header = fp.read(RecordIO.Blocks.HEADER.size)
+      if len(header) == 0:
+        # Reset EOF
+        fp.seek(fp.tell())
+        return None
+      if len(header) != RecordIO.Blocks.HEADER.size:
+        raise RecordIO.PrematureEndOfStream("Expected %d bytes, got %d" % (
+            RecordIO.Blocks.HEADER.size, len(header)))
+      compression, count, length, crc = RecordIO.Blocks.parse_header(header)
+      payload = fp.read(length)
+      if len(payload) != length:
+        raise RecordIO.PrematureEndOfStream()
+      if RecordIO.Blocks._crc(payload) != crc:
+        raise RecordIO.CorruptBlock('Block checksum mismatch.')
+      return RecordIO.Blocks.decode(compression, count, payload)
+
+    @staticmethod
+    def iter_payloads(fp):
+      while True:
+        payloads = RecordIO.Blocks.read_block(fp)
+        if payloads is None:
+          break
+        for payload in payloads:
+          yield payload
+
+    @staticmethod
+    def resync(fp, pos):
+      """
+        Position fp at the first valid block header after the corrupt block at pos.
+
+        Returns True if one was found.  Otherwise returns False and leaves fp where a block
+        header appended to the stream later would be found.
+      """
+      magic = RecordIO.Blocks.BLOCK_MAGIC
+      offset = pos + 1
+      fp.seek(offset)
+      window = b''
+      while True:
+        chunk = fp.read(RecordIO.Blocks.SCAN_BYTES)
+        window += chunk
+        index = window.find(magic)
+        while index != -1 and index + RecordIO.Blocks.HEADER.size <= len(window):
+          try:
+            RecordIO.Blocks.parse_header(window[index:index + RecordIO.Blocks.HEADER.size])
+            fp.seek(offset + index)
+            return True
+          except (RecordIO.CorruptBlock, RecordIO.RecordSizeExceeded):
+            index = window.find(magic, index + 1)
+        # Retain a possibly incomplete header at the end of the window.
+        keep = index if index != -1 else max(0, len(window) - len(magic) + 1)
+        if not chunk:
+          fp.seek(offset + keep)
+          return False
+        window = window[keep:]
+        offset += keep
 
   class Writer(Stream):
-    def __init__(self, fp, codec, sync=False):
+    def __init__(self, fp, codec, sync=False, sync_interval=None, clock=time):
       """
         Initialize a Writer from the file pointer fp.
 
         If sync=True is supplied, then all mutations are fsynced after write, otherwise
         standard filesystem buffering is employed.
+
+        If sync_interval (in seconds) is also supplied, fsyncs are group committed: at
+        most one fsync is issued per interval, and writes made in between are fsynced by
+        the next write after the interval elapses, by sync() or by close().
       """
       RecordIO.Stream.__init__(self, fp, codec)
       if 'w' not in self._fp.mode and 'a' not in self._fp.mode and '+' not in self._fp.mode:
         raise RecordIO.InvalidFileHandle(
           'Filehandle supplied to RecordWriter does not appear to be writeable!')
-      self.set_sync(sync)
+      self._clock = clock
+      self._last_sync = None
+      self._dirty = False
+      self.set_sync(sync, sync_interval)
 
-    def set_sync(self, value):
+    def set_sync(self, value, interval=None):
       self._sync = bool(value)
+      self._sync_interval = interval
+
+    def sync(self):
+      """
+        fsync any writes that have not yet been group committed.
+      """
+      if self._dirty:
+        RecordIO.Writer._fsync(self._fp)
+        self._last_sync = self._clock.time()
+        self._dirty = False
+
+    def _maybe_sync(self):
+      if not self._sync:
+        return
+      self._dirty = True
+      if self._sync_interval is None or self._last_sync is None or (
+          self._clock.time() - self._last_sync >= self._sync_interval):
+        self.sync()
+
+    def close(self):
+      if self._sync:
+        self.sync()
+      RecordIO.Stream.close(self)
 
     @staticmethod
     def _fsync(fp):
@@ -239,6 +645,34 @@ class RecordIO(object):
         RecordIO.Writer._fsync(fp)
       return True
 
+    @staticmethod
+    def do_write_batch(fp, inputs, codec, sync=False):
+      """
+        Write a sequence of records to the current fp using the supplied codec.  The
+        framed records are byte-identical to those written by do_write, but are issued
+        as a single write followed by at most one fsync.
+
+        Returns True on success, False on any filesystem failure.
+
+        May raise:
+          RecordIO.UnknownTypeException if any input is not a string.
+      """
+      frames = []
+      for input in inputs:
+        blob = codec.encode(input)
+        frames.append(struct.pack(">L", len(blob)))
+        frames.append(blob)
+      if not frames:
+        return True
+      try:
+        fp.write(b''.join(frames))
+      except Exception as e:
+        log.debug("Got exception in write(%s): %s" % (fp.name, e))
+        return False
+      if sync:
+        RecordIO.Writer._fsync(fp)
+      return True
+
     @staticmethod
     def append(filename, input, codec):
       """
@@ -271,7 +705,111 @@ class RecordIO(object):
         May raise:
           RecordIO.UnknownTypeException if blob is not a string.
       """
-      return RecordIO.Writer.do_write(self._fp, blob, self._codec, sync=self._sync)
+      if not RecordIO.Writer.do_write(self._fp, blob, self._codec):
+        return False
+      self._maybe_sync()
+      return True
+
+    def write_batch(self, blobs):
+      """
+        Append each blob in blobs to the current RecordWriter with a single write.  If the
+        writer is synced, the whole batch is committed with one fsync.
+
+        Returns True on success, False on any filesystem failure.
+
+        May raise:
+          RecordIO.UnknownTypeException if any blob is not a string.
+      """
+      if not RecordIO.Writer.do_write_batch(self._fp, blobs, self._codec):
+        return False
+      self._maybe_sync()
+      return True
+
+  class BlockWriter(Writer):
+    DEFAULT_BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, fp, codec, compression='zlib', block_size=DEFAULT_BLOCK_SIZE, sync=False,
+                 sync_interval=None, clock=time):
+      """
+        Initialize a Writer of version 2 (compressed, checksummed) framing from the file
+        pointer fp.  Records are buffered and written out as a block once block_size bytes
+        of them are pending, on flush() or on close().  If the writer is synced, every
+        write is flushed as its own block.
+
+        compression is one of RecordIO.Blocks.COMPRESSION.  An fp that already contains
+        data must be a version 2 stream.
+      """
+      RecordIO.Writer.__init__(self, fp, codec, sync, sync_interval, clock)
+      self._compression = RecordIO.Blocks.compression(compression)
+      self._block_size = block_size
+      self._frames = []
+      self._frame_bytes = 0
+      self._write_header()
+
+    def _write_header(self):
+      self._fp.flush()
+      if os.fstat(self._fp.fileno()).st_size == 0:
+        self._fp.write(RecordIO.Blocks.FILE_MAGIC)
+        return
+      with open(self._fp.name, 'rb') as fp:
+        if fp.read(len(RecordIO.Blocks.FILE_MAGIC)) != RecordIO.Blocks.FILE_MAGIC:
+          raise RecordIO.InvalidFileHandle(
+            'Filehandle supplied to BlockWriter is not a version 2 RecordIO stream!')
+
+    @staticmethod
+    def append(filename, input, codec):
+      raise RecordIO.UnimplementedException('BlockWriter does not support append.')
+
+    def _buffer(self, blob):
+      self._frames.append(struct.pack(">L", len(blob)))
+      self._frames.append(blob)
+      self._frame_bytes += 4 + len(blob)
+
+    def flush(self):
+      """
+        Write out any buffered records as a block.
+
+        Returns True on success, False on any filesystem failure.
+      """
+      if not self._frames:
+        return True
+      block = RecordIO.Blocks.encode(self._compression, b''.join(self._frames),
+          len(self._frames) // 2)
+      self._frames = []
+      self._frame_bytes = 0
+      try:
+        self._fp.write(block)
+      except Exception as e:
+        log.debug("Got exception in write(%s): %s" % (self._fp.name, e))
+        return False
+      self._maybe_sync()
+      return True
+
+    def _maybe_flush(self):
+      if self._sync or self._frame_bytes >= self._block_size:
+        return self.flush()
+      return True
+
+    def write(self, blob):
+      """
+        Append the blob to the current block.
+
+        Returns True on success, False on any filesystem failure.
+
+        May raise:
+          RecordIO.UnknownTypeException if blob is not a string.
+      """
+      self._buffer(self._codec.encode(blob))
+      return self._maybe_flush()
+
+    def write_batch(self, blobs):
+      for blob in blobs:
+        self._buffer(self._codec.encode(blob))
+      return self._maybe_flush()
+
+    def close(self):
+      self.flush()
+      RecordIO.Writer.close(self)
 
 class RecordWriter(RecordIO.Writer):
   """
@@ -292,3 +830,18 @@ class RecordReader(RecordIO.Reader):
   """
   def __init__(self, fp):
     RecordIO.Reader.__init__(self, fp, RecordIO.StringCodec())
+
+class BufferedRecordReader(RecordIO.BufferedReader):
+  """
+    Read framed string records from a RecordWriter stream in large blocks.
+  """
+  def __init__(self, fp, buffer_size=RecordIO.BufferedReader.DEFAULT_BUFFER_SIZE):
+    RecordIO.BufferedReader.__init__(self, fp, RecordIO.StringCodec(), buffer_size)
+
+class CompressedRecordWriter(RecordIO.BlockWriter):
+  """
+    Write string records to a stream in compressed, checksummed version 2 framing.  The
+    stream may be read by RecordReader.
+  """
+  def __init__(self, fp, compression='zlib', block_size=RecordIO.BlockWriter.DEFAULT_BLOCK_SIZE):
+    RecordIO.BlockWriter.__init__(self, fp, RecordIO.StringCodec(), compression, block_size)
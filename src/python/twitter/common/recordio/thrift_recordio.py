@@ -16,9 +16,16 @@
 
 from __future__ import print_function
 
-import sys
 import inspect
+import io
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
 
+from .mmap_recordio import RecordIndex
 from .recordio import RecordIO
 
 try:
@@ -33,6 +40,7 @@ class ThriftRecordIO:
   class ThriftUnavailableException(Exception): pass
   class ThriftUnsuppliedException(Exception): pass
   class InvalidThriftException(Exception): pass
+  class DecodeError(Exception): pass
 
   @staticmethod
   def assert_has_thrift():
@@ -89,6 +97,169 @@ class ThriftRecordReader(RecordIO.Reader):
         'Must construct ThriftRecordReader with valid thrift_base!')
     RecordIO.Reader.__init__(self, fp, ThriftRecordIO.ThriftCodec(thrift_base))
 
+def _decode_byte_range(args):
+  """
+    Decode the records in the byte range [start, end) of filename, version 1 frames or
+    version 2 blocks if blocks is True.  Runs in a worker process, so errors are returned as
+    (exception class name, message) rather than raised since RecordIO exceptions do not
+    survive pickling.
+  """
+  filename, thrift_base, start, end, blocks = args
+  with open(filename, 'rb') as fp:
+    fp.seek(start)
+    data = fp.read(end - start)
+  codec = ThriftRecordIO.ThriftCodec(thrift_base)
+  records = []
+  offset = 0
+  try:
+    if blocks:
+      for payload in RecordIO.Blocks.iter_payloads(io.BytesIO(data)):
+        records.append(codec.decode(payload))
+    while not blocks and offset < len(data):
+      blob_len = struct.unpack_from('>L', data, offset)[0]
+      records.append(codec.decode(data[offset + 4:offset + 4 + blob_len]))
+      offset += 4 + blob_len
+  except Exception as e:
+    return records, (e.__class__.__name__, str(e))
+  return records, None
+
+
+class ParallelThriftRecordReader(ThriftRecordReader):
+  """
+    ThriftRecordReader that decodes records on a pool of worker processes when iterated.
+
+    The file is indexed up front in the calling thread (see RecordIndex, although the index
+    is not persisted) and split into byte ranges of chunk_records records, at most prefetch
+    of which are outstanding on the pool at any time.  Version 2 (compressed) streams are
+    split on block boundaries into ranges of at least chunk_records records.  Records are yielded in file order
+    unless ordered=False, in which case each chunk is yielded as soon as it has been
+    decoded.  As with ThriftRecordReader, the records preceding a truncated or oversized
+    frame are yielded before its error is raised.  read() and try_read() decode serially as
+    ThriftRecordReader.
+  """
+
+  DEFAULT_CHUNK_RECORDS = 1024
+
+  def __init__(self, fp, thrift_base, processes=None, chunk_records=DEFAULT_CHUNK_RECORDS,
+               prefetch=None, ordered=True):
+    ThriftRecordReader.__init__(self, fp, thrift_base)
+    self._thrift_base = thrift_base
+    self._processes = processes or multiprocessing.cpu_count()
+    self._chunk_records = chunk_records
+    self._prefetch = prefetch or 2 * self._processes
+    self._ordered = ordered
+
+  def _block_ranges(self, fp):
+    """
+      Return the byte ranges of the chunks of complete blocks of the version 2 stream fp,
+      positioned after its FILE_MAGIC, and the error to raise once they have been decoded.
+    """
+    size = os.fstat(fp.fileno()).st_size
+    ranges, error = [], None
+    start = offset = fp.tell()
+    count = 0
+    while offset < size:
+      header = fp.read(RecordIO.Blocks.HEADER.size)
+      try:
+        if len(header) != RecordIO.Blocks.HEADER.size:
+          raise RecordIO.PrematureEndOfStream('Truncated block header at offset %d' % offset)
+        _, block_count, length, _ = RecordIO.Blocks.parse_header(header)
+      except (RecordIO.PrematureEndOfStream, RecordIO.CorruptBlock,
+              RecordIO.RecordSizeExceeded) as e:
+        error = e
+        break
+      end = offset + RecordIO.Blocks.HEADER.size + length
+      if end > size:
+        error = RecordIO.PrematureEndOfStream('Truncated block at offset %d' % offset)
+        break
+      offset = end
+      fp.seek(offset)
+      count += block_count
+      if count >= self._chunk_records:
+        ranges.append((start, offset))
+        start, count = offset, 0
+    if offset > start:
+      ranges.append((start, offset))
+    return ranges, error
+
+  def _byte_ranges(self):
+    """
+      Return the byte ranges of the chunks of complete records in the file, whether they
+      are version 2 blocks, and the error to raise once they have been decoded, if any.
+    """
+    with open(self._fp.name, 'rb') as fp:
+      if RecordIO.Reader.detect_version(fp) == 2:
+        ranges, error = self._block_ranges(fp)
+        return ranges, True, error
+    error = None
+    index = RecordIndex(self._fp.name)
+    with open(self._fp.name, 'rb') as fp:
+      st = os.fstat(fp.fileno())
+      data = mmap.mmap(fp.fileno(), st.st_size, access=mmap.ACCESS_READ) if st.st_size else b''
+      try:
+        index.update(data, st.st_size, st.st_ino)
+      except RecordIO.RecordSizeExceeded as e:
+        error = e
+      finally:
+        if st.st_size:
+          data.close()
+    if error is None and index.end < st.st_size:
+      error = RecordIO.PrematureEndOfStream(
+          'Truncated record at offset %d of %d' % (index.end, st.st_size))
+    ranges = [(index.offset(start), index.offset(min(start + self._chunk_records, len(index))))
+              for start in range(0, len(index), self._chunk_records)]
+    return ranges, False, error
+
+  def __iter__(self):
+    """
+      May raise:
+        RecordIO.PrematureEndOfStream
+        RecordIO.RecordSizeExceeded
+        RecordIO.CorruptBlock if a version 2 block is corrupt
+        ThriftRecordIO.DecodeError if a record fails to deserialize
+    """
+    ranges, blocks, index_error = self._byte_ranges()
+    if not ranges:
+      if index_error is not None:
+        raise index_error
+      return
+
+    pool = multiprocessing.Pool(processes=self._processes)
+    slots = threading.Semaphore(self._prefetch)
+    stopped = threading.Event()
+
+    def tasks():
+      # Consumed by the pool's task handler thread, which blocks here once prefetch chunks
+      # are outstanding.
+      for start, end in ranges:
+        slots.acquire()
+        if stopped.is_set():
+          return
+        yield (self._fp.name, self._thrift_base, start, end, blocks)
+
+    imap = pool.imap if self._ordered else pool.imap_unordered
+    try:
+      for records, error in imap(_decode_byte_range, tasks()):
+        slots.release()
+        for record in records:
+          yield record
+        if error is not None:
+          name, message = error
+          if name == RecordIO.PrematureEndOfStream.__name__:
+            raise RecordIO.PrematureEndOfStream(message)
+          if name == RecordIO.CorruptBlock.__name__:
+            raise RecordIO.CorruptBlock(message)
+          raise ThriftRecordIO.DecodeError('%s: %s' % (name, message))
+      pool.close()
+    finally:
+      stopped.set()
+      slots.release()
+      pool.terminate()
+      pool.join()
+    if index_error is not None:
+      raise index_error
+
+
 class ThriftRecordWriter(RecordIO.Writer):
   """
     RecordWriter that serializes Thrift objects instead of strings.
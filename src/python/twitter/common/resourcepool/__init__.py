@@ -16,7 +16,7 @@
 
 __author__ = 'Alec Thomas'
 
-from .resourcepool import ResourcePool
+from .resourcepool import ElasticResourcePool, ResourcePool
 
-__all__ = ['ResourcePool']
+__all__ = ['ElasticResourcePool', 'ResourcePool']
 
@@ -17,14 +17,26 @@
 
 """A generic thread-safe resource pool."""
 
+from collections import deque
+import threading
+import time
+
 try:
-  from Queue import Queue
+  from Queue import Empty, Queue
 except ImportError:
-  from queue import Queue
+  from queue import Empty, Queue
 
+from twitter.common import log
+from twitter.common.metrics import Histogram, LambdaGauge
 from twitter.common.quantity import Amount, Time
 
 
+def _seconds(value):
+  if isinstance(value, Amount):
+    return value.as_(Time.SECONDS)
+  return value
+
+
 class Resource(object):
   """Wrapper object around an allocated resource from ResourcePool.
 
@@ -52,6 +64,11 @@ class Resource(object):
     self._pool.release(self.resource)
     self._pool = None
 
+  def discard(self):
+    """Remove the underlying resource from the pool, e.g. because it is broken."""
+    self._pool.discard(self.resource)
+    self._pool = None
+
   def __enter__(self):
     return self.resource
 
@@ -97,15 +114,16 @@ class ResourcePool(object):
     if timeout is None:
       resource = self._resources.get()
     else:
-      if isinstance(timeout, Amount):
-        timeout = timeout.as_(Time.SECONDS)
-      resource = self._resources.get(True, timeout)
+      resource = self._resources.get(True, _seconds(timeout))
     return Resource(self, resource)
 
   def release(self, resource):
     """Add a resource to the pool."""
     self._resources.put(resource)
 
+  def discard(self, resource):
+    """Drop an acquired resource rather than returning it.  The pool shrinks by one."""
+
   def empty(self):
     """Check if any resources are available.
 
@@ -113,3 +131,241 @@ class ResourcePool(object):
         will succeed.
     """
     return self._resources.empty()
+
+
+class ElasticResourcePool(object):
+  """A thread-safe resource pool that creates resources on demand.
+
+  The pool holds between min_size and max_size resources.  Resources are created lazily
+  by factory() when no idle resource is available, idle resources beyond min_size are
+  destroyed once they have been idle for longer than max_idle, and if validate is given,
+  idle resources are checked with validate(resource) when borrowed and replaced if it
+  returns False.  Threads waiting for a resource are served in FIFO order.
+
+    >>> pool = ElasticResourcePool(lambda: make_connection(host, port), max_size=8)
+    >>> with pool.acquire(timeout=Amount(1, Time.SECONDS)) as connection:
+    ...   connection.send(request)
+
+  If a metrics registry is supplied, acquire wait times and pool utilization are exported
+  as metrics under name in it until the pool is closed.
+  """
+
+  class _Waiter(object):
+    __slots__ = ('event', 'resource', 'permit')
+
+    def __init__(self):
+      self.event = threading.Event()
+      self.resource = None
+      self.permit = False
+
+  _NOTHING = object()
+
+  def __init__(self, factory, min_size=0, max_size=8, max_idle=None, validate=None,
+               destroy=None, name='resourcepool', metrics=None, clock=time):
+    """
+      factory: function returning a new resource.
+      min_size: number of resources to create up front and keep when idle.
+      max_size: maximum number of resources, borrowed or idle.
+      max_idle: seconds (or Amount) after which idle resources beyond min_size are destroyed,
+          or None to keep them indefinitely.
+      validate: function returning whether an idle resource is still usable.
+      destroy: function to dispose of a resource leaving the pool.
+      name: scope of the exported metrics.
+      metrics: registry (e.g. RootMetrics()) to export metrics to, or None not to.
+    """
+    if not 0 <= min_size <= max_size or max_size < 1:
+      raise ValueError('ElasticResourcePool requires 0 <= min_size <= max_size and max_size >= 1')
+    self._factory = factory
+    self._min_size = min_size
+    self._max_size = max_size
+    self._max_idle = _seconds(max_idle)
+    self._validate = validate
+    self._destroy = destroy or (lambda resource: None)
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._idle = deque()  # (resource, released time), most recently released last
+    self._waiters = deque()
+    self._size = 0
+    self._closed = False
+    self._created = 0
+    self._destroyed = 0
+    self._timeouts = 0
+    self._wait_ms = Histogram('acquire_wait_ms')
+    self._metrics = metrics.scope(name) if metrics is not None else None
+    if self._metrics is not None:
+      self._export(self._metrics)
+    now = self._clock.time()
+    for _ in range(min_size):
+      self._idle.append((self._create(), now))
+      self._size += 1
+
+  def _export(self, scope):
+    gauges = [
+      self._wait_ms,
+      LambdaGauge('size', lambda: self._size),
+      LambdaGauge('idle', lambda: len(self._idle)),
+      LambdaGauge('in_use', lambda: self.in_use),
+      LambdaGauge('waiters', lambda: len(self._waiters)),
+      LambdaGauge('utilization', lambda: float(self.in_use) / self._max_size),
+      LambdaGauge('created', lambda: self._created),
+      LambdaGauge('destroyed', lambda: self._destroyed),
+      LambdaGauge('timeouts', lambda: self._timeouts),
+    ]
+    for gauge in gauges:
+      scope.register(gauge)
+    self._exported = [gauge.name() for gauge in gauges]
+
+  @property
+  def size(self):
+    """The number of resources in the pool, borrowed or idle."""
+    return self._size
+
+  @property
+  def in_use(self):
+    """The number of resources currently borrowed (or being created.)"""
+    return self._size - len(self._idle)
+
+  def _create(self):
+    resource = self._factory()
+    self._created += 1
+    return resource
+
+  def _dispose(self, resource):
+    self._destroyed += 1
+    try:
+      self._destroy(resource)
+    except Exception as e:
+      log.warning('Failed to destroy pooled resource %r: %s' % (resource, e))
+
+  def _expire_idle(self, now):
+    """Pop idle resources past max_idle beyond min_size.  Must hold the lock."""
+    expired = []
+    if self._max_idle is None:
+      return expired
+    while (self._idle and self._size > self._min_size and
+           now - self._idle[0][1] >= self._max_idle):
+      expired.append(self._idle.popleft()[0])
+      self._size -= 1
+    return expired
+
+  def _checkout(self, timeout):
+    """Return an idle resource, or _NOTHING if the caller holds a slot to create one in."""
+    deadline = None if timeout is None else self._clock.time() + timeout
+    with self._lock:
+      if self._closed:
+        raise ValueError('Cannot acquire from a closed ElasticResourcePool.')
+      if not self._waiters:
+        if self._idle:
+          return self._idle.pop()[0]
+        if self._size < self._max_size:
+          self._size += 1
+          return self._NOTHING
+      waiter = self._Waiter()
+      self._waiters.append(waiter)
+    waiter.event.wait(None if deadline is None else max(0, deadline - self._clock.time()))
+    with self._lock:
+      if waiter.resource is None and not waiter.permit:
+        if self._closed:
+          raise ValueError('ElasticResourcePool closed while waiting to acquire.')
+        self._waiters.remove(waiter)
+        self._timeouts += 1
+        raise Empty()
+    return self._NOTHING if waiter.permit else waiter.resource
+
+  def acquire(self, timeout=None):
+    """Acquire a resource, creating one if none are idle and the pool is not full.
+
+    :param timeout: If provided, seconds (or Amount) to wait for a resource before raising
+        Queue.Empty. If not provided, blocks indefinitely.
+
+    :returns: Returns a Resource() wrapper object.
+    :raises Empty: No resources are available before timeout.
+    """
+    start = self._clock.time()
+    resource = self._checkout(_seconds(timeout))
+    self._wait_ms.update(max(0, self._clock.time() - start) * 1000.0)
+    if resource is not self._NOTHING and self._validate is not None:
+      try:
+        valid = self._validate(resource)
+      except Exception as e:
+        log.debug('Validation of pooled resource %r failed: %s' % (resource, e))
+        valid = False
+      if not valid:
+        self._dispose(resource)
+        resource = self._NOTHING
+    if resource is self._NOTHING:
+      try:
+        resource = self._create()
+      except:
+        self._vacate()
+        raise
+    return Resource(self, resource)
+
+  def _vacate(self):
+    """Give up a slot in the pool, passing it on to the next waiter if there is one."""
+    with self._lock:
+      if self._waiters and not self._closed:
+        waiter = self._waiters.popleft()
+        waiter.permit = True
+        waiter.event.set()
+      else:
+        self._size -= 1
+
+  def release(self, resource):
+    """Return a resource to the pool."""
+    now = self._clock.time()
+    with self._lock:
+      if self._closed:
+        expired = [resource]
+        self._size -= 1
+      elif self._waiters:
+        waiter = self._waiters.popleft()
+        waiter.resource = resource
+        waiter.event.set()
+        return
+      else:
+        self._idle.append((resource, now))
+        expired = self._expire_idle(now)
+    for resource in expired:
+      self._dispose(resource)
+
+  def discard(self, resource):
+    """Destroy a borrowed resource instead of returning it, e.g. because it is broken."""
+    self._dispose(resource)
+    self._vacate()
+
+  def evict(self):
+    """Destroy idle resources beyond min_size that have been idle longer than max_idle.
+
+    Expired resources are otherwise only evicted as resources are released.
+    """
+    with self._lock:
+      expired = self._expire_idle(self._clock.time())
+    for resource in expired:
+      self._dispose(resource)
+
+  def empty(self):
+    """Check if an acquire() would have to wait.
+
+    Note: This is a rough guide only. It does not guarantee that acquire()
+        will succeed.
+    """
+    return not self._idle and self._size >= self._max_size
+
+  def close(self):
+    """Destroy all idle resources and unregister any exported metrics.
+
+    Resources still borrowed are destroyed on release.
+    """
+    if self._metrics is not None:
+      for name in self._exported:
+        self._metrics.unregister(name)
+    with self._lock:
+      self._closed = True
+      while self._waiters:
+        self._waiters.popleft().event.set()
+      idle = [resource for resource, _ in self._idle]
+      self._idle.clear()
+      self._size -= len(idle)
+    for resource in idle:
+      self._dispose(resource)
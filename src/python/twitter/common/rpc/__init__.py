@@ -2,7 +2,11 @@ __author__ = 'Brian Wickman'
 
 from twitter.common.rpc.factories import make_client
 from twitter.common.rpc.address import Address
+from twitter.common.rpc.balancer import BalancedClient
+from twitter.common.rpc.pipelined import PipelinedClient
 __all__ = [
   'make_client',
-  'Address'
+  'Address',
+  'BalancedClient',
+  'PipelinedClient'
 ]
@@ -0,0 +1,311 @@
+import random
+import socket
+import threading
+import time
+
+try:
+  from Queue import Empty
+except ImportError:
+  from queue import Empty
+
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TSocket, TTransport
+from twitter.common import log
+from twitter.common.metrics import LambdaGauge
+from twitter.common.quantity import Amount, Time
+from twitter.common.resourcepool import ElasticResourcePool
+from twitter.common.rpc.address import Address
+from twitter.common.rpc.factories import (
+    ClientFactory,
+    ConnectionFactory,
+    ProtocolFactory,
+    TransportFactory)
+
+
+def _seconds(value):
+  return value.as_(Time.SECONDS) if isinstance(value, Amount) else value
+
+
+def _address(instance):
+  """
+    Convert a ServerSet member (thrift or twitter.common.zookeeper.serverset ServiceInstance),
+    Address, 'host:port' string or (host, port) tuple to an Address.
+  """
+  if isinstance(instance, Address):
+    return instance
+  endpoint = getattr(instance, 'serviceEndpoint', None) or getattr(
+      instance, 'service_endpoint', None)
+  if endpoint is not None:
+    return Address(str(endpoint.host), endpoint.port)
+  return Address.parse(instance)
+
+
+class _Host(object):
+  def __init__(self, address, pool):
+    self.address = address
+    self.pool = pool
+    self.outstanding = 0
+    self.failures = 0
+    self.ejected_until = 0
+
+  @property
+  def key(self):
+    return (self.address.host, self.address.port)
+
+
+class BalancedClient(object):
+  """
+    A thrift client that balances calls over a dynamic set of hosts.
+
+    Ex, balance over a static host list:
+      client = BalancedClient(UserService, ['host1:9999', 'host2:9999'])
+      client.getUser(user_id)
+
+    Ex, follow a twitter.common.zookeeper.serversets.ServerSetClient:
+      client = BalancedClient(UserService, ServerSetClient('/twitter/service/users', zk=zk))
+
+    Each host keeps a pool of at most max_connections open connections that are reused
+    across calls.  Calls go to the host with the fewest outstanding requests
+    (LEAST_OUTSTANDING) or the less loaded of two random hosts (POWER_OF_TWO.)  A host whose
+    calls fail with transport errors failure_threshold times in a row is ejected for
+    eject_period; if every host is ejected, all hosts are used again.
+
+    Calls that cannot get a connection to a host are retried on another host up to retries
+    times.  A call that fails with a transport error after it was sent may or may not have
+    run, so it is only retried if retry_calls is True, i.e. every method is idempotent.
+
+    Hosts follow a ServerSetClient as its membership changes (its existing delta watcher,
+    if any, is still called.)  Other sources, such as a
+    twitter.common.zookeeper.serverset.ServerSet, are read once; call refresh() to re-read
+    them or use add_host/remove_host as the ServerSet's on_join/on_leave callbacks.
+
+    The protocol, transport and connection keywords are as for make_client.  Thrift
+    methods whose names clash with those of BalancedClient may be invoked with call().
+  """
+
+  class Error(Exception): pass
+  class NoHostsAvailable(Error): pass
+
+  LEAST_OUTSTANDING = 'least_outstanding'
+  POWER_OF_TWO = 'power_of_two'
+  STRATEGIES = frozenset([LEAST_OUTSTANDING, POWER_OF_TWO])
+
+  TRANSPORT_ERRORS = (TTransport.TTransportException, socket.error, EOFError)
+
+  def __init__(self, client_iface, hosts=(), strategy=LEAST_OUTSTANDING, max_connections=8,
+               failure_threshold=3, eject_period=Amount(30, Time.SECONDS), retries=2,
+               retry_calls=False, timeout=None, acquire_timeout=Amount(1, Time.SECONDS),
+               name='balanced_client', metrics=None, clock=time, **kw):
+    """
+      client_iface: the thrift generated service module.
+      hosts: a ServerSetClient, ServerSet or iterable of addresses.
+      retries: number of other hosts to try when a call fails.
+      retry_calls: whether to also retry calls that failed after being sent.
+      timeout: socket timeout (connecting as well as calls) in seconds (or Amount), None
+        to block.
+      acquire_timeout: seconds (or Amount) to wait for a free connection from a host's pool
+        when all max_connections are in use.
+      metrics: a Metrics registry to export client and per-host pool gauges to, under name.
+        Nothing is exported if None.
+    """
+    if strategy not in self.STRATEGIES:
+      raise ValueError('Unknown balancing strategy: %s' % strategy)
+    self._client_factory = ClientFactory(client_iface)
+    self._protocol_factory = ProtocolFactory(
+        kw.pop('protocol', TBinaryProtocol.TBinaryProtocolAccelerated))
+    self._transport_factory = TransportFactory(kw.pop('transport', TTransport.TFramedTransport))
+    self._connection_factory = ConnectionFactory(kw.pop('connection', TSocket.TSocket))
+    if kw:
+      raise TypeError('Unexpected keyword arguments: %s' % ', '.join(kw))
+    self._strategy = strategy
+    self._max_connections = max_connections
+    self._failure_threshold = failure_threshold
+    self._eject_period = _seconds(eject_period)
+    self._retries = retries
+    self._retry_calls = retry_calls
+    self._timeout = _seconds(timeout)
+    self._acquire_timeout = _seconds(acquire_timeout)
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._hosts = {}
+    self._requests = 0
+    self._failures = 0
+    self._ejections = 0
+    self._closed = False
+    self._metrics = metrics.scope(name) if metrics is not None else None
+    self._gauges = [
+      LambdaGauge('hosts', lambda: len(self._hosts)),
+      LambdaGauge('requests', lambda: self._requests),
+      LambdaGauge('failures', lambda: self._failures),
+      LambdaGauge('ejections', lambda: self._ejections),
+    ]
+    if self._metrics is not None:
+      for gauge in self._gauges:
+        self._metrics.register(gauge)
+    self._source = hosts
+    self._delta_watcher = None
+    if hasattr(hosts, 'set_delta_watcher'):
+      self._delta_watcher = hosts.set_delta_watcher(self._on_delta)
+    self.refresh()
+
+  @staticmethod
+  def _metric_name(key):
+    """A scope name for a host that has no dots, which would split it into nested scopes."""
+    return ('%s_%d' % key).replace('.', '_').replace(':', '_')
+
+  def _on_delta(self, endpoint, added, removed):
+    if not self._closed:
+      for instance in removed:
+        self.remove_host(instance)
+      for instance in added:
+        self.add_host(instance)
+    if self._delta_watcher:
+      self._delta_watcher(endpoint, added, removed)
+
+  def refresh(self):
+    """Re-read the set of hosts from the source given at construction."""
+    source = self._source
+    if hasattr(source, 'get_endpoints'):
+      source = source.get_endpoints()
+    self.set_hosts(source)
+
+  def set_hosts(self, hosts):
+    """Replace the set of hosts, keeping the connection pools of hosts that remain."""
+    addresses = dict(((address.host, address.port), address) for address in map(_address, hosts))
+    with self._lock:
+      removed = [self._hosts.pop(key) for key in set(self._hosts) - set(addresses)]
+    for host in removed:
+      host.pool.close()
+    for address in addresses.values():
+      self.add_host(address)
+
+  def add_host(self, instance):
+    """Add a host (any address accepted as hosts at construction) if not already present."""
+    address = _address(instance)
+    key = (address.host, address.port)
+    with self._lock:
+      if self._closed or key in self._hosts:
+        return
+      pool = ElasticResourcePool(lambda: self._connect(address),
+          max_size=self._max_connections,
+          destroy=self._disconnect,
+          metrics=self._metrics.scope('hosts') if self._metrics is not None else None,
+          name=self._metric_name(key))
+      self._hosts[key] = _Host(address, pool)
+    log.debug('BalancedClient added %s:%d' % key)
+
+  def remove_host(self, instance):
+    """Remove a host and its metrics.  Its idle connections are closed, and borrowed ones
+    once released."""
+    address = _address(instance)
+    with self._lock:
+      host = self._hosts.pop((address.host, address.port), None)
+    if host is not None:
+      host.pool.close()
+      log.debug('BalancedClient removed %s:%d' % host.key)
+
+  def hosts(self):
+    """The addresses of the current hosts, ejected or not."""
+    with self._lock:
+      return [host.address for host in self._hosts.values()]
+
+  def _connect(self, address):
+    connection = self._connection_factory(address.host, address.port)
+    if self._timeout is not None and hasattr(connection, 'setTimeout'):
+      connection.setTimeout(self._timeout * 1000.0)
+    transport = self._transport_factory(connection)
+    transport.open()
+    return self._client_factory(self._protocol_factory(transport)), transport
+
+  def _disconnect(self, resource):
+    _, transport = resource
+    transport.close()
+
+  def _choose(self, exclude):
+    """Choose a host not in exclude, or any host if every candidate is ejected."""
+    now = self._clock.time()
+    with self._lock:
+      hosts = [host for host in self._hosts.values() if host.key not in exclude]
+      candidates = [host for host in hosts if host.ejected_until <= now] or hosts
+      if not candidates:
+        raise self.NoHostsAvailable('No hosts available.')
+      if self._strategy == self.POWER_OF_TWO and len(candidates) > 2:
+        candidates = random.sample(candidates, 2)
+      least = min(host.outstanding for host in candidates)
+      host = random.choice([host for host in candidates if host.outstanding == least])
+      host.outstanding += 1
+      return host
+
+  def _record(self, host, failed):
+    with self._lock:
+      host.outstanding -= 1
+      if not failed:
+        host.failures = 0
+        return
+      self._failures += 1
+      host.failures += 1
+      if host.failures >= self._failure_threshold:
+        host.failures = 0
+        host.ejected_until = self._clock.time() + self._eject_period
+        self._ejections += 1
+        log.warning('BalancedClient ejecting %s:%d for %.1fs' % (host.key + (
+            self._eject_period,)))
+
+  def call(self, method_name, *args, **kw):
+    """Call method_name on a chosen host, retrying transport failures on other hosts."""
+    with self._lock:
+      self._requests += 1
+    tried = set()
+    while True:
+      host = self._choose(tried)
+      tried.add(host.key)
+      try:
+        resource = host.pool.acquire(timeout=self._acquire_timeout)
+      except Empty:
+        error = self.NoHostsAvailable('Timed out waiting for a connection to %s:%d' % host.key)
+        self._record(host, failed=False)
+      except self.TRANSPORT_ERRORS as e:
+        error = e
+        self._record(host, failed=True)
+      else:
+        client, _ = resource.resource
+        try:
+          result = getattr(client, method_name)(*args, **kw)
+        except self.TRANSPORT_ERRORS as e:
+          resource.discard()
+          self._record(host, failed=True)
+          if not self._retry_calls:
+            raise
+          error = e
+        except:
+          # Application errors leave the connection usable.
+          resource.release()
+          self._record(host, failed=False)
+          raise
+        else:
+          resource.release()
+          self._record(host, failed=False)
+          return result
+      if len(tried) > self._retries or len(tried) >= len(self._hosts):
+        raise error
+      log.debug('BalancedClient retrying %s after %s:%d failed: %s' % (
+          method_name, host.key[0], host.key[1], error))
+
+  def __getattr__(self, method_name):
+    if method_name.startswith('_'):
+      raise AttributeError(method_name)
+    def method(*args, **kw):
+      return self.call(method_name, *args, **kw)
+    method.__name__ = method_name
+    return method
+
+  def close(self):
+    """Close all pooled connections, unregister metrics and stop following the hosts."""
+    with self._lock:
+      self._closed = True
+      hosts, self._hosts = list(self._hosts.values()), {}
+    for host in hosts:
+      host.pool.close()
+    if self._metrics is not None:
+      for gauge in self._gauges:
+        self._metrics.unregister(gauge.name())
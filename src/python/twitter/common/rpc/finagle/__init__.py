@@ -1,10 +1,12 @@
 __author__ = 'Brian Wickman'
 
 from twitter.common.rpc.finagle.protocol import (
+  FinagleCodec,
   TFinagleProtocol,
   TFinagleProtocolWithClientId)
 
 __all__ = [
+  'FinagleCodec',
   'TFinagleProtocol',
   'TFinagleProtocolWithClientId'
 ]
@@ -12,6 +12,7 @@ from gen.twitter.finagle.thrift.ttypes import (
   ResponseHeader)
 
 from twitter.common.rpc.finagle.trace import Trace
+from twitter.common.rpc.pipelined import PipelinedClient
 
 def upgrade_protocol_to_finagle(protocol):
   UPGRADE_METHOD = "__can__finagle__trace__v3__"
@@ -81,3 +82,39 @@ class TFinagleProtocol(TBinaryProtocol.TBinaryProtocolAccelerated):
 
 def TFinagleProtocolWithClientId(client_id):
   return functools.partial(TFinagleProtocol, client_id=client_id)
+
+
+class FinagleCodec(PipelinedClient.Codec):
+  """
+    Negotiate the Finagle TTwitter upgrade for a PipelinedClient and, if the server accepts
+    it, add the same trace headers to each request as TFinagleProtocol.
+
+    Ex, pipeline finagle calls with a client_id:
+      PipelinedClient(UserService, 'localhost', 9999, codec=FinagleCodec(client_id='test_client'))
+  """
+
+  def __init__(self, client_id=''):
+    self._locals = threading.local()
+    self._finagle_upgraded = False
+    self._client_id = client_id
+
+  def handshake(self, protocol):
+    try:
+      upgrade_protocol_to_finagle(protocol)
+      self._finagle_upgraded = True
+    except TApplicationException:
+      pass
+
+  def write_header(self, protocol):
+    if self._finagle_upgraded:
+      if not hasattr(self._locals, 'trace'):
+        self._locals.trace = Trace()
+      header = TFinagleProtocol.to_request_header(self._locals.trace.get())
+      if self._client_id:
+        header.client_id = ClientId(name=self._client_id)
+      header.write(protocol)
+
+  def read_header(self, protocol):
+    if self._finagle_upgraded:
+      header = ResponseHeader()
+      header.read(protocol)
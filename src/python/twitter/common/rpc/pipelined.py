@@ -0,0 +1,223 @@
+import heapq
+import struct
+import threading
+import time
+
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TSocket, TTransport
+from twitter.common import log
+from twitter.common.concurrent import Future
+from twitter.common.quantity import Amount, Time
+from twitter.common.rpc.factories import ConnectionFactory
+
+
+class PipelinedClient(object):
+  """
+    A thrift client that pipelines many outstanding calls over one framed connection.
+
+    Requests are written as soon as they are made and replies, which may arrive in any
+    order, are matched to their calls by sequence id on a reader thread.  Calls made with
+    call_async return a Future and may be given a deadline after which the Future fails
+    with DeadlineExceeded:
+
+      client = PipelinedClient(UserService, 'localhost', 9999)
+      futures = [client.call_async('getUser', user_id, deadline=0.5) for user_id in ids]
+      users = [future.result() for future in futures]
+
+    Calling a thrift method on the client directly blocks for its result:
+
+      user = client.getUser(user_id)
+
+    A Codec adds per-message headers to the protocol, see
+    twitter.common.rpc.finagle.FinagleCodec.  The server must speak framed transport.
+  """
+
+  class Error(Exception): pass
+  class ConnectionClosed(Error): pass
+  class DeadlineExceeded(Error): pass
+
+  class Codec(object):
+    """
+      Hooks to negotiate a connection and add headers to each message.  The default
+      writes and reads no headers.
+    """
+    def handshake(self, protocol):
+      """Negotiate over the framed protocol before any calls are pipelined."""
+
+    def write_header(self, protocol):
+      """Write any header preceding each request message."""
+
+    def read_header(self, protocol):
+      """Read any header preceding each reply message."""
+
+  class _Call(object):
+    __slots__ = ('method', 'future', 'deadline')
+
+    def __init__(self, method, future, deadline):
+      self.method = method
+      self.future = future
+      self.deadline = deadline
+
+  FRAME_SIZE = struct.Struct('>i')
+  MAX_SEQID = 2 ** 31 - 1
+
+  def __init__(self, client_iface, host, port, protocol=TBinaryProtocol.TBinaryProtocolAccelerated,
+               codec=None, connection=TSocket.TSocket, clock=time):
+    self._client_class = client_iface.Client
+    self._protocol_class = protocol
+    self._codec = codec or PipelinedClient.Codec()
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._write_lock = threading.Lock()
+    self._pending = {}
+    self._deadlines = []  # heap of (deadline, seqid)
+    self._deadline_changed = threading.Condition(self._lock)
+    self._seqid = 0
+    self._closed = None
+    self._socket = ConnectionFactory(connection)(host, port)
+    self._socket.open()
+    self._codec.handshake(self._protocol_class(TTransport.TFramedTransport(self._socket)))
+    self._reader = threading.Thread(target=self._read_replies,
+        name='PipelinedClient(%s:%s) reader' % (host, port))
+    self._reader.daemon = True
+    self._reader.start()
+    self._reaper = threading.Thread(target=self._expire_deadlines,
+        name='PipelinedClient(%s:%s) deadlines' % (host, port))
+    self._reaper.daemon = True
+    self._reaper.start()
+
+  @property
+  def outstanding(self):
+    """The number of calls awaiting replies."""
+    return len(self._pending)
+
+  def _next_seqid(self):
+    """Must hold the lock."""
+    while True:
+      self._seqid = self._seqid % self.MAX_SEQID + 1
+      if self._seqid not in self._pending:
+        return self._seqid
+
+  def _encode(self, method, seqid, args, kw):
+    buf = TTransport.TMemoryBuffer()
+    protocol = self._protocol_class(buf)
+    self._codec.write_header(protocol)
+    client = self._client_class(protocol)
+    client._seqid = seqid
+    getattr(client, 'send_' + method)(*args, **kw)
+    return buf.getvalue()
+
+  def call_async(self, method, *args, **kw):
+    """
+      Call the thrift method with args and return a Future of its result.
+
+      If the keyword deadline is given (seconds or Amount), the Future fails with
+      DeadlineExceeded if no reply arrives in time; a late reply is discarded.
+    """
+    deadline = kw.pop('deadline', None)
+    if isinstance(deadline, Amount):
+      deadline = deadline.as_(Time.SECONDS)
+    if not hasattr(self._client_class, 'send_' + method):
+      raise AttributeError('%s has no method %s' % (self._client_class.__module__, method))
+    future = Future()
+    oneway = not hasattr(self._client_class, 'recv_' + method)
+    with self._lock:
+      if self._closed:
+        raise self._closed
+      seqid = self._next_seqid()
+      if not oneway:
+        call = self._Call(method, future, None)
+        if deadline is not None:
+          call.deadline = self._clock.time() + deadline
+          heapq.heappush(self._deadlines, (call.deadline, seqid))
+          self._deadline_changed.notify()
+        self._pending[seqid] = call
+    try:
+      payload = self._encode(method, seqid, args, kw)
+      with self._write_lock:
+        self._socket.write(self.FRAME_SIZE.pack(len(payload)) + payload)
+        self._socket.flush()
+    except Exception as e:
+      with self._lock:
+        self._pending.pop(seqid, None)
+      if isinstance(e, (TTransport.TTransportException, IOError)):
+        self._close(self.ConnectionClosed('Failed to send %s: %s' % (method, e)))
+      raise
+    if oneway:
+      future.set_result(None)
+    return future
+
+  def call(self, method, *args, **kw):
+    """Call the thrift method and block for its result."""
+    return self.call_async(method, *args, **kw).result()
+
+  def __getattr__(self, method):
+    if method.startswith('_') or not hasattr(self._client_class, 'send_' + method):
+      raise AttributeError(method)
+    def call(*args, **kw):
+      return self.call(method, *args, **kw)
+    call.__name__ = method
+    return call
+
+  def _complete(self, frame):
+    protocol = self._protocol_class(TTransport.TMemoryBuffer(frame))
+    self._codec.read_header(protocol)
+    message = protocol.readMessageBegin()
+    _, _, seqid = message
+    with self._lock:
+      call = self._pending.pop(seqid, None)
+    if call is None:
+      log.debug('PipelinedClient discarding reply to unknown or expired call %d' % seqid)
+      return
+    # Let the generated client read the message header we have already consumed.
+    protocol.readMessageBegin = lambda: message
+    try:
+      call.future.set_result(getattr(self._client_class(protocol), 'recv_' + call.method)())
+    except Exception as e:
+      call.future.set_exception(e)
+
+  def _read_replies(self):
+    try:
+      while True:
+        size, = self.FRAME_SIZE.unpack(self._socket.readAll(self.FRAME_SIZE.size))
+        self._complete(self._socket.readAll(size))
+    except Exception as e:
+      self._close(self.ConnectionClosed('Connection closed: %s' % e))
+
+  def _expire_deadlines(self):
+    while True:
+      expired = []
+      with self._lock:
+        if self._closed:
+          return
+        now = self._clock.time()
+        while self._deadlines and self._deadlines[0][0] <= now:
+          _, seqid = heapq.heappop(self._deadlines)
+          call = self._pending.get(seqid)
+          # The sequence id may have been reused by a later call.
+          if call is not None and call.deadline is not None and call.deadline <= now:
+            expired.append(self._pending.pop(seqid))
+        if not expired:
+          self._deadline_changed.wait(self._deadlines[0][0] - now if self._deadlines else None)
+      for call in expired:
+        call.future.set_exception(self.DeadlineExceeded(
+            '%s did not complete within its deadline' % call.method))
+
+  def _close(self, error):
+    with self._lock:
+      if self._closed:
+        return
+      self._closed = error
+      pending, self._pending = self._pending, {}
+      self._deadlines = []
+      self._deadline_changed.notify()
+    try:
+      self._socket.close()
+    except Exception:
+      pass
+    for call in pending.values():
+      call.future.set_exception(error)
+
+  def close(self):
+    """Close the connection, failing any outstanding calls with ConnectionClosed."""
+    self._close(self.ConnectionClosed('PipelinedClient closed.'))
@@ -1,5 +1,7 @@
 import re
+from operator import itemgetter
 from ctypes import (
+  sizeof,
   c_int,
   c_long,
   c_longlong,
@@ -47,7 +49,13 @@ class ScanfParser(object):
 
   """
     Partial scanf emulator.
+
+    Compiled formats are cached by format string, so constructing a ScanfParser per line
+    (as scanf does) does not recompile its regex.
   """
+  MAX_CACHE = 256
+  _CACHE = {}
+
   CONVERSIONS = {
      "c": (".", c_char),
      "d": ("[-+]?\d+", c_int),
@@ -125,12 +133,183 @@ class ScanfParser(object):
         k += 1
     return re_str, applicators
 
+  # A format of only whitespace separated conversions is parsed by splitting lines on
+  # whitespace.  %f is excluded as its pattern also matches strings float() rejects.
+  FAST_CONVERSION = re.compile(r'%(\*|\([^)]+\))?(lld|llu|ld|lu|c|d|s|u)$')
+
+  @staticmethod
+  def _fast_converter(conversion):
+    """
+      Return a function converting a whitespace-free token like the conversion's regex
+      and applicator would, or raising ValueError or TypeError where they might differ.
+    """
+    _, ctype = ScanfParser.CONVERSIONS[conversion]
+    if ctype is c_char_p:
+      def convert(token):
+        return token if type(token) is bytes and b'\0' not in token else ctype(token).value
+    elif ctype is c_char:
+      def convert(token):
+        if len(token) != 1:
+          raise ValueError('Expected a character.')
+        return token if type(token) is bytes else ctype(str(token)).value
+    else:
+      bits = 8 * sizeof(ctype)
+      signed = ctype(-1).value < 0
+      low, high = (-(1 << bits - 1), (1 << bits - 1) - 1) if signed else (0, (1 << bits) - 1)
+      preconversion = ScanfParser.PRECONVERSIONS[ctype]
+      result = type(ctype(0).value)
+      def convert(token):
+        if not (token[1:] if signed and token[:1] in '+-' else token).isdigit():
+          raise ValueError('Expected digits.')
+        value = preconversion(token)
+        return result(value) if low <= value <= high else ctype(value).value
+    return convert
+
+  @staticmethod
+  def _batch_converter(ctype):
+    """
+      Return a function converting a tuple of whitespace-free tokens of one conversion at
+      once with builtins, or raising ValueError or TypeError if any token might convert
+      differently through _fast_converter.
+    """
+    if ctype is c_char_p:
+      def convert(tokens):
+        joined = ''.join(tokens)
+        if type(joined) is not bytes or b'\0' in joined:
+          raise ValueError('Expected strings without NUL.')
+        return tokens
+    elif ctype is c_char:
+      def convert(tokens):
+        joined = ''.join(tokens)
+        if type(joined) is not bytes or len(joined) != len(tokens):
+          raise ValueError('Expected characters.')
+        return tokens
+    else:
+      bits = 8 * sizeof(ctype)
+      if ctype(-1).value < 0:
+        low, high = -(1 << bits - 1), (1 << bits - 1) - 1
+        def convert(tokens):
+          # int() accepts exactly [-+]?\d+ of whitespace-free tokens, but for underscores.
+          values = list(map(int, tokens))
+          if min(values) < low or max(values) > high or '_' in ''.join(tokens):
+            raise ValueError('Expected integers in range.')
+          return values
+      else:
+        high = (1 << bits) - 1
+        result = type(ctype(0).value)
+        def convert(tokens):
+          if not ''.join(tokens).isdigit():
+            raise ValueError('Expected digits.')
+          values = list(map(result, tokens))
+          if max(values) > high:
+            raise ValueError('Expected integers in range.')
+          return values
+    return convert
+
+  @staticmethod
+  def _getter(indices):
+    """Return a function of a sequence returning the tuple of its items at indices."""
+    if len(indices) == 1:
+      index = indices[0]
+      return lambda sequence: (sequence[index],)
+    return itemgetter(*indices)
+
+  @staticmethod
+  def _compile_fast(format_string):
+    """
+      Return (plan, batches, order) for a format that is only conversions separated by
+      single spaces, or None if it is not.
+
+      plan is [(name, convert)] of each conversion, where name is None for unnamed and
+      False for ignored conversions.  If every conversion is unnamed, the fields of each
+      conversion can also be converted together: batches is [(getter, convert)] of the
+      fields of each conversion, and order maps the concatenated results back into place.
+    """
+    plan, conversions = [], []
+    for token in format_string.split(' '):
+      match = ScanfParser.FAST_CONVERSION.match(token)
+      if match is None:
+        return None
+      modifier, conversion = match.groups()
+      name = None if modifier is None else False if modifier == '*' else modifier[1:-1]
+      plan.append((name, ScanfParser._fast_converter(conversion)))
+      conversions.append(conversion)
+    if any(name is not None for name, _ in plan):
+      return plan, None, None
+    positions = {}
+    for index, conversion in enumerate(conversions):
+      positions.setdefault(ScanfParser.CONVERSIONS[conversion][1], []).append(index)
+    batches, concatenated = [], []
+    for ctype, indices in positions.items():
+      batches.append((ScanfParser._getter(indices), ScanfParser._batch_converter(ctype)))
+      concatenated.extend(indices)
+    order = [0] * len(concatenated)
+    for offset, index in enumerate(concatenated):
+      order[index] = offset
+    return plan, batches, ScanfParser._getter(order)
+
+  def _convert(self, fields):
+    """Convert whitespace-free fields by the fast plan, or return None."""
+    so = ScanfResult()
+    if self._batches is not None:
+      try:
+        values = []
+        for getter, convert in self._batches:
+          values.extend(convert(getter(fields)))
+        so._list = list(self._order(values))
+        return so
+      except (ValueError, TypeError):
+        pass
+    try:
+      if self._batches is not None:
+        so._list = [convert(field) for (_, convert), field in zip(self._fast, fields)]
+      else:
+        for (name, convert), field in zip(self._fast, fields):
+          value = convert(field)
+          if name is None:
+            so._list.append(value)
+          elif name is not False:
+            so._dict[name] = value
+    except (ValueError, TypeError):
+      return None
+    return so
+
+  def parse_fields(self, fields, allow_extra=False):
+    """
+      Parse a line already split on whitespace, as if its fields were joined by single
+      spaces, and return a ScanfResult object.
+    """
+    if self._fast is not None and (len(fields) == len(self._fast) or (
+        allow_extra and len(fields) > len(self._fast))):
+      so = self._convert(fields)
+      if so is not None:
+        return so
+    return self.parse(' '.join(fields), allow_extra)
+
+  def parse_many(self, lines, allow_extra=False):
+    """
+      Parse each of lines and return a list of ScanfResult objects.
+    """
+    parse = self.parse
+    return [parse(line, allow_extra) for line in lines]
+
   def parse(self, line, allow_extra=False):
     """
       Given a line of text, parse it and return a ScanfResult object.
     """
     if not isinstance(line, Compatibility.string):
       raise TypeError("Expected line to be a string, got %s" % type(line))
+    if self._fast is not None and type(line) is str:
+      # Only lines of the single space separated fields the format expects take the fast
+      # path, everything else is left to the regex to match or reject.
+      count = len(self._fast)
+      fields = line.split(' ', count) if allow_extra else line.split(' ')
+      if len(fields) >= count:
+        head = fields[:count]
+        if (len(fields) == count or allow_extra) and line.split(None, count)[:count] == head:
+          so = self._convert(head)
+          if so is not None:
+            return so
     sre_match = self._re.match(line)
     if sre_match is None:
       raise ScanfParser.ParseError("Failed to match pattern: %s against %s" % (
@@ -159,5 +338,13 @@ class ScanfParser(object):
     """
     if not isinstance(format_string, Compatibility.string):
       raise TypeError('format_string should be a string, instead got %s' % type(format_string))
-    self._re_pattern, self._applicators = self._preprocess_format_string(format_string)
-    self._re = re.compile(self._re_pattern)
+    compiled = ScanfParser._CACHE.get(format_string)
+    if compiled is None:
+      re_pattern, applicators = self._preprocess_format_string(format_string)
+      compiled = (re_pattern, applicators, re.compile(re_pattern),
+                  self._compile_fast(format_string))
+      if len(ScanfParser._CACHE) >= ScanfParser.MAX_CACHE:
+        ScanfParser._CACHE.clear()
+      ScanfParser._CACHE[format_string] = compiled
+    self._re_pattern, self._applicators, self._re, fast = compiled
+    self._fast, self._batches, self._order = fast or (None, None, None)
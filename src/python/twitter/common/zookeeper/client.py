@@ -118,6 +118,12 @@ class ZooKeeper(object):
   class Error(Exception): pass
   class ConnectionTimeout(Error): pass
   class Stopped(Error): pass
+  class OperationError(Error):
+    def __init__(self, path, rc):
+      self.path = path
+      self.rc = rc
+      super(ZooKeeper.OperationError, self).__init__(
+          '%s failed: %s' % (path, ZooKeeper.ReturnCode(rc)))
 
   class Event(NamedValue):
     MAP = {
@@ -215,6 +221,7 @@ class ZooKeeper(object):
     return ','.join(server_ports)
 
   DEFAULT_TIMEOUT_SECONDS = 30.0
+  DEFAULT_CONCURRENCY = 64
   DEFAULT_ENSEMBLE = 'localhost:2181'
   DEFAULT_ACL = [{ "perms": zookeeper.PERM_ALL, "scheme": "world", "id": "anyone" }]
   MAX_RECONNECTS = 1
@@ -469,6 +476,138 @@ class ZooKeeper(object):
       return False
     return True
 
+  def pipeline(self, function_name, argument_lists, concurrency=None):
+    """Dispatch the asynchronous function_name(*arguments, completion) for each tuple of
+       arguments in argument_lists, keeping at most concurrency calls outstanding.
+
+       Calls whose completion reports a retryable error (e.g. CONNECTIONLOSS) are
+       re-dispatched.  Blocks until every call completes and returns a list of
+       (rc, completion values) in the order of argument_lists.
+
+       Completions are delivered on the ZooKeeper completion thread, so this must not be
+       called from a watch or completion callback.
+    """
+    argument_lists = list(argument_lists)
+    function = getattr(self, function_name)
+    results = [None] * len(argument_lists)
+    slots = threading.Semaphore(concurrency or self.DEFAULT_CONCURRENCY)
+    remaining = [len(argument_lists)]
+    lock = threading.Lock()
+    finished = threading.Event()
+
+    def complete(index, rc, values):
+      results[index] = (rc, values)
+      slots.release()
+      with lock:
+        remaining[0] -= 1
+        if remaining[0] == 0:
+          finished.set()
+
+    def dispatch(index):
+      def completion(_, rc, *values):
+        if rc in self.COMPLETION_RETRY and not self._stopped.is_set():
+          self._log('%s%r returned %s, re-dispatching' % (
+              function_name, argument_lists[index], self.ReturnCode(rc)))
+          dispatch(index)
+        else:
+          complete(index, rc, values)
+      rc = function(*(tuple(argument_lists[index]) + (completion,)))
+      if rc != zookeeper.OK:
+        complete(index, rc, ())
+
+    if not argument_lists:
+      return results
+    for index in range(len(argument_lists)):
+      while not slots.acquire(False):
+        if self._stopped.is_set():
+          raise ZooKeeper.Stopped('ZooKeeper is stopped.')
+        finished.wait(0.01)
+      dispatch(index)
+    while not finished.is_set():
+      if self._stopped.is_set():
+        raise ZooKeeper.Stopped('ZooKeeper is stopped.')
+      finished.wait(0.1)
+    return results
+
+  def get_many(self, paths, concurrency=None):
+    """Read the data of many znodes with pipelined asynchronous gets.
+
+       Returns a dict of path => (data, stat).  Paths that do not exist are omitted.
+       Raises ZooKeeper.OperationError on any other failure.
+    """
+    paths = list(paths)
+    results = self.pipeline('aget', ((path, None) for path in paths), concurrency)
+    values = {}
+    for path, (rc, result) in zip(paths, results):
+      if rc == zookeeper.OK:
+        values[path] = tuple(result)
+      elif rc != zookeeper.NONODE:
+        raise ZooKeeper.OperationError(path, rc)
+    return values
+
+  def get_children_with_data(self, path, concurrency=None):
+    """Return a dict of child name => (data, stat) for the children of path, reading all
+       children with pipelined asynchronous gets.  Children deleted while being read are
+       omitted.
+    """
+    children = self.get_children(path)
+    values = self.get_many((posixpath.join(path, child) for child in children), concurrency)
+    return dict((posixpath.basename(child_path), value) for child_path, value in values.items())
+
+  def _children_by_depth(self, path, concurrency):
+    """Walk the tree under path breadth-first with pipelined listings.  Returns the list
+       of levels, each a list of paths."""
+    levels = []
+    level = [path]
+    while level:
+      levels.append(level)
+      results = self.pipeline('aget_children', ((child, None) for child in level), concurrency)
+      next_level = []
+      for parent, (rc, result) in zip(level, results):
+        if rc == zookeeper.OK:
+          next_level.extend(posixpath.join(parent, child) for child in result[0])
+        elif rc != zookeeper.NONODE:
+          raise ZooKeeper.OperationError(parent, rc)
+      level = next_level
+    return levels
+
+  def delete_tree(self, path, concurrency=None):
+    """Recursively delete path and everything under it, deleting each level of the tree
+       with pipelined asynchronous deletes.  Returns True on success, like safe_delete.
+    """
+    try:
+      for level in reversed(self._children_by_depth(path, concurrency)):
+        results = self.pipeline('adelete', ((child, -1) for child in level), concurrency)
+        for child, (rc, _) in zip(level, results):
+          if rc not in (zookeeper.OK, zookeeper.NONODE):
+            raise ZooKeeper.OperationError(child, rc)
+    except ZooKeeper.OperationError as e:
+      self._log('delete_tree(%s) failed: %s' % (path, e))
+      return False
+    return True
+
+  def create_many(self, paths, value='', acl=DEFAULT_ACL, flags=0, concurrency=None):
+    """Create many znodes with pipelined asynchronous creates, creating missing parents
+       level by level as with safe_create.  Existing znodes are left untouched.  Every
+       path is created with value and flags; missing parents are created empty and
+       persistent.  Raises ZooKeeper.OperationError on failure.
+    """
+    paths = set(posixpath.normpath(path) for path in paths)
+    levels = {}
+    for path in paths:
+      parent = '/'
+      for component in filter(None, path.split('/')):
+        parent = posixpath.join(parent, component)
+        levels.setdefault(parent.count('/'), set()).add(parent)
+    for depth in sorted(levels):
+      level = sorted(levels[depth])
+      results = self.pipeline('acreate',
+          ((path, value, acl, flags) if path in paths else (path, '', acl, 0) for path in level),
+          concurrency)
+      for path, (rc, _) in zip(level, results):
+        if rc not in (zookeeper.OK, zookeeper.NODEEXISTS):
+          raise ZooKeeper.OperationError(path, rc)
+
   def __getattr__(self, function_name):
     """Proxy to underlying ZK functions."""
     if function_name in ZooKeeper._ZK_SYNC_METHODS:
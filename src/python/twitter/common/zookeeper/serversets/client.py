@@ -35,11 +35,19 @@ app.add_option(
 class ServerSetClient(object):
   """Represents a dynamic set of service endpoints.
 
+  Members are cached by znode name along with the version of their data, so a change to
+  the serverset only fetches and deserializes the members that were added.  Updates
+  triggered by ZooKeeper watches are applied on a background thread, with bursts of
+  changes coalesced into a single update, so watcher and delta_watcher are called on that
+  thread.  stop() the client to end the thread.
+
   :param endpoint: ZK path to ServerSet endpoint.
   :param zk: twitter.common.zookeeper.ZooKeeper instance.
   :param watcher: Callback triggered when instances in the endpoint change. Signature is
       watcher(endpoint:str, old_services:[ServiceInstance], new_services:[ServiceInstance])
   :param retries: Number of retries when reconnecting before failing.
+  :param delta_watcher: Callback triggered with just the changed instances. Signature is
+      delta_watcher(endpoint:str, added:[ServiceInstance], removed:[ServiceInstance])
   """
 
   class ServerSetMarkedBad(Exception):
@@ -47,16 +55,27 @@ class ServerSetClient(object):
   class ReconnectFailed(Exception):
     """Reconnect attempt failed."""
 
-  def __init__(self, endpoint, zk=None, watcher=None, retries=None):
+  def __init__(self, endpoint, zk=None, watcher=None, retries=None, delta_watcher=None):
     self._error = None
     self._endpoint = endpoint
     self._watcher = watcher
+    self._delta_watcher = delta_watcher
     self._lock = threading.Lock()
-    self._endpoints = set()
+    self._update_lock = threading.RLock()
+    self._endpoints = []
+    self._members = {}  # znode name => (data version, ServiceInstance)
+    self._resync = False
+    self._changed = threading.Event()
+    self._stopped = False
     options = app.get_options()
     self._retries = options.serverset_retries if retries is None else retries
+    self._owns_zk = zk is None
     self._zk = zk or ZooKeeper()
     self._start()
+    self._updater = threading.Thread(target=self._run_updates,
+        name='ServerSetClient(%s)' % endpoint)
+    self._updater.daemon = True
+    self._updater.start()
 
   def validate(f):
     """An internal method decorator used to validate if the ZK connection has been marked bad."""
@@ -77,6 +96,13 @@ class ServerSetClient(object):
     """Set watcher callback for this endpoint."""
     self._watcher = watcher
 
+  @validate
+  def set_delta_watcher(self, delta_watcher):
+    """Set the (added, removed) watcher callback for this endpoint, returning the previous
+    one so that it may be chained."""
+    previous, self._delta_watcher = self._delta_watcher, delta_watcher
+    return previous
+
   @validate
   def __len__(self):
     """Number of endpoints in ServerSet."""
@@ -95,41 +121,111 @@ class ServerSetClient(object):
     return iter(snapshot)
 
   def _start(self):
-    self._update_endpoints(None, zookeeper.CHILD_EVENT, zookeeper.CONNECTED_STATE, None)
+    self._refresh()
 
   def _update_endpoints(self, _1, event, state, _2):
+    """ZooKeeper watch on the endpoint's children.
+
+    Watches are delivered on the ZooKeeper completion thread, which must not block on
+    further ZooKeeper calls, so the update itself is left to the updater thread.
+    """
+    if state == zookeeper.EXPIRED_SESSION_STATE:
+      # Cached versions may be stale once the session is lost; refetch everything.
+      self._resync = True
+    elif not (state == zookeeper.CONNECTED_STATE and event == zookeeper.CHILD_EVENT):
+      return
+    self._changed.set()
+
+  def stop(self):
+    """Stop applying updates from ZooKeeper watches.  Endpoints are still refreshed on
+    iteration."""
+    self._stopped = True
+    self._changed.set()
+    if threading.current_thread() is not self._updater:
+      self._updater.join()
+
+  def close(self):
+    """Stop the client, and close its ZooKeeper connection if it created it."""
+    self.stop()
+    if self._owns_zk and self._zk is not None:
+      self._zk.stop()
+
+  def _run_updates(self):
+    while True:
+      self._changed.wait()
+      self._changed.clear()
+      if self._stopped:
+        return
+      try:
+        self._refresh()
+      except ServerSetClient.ReconnectFailed as e:
+        log.error('ServerSet %r marked bad: %s' % (self._endpoint, e))
+        self._error = e
+        self._zk = None
+        return
+      except Exception as e:
+        # A failing watcher or a vanished endpoint must not end updates for good.
+        log.error('Failed to update ServerSet %r: %s' % (self._endpoint, e))
+
+  def _fetch_members(self, names):
+    """Fetch and deserialize the members names.  Members that have disappeared or cannot
+       be deserialized are omitted."""
+    members = {}
+    paths = dict((posixpath.join(self._endpoint, name), name) for name in names)
+    for path, (data, stat) in self._zk.get_many(paths).items():
+      try:
+        instance = codec.deserialize(serverset_types.ServiceInstance(), data)
+      except Exception as e:
+        log.warning('Failed to deserialize ServerSet member %s: %s' % (path, e))
+        continue
+      members[paths[path]] = (stat['version'], instance)
+    return members
+
+  def _refresh(self):
     """Update endpoints from ZK.
 
-    This function will block until the ZK servers respond or retry limit is hit.
+    Only members added since the last update are fetched.  This function will block until
+    the ZK servers respond or retry limit is hit.
 
     :raises ReconnectFailed: If reconnection fails.
     """
-    if not (state == zookeeper.CONNECTED_STATE and event == zookeeper.CHILD_EVENT) and not (
-        state == zookeeper.EXPIRED_SESSION_STATE):
-      return
-
-    try:
-      endpoints = []
-      endpoint_names = self._zk.get_children(self._endpoint, self._update_endpoints)
-      endpoint_names.sort()
-      for endpoint in endpoint_names:
-        data = self._zk.get(posixpath.join(self._endpoint, endpoint))
-        service_endpoint = serverset_types.ServiceInstance()
-        endpoints.append(codec.deserialize(service_endpoint, data[0]))
-
-      old = set(map(_format_endpoint, self._endpoints))
-      new = set(map(_format_endpoint, endpoints))
-      log.debug('ServerSet endpoints at %r changed to: %s' % (self._endpoint, ', '.join(new)))
-      log.debug('  Added: %s' % ', '.join(new - old))
-      log.debug('  Removed: %s' % ', '.join(old - new))
+    with self._update_lock:
+      resync, self._resync = self._resync, False
+      try:
+        names = set(self._zk.get_children(self._endpoint, self._update_endpoints))
+        fetched = self._fetch_members(names if resync else names - set(self._members))
+      except ZooKeeper.Error as e:
+        log.error('Lost connection to ZooKeeper: %s, reestablishing.' % e)
+        # The failed fetch did not resync, so the refresh after reconnecting must.
+        self._resync = self._resync or resync
+        self._reconnect()
+        return
+
+      present = set(fetched) if resync else names
+      removed = [self._members.pop(name)[1] for name in sorted(set(self._members) - present)]
+      added = []
+      for name in sorted(fetched):
+        version, instance = fetched[name]
+        previous = self._members.get(name)
+        if previous is not None and previous[0] == version:
+          continue
+        if previous is not None:
+          removed.append(previous[1])
+        self._members[name] = fetched[name]
+        added.append(instance)
+      endpoints = [self._members[name][1] for name in sorted(self._members)]
+
+      log.debug('ServerSet endpoints at %r changed, now %d members.' % (
+          self._endpoint, len(endpoints)))
+      log.debug('  Added: %s' % ', '.join(map(_format_endpoint, added)))
+      log.debug('  Removed: %s' % ', '.join(map(_format_endpoint, removed)))
 
       with self._lock:
-        if self._watcher:
-          self._watcher(self._endpoint, self._endpoints, endpoints)
-        self._endpoints = endpoints
-    except ZooKeeper.Error as e:
-      log.error('Lost connection to ZooKeeper: %s, reestablishing.' % e)
-      self._reconnect()
+        old, self._endpoints = self._endpoints, endpoints
+      if self._watcher:
+        self._watcher(self._endpoint, old, endpoints)
+      if self._delta_watcher and (added or removed):
+        self._delta_watcher(self._endpoint, added, removed)
 
   # Nuke internal decorator
   del validate
@@ -0,0 +1,99 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+import json
+from wsgiref.util import setup_testing_defaults
+
+from twitter.common.app.modules.varz import SampleJson, VarsEndpoint
+from twitter.common.http import HttpServer
+from twitter.common.metrics import AtomicGauge, Label, MetricSampler, Metrics
+
+import pytest
+
+
+def build_metrics():
+  metrics = Metrics()
+  metrics.register(Label('version', '1.0'))
+  for name in ('requests', 'failures'):
+    metrics.scope('rpc').register(AtomicGauge(name))
+  metrics.scope('rpcx').register(AtomicGauge('calls'))
+  metrics.scope('zk').register(Label('path', '/"quoted"'))
+  return metrics
+
+
+def test_sample_json_stream():
+  sampler = MetricSampler(build_metrics())
+  _, names, entries = SampleJson(sampler).snapshot()
+  assert json.loads(''.join(SampleJson.stream(names, entries))) == sampler.sample()
+  assert json.loads(''.join(SampleJson.stream(names, entries, 'rpc.'))) == {
+      'rpc.requests': '0', 'rpc.failures': '0'}
+  assert json.loads(''.join(SampleJson.stream(names, entries, 'rpc'))) == {
+      'rpc.requests': '0', 'rpc.failures': '0', 'rpcx.calls': '0'}
+  assert json.loads(''.join(SampleJson.stream(names, entries, 'missing'))) == {}
+
+
+def test_sample_json_chunks(monkeypatch):
+  monkeypatch.setattr(SampleJson, 'CHUNK_SIZE', 2)
+  sampler = MetricSampler(build_metrics())
+  _, names, entries = SampleJson(sampler).snapshot()
+  chunks = list(SampleJson.stream(names, entries))
+  assert len(chunks) == 5
+  assert json.loads(''.join(chunks)) == sampler.sample()
+
+
+def test_sample_json_shared_until_changed():
+  metrics = build_metrics()
+  sampler = MetricSampler(metrics)
+  sample_json = SampleJson(sampler)
+  etag, _, entries = sample_json.snapshot()
+  sampler._take_sample()
+  same_etag, _, same_entries = sample_json.snapshot()
+  assert (same_etag, same_entries) == (etag, entries)
+  assert same_entries is entries
+  metrics.scope('rpc').register(AtomicGauge('requests')).increment()
+  sampler._take_sample()
+  new_etag, _, new_entries = sample_json.snapshot()
+  assert new_etag != etag
+  assert '"rpc.requests": "1"' in new_entries
+
+
+def request(app, path, query='', headers=None):
+  environ = {'PATH_INFO': path, 'QUERY_STRING': query}
+  environ.update(headers or {})
+  setup_testing_defaults(environ)
+  response = {}
+  def start_response(status, response_headers, exc_info=None):
+    response['status'] = status
+    response['headers'] = dict((name.lower(), value) for name, value in response_headers)
+  body = b''.join(app(environ, start_response))
+  return response['status'], response['headers'], body
+
+
+@pytest.mark.skipif("sys.version_info >= (3,0)")
+def test_vars_json_endpoint():
+  endpoint = VarsEndpoint()
+  endpoint.shutdown()
+  endpoint._monitor = MetricSampler(build_metrics())
+  endpoint._json = SampleJson(endpoint._monitor)
+  server = HttpServer()
+  server.mount_routes(endpoint)
+  status, headers, body = request(server.app(), '/vars.json', 'filter=rpc.')
+  assert status.startswith('200')
+  assert headers['content-type'] == 'application/json'
+  assert json.loads(body) == {'rpc.requests': '0', 'rpc.failures': '0'}
+  status, _, body = request(server.app(), '/vars.json',
+      headers={'HTTP_IF_NONE_MATCH': '"stale", %s' % headers['etag']})
+  assert status.startswith('304')
+  assert body == b''
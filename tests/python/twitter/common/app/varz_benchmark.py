@@ -0,0 +1,84 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+from __future__ import print_function
+
+import json
+import threading
+import time
+
+from twitter.common import app
+from twitter.common.app.modules.varz import SampleJson
+from twitter.common.metrics import AtomicGauge, MetricSampler, Metrics
+
+app.add_option('--gauges', type=int, default=50000, help='Number of gauges.')
+app.add_option('--scrapers', type=int, default=8, help='Number of concurrent scrapers.')
+app.add_option('--scrapes', type=int, default=5, help='Number of scrapes per scraper.')
+app.add_option('--filter', default='scope7.', help='Prefix of the filtered scrape.')
+
+
+def build(size):
+  metrics = Metrics()
+  for k in range(size):
+    metrics.scope('scope%d' % (k % 100)).register(AtomicGauge('gauge%d' % k))
+  return MetricSampler(metrics)
+
+
+def timed(name, options, scrape):
+  largest = [0]
+  def run():
+    for _ in range(options.scrapes):
+      for chunk in scrape():
+        largest[0] = max(largest[0], len(chunk))
+  scrapers = [threading.Thread(target=run) for _ in range(options.scrapers)]
+  start = time.time()
+  for scraper in scrapers:
+    scraper.start()
+  for scraper in scrapers:
+    scraper.join()
+  elapsed = time.time() - start
+  print('%-18s %8.2f ms/scrape  largest string %8d bytes' % (
+      name, 1000.0 * elapsed / (options.scrapers * options.scrapes), largest[0]))
+
+
+def main(args, options):
+  sampler = build(options.gauges)
+  sample_json = SampleJson(sampler)
+
+  def legacy():
+    return [json.dumps(sampler.sample())]
+
+  def legacy_filtered():
+    sample = sampler.sample()
+    return [json.dumps(dict((name, value) for name, value in sample.items()
+                            if name.startswith(options.filter)))]
+
+  def streamed(prefix=''):
+    _, names, entries = sample_json.snapshot()
+    return SampleJson.stream(names, entries, prefix)
+
+  def reserialized():
+    # Every scrape sees a new sample, as when gauges change faster than scrapes arrive.
+    sampler._version += 1
+    return streamed()
+
+  timed('legacy', options, legacy)
+  timed('streamed', options, streamed)
+  timed('streamed (changed)', options, reserialized)
+  timed('legacy filtered', options, legacy_filtered)
+  timed('streamed filtered', options, lambda: streamed(options.filter))
+
+
+app.main()
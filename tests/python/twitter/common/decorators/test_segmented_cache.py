@@ -0,0 +1,175 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import threading
+
+import pytest
+
+from twitter.common.decorators import SegmentedCache, segmented_cache
+from twitter.common.metrics import Metrics
+
+class FakeClock(object):
+  def __init__(self):
+    self._time = 0
+
+  def advance(self, ticks):
+    self._time += ticks
+
+  def time(self):
+    return self._time
+
+def test_get_put():
+  cache = SegmentedCache(segments=4)
+  assert cache.get('a') is None
+  assert cache.get('a', 1) == 1
+  cache.put('a', 2)
+  assert cache.get('a') == 2
+  assert len(cache) == 1
+  cache.invalidate('a')
+  assert cache.get('a') is None
+  assert cache.stats().hits == 1
+  assert cache.stats().misses == 3
+
+def test_weighted_eviction():
+  evicted = []
+  cache = SegmentedCache(segments=1, max_weight=10, weigher=lambda key, value: len(value),
+      on_eviction=evicted.append)
+  cache.put('a', 'xxxx')
+  cache.put('b', 'xxxx')
+  assert cache.get('a') == 'xxxx'
+  cache.put('c', 'xxxx')
+  assert evicted == ['xxxx']
+  assert cache.get('b') is None
+  assert cache.get('a') == 'xxxx'
+  cache.put('d', 'x' * 11)
+  assert cache.get('d') is None
+  assert cache.stats().weight == 8
+  assert cache.stats().evictions == 1
+
+def test_ttl():
+  clock = FakeClock()
+  cache = SegmentedCache(ttl=10, clock=clock)
+  cache.put('a', 1)
+  cache.put('b', 2, ttl=20)
+  clock.advance(10)
+  assert cache.get('a') is None
+  assert cache.get('b') == 2
+  clock.advance(10)
+  assert cache.get('b') is None
+  assert cache.stats().expirations == 2
+  assert len(cache) == 0
+
+def test_single_flight():
+  calls = []
+  started, release = threading.Event(), threading.Event()
+  def compute():
+    calls.append(1)
+    started.set()
+    release.wait()
+    return 'value'
+
+  cache = SegmentedCache()
+  results = []
+  def get():
+    results.append(cache.get_or_compute('key', compute))
+  threads = [threading.Thread(target=get) for _ in range(8)]
+  threads[0].start()
+  started.wait()
+  for thread in threads[1:]:
+    thread.start()
+  release.set()
+  for thread in threads:
+    thread.join()
+  assert calls == [1]
+  assert results == ['value'] * 8
+
+def test_single_flight_error():
+  cache = SegmentedCache()
+  def compute():
+    raise ValueError('oops')
+  with pytest.raises(ValueError):
+    cache.get_or_compute('key', compute)
+  assert cache.get_or_compute('key', lambda: 'value') == 'value'
+
+def test_single_flight_base_exception():
+  class Interrupted(BaseException): pass
+  started, release = threading.Event(), threading.Event()
+  def compute():
+    started.set()
+    release.wait()
+    raise Interrupted()
+
+  cache = SegmentedCache()
+  errors = []
+  def get():
+    try:
+      cache.get_or_compute('key', compute)
+    except Interrupted as e:
+      errors.append(e)
+  leader, waiter = threading.Thread(target=get), threading.Thread(target=get)
+  leader.start()
+  started.wait()
+  waiter.start()
+  release.set()
+  leader.join()
+  waiter.join()
+  assert len(errors) == 2
+  assert cache.get('key', 'missing') == 'missing'
+
+def test_on_eviction_may_use_cache():
+  cache = None
+  seen = []
+  def on_eviction(value):
+    seen.append((value, cache.get('a')))
+  cache = SegmentedCache(segments=1, max_weight=1, on_eviction=on_eviction)
+  cache.put('a', 1)
+  cache.put('b', 2)
+  cache.invalidate('b')
+  assert seen == [(1, None), (2, None)]
+
+def test_decorator():
+  calls = []
+
+  @segmented_cache(max_weight=2, segments=1)
+  def double(value):
+    calls.append(value)
+    return value * 2
+
+  assert double(1) == 2
+  assert double(1) == 2
+  assert double(2) == 4
+  assert double(3) == 6
+  assert double(1) == 2
+  assert calls == [1, 2, 3, 1]
+  assert double.cache_info().hits == 1
+  double.cache_clear()
+  assert len(double.cache) == 0
+
+def test_export():
+  metrics = Metrics()
+  cache = SegmentedCache()
+  cache.export(metrics.scope('cache'))
+  cache.put('a', 1)
+  cache.get('a')
+  cache.get('b')
+  assert metrics.sample() == {
+    'cache.hits': '1',
+    'cache.misses': '1',
+    'cache.evictions': '0',
+    'cache.expirations': '0',
+    'cache.size': '1',
+    'cache.weight': '1',
+  }
@@ -0,0 +1,91 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+from __future__ import print_function
+
+import os
+import time
+
+from twitter.common import app
+from twitter.common.contextutil import temporary_dir
+from twitter.common.dirutil import DiskUsage, du
+
+app.add_option('--files', type=int, default=1000000, help='Number of files generated.')
+app.add_option('--files_per_directory', type=int, default=100,
+               help='Number of files in each generated directory.')
+app.add_option('--fanout', type=int, default=10,
+               help='Number of subdirectories of each generated directory.')
+app.add_option('--threads', type=int, default=8, help='Number of threads of the parallel scan.')
+app.add_option('--root', default=None,
+               help='Scan this existing directory rather than generating a tree.')
+
+
+def generate(root, options):
+  """Generate a tree of options.files small files, breadth first."""
+  directories = [root]
+  created = 0
+  while created < options.files:
+    directory = directories.pop(0)
+    for k in range(options.fanout):
+      subdirectory = os.path.join(directory, 'd%d' % k)
+      os.mkdir(subdirectory)
+      directories.append(subdirectory)
+    for k in range(min(options.files_per_directory, options.files - created)):
+      with open(os.path.join(directory, 'f%d' % k), 'w') as fp:
+        fp.write('x' * (k % 7 * 1000))
+    created += options.files_per_directory
+
+
+def drop_cache_entry(usage, path):
+  """Simulate a change to one directory between cached scans."""
+  entry = usage._cache[path]
+  entry[0] = None
+
+
+def measure(name, scan, *args):
+  start = time.time()
+  result = scan(*args)
+  print('%-32s %10.3fs %16d bytes' % (name, time.time() - start, result))
+
+
+def benchmark(root, options):
+  with temporary_dir() as cache_dir:
+    cache = os.path.join(cache_dir, 'du.cache')
+    measure('du (apparent sizes)', du, root)
+    measure('DiskUsage threads=1', DiskUsage(threads=1).scan, root)
+    measure('DiskUsage threads=%d' % options.threads, DiskUsage(threads=options.threads).scan,
+            root)
+    usage = DiskUsage(threads=options.threads, cache=cache)
+    measure('DiskUsage cache, cold', usage.scan, root)
+    usage.save()
+    print('%-32s %10.1fMB' % ('cache size', os.path.getsize(cache) / 1e6))
+    measure('DiskUsage cache, warm', DiskUsage(threads=options.threads, cache=cache).scan, root)
+    warm = DiskUsage(threads=options.threads, cache=cache)
+    drop_cache_entry(warm, os.path.abspath(root))
+    measure('DiskUsage cache, root changed', warm.scan, root)
+
+
+def main(args, options):
+  if options.root:
+    benchmark(options.root, options)
+    return
+  with temporary_dir() as root:
+    start = time.time()
+    generate(root, options)
+    print('Generated %d files in %.1fs' % (options.files, time.time() - start))
+    benchmark(root, options)
+
+
+app.main()
@@ -0,0 +1,144 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+import os
+
+from twitter.common.contextutil import temporary_dir
+from twitter.common.dirutil import DiskUsage, du, load_json_cache, save_json_cache, touch
+
+
+def write(filename, size):
+  with open(filename, 'w') as fp:
+    fp.write('x' * size)
+
+
+def make_tree(root):
+  os.makedirs(os.path.join(root, 'a', 'b'))
+  os.makedirs(os.path.join(root, 'c'))
+  write(os.path.join(root, 'one'), 10)
+  write(os.path.join(root, 'a', 'two'), 5000)
+  write(os.path.join(root, 'a', 'b', 'three'), 100000)
+  os.symlink('one', os.path.join(root, 'c', 'link'))
+
+
+def blocks(root):
+  total = os.lstat(root).st_blocks
+  for path, dirnames, filenames in os.walk(root):
+    for name in dirnames + filenames:
+      total += os.lstat(os.path.join(path, name)).st_blocks
+  return total * 512
+
+
+def test_blocks():
+  with temporary_dir() as root:
+    make_tree(root)
+    assert DiskUsage().scan(root) == blocks(root)
+    assert DiskUsage(threads=1).scan(root) == blocks(root)
+
+
+def test_apparent():
+  with temporary_dir() as root:
+    os.makedirs(os.path.join(root, 'a'))
+    write(os.path.join(root, 'a', 'one'), 10)
+    write(os.path.join(root, 'two'), 5000)
+    directories = os.lstat(root).st_size + os.lstat(os.path.join(root, 'a')).st_size
+    assert DiskUsage(apparent=True).scan(root) == du(root) + directories == 5010 + directories
+
+
+def test_file():
+  with temporary_dir() as root:
+    write(os.path.join(root, 'one'), 5000)
+    assert DiskUsage(apparent=True).scan(os.path.join(root, 'one')) == 5000
+
+
+def test_hard_links_counted_once():
+  with temporary_dir() as root:
+    os.makedirs(os.path.join(root, 'a'))
+    os.makedirs(os.path.join(root, 'b'))
+    write(os.path.join(root, 'a', 'one'), 100000)
+    os.link(os.path.join(root, 'a', 'one'), os.path.join(root, 'b', 'one'))
+    os.link(os.path.join(root, 'a', 'one'), os.path.join(root, 'two'))
+    size = os.lstat(os.path.join(root, 'two')).st_blocks * 512
+    assert size > 0
+    assert DiskUsage().scan(root) == blocks(root) - 2 * size
+
+
+def test_cache():
+  with temporary_dir() as root:
+    make_tree(os.path.join(root, 'tree'))
+    cache = os.path.join(root, 'du.cache')
+    usage = DiskUsage(cache=cache)
+    assert usage.scan(os.path.join(root, 'tree')) == blocks(os.path.join(root, 'tree'))
+    usage.save()
+
+    # A file rewritten in place goes unnoticed while its directory is unchanged.
+    write(os.path.join(root, 'tree', 'a', 'two'), 100000)
+    stale = DiskUsage(cache=cache)
+    assert stale.scan(os.path.join(root, 'tree')) < blocks(os.path.join(root, 'tree'))
+
+    # Adding an entry changes the directory's mtime and so rescans it.
+    touch(os.path.join(root, 'tree', 'a', 'new'))
+    fresh = DiskUsage(cache=cache)
+    assert fresh.scan(os.path.join(root, 'tree')) == blocks(os.path.join(root, 'tree'))
+
+
+def test_json_cache():
+  with temporary_dir() as root:
+    cache = os.path.join(root, 'cache')
+    assert load_json_cache(cache, 1) == {}
+    save_json_cache(cache, 1, {'a': [1, 2]})
+    assert load_json_cache(cache, 1) == {'a': [1, 2]}
+    assert load_json_cache(cache, 2) == {}
+    with open(cache, 'w') as fp:
+      fp.write('{"a": [1, 2]')
+    assert load_json_cache(cache, 1) == {}
+    assert os.listdir(root) == ['cache']
+
+
+def test_cache_removed_directory():
+  with temporary_dir() as root:
+    make_tree(root)
+    usage = DiskUsage(cache=os.path.join(root, 'du.cache'))
+    usage.scan(os.path.join(root, 'a'))
+    os.unlink(os.path.join(root, 'a', 'b', 'three'))
+    os.rmdir(os.path.join(root, 'a', 'b'))
+    assert usage.scan(os.path.join(root, 'a')) == blocks(os.path.join(root, 'a'))
+
+
+def test_cache_keeps_other_trees():
+  with temporary_dir() as root:
+    make_tree(root)
+    cache = os.path.join(root, 'du.cache')
+    usage = DiskUsage(cache=cache)
+    usage.scan(os.path.join(root, 'a'))
+    usage.scan(os.path.join(root, 'c'))
+    usage.save()
+    # Entries loaded from the cache are used without listing their directories.
+    reloaded = DiskUsage(cache=cache)
+    listed = []
+    list_directory = reloaded._list
+    reloaded._list = lambda directory: listed.append(directory) or list_directory(directory)
+    assert reloaded.scan(os.path.join(root, 'a')) == blocks(os.path.join(root, 'a'))
+    assert reloaded.scan(os.path.join(root, 'c')) == blocks(os.path.join(root, 'c'))
+    assert listed == []
+
+
+def test_corrupt_cache():
+  with temporary_dir() as root:
+    make_tree(os.path.join(root, 'tree'))
+    cache = os.path.join(root, 'du.cache')
+    write(cache, 10)
+    assert DiskUsage(cache=cache).scan(os.path.join(root, 'tree')) == blocks(
+        os.path.join(root, 'tree'))
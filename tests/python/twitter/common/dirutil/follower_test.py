@@ -0,0 +1,138 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+import os
+import time
+
+from twitter.common.contextutil import temporary_dir
+from twitter.common.dirutil.inotify import Inotify
+from twitter.common.dirutil.tail import Follower
+
+import pytest
+
+
+def write(filename, data, mode='a'):
+  with open(filename, mode) as fp:
+    fp.write(data)
+
+
+def wait_for(follower, count, timeout=5):
+  lines = []
+  deadline = time.time() + timeout
+  while len(lines) < count and time.time() < deadline:
+    lines.extend(follower.wait(timeout=deadline - time.time()))
+  return lines
+
+
+
+@pytest.fixture(params=['polling', 'inotify'])
+def follower(request):
+  follower = Follower(interval=0.01, inotify=request.param == 'inotify')
+  if request.param == 'inotify' and not follower.uses_inotify:
+    pytest.skip('inotify is unavailable')
+  yield follower
+  follower.close()
+
+
+def test_last_lines_then_appends(follower):
+  with temporary_dir() as td:
+    log = os.path.join(td, 'log')
+    write(log, ''.join('line %d\n' % k for k in range(20)))
+    follower.add(log, lines=3)
+    assert [line for _, line in wait_for(follower, 3)] == ['line 17\n', 'line 18\n', 'line 19\n']
+    write(log, 'line 20\npartial')
+    assert wait_for(follower, 1) == [(log, 'line 20\n')]
+    assert follower.wait(timeout=0.05) == []
+    write(log, ' line\n')
+    assert wait_for(follower, 1) == [(log, 'partial line\n')]
+
+
+def test_many_files(follower):
+  with temporary_dir() as td:
+    logs = [os.path.join(td, 'log%d' % k) for k in range(10)]
+    for log in logs:
+      write(log, '')
+      follower.add(log)
+    for log in logs:
+      write(log, '%s\n' % os.path.basename(log))
+    lines = wait_for(follower, len(logs))
+    assert sorted(lines) == sorted((log, '%s\n' % os.path.basename(log)) for log in logs)
+
+
+def test_rotation(follower):
+  with temporary_dir() as td:
+    log = os.path.join(td, 'log')
+    write(log, '')
+    follower.add(log)
+    write(log, 'before\n')
+    assert wait_for(follower, 1) == [(log, 'before\n')]
+    write(log, 'last words')
+    os.rename(log, log + '.1')
+    write(log, 'after\n')
+    assert wait_for(follower, 2) == [(log, 'last words'), (log, 'after\n')]
+    write(log, 'more\n')
+    assert wait_for(follower, 1) == [(log, 'more\n')]
+
+
+def test_truncation(follower):
+  with temporary_dir() as td:
+    log = os.path.join(td, 'log')
+    write(log, '')
+    follower.add(log)
+    write(log, 'one\ntwo\n')
+    assert len(wait_for(follower, 2)) == 2
+    write(log, 'three\n', mode='w')
+    assert wait_for(follower, 1) == [(log, 'three\n')]
+
+
+def test_created_later(follower):
+  with temporary_dir() as td:
+    log = os.path.join(td, 'log')
+    follower.add(log)
+    assert follower.wait(timeout=0.05) == []
+    write(log, 'hello\n')
+    assert wait_for(follower, 1) == [(log, 'hello\n')]
+
+
+def test_created_later_in_new_directory(follower):
+  with temporary_dir() as td:
+    log = os.path.join(td, 'logs', 'log')
+    follower.add(log)
+    assert follower.wait(timeout=0.05) == []
+    os.mkdir(os.path.dirname(log))
+    write(log, 'hello\n')
+    assert wait_for(follower, 1) == [(log, 'hello\n')]
+    write(log, 'again\n')
+    assert wait_for(follower, 1) == [(log, 'again\n')]
+
+
+def test_last_line_partial(follower):
+  with temporary_dir() as td:
+    log = os.path.join(td, 'log')
+    write(log, 'first\nsecond\npart')
+    follower.add(log, lines=3)
+    assert wait_for(follower, 1) == [(log, 'first\n'), (log, 'second\n')]
+    write(log, 'ial\n')
+    assert wait_for(follower, 1) == [(log, 'partial\n')]
+
+
+def test_remove(follower):
+  with temporary_dir() as td:
+    log = os.path.join(td, 'log')
+    write(log, '')
+    follower.add(log)
+    follower.remove(log)
+    write(log, 'ignored\n')
+    assert follower.wait(timeout=0.05) == []
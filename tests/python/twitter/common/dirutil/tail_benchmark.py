@@ -0,0 +1,118 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+from __future__ import print_function
+
+import os
+import random
+import resource
+import threading
+import time
+
+from twitter.common import app
+from twitter.common.contextutil import temporary_dir
+from twitter.common.dirutil.tail import Follower, _tail_f_polling
+
+app.add_option('--files', type=int, default=200, help='Number of files followed.')
+app.add_option('--writes', type=int, default=500, help='Number of lines written.')
+app.add_option('--write_interval_ms', type=float, default=10,
+               help='Milliseconds between writes.')
+app.add_option('--idle_seconds', type=float, default=3,
+               help='Seconds without writes over which to measure idle CPU.')
+
+
+def cpu_seconds():
+  usage = resource.getrusage(resource.RUSAGE_SELF)
+  return usage.ru_utime + usage.ru_stime
+
+
+def write_lines(filenames, options):
+  for _ in range(options.writes):
+    with open(random.choice(filenames), 'a') as fp:
+      fp.write('%.6f\n' % time.time())
+    time.sleep(options.write_interval_ms / 1000.0)
+
+
+def record(latencies, line):
+  latencies.append(time.time() - float(line))
+
+
+def follow_threads(filenames, latencies, done):
+  """The polling tail_f, one thread per file."""
+  def follow(filename):
+    for line in _tail_f_polling(filename):
+      if done.is_set():
+        return
+      record(latencies, line)
+  for filename in filenames:
+    thread = threading.Thread(target=follow, args=(filename,))
+    thread.daemon = True
+    thread.start()
+
+
+def follow_one_thread(inotify):
+  def follow(filenames, latencies, done):
+    follower = Follower(inotify=inotify)
+    if inotify and not follower.uses_inotify:
+      print('inotify is unavailable, polling.')
+    for filename in filenames:
+      follower.add(filename, lines=0)
+    def run():
+      while not done.is_set():
+        for _, line in follower.wait(timeout=1):
+          record(latencies, line)
+      follower.close()
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+  return follow
+
+
+def timed(name, follow, options):
+  with temporary_dir() as td:
+    filenames = [os.path.join(td, 'file%d' % k) for k in range(options.files)]
+    for filename in filenames:
+      open(filename, 'w').close()
+    latencies, done = [], threading.Event()
+    follow(filenames, latencies, done)
+    time.sleep(0.5)
+    idle_cpu = cpu_seconds()
+    time.sleep(options.idle_seconds)
+    idle_cpu = cpu_seconds() - idle_cpu
+    start, cpu = time.time(), cpu_seconds()
+    write_lines(filenames, options)
+    deadline = time.time() + 5
+    while len(latencies) < options.writes and time.time() < deadline:
+      time.sleep(0.01)
+    elapsed, cpu = time.time() - start, cpu_seconds() - cpu
+    done.set()
+    if not latencies:
+      print('%-18s no lines received' % name)
+      return
+    latencies.sort()
+    percentile = lambda p: 1000.0 * latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+    print('%-18s latency p50 %8.2f ms  p99 %8.2f ms  cpu %5.1f%% idle %5.1f%%  (%d/%d lines)' % (
+        name, percentile(0.5), percentile(0.99), 100.0 * cpu / elapsed,
+        100.0 * idle_cpu / options.idle_seconds, len(latencies), options.writes))
+
+
+def main(args, options):
+  # The tail_f threads cannot be stopped, so they run last.
+  timed('follower inotify', follow_one_thread(True), options)
+  timed('follower polling', follow_one_thread(False), options)
+  timed('tail_f threads', follow_threads, options)
+
+
+app.main()
@@ -0,0 +1,136 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+from __future__ import print_function
+
+import socket
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler
+
+try:
+  from httplib import HTTPConnection
+except ImportError:
+  from http.client import HTTPConnection
+
+from twitter.common import app
+from twitter.common.http import HttpServer, ThreadedServer
+from twitter.common.http.server import QuittableServer
+
+app.add_option('--clients', type=int, default=8, help='Number of concurrent /fast clients.')
+app.add_option('--slow_clients', type=int, default=2,
+               help='Number of concurrent clients of an endpoint taking --slow_ms.')
+app.add_option('--slow_ms', type=int, default=100, help='Latency of the slow endpoint.')
+app.add_option('--seconds', type=float, default=5.0, help='Duration of each run.')
+app.add_option('--threads', type=int, default=16, help='ThreadedServer worker threads.')
+app.add_option('--processes', type=int, default=1, help='ThreadedServer processes.')
+
+
+class BenchmarkServer(HttpServer):
+  def __init__(self, slow_ms):
+    self._slow = slow_ms / 1000.0
+    HttpServer.__init__(self)
+
+  @HttpServer.route('/fast')
+  def fast(self):
+    return 'ok'
+
+  @HttpServer.route('/slow')
+  def slow(self):
+    time.sleep(self._slow)
+    return 'ok'
+
+
+def free_port():
+  sock = socket.socket()
+  sock.bind(('localhost', 0))
+  port = sock.getsockname()[1]
+  sock.close()
+  return port
+
+
+def wait_for(port):
+  for _ in range(100):
+    try:
+      socket.create_connection(('localhost', port)).close()
+      return
+    except socket.error:
+      time.sleep(0.05)
+  raise RuntimeError('Server did not start on port %d' % port)
+
+
+def load(port, path, deadline, latencies, errors):
+  connection = None
+  while time.time() < deadline:
+    start = time.time()
+    try:
+      connection = connection or HTTPConnection('localhost', port, timeout=10)
+      connection.request('GET', path)
+      response = connection.getresponse()
+      response.read()
+      if response.getheader('Connection') == 'close':
+        connection.close()
+        connection = None
+    except (socket.error, IOError, Exception):
+      errors.append(path)
+      connection = None
+      continue
+    latencies.append(time.time() - start)
+
+
+def timed(name, server, port, options):
+  http_server = BenchmarkServer(options.slow_ms)
+  thread = threading.Thread(target=http_server.run, args=('localhost', port),
+                            kwargs={'server': server})
+  thread.daemon = True
+  thread.start()
+  wait_for(port)
+  deadline = time.time() + options.seconds
+  fast, slow, errors = [], [], []
+  clients = [threading.Thread(target=load, args=(port, '/fast', deadline, fast, errors))
+             for _ in range(options.clients)]
+  clients.extend(threading.Thread(target=load, args=(port, '/slow', deadline, slow, errors))
+                 for _ in range(options.slow_clients))
+  for client in clients:
+    client.start()
+  for client in clients:
+    client.join()
+  server.shutdown()
+  fast.sort()
+  def percentile(p):
+    return 1000.0 * fast[min(len(fast) - 1, int(len(fast) * p))] if fast else float('nan')
+  print('%-9s %8.1f requests/sec  /fast p50 %7.2f ms  p99 %7.2f ms  p999 %7.2f ms  '
+        '(%d slow, %d errors)' % (name, len(fast) / options.seconds, percentile(0.5),
+        percentile(0.99), percentile(0.999), len(slow), len(errors)))
+
+
+class QuietHandler(WSGIRequestHandler):
+  def log_message(self, *args):
+    pass
+
+
+def main(args, options):
+  port = free_port()
+  server = QuittableServer(host='localhost', port=port, handler_class=QuietHandler)
+  server.quiet = True
+  timed('wsgiref', server, port, options)
+  port = free_port()
+  server = ThreadedServer(host='localhost', port=port, threads=options.threads,
+      processes=options.processes)
+  server.quiet = True
+  timed('threaded', server, port, options)
+
+
+app.main()
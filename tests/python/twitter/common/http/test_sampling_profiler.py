@@ -0,0 +1,126 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import threading
+
+try:
+  from httplib import HTTPConnection
+except ImportError:
+  from http.client import HTTPConnection
+
+from twitter.common.http import HttpServer, SamplingProfiler, ThreadedServer
+from twitter.common.http.diagnostics import DiagnosticsEndpoints
+from twitter.common.metrics import Metrics, RootMetrics
+
+import pytest
+
+
+def spin(started, stop):
+  started.set()
+  while not stop.is_set():
+    sum(range(100))
+
+
+def spinning(name):
+  started, stop = threading.Event(), threading.Event()
+  thread = threading.Thread(target=spin, args=(started, stop), name=name)
+  thread.daemon = True
+  thread.start()
+  started.wait()
+  return stop, thread
+
+
+def test_profile():
+  stop, thread = spinning('spinner')
+  try:
+    profile = SamplingProfiler().profile(0.5, hz=100)
+  finally:
+    stop.set()
+    thread.join()
+  assert 10 < profile.samples <= 51
+
+  rows = dict((label.split()[0], (own, total)) for own, total, label in profile.top())
+  assert rows['spin'][1] >= profile.samples - 1
+  assert rows['spin'][0] > 0
+  assert rows['run'] == (0, rows['run'][1])
+  assert 'profile' not in rows
+
+  stacks = [line for line in profile.collapsed().splitlines() if line.startswith('spinner;')]
+  assert stacks
+  assert sum(int(line.rsplit(' ', 1)[1]) for line in stacks) == profile.samples
+  assert all(';spin (test_sampling_profiler.py:' in line for line in stacks)
+
+  table = profile.format_top(limit=3)
+  assert table.startswith('%d samples of ' % profile.samples)
+  assert len(table.splitlines()) == 5
+
+
+def test_overhead_gauges():
+  metrics = Metrics()
+  profiler = SamplingProfiler(metrics=metrics)
+  profile = profiler.profile(0.2, hz=50)
+  samples = metrics.sample()
+  assert int(samples['sampling_profiler.samples']) == profile.samples
+  assert 0 < float(samples['sampling_profiler.overhead_ratio']) < 0.5
+  assert float(samples['sampling_profiler.sampling_seconds']) > 0
+
+
+def test_no_metrics_by_default():
+  before = RootMetrics().sample()
+  DiagnosticsEndpoints()
+  assert RootMetrics().sample() == before
+
+
+def test_invalid_arguments():
+  profiler = SamplingProfiler()
+  for seconds, hz in ((0, 100), (SamplingProfiler.MAX_SECONDS + 1, 100), (1, 0),
+                      (1, SamplingProfiler.MAX_HZ + 1)):
+    with pytest.raises(SamplingProfiler.InvalidArgument):
+      profiler.profile(seconds, hz)
+
+
+@pytest.mark.skipif("sys.version_info >= (3,0)")
+def test_endpoint():
+  http_server = HttpServer()
+  http_server.mount_routes(DiagnosticsEndpoints())
+  server = ThreadedServer(port=0)
+  thread = threading.Thread(target=http_server.run, args=('localhost', 0),
+                            kwargs={'server': server})
+  thread.daemon = True
+  thread.start()
+  stop, spinner = spinning('spinner')
+  try:
+    assert server.wait_started(timeout=10)
+    connection = HTTPConnection('localhost', server.port, timeout=10)
+    connection.request('GET', '/profile/sample?seconds=0.2&hz=50&format=collapsed')
+    response = connection.getresponse()
+    assert response.status == 200
+    assert response.getheader('Content-Type').startswith('text/plain')
+    assert b'spinner;' in response.read()
+
+    connection.request('GET', '/profile/sample?seconds=0.2&limit=2')
+    response = connection.getresponse()
+    assert response.status == 200
+    assert len(response.read().splitlines()) == 4
+
+    connection.request('GET', '/profile/sample?hz=100000')
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 400
+  finally:
+    stop.set()
+    server.shutdown()
+    thread.join(10)
@@ -0,0 +1,174 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+import socket
+import threading
+import time
+
+try:
+  from httplib import HTTPConnection
+except ImportError:
+  from http.client import HTTPConnection
+
+from twitter.common.http import HttpServer, ThreadedServer
+from twitter.common.metrics import Metrics, RootMetrics
+
+import pytest
+
+
+class SlowServer(HttpServer):
+  def __init__(self):
+    self.release = threading.Event()
+    HttpServer.__init__(self)
+
+  @HttpServer.route('/fast')
+  def fast(self):
+    return 'fast'
+
+  @HttpServer.route('/slow')
+  def slow(self):
+    self.release.wait()
+    return 'slow'
+
+  @HttpServer.route('/echo', method='POST')
+  def echo(self):
+    return self._request.body.read()
+
+
+def start(**kw):
+  http_server = SlowServer()
+  server = ThreadedServer(port=0, metrics=Metrics(), **kw)
+  thread = threading.Thread(target=http_server.run, args=('localhost', 0),
+                            kwargs={'server': server})
+  thread.daemon = True
+  thread.start()
+  assert server.wait_started(timeout=10)
+  return http_server, server, thread
+
+
+def get(connection, path):
+  connection.request('GET', path)
+  response = connection.getresponse()
+  return response.status, response.read()
+
+
+@pytest.mark.skipif("sys.version_info >= (3,0)")
+def test_slow_request_does_not_block_others():
+  http_server, server, thread = start(threads=2)
+  try:
+    slow = HTTPConnection('localhost', server.port, timeout=10)
+    slow.request('GET', '/slow')
+    assert get(HTTPConnection('localhost', server.port, timeout=10), '/fast') == (200, b'fast')
+    http_server.release.set()
+    assert slow.getresponse().read() == b'slow'
+  finally:
+    http_server.release.set()
+    server.shutdown()
+    thread.join(10)
+  assert not thread.is_alive()
+
+
+@pytest.mark.skipif("sys.version_info >= (3,0)")
+def test_keepalive():
+  http_server, server, thread = start(threads=1)
+  try:
+    connection = HTTPConnection('localhost', server.port, timeout=10)
+    for _ in range(3):
+      assert get(connection, '/fast') == (200, b'fast')
+    connection.request('POST', '/echo', body=b'x' * 1000)
+    assert connection.getresponse().read() == b'x' * 1000
+    assert get(connection, '/fast') == (200, b'fast')
+    # A single worker can only have served every request over the one connection.
+    assert server._connections == 1
+    assert server._requests.read() == 5
+  finally:
+    server.shutdown()
+    thread.join(10)
+
+
+@pytest.mark.skipif("sys.version_info >= (3,0)")
+def test_connection_close():
+  http_server, server, thread = start(threads=1, keepalive=False)
+  try:
+    connection = HTTPConnection('localhost', server.port, timeout=10)
+    connection.request('GET', '/fast')
+    response = connection.getresponse()
+    assert response.getheader('Connection') == 'close'
+    assert response.read() == b'fast'
+    assert get(connection, '/fast') == (200, b'fast')
+    assert server._connections == 2
+  finally:
+    server.shutdown()
+    thread.join(10)
+
+
+@pytest.mark.skipif("sys.version_info >= (3,0)")
+def test_idle_timeout():
+  http_server, server, thread = start(threads=1, timeout=0.2)
+  try:
+    idle = socket.create_connection(('localhost', server.port))
+    idle.settimeout(10)
+    # The idle connection times out and frees the only worker.
+    assert idle.recv(1) == b''
+    assert get(HTTPConnection('localhost', server.port, timeout=10), '/fast') == (200, b'fast')
+  finally:
+    server.shutdown()
+    thread.join(10)
+
+
+def test_metrics():
+  metrics = Metrics()
+  ThreadedServer(port=0, metrics=metrics, name='admin')
+  samples = metrics.sample()
+  for name in ('queued', 'active', 'threads', 'connections', 'requests'):
+    assert 'admin.%s' % name in samples
+  assert any(name.startswith('admin.latency_ms') for name in samples)
+
+
+def test_no_metrics_by_default():
+  ThreadedServer(port=0, name='threaded_server_unexported')
+  assert not [name for name in RootMetrics().sample()
+              if name.startswith('threaded_server_unexported.')]
+
+
+def test_shutdown_before_run():
+  ThreadedServer(port=0).shutdown()
+
+
+def test_shutdown_after_failed_bind():
+  sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  sock.bind(('localhost', 0))
+  sock.listen(1)
+  try:
+    server = ThreadedServer(host='localhost', port=sock.getsockname()[1])
+    errors = []
+    def run():
+      try:
+        server.run(lambda environ, start_response: [])
+      except socket.error as e:
+        errors.append(e)
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    assert not server.wait_started(timeout=10)
+    thread.join(10)
+    assert errors
+    stopper = threading.Thread(target=server.shutdown)
+    stopper.daemon = True
+    stopper.start()
+    stopper.join(10)
+    assert not stopper.is_alive()
+  finally:
+    sock.close()
@@ -0,0 +1,38 @@
+from __future__ import print_function
+
+import time
+import zipfile
+
+from twitter.common import app
+from twitter.common.java.class_file import ClassFile
+
+app.add_option('--jar', default=None, help='The jar whose classes are decoded.')
+app.add_option('--iterations', type=int, default=3, help='Number of times each case is run.')
+
+
+def measure(name, classes, fn):
+  best = None
+  for _ in range(app.get_options().iterations):
+    start = time.time()
+    for data in classes:
+      fn(data)
+    elapsed = time.time() - start
+    best = elapsed if best is None else min(best, elapsed)
+  print('%-40s %8.1f ms %10.0f classes/s' % (name, 1000.0 * best, len(classes) / best))
+
+
+def main(args, options):
+  if not options.jar:
+    app.error('--jar is required.')
+  with zipfile.ZipFile(options.jar) as jar:
+    classes = [jar.read(name) for name in jar.namelist() if name.endswith('.class')]
+  print('%d classes, %d bytes' % (len(classes), sum(map(len, classes))))
+
+  measure('eager', classes, ClassFile)
+  measure('eager, linkage_signature', classes, lambda data: ClassFile(data).linkage_signature())
+  measure('lazy, this_class', classes, lambda data: ClassFile(data, lazy=True).this_class())
+  measure('lazy, external_references', classes,
+          lambda data: ClassFile(data, lazy=True).external_references())
+
+
+app.main()
@@ -0,0 +1,37 @@
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+from twitter.common import app
+from twitter.common.java.classpath_scanner import ClasspathScanner
+
+app.add_option('--processes', type=int, default=None,
+               help='Number of worker processes, by default one per cpu.')
+
+
+def measure(name, fn):
+  start = time.time()
+  summaries = fn()
+  elapsed = time.time() - start
+  print('%-40s %8.1f ms %8d classes' % (name, 1000.0 * elapsed, len(summaries)))
+
+
+def main(args, options):
+  if not args:
+    app.error('Give the jars and directories of a classpath to scan.')
+  cache_dir = tempfile.mkdtemp()
+  try:
+    cache = os.path.join(cache_dir, 'cache')
+    measure('cold, 1 process', lambda: ClasspathScanner(processes=1).scan(args))
+    scanner = ClasspathScanner(processes=options.processes, cache=cache)
+    measure('cold, pool', lambda: scanner.scan(args))
+    scanner.save()
+    measure('warm, cache loaded', lambda: ClasspathScanner(cache=cache).scan(args))
+  finally:
+    shutil.rmtree(cache_dir)
+
+
+app.main()
@@ -0,0 +1,74 @@
+from __future__ import print_function
+
+import time
+import zipfile
+
+from twitter.common import app
+from twitter.common.java.attribute_info import Signature
+from twitter.common.java.class_file import ClassFile
+from twitter.common.java.signature_parser import (
+  ClassSignature,
+  ClassTypeSignature,
+  MethodTypeSignature,
+  SignatureParser)
+
+app.add_option('--jar', default=None, help='The jar whose signatures are parsed.')
+app.add_option('--iterations', type=int, default=3, help='Number of times each case is run.')
+
+
+def jar_signatures(filename):
+  """
+    The generic signatures and descriptors of the classes, fields and methods in a jar, in
+    the order they appear.  Descriptors are signatures without type arguments.
+  """
+  signatures = []
+  with zipfile.ZipFile(filename) as jar:
+    for name in jar.namelist():
+      if not name.endswith('.class'):
+        continue
+      class_file = ClassFile(jar.read(name))
+      for member in [class_file] + class_file.fields() + class_file.methods():
+        for attribute in getattr(member, '_attributes', ()):
+          if isinstance(attribute, Signature):
+            signatures.append(attribute._signature.bytes())
+        if member is not class_file:
+          signatures.append(member._descriptor.bytes())
+  return signatures
+
+
+def clear_caches():
+  SignatureParser._CACHE.clear()
+  ClassTypeSignature._INTERNED.clear()
+
+
+def unmemoized(signature):
+  clear_caches()
+  for production in (ClassSignature, MethodTypeSignature):
+    parsed, _ = production.match(signature)
+    if parsed is not None:
+      return parsed
+
+
+def measure(name, signatures, fn, setup=lambda: None):
+  best = None
+  for _ in range(app.get_options().iterations):
+    setup()
+    start = time.time()
+    fn(signatures)
+    elapsed = time.time() - start
+    best = elapsed if best is None else min(best, elapsed)
+  print('%-40s %8.1f ms %10.0f signatures/s' % (name, 1000.0 * best, len(signatures) / best))
+
+
+def main(args, options):
+  if not options.jar:
+    app.error('--jar is required.')
+  signatures = jar_signatures(options.jar)
+  print('%d signatures, %d distinct' % (len(signatures), len(set(signatures))))
+
+  measure('unmemoized', signatures, lambda sigs: [unmemoized(sig) for sig in sigs])
+  measure('parse_all, cold', signatures, SignatureParser.parse_all, setup=clear_caches)
+  measure('parse_all, warm', signatures, SignatureParser.parse_all)
+
+
+app.main()
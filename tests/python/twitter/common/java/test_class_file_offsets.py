@@ -0,0 +1,59 @@
+import os
+
+import pytest
+from twitter.common.java.attribute_info import Attribute, SourceFile
+from twitter.common.java.class_file import ClassFile
+from twitter.common.java.constant import Constant, Utf8Constant
+from twitter.common.java.java_types import JavaNativeType, u1, u2, u4
+
+# Read relative to this file, since resources are not packaged for python_tests.
+_EXAMPLE_CLASS = os.path.join(os.path.dirname(__file__), 'resources', 'example_class')
+
+
+def example_class():
+  with open(_EXAMPLE_CLASS, 'rb') as fp:
+    return fp.read()
+
+
+def test_parse_from():
+  data = b'\xff\xca\xfe\xba\xbe\x00\x32\x07'
+  assert JavaNativeType.parse_from(data, 1, u4, u2) == ([0xCAFEBABE, 50], 7)
+  assert JavaNativeType.parse_from(data, 7, u1) == ([7], 8)
+  assert JavaNativeType.parse(data[1:], u4, u2) == ([0xCAFEBABE, 50], b'\x07')
+
+
+def test_constant_at_offset():
+  data = b'junk' + b'\x01\x00\x05hello' + b'junk'
+  constant = Constant.parse(data, 4)
+  assert isinstance(constant, Utf8Constant)
+  assert constant.bytes() == b'hello'
+  assert constant.size() == 8
+
+
+def test_attribute_at_offset():
+  constants = [None, Utf8Constant(b'\x01\x00\x0aSourceFile'),
+               Utf8Constant(b'\x01\x00\x08Foo.java')]
+  data = b'junk' + b'\x00\x01\x00\x00\x00\x02\x00\x02' + b'junk'
+  attribute = Attribute.parse(data, constants, 4)
+  assert isinstance(attribute, SourceFile)
+  assert attribute.size() == 8
+  assert attribute.bytes() == b'\x00\x02'
+  assert str(attribute) == 'SourceFile(file:Foo.java)'
+
+
+@pytest.mark.skipif('sys.version_info >= (3,0)')
+def test_lazy_matches_eager():
+  data = example_class()
+  eager, lazy = ClassFile(data), ClassFile(data, lazy=True)
+  assert lazy.this_class() == eager.this_class() == 'com/google/protobuf/ByteString'
+  assert lazy.super_class() == eager.super_class() == 'java/lang/Object'
+  assert lazy.version() == eager.version() == (50, 0)
+  assert lazy._members_offset is not None
+  assert len(lazy.methods()) == len(eager.methods()) > 0
+  assert lazy._members_offset is None
+  assert [str(m) for m in lazy.methods()] == [str(m) for m in eager.methods()]
+  assert [str(f) for f in lazy.fields()] == [str(f) for f in eager.fields()]
+  assert [str(a) for a in lazy.attributes()] == [str(a) for a in eager.attributes()]
+  assert lazy.external_references() == eager.external_references()
+  assert lazy.linkage_signature() == eager.linkage_signature()
+  assert str(lazy) == str(eager)
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import zipfile
+
+import pytest
+from twitter.common.java.class_file import ClassFile
+from twitter.common.java.classpath_scanner import ClassSummary, ClasspathScanner
+
+# Read relative to this file, since resources are not packaged for python_tests.
+_EXAMPLE_CLASS = os.path.join(os.path.dirname(__file__), 'resources', 'example_class')
+_EXAMPLE_ENTRY = 'com/google/protobuf/ByteString.class'
+
+pytestmark = pytest.mark.skipif('sys.version_info >= (3,0)')
+
+
+def example_class():
+  with open(_EXAMPLE_CLASS, 'rb') as fp:
+    return fp.read()
+
+
+def write_jar(path, entries):
+  with zipfile.ZipFile(path, 'w') as jar:
+    for name, data in entries.items():
+      jar.writestr(name, data)
+
+
+class CountingScanner(ClasspathScanner):
+  def _run(self, tasks):
+    self.parsed = sum(len(entries) for _, _, entries in tasks)
+    return ClasspathScanner._run(self, tasks)
+
+
+@pytest.fixture
+def tmpdir():
+  directory = tempfile.mkdtemp()
+  yield directory
+  shutil.rmtree(directory)
+
+
+def test_summary():
+  summary = ClassSummary.from_class_file(ClassFile(example_class(), lazy=True))
+  assert summary.name == 'com/google/protobuf/ByteString'
+  assert summary.super_class == 'java/lang/Object'
+  assert summary.interfaces == ()
+  assert 'java/lang/String' in summary.references
+  assert summary.name not in summary.references
+  assert not any(reference.startswith('[') for reference in summary.references)
+  assert summary.linkage_signature == ClassFile(example_class()).linkage_signature()
+  assert ClassSummary.from_json(summary.to_json()) == summary
+
+
+def test_scan_jar_and_directory(tmpdir):
+  jar = os.path.join(tmpdir, 'lib.jar')
+  write_jar(jar, {_EXAMPLE_ENTRY: example_class(), 'Broken.class': b'junk', 'README': b''})
+  classes = os.path.join(tmpdir, 'classes', 'com', 'google', 'protobuf')
+  os.makedirs(classes)
+  shutil.copy(_EXAMPLE_CLASS, os.path.join(classes, 'ByteString.class'))
+
+  scanner = ClasspathScanner(processes=2, chunk_size=1)
+  summaries = scanner.scan([jar, os.path.join(tmpdir, 'classes'), os.path.join(tmpdir, 'missing')])
+  assert list(summaries) == ['com/google/protobuf/ByteString']
+  assert [(path, entry) for path, entry, _ in scanner.failures] == [(jar, 'Broken.class')]
+
+
+def test_cache(tmpdir):
+  jar, cache = os.path.join(tmpdir, 'lib.jar'), os.path.join(tmpdir, 'cache')
+  write_jar(jar, {_EXAMPLE_ENTRY: example_class(), 'Broken.class': b'junk'})
+
+  scanner = CountingScanner(processes=1, cache=cache)
+  cold = scanner.scan([jar])
+  assert scanner.parsed == 2
+  scanner.save()
+
+  scanner = CountingScanner(processes=1, cache=cache)
+  assert scanner.scan([jar]) == cold
+  assert scanner.parsed == 0
+  assert len(scanner.failures) == 1
+
+  # A rewritten jar only has its changed entries parsed again.
+  write_jar(jar, {_EXAMPLE_ENTRY: example_class(), 'Broken.class': b'still junk'})
+  os.utime(jar, (0, 0))
+  assert scanner.scan([jar]) == cold
+  assert scanner.parsed == 1
+
+
+def test_cache_version(tmpdir):
+  jar, cache = os.path.join(tmpdir, 'lib.jar'), os.path.join(tmpdir, 'cache')
+  write_jar(jar, {_EXAMPLE_ENTRY: example_class()})
+  scanner = ClasspathScanner(processes=1, cache=cache)
+  scanner.scan([jar])
+  scanner.save()
+
+  class NewerScanner(CountingScanner):
+    CACHE_VERSION = ClasspathScanner.CACHE_VERSION + 1
+  scanner = NewerScanner(processes=1, cache=cache)
+  scanner.scan([jar])
+  assert scanner.parsed == 1
+
+
+def test_first_class_wins(tmpdir):
+  first, second = os.path.join(tmpdir, 'first.jar'), os.path.join(tmpdir, 'second.jar')
+  write_jar(first, {_EXAMPLE_ENTRY: example_class()})
+  write_jar(second, {'Other.class': example_class()})
+  scanner = ClasspathScanner(processes=1)
+  assert list(scanner.scan([first, second])) == ['com/google/protobuf/ByteString']
@@ -0,0 +1,76 @@
+import pytest
+from twitter.common.java.signature_parser import (
+  ClassSignature,
+  ClassTypeSignature,
+  MethodTypeSignature,
+  SignatureParser,
+  TypeSignature)
+
+pytestmark = pytest.mark.skipif('sys.version_info >= (3,0)')
+
+
+def test_class_signature():
+  signature = ('<K:Ljava/lang/Object;V:Ljava/lang/Object;>Ljava/util/AbstractMap<TK;TV;>;'
+               'Ljava/util/Map<TK;TV;>;Ljava/io/Serializable;')
+  parsed, length = ClassSignature.match(signature)
+  assert length == len(signature)
+  assert str(parsed) == (
+      'ClassSignature(<K extends java.lang.Object, V extends java.lang.Object> '
+      'CLASS extends java.util.AbstractMap<<K>, <V>> '
+      'implements java.util.Map<<K>, <V>>, java.io.Serializable)')
+
+
+def test_method_signature():
+  signature = '<T:Ljava/lang/Object;>(Ljava/lang/Class<+TT;>;[[I)Lcom/twitter/Supplier<TT;>;'
+  parsed, length = MethodTypeSignature.match(signature)
+  assert length == len(signature)
+  assert str(parsed) == (
+      'MethodTypeSignature(<T extends java.lang.Object> com.twitter.Supplier<<T>> '
+      'METHOD(java.lang.Class<? extends <T>>, [][]int))')
+
+
+def test_throws():
+  signature = '(I)V^Ljava/io/IOException;^TX;'
+  parsed, length = MethodTypeSignature.match(signature)
+  assert length == len(signature)
+  assert str(parsed) == 'MethodTypeSignature(void METHOD(int) throws java.io.IOException, <X>)'
+
+
+def test_inner_class():
+  parsed, _ = TypeSignature.match('Lcom/foo/Outer<TT;>.Inner<TU;>;')
+  assert str(parsed) == 'com.foo.Outer<<T>>suffixes.SimpleClassTypeSignature(Inner<<U>>)'
+
+
+def test_unparsed():
+  for signature in ('', '(', 'L', 'Ljava/lang/String', 'TT;', 'I'):
+    assert ClassSignature.match(signature) == (None, 0)
+    assert SignatureParser.parse(signature) is None
+
+
+def test_interned():
+  first, _ = ClassTypeSignature.match('Ljava/lang/String;')
+  second, _ = MethodTypeSignature.match('(Ljava/lang/String;)Ljava/lang/String;')
+  assert second._type_signatures[0]._signature is first
+  assert second._return_type._signature._signature is first
+  generic, _ = ClassTypeSignature.match('Ljava/util/List<Ljava/lang/String;>;')
+  assert generic._arguments[0]._signature is first
+
+
+def test_parse_memoized():
+  signatures = ['()V', '<E:Ljava/lang/Object;>Ljava/lang/Object;', '()V', 'TT;']
+  parsed = SignatureParser.parse_all(signatures)
+  assert [type(p) for p in parsed] == [
+      MethodTypeSignature, ClassSignature, MethodTypeSignature, type(None)]
+  assert parsed[0] is parsed[2] is SignatureParser.parse('()V')
+
+
+def test_cache_bounded():
+  old_max = SignatureParser.MAX_CACHE
+  SignatureParser.MAX_CACHE = 2
+  try:
+    SignatureParser._CACHE.clear()
+    for k in range(5):
+      SignatureParser.parse('(%s)V' % ('I' * k))
+      assert len(SignatureParser._CACHE) <= 2
+  finally:
+    SignatureParser.MAX_CACHE = old_max
@@ -0,0 +1,79 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+from __future__ import print_function
+
+import logging
+import time
+
+from twitter.common import app
+from twitter.common.log.formatters.base import format_message
+from twitter.common.log.formatters.glog import GlogFormatter
+from twitter.common.log.initialize import ProxyFormatter
+
+app.add_option('--records', type=int, default=100000, help='Number of records to format.')
+app.add_option('--handlers', type=int, default=2,
+               help='Number of handlers formatting each record.')
+
+
+class LegacyGlogFormatter(logging.Formatter):
+  """The GlogFormatter before per-second date caching and per-record reuse."""
+  LEVEL_MAP = GlogFormatter.LEVEL_MAP
+
+  def format(self, record):
+    try:
+      level = self.LEVEL_MAP[record.levelno]
+    except:
+      level = '?'
+    date = time.localtime(record.created)
+    date_usec = (record.created - int(record.created)) * 1e6
+    record_message = '%c%02d%02d %02d:%02d:%02d.%06d %s %s:%d] %s' % (
+       level, date.tm_mon, date.tm_mday, date.tm_hour, date.tm_min, date.tm_sec, date_usec,
+       record.process if record.process is not None else '?????',
+       record.filename,
+       record.lineno,
+       format_message(record))
+    record.getMessage = lambda: record_message
+    return logging.Formatter.format(self, record)
+
+
+def timed(name, formatter, options):
+  now = time.time()
+  records = [logging.LogRecord('benchmark', logging.INFO, 'benchmark.py', 1, 'record %d of %s',
+                               (k, name), None) for k in range(options.records)]
+  for k, record in enumerate(records):
+    # Spread the records over ten seconds as a busy process would.
+    record.created = now + 10.0 * k / options.records
+  start = time.time()
+  for record in records:
+    for _ in range(options.handlers):
+      formatter.format(record)
+  elapsed = time.time() - start
+  print('%-8s %7.2f us/record  (%d handlers)' % (
+      name, 1e6 * elapsed / options.records, options.handlers))
+
+
+def main(args, options):
+  schemes = {'legacy': LegacyGlogFormatter()}
+  ProxyFormatter._SCHEME_TO_FORMATTER.update(schemes)
+  try:
+    timed('legacy', ProxyFormatter(lambda: 'legacy'), options)
+    timed('glog', ProxyFormatter(lambda: GlogFormatter.SCHEME), options)
+  finally:
+    for scheme in schemes:
+      ProxyFormatter._SCHEME_TO_FORMATTER.pop(scheme)
+
+
+app.main()
@@ -0,0 +1,69 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from __future__ import print_function
+
+import logging
+import threading
+import time
+
+from twitter.common import app
+from twitter.common.contextutil import temporary_dir
+from twitter.common.log import initialize
+from twitter.common.log.options import LogOptions
+
+app.add_option('--threads', type=int, default=4, help='Number of logging threads.')
+app.add_option('--records', type=int, default=20000, help='Number of records per thread.')
+
+
+def timed(name, options):
+  latencies = []
+  def run():
+    thread_latencies = []
+    for k in range(options.records):
+      start = time.time()
+      logging.info('record %d from %s', k, threading.current_thread().name)
+      thread_latencies.append(time.time() - start)
+    latencies.extend(thread_latencies)
+  workers = [threading.Thread(target=run) for _ in range(options.threads)]
+  start = time.time()
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+  logged = time.time() - start
+  initialize.teardown_disk_logging()
+  elapsed = time.time() - start
+  latencies.sort()
+  print('%-6s %10.1f records/sec  caller p50 %7.1f us  p99 %7.1f us  (%.2fs logging, '
+        '%.2fs until written)' % (name, len(latencies) / elapsed,
+        1e6 * latencies[len(latencies) // 2], 1e6 * latencies[int(len(latencies) * 0.99)],
+        logged, elapsed))
+
+
+def main(args, options):
+  LogOptions.set_stderr_log_level('NONE')
+  LogOptions.set_disk_log_level('google:INFO')
+  for asynchronous in (False, True):
+    with temporary_dir() as td:
+      LogOptions.set_log_dir(td)
+      LogOptions.set_disk_log_async(asynchronous)
+      initialize.init('handler_benchmark')
+      timed("async" if asynchronous else "sync", options)
+  initialize.teardown_stderr_logging()
+
+
+app.main()
@@ -0,0 +1,98 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+import logging
+import sys
+import time
+
+from twitter.common.log.formatters.glog import GlogFormatter
+from twitter.common.log.formatters.plain import PlainFormatter
+from twitter.common.log.handlers import AsyncFanoutHandler
+from twitter.common.log.initialize import ProxyFormatter
+
+import pytest
+
+
+def make_record(level, msg, *args, **kw):
+  return logging.LogRecord('test', level, '/src/foo.py', 42, msg, args, kw.get('exc_info'))
+
+
+def test_glog_format():
+  record = make_record(logging.WARN, 'hello %s', 'world')
+  record.created = time.mktime((2012, 3, 4, 5, 6, 7, 0, 0, -1)) + 0.25
+  record.process = 1234
+  assert GlogFormatter().format(record) == 'W0304 05:06:07.250000 1234 foo.py:42] hello world'
+
+
+def test_glog_date_cached_per_second():
+  formatter = GlogFormatter()
+  base = time.mktime((2012, 3, 4, 5, 6, 7, 0, 0, -1))
+  lines = []
+  for created in (base + 0.125, base + 0.875, base + 1.5):
+    record = make_record(logging.INFO, 'message')
+    record.created = created
+    lines.append(formatter.format(record).split(' ')[1])
+  assert lines == ['05:06:07.125000', '05:06:07.875000', '05:06:08.500000']
+
+
+def test_format_once_per_scheme():
+  calls = []
+  class CountingFormatter(PlainFormatter):
+    def _format(self, record):
+      calls.append(record)
+      return PlainFormatter._format(self, record)
+  formatter = CountingFormatter()
+  record = make_record(logging.INFO, 'hello %d', 1)
+  assert formatter.format(record) == ' INFO] hello 1'
+  assert formatter.format(record) == ' INFO] hello 1'
+  assert len(calls) == 1
+  assert GlogFormatter().format(record).endswith('foo.py:42] hello 1')
+
+
+def test_format_exception():
+  try:
+    raise ValueError('broken')
+  except ValueError:
+    record = make_record(logging.ERROR, 'failed', exc_info=sys.exc_info())
+  lines = PlainFormatter().format(record).splitlines()
+  assert lines[0] == 'ERROR] failed'
+  assert lines[1] == 'Traceback (most recent call last):'
+  assert lines[-1] == 'ValueError: broken'
+
+
+def test_proxy_formatter_follows_scheme():
+  schemes = ['plain']
+  formatter = ProxyFormatter(lambda: schemes[0])
+  assert formatter.format(make_record(logging.INFO, 'one')) == ' INFO] one'
+  schemes[0] = 'google'
+  assert formatter.format(make_record(logging.INFO, 'two')).startswith('I')
+  schemes[0] = 'unknown'
+  with pytest.raises(ProxyFormatter.UnknownSchemeException):
+    formatter.format(make_record(logging.INFO, 'three'))
+
+
+def test_filtered_records_not_interpolated():
+  class Exploding(object):
+    def __str__(self):
+      raise AssertionError('interpolated a record no target accepts')
+  handler = AsyncFanoutHandler()
+  handler.setFormatter(PlainFormatter())
+  handler.add_target(sys.stderr, lambda level: level >= logging.ERROR)
+  try:
+    handler.emit(make_record(logging.DEBUG, 'debug %s', Exploding()))
+    handler.flush()
+  finally:
+    handler._targets = []
+    handler.close()
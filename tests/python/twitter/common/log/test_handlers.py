@@ -0,0 +1,145 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import logging
+import os
+import threading
+
+from twitter.common.contextutil import temporary_dir
+from twitter.common.log import initialize
+from twitter.common.log.formatters.plain import PlainFormatter
+from twitter.common.log.handlers import AsyncFanoutHandler
+from twitter.common.log.options import LogOptions
+
+import pytest
+
+
+class BlockingStream(object):
+  def __init__(self):
+    self.release = threading.Event()
+    self.writes = []
+
+  def write(self, data):
+    self.release.wait()
+    self.writes.append(data)
+
+  def flush(self):
+    pass
+
+  def close(self):
+    pass
+
+
+def make_record(level, msg, *args):
+  return logging.LogRecord('test', level, __file__, 1, msg, args, None)
+
+
+def make_handler(**kw):
+  handler = AsyncFanoutHandler(**kw)
+  handler.setFormatter(PlainFormatter())
+  return handler
+
+
+def test_fanout():
+  with temporary_dir() as td:
+    everything, errors = [open(os.path.join(td, name), 'w') for name in ('all', 'errors')]
+    handler = make_handler()
+    handler.add_target(everything)
+    handler.add_target(errors, lambda level: level >= logging.ERROR)
+    handler.handle(make_record(logging.INFO, 'hello %s', 'world'))
+    handler.handle(make_record(logging.ERROR, 'oops %d%%', 100))
+    handler.close()
+    with open(os.path.join(td, 'all')) as fp:
+      assert fp.read() == ' INFO] hello world\nERROR] oops 100%\n'
+    with open(os.path.join(td, 'errors')) as fp:
+      assert fp.read() == 'ERROR] oops 100%\n'
+
+
+def test_arguments_captured_when_logged():
+  stream = BlockingStream()
+  handler = make_handler()
+  handler.add_target(stream)
+  value = ['before']
+  handler.handle(make_record(logging.INFO, '%s', value))
+  value[0] = 'after'
+  stream.release.set()
+  handler.close()
+  assert ''.join(stream.writes) == " INFO] ['before']\n"
+
+
+def test_drop_when_full():
+  stream = BlockingStream()
+  handler = make_handler(capacity=2, overflow=AsyncFanoutHandler.DROP)
+  handler.add_target(stream)
+  for k in range(10):
+    handler.handle(make_record(logging.INFO, 'record %d', k))
+  assert handler.dropped > 0
+  stream.release.set()
+  handler.flush()
+  lines = ''.join(stream.writes).splitlines()
+  assert len(lines) + handler.dropped == 10
+  handler.close()
+
+
+def test_block_when_full():
+  stream = BlockingStream()
+  handler = make_handler(capacity=2, overflow=AsyncFanoutHandler.BLOCK, batch_size=1)
+  handler.add_target(stream)
+  done = threading.Event()
+  def log():
+    for k in range(10):
+      handler.handle(make_record(logging.INFO, 'record %d', k))
+    done.set()
+  thread = threading.Thread(target=log)
+  thread.start()
+  assert not done.wait(0.1)
+  stream.release.set()
+  thread.join()
+  handler.close()
+  assert ''.join(stream.writes).splitlines() == [' INFO] record %d' % k for k in range(10)]
+  assert handler.dropped == 0
+
+
+def test_unknown_overflow_policy():
+  with pytest.raises(ValueError):
+    AsyncFanoutHandler(overflow='explode')
+
+
+def test_async_disk_logging():
+  # Set every option init() reads rather than falling back to app options, which other
+  # tests may have reset, and restore them afterwards.
+  saved = dict((name, getattr(LogOptions, name)) for name in (
+      '_STDERR_LOG_LEVEL', '_STDOUT_LOG_SCHEME', '_DISK_LOG_LEVEL', '_DISK_LOG_SCHEME',
+      '_DISK_LOG_ASYNC', '_DISK_LOG_OVERFLOW', '_LOG_DIR'))
+  with temporary_dir() as td:
+    LogOptions.set_log_dir(td)
+    LogOptions.set_stderr_log_level('google:NONE')
+    LogOptions.set_disk_log_level('google:INFO')
+    LogOptions.set_disk_log_async(True)
+    LogOptions.set_disk_log_overflow('block')
+    try:
+      initialize.init('test')
+      logging.info('async info')
+      logging.error('async error')
+      initialize.teardown_disk_logging()
+    finally:
+      initialize.teardown_stderr_logging()
+      for name, value in saved.items():
+        setattr(LogOptions, name, value)
+    with open(os.path.join(td, 'test.INFO')) as fp:
+      assert fp.read().endswith('] async info\n')
+    with open(os.path.join(td, 'test.ERROR')) as fp:
+      assert fp.read().endswith('] async error\n')
@@ -0,0 +1,53 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from __future__ import print_function
+
+import threading
+import time
+
+from twitter.common import app
+from twitter.common.metrics import AtomicGauge, Histogram, ShardedCounter
+
+app.add_option('--threads', type=int, default=8, help='Number of incrementing threads.')
+app.add_option('--increments', type=int, default=100000,
+               help='Number of increments per thread.')
+
+
+def timed(name, increment, threads, increments):
+  def run():
+    for _ in range(increments):
+      increment()
+  workers = [threading.Thread(target=run) for _ in range(threads)]
+  start = time.time()
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+  elapsed = time.time() - start
+  print('%-15s %d threads: %12.1f increments/sec' % (name, threads,
+      threads * increments / elapsed))
+
+
+def main(args, options):
+  timed('AtomicGauge', AtomicGauge('atomic').increment, options.threads, options.increments)
+  timed('ShardedCounter', ShardedCounter('sharded').increment, options.threads,
+      options.increments)
+  histogram = Histogram('histogram')
+  timed('Histogram', lambda: histogram.update(1), options.threads, options.increments)
+
+
+app.main()
@@ -0,0 +1,59 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from __future__ import print_function
+
+import time
+
+from twitter.common import app
+from twitter.common.metrics import AtomicGauge, MetricSampler, Metrics
+
+app.add_option('--gauges', default='10000,100000',
+               help='Comma separated list of registry sizes to benchmark.')
+app.add_option('--dirty', type=float, default=0.01,
+               help='Fraction of gauges mutated between samples.')
+app.add_option('--samples', type=int, default=20, help='Number of samples per measurement.')
+
+
+def build(size):
+  metrics = Metrics()
+  gauges = []
+  for k in range(size):
+    gauges.append(metrics.scope('scope%d' % (k % 100)).register(AtomicGauge('gauge%d' % k)))
+  return metrics, gauges
+
+
+def timed(name, size, samples, sample):
+  start = time.time()
+  for _ in range(samples):
+    sample()
+  elapsed = time.time() - start
+  print('%-20s %7d gauges: %8.2f ms/sample' % (name, size, 1000.0 * elapsed / samples))
+
+
+def main(args, options):
+  for size in map(int, options.gauges.split(',')):
+    metrics, gauges = build(size)
+    dirty = gauges[:int(size * options.dirty)]
+    def mutate():
+      for gauge in dirty:
+        gauge.increment()
+    sampler = MetricSampler(metrics)
+    timed('Metrics.sample', size, options.samples, lambda: (mutate(), metrics.sample()))
+    timed('MetricSampler', size, options.samples, lambda: (mutate(), sampler._take_sample()))
+
+
+app.main()
@@ -14,6 +14,9 @@
 # limitations under the License.
 # ==================================================================================================
 
+import threading
+import time
+
 import pytest
 
 from twitter.common.quantity import Amount, Time, Data
@@ -21,6 +24,7 @@ from twitter.common.metrics import (
   Label,
   AtomicGauge,
   MutatorGauge,
+  ShardedCounter,
 
   gaugelike,
   namable,
@@ -74,6 +78,48 @@ def test_atomic_gauge_types():
   with pytest.raises(TypeError):
     ag.add('hello')
 
+def test_sharded_counter():
+  sc = ShardedCounter('a')
+  assert sc.name() == 'a'
+  assert sc.read() == 0
+  sc.add(-2)
+  assert sc.read() == -2
+  sc.increment()
+  sc.increment()
+  sc.decrement()
+  assert sc.read() == -1
+  assert ShardedCounter('a', 23).read() == 23
+  with pytest.raises(TypeError):
+    ShardedCounter('a', None)
+  with pytest.raises(TypeError):
+    sc.add('hello')
+
+def test_sharded_counter_threads():
+  sc = ShardedCounter('a')
+  def increment():
+    for _ in range(1000):
+      sc.increment()
+  threads = [threading.Thread(target=increment) for _ in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert sc.read() == 8000
+
+def test_sharded_counter_reclaims_dead_threads():
+  sc = ShardedCounter('a', 5)
+  sc.increment()
+  for _ in range(100):
+    thread = threading.Thread(target=sc.increment)
+    thread.start()
+    thread.join()
+  assert sc.read() == 106
+  deadline = time.time() + 5
+  while len(sc._shards) > 1 and time.time() < deadline:
+    time.sleep(0.01)
+  assert len(sc._shards) == 1
+  assert sc.read() == 106
+
 def test_named_gauge_types():
   with pytest.raises(TypeError):
     ag = AtomicGauge(0)
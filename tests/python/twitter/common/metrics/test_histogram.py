@@ -0,0 +1,97 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import threading
+import time
+
+import pytest
+
+from twitter.common.metrics import Histogram, Metrics
+
+def within(value, expected, error=2 ** -(Histogram.PRECISION + 1)):
+  return abs(value - expected) <= expected * error
+
+def test_empty_histogram():
+  hg = Histogram('latency')
+  assert hg.name() == 'latency'
+  assert hg.percentile(50) == 0
+  assert hg.sample() == {'count': '0', 'sum': '0', 'p50': '0', 'p90': '0', 'p99': '0',
+      'p999': '0'}
+
+def test_histogram_percentiles():
+  hg = Histogram('latency')
+  for value in range(1, 10001):
+    hg.update(value)
+  count, total, _ = hg.snapshot()
+  assert count == 10000
+  assert total == sum(range(1, 10001))
+  assert within(hg.percentile(50), 5000)
+  assert within(hg.percentile(90), 9000)
+  assert within(hg.percentile(99), 9900)
+  assert within(hg.percentile(99.9), 9990)
+  assert within(hg.percentile(100), 10000)
+
+def test_histogram_small_values():
+  hg = Histogram('latency')
+  for value in (0, 0, 0.001, 0.002):
+    hg.update(value)
+  assert hg.percentile(50) == 0
+  assert within(hg.percentile(75), 0.001)
+  assert within(hg.percentile(100), 0.002)
+
+def test_histogram_types():
+  with pytest.raises(TypeError):
+    Histogram(None)
+  with pytest.raises(TypeError):
+    Histogram('latency').update('hello')
+
+def test_histogram_threads():
+  hg = Histogram('latency')
+  def update():
+    for value in range(1000):
+      hg.update(value)
+  threads = [threading.Thread(target=update) for _ in range(4)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert hg.snapshot()[0] == 4000
+
+def test_histogram_reclaims_dead_threads():
+  hg = Histogram('latency')
+  for value in range(1, 101):
+    thread = threading.Thread(target=hg.update, args=(value,))
+    thread.start()
+    thread.join()
+  deadline = time.time() + 5
+  while len(hg._shards) > 0 and time.time() < deadline:
+    time.sleep(0.01)
+  assert len(hg._shards) == 0
+  count, total, _ = hg.snapshot()
+  assert count == 100
+  assert total == sum(range(1, 101))
+  assert within(hg.percentile(50), 50)
+
+def test_histogram_registration():
+  rm = Metrics()
+  hg = rm.scope('rpc').register(Histogram('latency'))
+  hg.update(10)
+  samples = rm.sample()
+  assert sorted(samples) == ['rpc.latency.count', 'rpc.latency.p50', 'rpc.latency.p90',
+      'rpc.latency.p99', 'rpc.latency.p999', 'rpc.latency.sum']
+  assert samples['rpc.latency.count'] == '1'
+  assert samples['rpc.latency.sum'] == '10'
+  assert within(float(samples['rpc.latency.p99']), 10)
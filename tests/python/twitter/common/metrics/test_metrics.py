@@ -17,7 +17,7 @@
 import pytest
 
 from twitter.common.quantity import Amount, Time, Data
-from twitter.common.metrics import Label, MutatorGauge
+from twitter.common.metrics import Histogram, Label, Metrics, MutatorGauge
 from twitter.common.metrics import RootMetrics
 
 def test_root_metrics_singleton():
@@ -77,3 +77,17 @@ def test_bad_scope_names():
     my_scope.scope(123)
   with pytest.raises(TypeError):
     my_scope.scope(RootMetrics)
+
+def test_unregister():
+  metrics = Metrics()
+  scope = metrics.scope('a')
+  scope.register(Label('b', 'c'))
+  scope.register(Histogram('latency'))
+  metrics.register(Label('d', 'e'))
+  assert scope.unregister('b')
+  assert scope.unregister('latency')
+  assert not scope.unregister('b')
+  assert not scope.unregister('missing')
+  assert metrics.sample() == {'d': 'e'}
+  scope.register(Label('b', 'f'))
+  assert metrics.sample() == {'a.b': 'f', 'd': 'e'}
@@ -20,10 +20,14 @@ import unittest
 from twitter.common.quantity import Amount, Time, Data
 from twitter.common.metrics import (
   AtomicGauge,
+  EWMA,
+  Metrics,
   MutatorGauge,
   NamedGauge,
-  Rate
+  Rate,
+  WindowedRates
 )
+from twitter.common.metrics.rate import TimeSeries
 
 class FakeGauge(NamedGauge):
   def __init__(self, name):
@@ -91,3 +95,70 @@ class TestRate(unittest.TestCase):
     assert rate.name() == 'holyguacamole_per_1secs'
     rate = Rate.of(gauge, name = 'holyguacamole', window = Amount(3, Time.HOURS))
     assert rate.name() == 'holyguacamole_per_3hrs'
+
+  def test_bounded_samples(self):
+    clock = TestClock()
+    gauge = FakeGauge('test').supplies(range(0, 1000, 10))
+    rate = Rate("foo", gauge, window = Amount(30, Time.SECONDS), clock=clock, capacity=4)
+    assert rate.read() == 0
+    for _ in range(99):
+      clock.advance(0.1)
+      assert abs(rate.read() - 100) < 1e-6
+    assert len(rate._samples) == 4
+
+
+class TestTimeSeries(unittest.TestCase):
+  def test_ring_buffer(self):
+    series = TimeSeries(3)
+    assert len(series) == 0
+    for k in range(5):
+      series.append(k, k * 10)
+    assert len(series) == 3
+    assert (series.tail, series.head) == (2, 5)
+    assert series[2] == (2, 20)
+    assert series[4] == (4, 40)
+    with pytest.raises(IndexError):
+      series[1]
+    assert series.advance(0, 3) == 3
+    assert series.advance(0, 10) == 5
+
+
+class TestEWMA(unittest.TestCase):
+  def test_ewma(self):
+    clock = TestClock()
+    gauge = AtomicGauge('test')
+    ewma = EWMA('foo', gauge, window = Amount(1, Time.MINUTES), clock=clock)
+    assert ewma.name() == 'foo_ewma_1mins'
+    assert ewma.read() == 0
+    for _ in range(600):
+      clock.advance(1)
+      gauge.add(10)
+      ewma.read()
+    assert abs(ewma.read() - 10) < 1e-3
+
+
+class TestWindowedRates(unittest.TestCase):
+  def test_windows(self):
+    clock = TestClock()
+    gauge = AtomicGauge('test')
+    rates = WindowedRates('requests', gauge, windows = (Amount(10, Time.SECONDS),
+        Amount(1, Time.MINUTES)), clock=clock)
+    assert rates.sample() == {'per_10secs': '0', 'ewma_10secs': '0.0',
+        'per_1mins': '0', 'ewma_1mins': '0.0'}
+    for _ in range(30):
+      clock.advance(1)
+      gauge.add(2)
+      rates.read()
+    for _ in range(30):
+      clock.advance(1)
+      rates.read()
+    samples = rates.sample_values()
+    assert samples['per_10secs'] == 0
+    assert abs(samples['per_1mins'] - 1) < 1e-6
+
+  def test_registration(self):
+    metrics = Metrics()
+    metrics.register(WindowedRates('requests', AtomicGauge('test')))
+    assert sorted(metrics.sample()) == ['requests.ewma_15mins', 'requests.ewma_1mins',
+        'requests.ewma_5mins', 'requests.per_15mins', 'requests.per_1mins',
+        'requests.per_5mins']
@@ -0,0 +1,104 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from twitter.common.metrics import (
+  AtomicGauge,
+  Histogram,
+  Label,
+  LambdaGauge,
+  MetricSampler,
+  Metrics,
+  MutatorGauge)
+
+class CountingGauge(MutatorGauge):
+  def __init__(self, name, value=None):
+    MutatorGauge.__init__(self, name, value)
+    self.reads = 0
+
+  def read(self):
+    self.reads += 1
+    return MutatorGauge.read(self)
+
+def test_sampler_typed_values():
+  metrics = Metrics()
+  metrics.register(Label('version', '1.0'))
+  counter = metrics.scope('rpc').register(AtomicGauge('requests'))
+  sampler = MetricSampler(metrics)
+  assert sampler.sample_values() == {'version': '1.0', 'rpc.requests': 0}
+  assert sampler.sample() == {'version': '1.0', 'rpc.requests': '0'}
+  counter.add(5)
+  sampler._take_sample()
+  assert sampler.sample_values()['rpc.requests'] == 5
+  assert sampler.sample()['rpc.requests'] == '5'
+
+def test_sampler_skips_unchanged_versions():
+  metrics = Metrics()
+  gauge = metrics.register(MutatorGauge('mutator', 1))
+  sampler = MetricSampler(metrics)
+  gauge._value = 3  # Bypass write(), leaving the version unchanged.
+  sampler._take_sample()
+  assert sampler.sample() == {'mutator': '1'}
+  gauge.write(2)
+  sampler._take_sample()
+  assert sampler.sample() == {'mutator': '2'}
+
+def test_sampler_rereads_subclasses():
+  metrics = Metrics()
+  gauge = metrics.register(CountingGauge('counting', 1))
+  sampler = MetricSampler(metrics)
+  assert gauge.reads == 1
+  sampler._take_sample()
+  sampler._take_sample()
+  assert gauge.reads == 3
+  assert sampler.sample() == {'counting': '1'}
+
+def test_sampler_reads_unversioned_gauges():
+  metrics = Metrics()
+  values = [1, 2]
+  metrics.register(LambdaGauge('lambda', lambda: values.pop(0)))
+  sampler = MetricSampler(metrics)
+  assert sampler.sample() == {'lambda': '1'}
+  sampler._take_sample()
+  assert sampler.sample() == {'lambda': '2'}
+
+def test_sampler_picks_up_new_registrations():
+  metrics = Metrics()
+  sampler = MetricSampler(metrics)
+  assert sampler.sample() == {}
+  metrics.scope('a').register(Label('b', 'c'))
+  metrics.register(Histogram('latency'))
+  sampler._take_sample()
+  assert sampler.sample()['a.b'] == 'c'
+  assert sampler.sample()['latency.count'] == '0'
+
+def test_sampler_of_scope():
+  metrics = Metrics()
+  metrics.register(Label('outer', 'x'))
+  metrics.scope('a').register(Label('inner', 'y'))
+  assert MetricSampler(metrics.scope('a')).sample() == {'inner': 'y'}
+  assert metrics.scope('a').sample() == {'inner': 'y'}
+
+def test_scoped_sampling_matches_whole_scopes():
+  metrics = Metrics()
+  metrics.scope('a').register(Label('x', '1'))
+  metrics.scope('ab').register(Label('y', '2'))
+  metrics.register(Label('a.z', '3'))
+  metrics.scope('a').scope('b').register(Histogram('latency'))
+  assert metrics.scope('a').sample_values() == {'x': '1', 'z': '3', 'b.latency.count': 0,
+      'b.latency.sum': 0, 'b.latency.p50': 0, 'b.latency.p90': 0, 'b.latency.p99': 0,
+      'b.latency.p999': 0}
+  assert metrics.scope('ab').sample_values() == {'y': '2'}
+  assert MetricSampler(metrics.scope('ab')).sample() == {'y': '2'}
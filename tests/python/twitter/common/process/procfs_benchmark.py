@@ -0,0 +1,53 @@
+from __future__ import print_function
+
+import subprocess
+import time
+
+from twitter.common import app
+from twitter.common.process import ProcessProvider_Procfs, ProcfsSnapshotter
+
+app.add_option('--processes', type=int, default=5000, help='Number of idle processes spawned.')
+app.add_option('--busy', type=int, default=0, help='Number of busy processes spawned.')
+app.add_option('--iterations', type=int, default=10, help='Number of collections timed.')
+
+
+def provider_cpu(provider):
+  """The cpu time of every process via the ProcessProvider, as monitors use it."""
+  provider.collect_all()
+  return dict((pid, provider.get_handle(pid).cpu_time()) for pid in provider.pids())
+
+
+def snapshot_cpu(snapshotter):
+  return snapshotter.snapshot().cpu_deltas()
+
+
+def measure(name, collect, *args):
+  collect(*args)
+  start = time.time()
+  for _ in range(app.get_options().iterations):
+    collect(*args)
+  elapsed = (time.time() - start) / app.get_options().iterations
+  print('%-40s %8.1fms per collection' % (name, 1000.0 * elapsed))
+
+
+def main(args, options):
+  children = []
+  try:
+    for _ in range(options.processes):
+      children.append(subprocess.Popen(['sleep', '3600'], close_fds=True))
+    for _ in range(options.busy):
+      children.append(subprocess.Popen(['sh', '-c', 'while :; do :; done'], close_fds=True))
+    time.sleep(1)
+    print('Spawned %d processes' % len(children))
+    measure('ProcessProvider_Procfs', provider_cpu, ProcessProvider_Procfs())
+    measure('ProcfsSnapshotter', snapshot_cpu, ProcfsSnapshotter())
+    measure('ProcfsSnapshotter(statm, status)', snapshot_cpu,
+            ProcfsSnapshotter(statm=True, status=True))
+  finally:
+    for child in children:
+      child.kill()
+    for child in children:
+      child.wait()
+
+
+app.main()
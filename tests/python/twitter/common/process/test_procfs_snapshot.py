@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from twitter.common.process.process_handle_procfs import ProcessHandleProcfs
+from twitter.common.process.process_provider import ProcessProvider
+from twitter.common.process.procfs_snapshot import ProcfsSnapshot, ProcfsSnapshotter
+
+import pytest
+
+
+def stat_line(pid, comm, ppid, utime=0, stime=0, starttime=100):
+  fields = ['S', ppid] + [0] * 9 + [utime, stime] + [0] * 6 + [starttime] + [0] * 24
+  return '%d (%s) %s\n' % (pid, comm, ' '.join(map(str, fields)))
+
+
+class FakeClock(object):
+  def __init__(self):
+    self.now = 0
+
+  def time(self):
+    return self.now
+
+
+class TestProcfsSnapshot(unittest.TestCase):
+  def setUp(self):
+    self.root = tempfile.mkdtemp()
+    self.clock = FakeClock()
+    self.snapshotter = ProcfsSnapshotter(root=self.root, statm=True, status=True,
+                                         clock=self.clock)
+
+  def tearDown(self):
+    shutil.rmtree(self.root)
+
+  def write(self, pid, name, content):
+    directory = os.path.join(self.root, str(pid))
+    if not os.path.isdir(directory):
+      os.makedirs(directory)
+    with open(os.path.join(directory, name), 'w') as fp:
+      fp.write(content)
+
+  def remove(self, pid):
+    shutil.rmtree(os.path.join(self.root, str(pid)))
+
+  def snapshot(self, elapsed=10):
+    self.clock.now += elapsed
+    return self.snapshotter.snapshot()
+
+  def test_diff(self):
+    self.write(1, 'stat', stat_line(1, 'init', 0, utime=10))
+    self.write(2, 'stat', stat_line(2, 'a b) c', 1, utime=20))
+    self.write(3, 'stat', stat_line(3, 'idle', 1, utime=30))
+    self.write(4, 'stat', stat_line(4, 'child', 2, utime=40))
+    self.write(5, 'stat', 'garbage')
+    first = self.snapshot()
+    assert first.pids() == set([1, 2, 3, 4])
+    assert first.added == set([1, 2, 3, 4])
+    assert first.changed == first.removed == set()
+    assert first.cpu_delta(1) is None
+    assert first.cpu_deltas() == {}
+    assert first.children_of(1) == set([2, 3])
+    assert first.children_of(1, all=True) == set([2, 3, 4])
+    assert first.ppid(4) == 2
+    assert first.cpu_time(2) == pytest.approx(20.0 / ProcfsSnapshot.CLK_TCK)
+
+    self.write(1, 'stat', stat_line(1, 'init', 0, utime=15, stime=5))
+    self.write(2, 'stat', stat_line(2, 'a b) c', 1, utime=20, starttime=200))
+    self.remove(4)
+    self.write(6, 'stat', stat_line(6, 'new', 1, utime=7))
+    second = self.snapshot(elapsed=5)
+    assert second.elapsed == 5
+    assert second.pids() == set([1, 2, 3, 6])
+    assert second.added == set([2, 6])
+    assert second.changed == set([1])
+    assert second.removed == set([2, 4])
+    assert second.cpu_delta(3) == 0
+    assert second.cpu_deltas() == pytest.approx(dict(
+        (pid, 1.0 * ticks / ProcfsSnapshot.CLK_TCK) for pid, ticks in ((1, 10), (2, 20), (6, 7))))
+    with pytest.raises(ProcessProvider.UnknownPidError):
+      second.cpu_delta(4)
+
+  def test_handles(self):
+    self.write(1, 'stat', stat_line(1, 'init', 0, utime=10))
+    self.write(2, 'stat', stat_line(2, 'a b) c', 1, utime=20))
+    first = self.snapshot()
+    handle = first.get_handle(1)
+    assert handle.exists()
+    assert handle.pid() == 1
+    assert handle.ppid() == 0
+    assert handle.get('comm') == '(init)'
+    assert first.get_handle(2).get('comm') == '(a b) c)'
+    assert first.get_handle(1) is handle
+
+    self.write(2, 'stat', stat_line(2, 'a b) c', 1, utime=30))
+    second = self.snapshot()
+    assert second.get_handle(1) is handle
+    assert second.get_handle(2).cpu_time() == pytest.approx(30.0 / ProcfsSnapshot.CLK_TCK)
+
+  def test_statm_status(self):
+    self.write(1, 'stat', stat_line(1, 'init', 0))
+    self.write(1, 'statm', '660 331 306 5 0 123 0\n')
+    self.write(1, 'status', 'Name:\tinit\nUid:\t0\t0\t0\t0\n' + 'X' * 5000 + ':\n')
+    snapshot = self.snapshot()
+    assert snapshot.statm(1) == (660, 331, 306, 5, 0, 123, 0)
+    status = snapshot.status(1)
+    assert status['Name'] == 'init'
+    assert status['Uid'] == '0\t0\t0\t0'
+    assert 'X' * 5000 in status
+    assert ProcfsSnapshotter(root=self.root).snapshot().statm(1) is None
+
+  def test_stats_are_not_modified(self):
+    stats = {1: stat_line(1, 'init', 0), 5: 'garbage'}
+    snapshot = ProcfsSnapshot(0, stats)
+    assert snapshot.pids() == set([1])
+    assert stats == {1: stat_line(1, 'init', 0), 5: 'garbage'}
+    stats[1] = stat_line(1, 'init', 0, utime=10)
+    assert ProcfsSnapshot(1, stats, previous=snapshot).changed == set([1])
+
+
+@pytest.mark.skipif("not os.path.exists('/proc/self/stat')")
+def test_parse_stat_matches_parser():
+  ProcessHandleProcfs.init_class()
+  for pid in [int(name) for name in os.listdir('/proc') if name.isdigit()][:50]:
+    try:
+      with open('/proc/%d/stat' % pid) as fp:
+        line = fp.read()
+    except IOError:
+      continue
+    expected = ProcessHandleProcfs.PARSER.parse(line)
+    if not expected:
+      continue
+    attrs = ProcessHandleProcfs.parse_stat(line)
+    assert abs(attrs.pop('starttime') - expected.pop('starttime')) < 1
+    assert attrs == expected
+
+
+@pytest.mark.skipif("not os.path.exists('/proc/self/stat')")
+def test_live():
+  snapshotter = ProcfsSnapshotter()
+  snapshotter.snapshot()
+  sum(range(1000000))
+  snapshot = snapshotter.snapshot()
+  pid = os.getpid()
+  assert pid in snapshot
+  assert pid in snapshot.changed
+  assert snapshot.cpu_delta(pid) >= 0
+  assert snapshot.ppid(pid) == os.getppid()
+  assert snapshot.get_handle(pid).cpu_time() == pytest.approx(snapshot.cpu_time(pid))
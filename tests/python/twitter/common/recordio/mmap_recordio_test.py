@@ -0,0 +1,135 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+import os
+import struct
+
+import pytest
+
+from twitter.common.recordio import RecordIO, RecordWriter, MmapRecordReader, RecordIndex
+
+from recordio_test_harness import EphemeralFile
+
+TEST_STRINGS = ["record %d" % k for k in range(20)]
+
+def write_records(fp, records):
+  RecordWriter(fp).write_batch(records)
+  fp.flush()
+
+def test_empty_file():
+  with EphemeralFile('r') as fp:
+    rr = MmapRecordReader(fp)
+    assert len(rr) == 0
+    assert rr.read() is None
+    assert list(rr) == []
+    assert not os.path.exists(RecordIndex.index_filename(fp.name))
+
+def test_random_access():
+  with EphemeralFile('w') as fp:
+    write_records(fp, TEST_STRINGS)
+    with open(fp.name) as fpr:
+      rr = MmapRecordReader(fpr)
+      assert len(rr) == len(TEST_STRINGS)
+      assert rr[0] == TEST_STRINGS[0]
+      assert rr[13] == TEST_STRINGS[13]
+      assert rr[-1] == TEST_STRINGS[-1]
+      assert str(rr.view(7)) == TEST_STRINGS[7]
+      with pytest.raises(IndexError):
+        rr[len(TEST_STRINGS)]
+      assert list(rr) == TEST_STRINGS
+      rr.seek_record(18)
+      assert rr.read() == TEST_STRINGS[18]
+      assert rr.read() == TEST_STRINGS[19]
+      assert rr.read() is None
+      rr.close()
+    os.remove(RecordIndex.index_filename(fp.name))
+
+def test_index_is_persisted_and_extended():
+  with EphemeralFile('w') as fp:
+    write_records(fp, TEST_STRINGS[:10])
+    index_filename = RecordIndex.index_filename(fp.name)
+    with open(fp.name) as fpr:
+      rr = MmapRecordReader(fpr)
+      assert len(rr) == 10
+      assert os.path.getsize(index_filename) == (
+          RecordIndex.HEADER.size + 11 * RecordIndex.ENTRY.size)
+
+      # A partial trailing record is not indexed.
+      fp.write(struct.pack('>L', 100))
+      fp.flush()
+      rr.refresh()
+      assert len(rr) == 10
+
+    with open(fp.name, 'w') as fpw:
+      write_records(fpw, TEST_STRINGS)
+    with open(fp.name) as fpr:
+      rr = MmapRecordReader(fpr)
+      assert list(rr) == TEST_STRINGS
+      assert len(RecordIndex(fp.name)) == len(TEST_STRINGS)
+    os.remove(index_filename)
+
+def test_index_is_rebuilt_when_file_is_rewritten():
+  with EphemeralFile('w') as fp:
+    write_records(fp, TEST_STRINGS)
+    index_filename = RecordIndex.index_filename(fp.name)
+    with open(fp.name) as fpr:
+      assert len(MmapRecordReader(fpr)) == len(TEST_STRINGS)
+
+    # Rewrite in place with other records framed at other offsets, at least as long as the
+    # indexed data.
+    rewritten = ['xyz' * k for k in range(1, 30)]
+    with open(fp.name, 'w') as fpw:
+      write_records(fpw, rewritten)
+    with open(fp.name) as fpr:
+      assert list(MmapRecordReader(fpr)) == rewritten
+
+    # Replace the file with one of the same size and different contents.
+    replaced = ['zyx' * k for k in range(1, 30)]
+    os.remove(fp.name)
+    with open(fp.name, 'w') as fpw:
+      write_records(fpw, replaced)
+    with open(fp.name) as fpr:
+      assert list(MmapRecordReader(fpr)) == replaced
+    os.remove(index_filename)
+
+def test_ranges():
+  with EphemeralFile('w') as fp:
+    write_records(fp, TEST_STRINGS)
+    with open(fp.name) as fpr:
+      rr = MmapRecordReader(fpr)
+      ranges = rr.ranges(3)
+      assert ranges == [(0, 6), (6, 13), (13, 20)]
+      records = []
+      for start, stop in ranges:
+        with open(fp.name) as fpw:
+          worker = MmapRecordReader(fpw, start=start, stop=stop)
+          assert len(worker) == stop - start
+          assert worker[0] == TEST_STRINGS[start]
+          records.extend(worker)
+      assert records == TEST_STRINGS
+    os.remove(RecordIndex.index_filename(fp.name))
+
+def test_custom_codec():
+  class UpperCodec(RecordIO.StringCodec):
+    def decode(self, blob):
+      return blob.upper()
+
+  with EphemeralFile('w') as fp:
+    write_records(fp, TEST_STRINGS)
+    with open(fp.name) as fpr:
+      rr = MmapRecordReader(fpr, UpperCodec())
+      assert rr[3] == TEST_STRINGS[3].upper()
+    os.remove(RecordIndex.index_filename(fp.name))
@@ -21,7 +21,13 @@ import struct
 import pytest
 
 from twitter.common.recordio import RecordIO
-from twitter.common.recordio import RecordWriter, RecordReader
+from twitter.common.recordio import (
+  BufferedRecordReader,
+  CompressedRecordWriter,
+  MmapRecordReader,
+  RecordIndex,
+  RecordReader,
+  RecordWriter)
 
 from recordio_test_harness import DurableFile, EphemeralFile
 
@@ -208,3 +214,231 @@ def test_sanity_check_bytes():
       rr = RecordReader(fpr)
       with pytest.raises(RecordIO.RecordSizeExceeded):
         rr.read()
+
+def test_write_batch_framing_is_identical():
+  test_strings = ["hello world", "", "ahoy ahoy, bonjour"]
+
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    rw = RecordWriter(fp)
+    for test_string in test_strings:
+      rw.write(test_string)
+    rw.close()
+    with open(fn) as fpr:
+      serial = fpr.read()
+
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    rw = RecordWriter(fp)
+    assert rw.write_batch(test_strings)
+    rw.close()
+    with open(fn) as fpr:
+      batched = fpr.read()
+
+  assert serial == batched
+
+def test_read_batch():
+  test_strings = ["record %d" % k for k in range(10)]
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    RecordWriter(fp).write_batch(test_strings)
+    fp.close()
+
+    with open(fn) as fpr:
+      rr = RecordReader(fpr)
+      assert rr.read_batch(4) == test_strings[0:4]
+      assert rr.read_batch(4) == test_strings[4:8]
+      assert rr.read_batch(4) == test_strings[8:10]
+      assert rr.read_batch(4) == []
+
+def test_group_commit_sync():
+  class FakeClock(object):
+    def __init__(self):
+      self.now = 0
+    def time(self):
+      return self.now
+
+  clock = FakeClock()
+  with EphemeralFile('w') as fp:
+    rw = RecordIO.Writer(fp, RecordIO.StringCodec(), sync=True, sync_interval=10, clock=clock)
+    rw.write_batch(["a", "b", "c"])
+    rw.write("d")
+    rw.write("e")
+    assert rw._dirty
+    clock.now = 10
+    rw.write("f")
+    assert not rw._dirty
+    rw.write("g")
+    assert rw._dirty
+    rw.close()
+    assert not rw._dirty
+
+def test_buffered_recordreader():
+  test_strings = ["record %d" % k for k in range(100)]
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    RecordWriter(fp).write_batch(test_strings)
+    fp.close()
+
+    with open(fn) as fpr:
+      rr = BufferedRecordReader(fpr, buffer_size=7)
+      assert rr.read() == test_strings[0]
+      assert rr.read_batch(50) == test_strings[1:51]
+      assert list(rr) == test_strings
+      assert rr.read_batch(100) == test_strings[51:]
+      assert rr.read() is None
+      assert rr.tell() == os.path.getsize(fn)
+
+def test_buffered_recordreader_try_read_resumes_partial_record():
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    RecordWriter(fp).write("hello world")
+    fp.write(struct.pack('>L', 5))
+    fp.write('ab')
+    fp.flush()
+
+    with open(fn) as fpr:
+      rr = BufferedRecordReader(fpr)
+      assert rr.try_read() == "hello world"
+      assert rr.try_read() is None
+      with pytest.raises(RecordIO.PrematureEndOfStream):
+        rr.read()
+      fp.write('cde')
+      fp.flush()
+      assert rr.try_read() == "abcde"
+      assert rr.try_read() is None
+
+def test_buffered_recordreader_sanity_check_bytes():
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    fp.write(struct.pack('>L', RecordIO.SANITY_CHECK_BYTES+1))
+    fp.write('a')
+    fp.close()
+
+    with open(fn) as fpr:
+      rr = BufferedRecordReader(fpr)
+      with pytest.raises(RecordIO.RecordSizeExceeded):
+        rr.read()
+
+def test_compressed_recordwriter_roundtrip():
+  test_strings = ["record %d" % k for k in range(100)]
+  for compression in RecordIO.Blocks.COMPRESSION:
+    with EphemeralFile('w') as fp:
+      fn = fp.name
+      rw = CompressedRecordWriter(fp, compression=compression, block_size=64)
+      rw.write(test_strings[0])
+      rw.write_batch(test_strings[1:])
+      rw.close()
+
+      with open(fn) as fpr:
+        assert fpr.read(len(RecordIO.Blocks.FILE_MAGIC)) == RecordIO.Blocks.FILE_MAGIC
+      with open(fn) as fpr:
+        rr = RecordReader(fpr)
+        assert rr.read() == test_strings[0]
+        assert rr.read_batch(1000) == test_strings[1:]
+        assert rr.read() is None
+        assert list(rr) == test_strings
+
+def test_compressed_recordwriter_appends_blocks():
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    rw = CompressedRecordWriter(fp)
+    rw.write("hello world")
+    rw.close()
+    with open(fn, 'a') as fpa:
+      rw = CompressedRecordWriter(fpa, compression='bz2')
+      rw.write("ahoy ahoy, bonjour")
+      rw.close()
+    with open(fn) as fpr:
+      assert list(RecordReader(fpr)) == ["hello world", "ahoy ahoy, bonjour"]
+
+def test_compressed_recordwriter_rejects_version_1_stream():
+  with EphemeralFile('w') as fp:
+    RecordWriter(fp).write("hello world")
+    fp.flush()
+    with open(fp.name, 'a') as fpa:
+      with pytest.raises(RecordIO.InvalidFileHandle):
+        CompressedRecordWriter(fpa)
+    with pytest.raises(RecordIO.InvalidArgument):
+      CompressedRecordWriter(fp, compression='lzma')
+
+def test_compressed_try_read_partial_block():
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    fp.write(RecordIO.Blocks.FILE_MAGIC)
+    block = RecordIO.Blocks.encode(RecordIO.Blocks.ZLIB, struct.pack('>L', 5) + 'hello', 1)
+    fp.write(block[:10])
+    fp.flush()
+    with open(fn) as fpr:
+      rr = RecordReader(fpr)
+      assert rr.try_read() is None
+      fp.write(block[10:])
+      fp.flush()
+      assert rr.try_read() == 'hello'
+
+def test_compressed_try_read_resyncs_past_corrupt_block():
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    rw = CompressedRecordWriter(fp, block_size=1)
+    rw.write_batch(["hello world"])
+    rw.write_batch(["ahoy ahoy, bonjour"])
+    rw.write_batch(["goodbye"])
+    rw.close()
+
+    with open(fn) as fpr:
+      data = bytearray(fpr.read())
+    second_block = data.find(RecordIO.Blocks.BLOCK_MAGIC, len(RecordIO.Blocks.FILE_MAGIC) + 1)
+    data[second_block + RecordIO.Blocks.HEADER.size] ^= 0xff
+    with open(fn, 'w') as fpw:
+      fpw.write(str(data))
+
+    with open(fn) as fpr:
+      rr = RecordReader(fpr)
+      assert rr.read() == "hello world"
+      with pytest.raises(RecordIO.CorruptBlock):
+        rr.read()
+    with open(fn) as fpr:
+      rr = RecordReader(fpr)
+      assert rr.try_read() == "hello world"
+      assert rr.try_read() == "goodbye"
+      assert rr.try_read() is None
+
+def test_buffered_recordreader_reads_compressed_stream():
+  test_strings = ["record %d" % k for k in range(100)]
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    rw = CompressedRecordWriter(fp, block_size=64)
+    rw.write_batch(test_strings)
+    rw.close()
+
+    with open(fn) as fpr:
+      rr = BufferedRecordReader(fpr, buffer_size=7)
+      assert rr.read() == test_strings[0]
+      assert rr.read_batch(50) == test_strings[1:51]
+      assert list(rr) == test_strings
+      assert rr.try_read() == test_strings[51]
+      assert rr.read_batch(100) == test_strings[52:]
+      assert rr.read() is None
+
+def test_buffered_recordreader_detects_version_once_data_arrives():
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    with open(fn) as fpr:
+      rr = BufferedRecordReader(fpr)
+      assert rr.read() is None
+      rw = CompressedRecordWriter(fp)
+      rw.write("hello world")
+      rw.close()
+      assert rr.read() == "hello world"
+
+def test_mmap_recordreader_rejects_compressed_stream():
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+    rw = CompressedRecordWriter(fp)
+    rw.write("hello world")
+    rw.close()
+
+    with open(fn) as fpr:
+      with pytest.raises(RecordIO.InvalidFileHandle):
+        MmapRecordReader(fpr)
+    assert not os.path.exists(RecordIndex.index_filename(fn))
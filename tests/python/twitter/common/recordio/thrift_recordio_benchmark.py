@@ -0,0 +1,57 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from __future__ import print_function
+
+import time
+
+from twitter.common import app
+from twitter.common.recordio import (
+  ParallelThriftRecordReader,
+  ThriftRecordReader,
+  ThriftRecordWriter)
+from twitter.common.contextutil import temporary_file
+from twitter_test.thrift.ttypes import StringType
+
+app.add_option('--records', type=int, default=200000, help='Number of records to decode.')
+app.add_option('--processes', type=int, default=None,
+               help='Number of decoding processes (default: one per cpu.)')
+app.add_option('--chunk_records', type=int,
+               default=ParallelThriftRecordReader.DEFAULT_CHUNK_RECORDS,
+               help='Number of records handed to a worker at a time.')
+
+
+def timed(name, reader, records):
+  start = time.time()
+  count = sum(1 for _ in reader)
+  elapsed = time.time() - start
+  assert count == records
+  print('%-10s %10d records in %6.2fs: %12.1f records/sec' % (name, count, elapsed,
+      count / elapsed))
+
+
+def main(args, options):
+  with temporary_file() as fp:
+    ThriftRecordWriter(fp).write_batch(
+        StringType('record %d' % k) for k in range(options.records))
+    fp.flush()
+    with open(fp.name) as fpr:
+      timed('serial', ThriftRecordReader(fpr, StringType), options.records)
+      timed('parallel', ParallelThriftRecordReader(fpr, StringType,
+          processes=options.processes, chunk_records=options.chunk_records), options.records)
+
+
+app.main()
@@ -14,12 +14,16 @@
 # limitations under the License.
 # ==================================================================================================
 
+import os
 import struct
 
 import pytest
 
-from twitter.common.recordio import RecordIO
-from twitter.common.recordio import ThriftRecordWriter, ThriftRecordReader
+from twitter.common.recordio import RecordIO, MmapRecordReader, RecordIndex
+from twitter.common.recordio import (
+  ParallelThriftRecordReader,
+  ThriftRecordReader,
+  ThriftRecordWriter)
 from twitter.common.recordio.thrift_recordio import ThriftRecordIO
 from twitter_test.thrift.ttypes import IntType, StringType, BinaryType
 
@@ -168,3 +172,126 @@ def test_thrift_invalid_codec_with_object_instead_of_class():
   with EphemeralFile('w') as fp:
     with pytest.raises(ThriftRecordIO.InvalidThriftException):
       ThriftRecordReader(fp, StringType())
+
+def test_thrift_mmap_recordreader():
+  test_strings = [StringType("hello world"), StringType("ahoy ahoy, bonjour")]
+
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+
+    rw = ThriftRecordWriter(fp)
+    rw.write_batch(test_strings)
+    rw.close()
+
+    with open(fn) as fpr:
+      rr = MmapRecordReader(fpr, ThriftRecordIO.ThriftCodec(StringType))
+      assert rr[1] == test_strings[1]
+      assert list(rr) == test_strings
+    os.remove(RecordIndex.index_filename(fn))
+
+def test_parallel_thriftrecordreader():
+  test_strings = [StringType("record %d" % k) for k in range(100)]
+
+  with EphemeralFile('w') as fp:
+    fn = fp.name
+
+    rw = ThriftRecordWriter(fp)
+    rw.write_batch(test_strings)
+    rw.close()
+
+    with open(fn) as fpr:
+      rr = ParallelThriftRecordReader(fpr, StringType, processes=2, chunk_records=7, prefetch=2)
+      assert list(rr) == test_strings
+      unordered = ParallelThriftRecordReader(fpr, StringType, processes=2, chunk_records=7,
+          ordered=False)
+      assert sorted(unordered, key=lambda record: test_strings.index(record)) == test_strings
+      for record in rr:
+        assert record == test_strings[0]
+        break
+    assert not os.path.exists(RecordIndex.index_filename(fn))
+
+def write_parallel_test_file(fp, records, tail):
+  rw = ThriftRecordWriter(fp)
+  rw.write_batch(records)
+  fp.write(tail)
+  rw.close()
+
+def parallel_records(fn, records):
+  with open(fn) as fpr:
+    for record in ParallelThriftRecordReader(fpr, StringType, processes=2, chunk_records=3):
+      records.append(record)
+
+def test_parallel_thriftrecordreader_truncated():
+  test_strings = [StringType("record %d" % k) for k in range(10)]
+  with EphemeralFile('w') as fp:
+    write_parallel_test_file(fp, test_strings, struct.pack('>L', 100) + 'abc')
+    records = []
+    with pytest.raises(RecordIO.PrematureEndOfStream):
+      parallel_records(fp.name, records)
+    assert records == test_strings
+    assert not os.path.exists(RecordIndex.index_filename(fp.name))
+
+def test_parallel_thriftrecordreader_oversized_frame():
+  test_strings = [StringType("record %d" % k) for k in range(10)]
+  with EphemeralFile('w') as fp:
+    write_parallel_test_file(
+        fp, test_strings, struct.pack('>L', RecordIO.SANITY_CHECK_BYTES + 1) + 'abc')
+    records = []
+    with pytest.raises(RecordIO.RecordSizeExceeded):
+      parallel_records(fp.name, records)
+    assert records == test_strings
+
+  with EphemeralFile('w') as fp:
+    write_parallel_test_file(fp, [], struct.pack('>L', RecordIO.SANITY_CHECK_BYTES + 1))
+    with pytest.raises(RecordIO.RecordSizeExceeded):
+      parallel_records(fp.name, [])
+
+def test_parallel_thriftrecordreader_undecodable():
+  test_strings = [StringType("record %d" % k) for k in range(4)]
+  with EphemeralFile('w') as fp:
+    write_parallel_test_file(fp, test_strings, struct.pack('>L', 2) + 'ab')
+    records = []
+    with pytest.raises(RecordIO.PrematureEndOfStream):
+      parallel_records(fp.name, records)
+    assert records == test_strings
+
+def write_compressed_test_file(fp, records, block_size=64):
+  rw = RecordIO.BlockWriter(fp, ThriftRecordIO.ThriftCodec(), block_size=block_size)
+  for record in records:
+    rw.write(record)
+  rw.close()
+
+def test_parallel_thriftrecordreader_compressed():
+  test_strings = [StringType("record %d" % k) for k in range(100)]
+  with EphemeralFile('w') as fp:
+    write_compressed_test_file(fp, test_strings)
+    with open(fp.name) as fpr:
+      assert list(ThriftRecordReader(fpr, StringType)) == test_strings
+      rr = ParallelThriftRecordReader(fpr, StringType, processes=2, chunk_records=7, prefetch=2)
+      assert list(rr) == test_strings
+      unordered = ParallelThriftRecordReader(fpr, StringType, processes=2, chunk_records=7,
+          ordered=False)
+      assert sorted(unordered, key=lambda record: test_strings.index(record)) == test_strings
+    assert not os.path.exists(RecordIndex.index_filename(fp.name))
+
+def test_parallel_thriftrecordreader_compressed_truncated():
+  test_strings = [StringType("record %d" % k) for k in range(20)]
+  with EphemeralFile('w') as fp:
+    write_compressed_test_file(fp, test_strings)
+    complete = os.path.getsize(fp.name)
+    with open(fp.name, 'a') as fpa:
+      block = RecordIO.Blocks.encode(RecordIO.Blocks.ZLIB, struct.pack('>L', 3) + 'abc', 1)
+      fpa.write(block[:-2])
+    records = []
+    with pytest.raises(RecordIO.PrematureEndOfStream):
+      parallel_records(fp.name, records)
+    assert records == test_strings
+
+    with open(fp.name, 'r+') as fpw:
+      fpw.truncate(complete)
+      fpw.seek(complete - 1)
+      last = fpw.read(1)
+      fpw.seek(complete - 1)
+      fpw.write('\xff' if last != '\xff' else '\x00')
+    with pytest.raises(RecordIO.CorruptBlock):
+      parallel_records(fp.name, [])
@@ -0,0 +1,59 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from __future__ import print_function
+
+import threading
+import time
+
+from twitter.common import app
+from twitter.common.metrics import Metrics
+from twitter.common.resourcepool import ElasticResourcePool, ResourcePool
+
+app.add_option('--threads', type=int, default=32, help='Number of borrowing threads.')
+app.add_option('--size', type=int, default=8, help='Number of pooled resources.')
+app.add_option('--acquires', type=int, default=2000,
+               help='Number of acquires per thread.')
+app.add_option('--hold', type=float, default=0.0001,
+               help='Seconds each resource is held for.')
+
+
+def timed(name, pool, options):
+  def run():
+    for _ in range(options.acquires):
+      with pool.acquire():
+        time.sleep(options.hold)
+  workers = [threading.Thread(target=run) for _ in range(options.threads)]
+  start = time.time()
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+  elapsed = time.time() - start
+  print('%-20s %d threads, %d resources: %12.1f acquires/sec' % (name, options.threads,
+      options.size, options.threads * options.acquires / elapsed))
+
+
+def main(args, options):
+  timed('ResourcePool', ResourcePool([object() for _ in range(options.size)]), options)
+  metrics = Metrics()
+  timed('ElasticResourcePool', ElasticResourcePool(object, max_size=options.size,
+      metrics=metrics), options)
+  for name, value in sorted(metrics.sample().items()):
+    print('  %s: %s' % (name, value))
+
+
+app.main()
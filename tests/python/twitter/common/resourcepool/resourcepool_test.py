@@ -16,13 +16,15 @@
 
 import gc
 import pytest
+import threading
 import time
 from collections import namedtuple
 try:
   from Queue import Empty
 except ImportError:
   from queue import Empty
-from twitter.common.resourcepool import ResourcePool
+from twitter.common.metrics import Metrics, RootMetrics
+from twitter.common.resourcepool import ElasticResourcePool, ResourcePool
 from twitter.common.quantity import Amount, Time
 
 
@@ -74,3 +76,150 @@ class TestResourcePool(object):
     elapsed = time.time() - now
     assert elapsed >= 1.0
 
+
+
+class FakeClock(object):
+  def __init__(self):
+    self._time = 0
+
+  def advance(self, ticks):
+    self._time += ticks
+
+  def time(self):
+    return self._time
+
+
+class Factory(object):
+  def __init__(self):
+    self.created = 0
+    self.destroyed = []
+
+  def __call__(self):
+    self.created += 1
+    return MyResource(self.created)
+
+  def destroy(self, resource):
+    self.destroyed.append(resource)
+
+
+class TestElasticResourcePool(object):
+  def setup_method(self, method):
+    self.factory = Factory()
+    self.metrics = Metrics()
+
+  def pool(self, **kw):
+    return ElasticResourcePool(self.factory, destroy=self.factory.destroy, metrics=self.metrics,
+        **kw)
+
+  def test_lazy_creation(self):
+    pool = self.pool(min_size=1, max_size=3)
+    assert self.factory.created == 1
+    first, second = pool.acquire(), pool.acquire()
+    assert self.factory.created == 2
+    assert pool.size == 2
+    first.release()
+    with pool.acquire() as resource:
+      assert resource.id == 1
+    assert self.factory.created == 2
+
+  def test_max_size(self):
+    pool = self.pool(max_size=2)
+    _ = [pool.acquire() for _ in range(2)]
+    assert pool.empty()
+    with pytest.raises(Empty):
+      pool.acquire(Amount(10, Time.MILLISECONDS))
+    assert self.metrics.sample()['resourcepool.timeouts'] == '1'
+
+  def test_fifo_waiters(self):
+    pool = self.pool(max_size=1)
+    held = pool.acquire()
+    order = []
+    def acquire(name):
+      with pool.acquire():
+        order.append(name)
+    threads = []
+    for name in range(3):
+      threads.append(threading.Thread(target=acquire, args=(name,)))
+      threads[-1].start()
+      while len(pool._waiters) <= name:
+        time.sleep(0.001)
+    held.release()
+    for thread in threads:
+      thread.join()
+    assert order == [0, 1, 2]
+    assert self.factory.created == 1
+
+  def test_idle_eviction(self):
+    clock = FakeClock()
+    pool = self.pool(min_size=1, max_size=3, max_idle=10, clock=clock)
+    resources = [pool.acquire() for _ in range(3)]
+    for resource in resources:
+      resource.release()
+    assert pool.size == 3
+    clock.advance(10)
+    pool.evict()
+    assert pool.size == 1
+    assert len(self.factory.destroyed) == 2
+
+  def test_validate(self):
+    pool = self.pool(max_size=1, validate=lambda resource: resource.id != 1)
+    pool.acquire().release()
+    with pool.acquire() as resource:
+      assert resource.id == 2
+    assert self.factory.destroyed == [MyResource(1)]
+    assert pool.size == 1
+
+  def test_discard(self):
+    pool = self.pool(max_size=1)
+    pool.acquire().discard()
+    assert pool.size == 0
+    with pool.acquire() as resource:
+      assert resource.id == 2
+
+  def test_discard_wakes_waiter(self):
+    pool = self.pool(max_size=1)
+    held = pool.acquire()
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    thread.start()
+    while not pool._waiters:
+      time.sleep(0.001)
+    held.discard()
+    thread.join()
+    assert acquired[0].resource.id == 2
+    assert pool.size == 1
+
+  def test_factory_failure(self):
+    def factory():
+      raise ValueError('oops')
+    pool = ElasticResourcePool(factory, max_size=1, metrics=self.metrics)
+    with pytest.raises(ValueError):
+      pool.acquire()
+    assert pool.size == 0
+
+  def test_close(self):
+    pool = self.pool(min_size=2, max_size=2)
+    held = pool.acquire()
+    pool.close()
+    assert len(self.factory.destroyed) == 1
+    held.release()
+    assert len(self.factory.destroyed) == 2
+    assert pool.size == 0
+
+  def test_metrics(self):
+    pool = self.pool(max_size=4)
+    held = pool.acquire()
+    sample = self.metrics.sample()
+    assert sample['resourcepool.size'] == '1'
+    assert sample['resourcepool.in_use'] == '1'
+    assert sample['resourcepool.utilization'] == '0.25'
+    assert sample['resourcepool.acquire_wait_ms.count'] == '1'
+    held.release()
+    assert self.metrics.sample()['resourcepool.idle'] == '1'
+    pool.close()
+    assert self.metrics.sample() == {}
+
+  def test_no_metrics_by_default(self):
+    pool = ElasticResourcePool(self.factory)
+    assert not [name for name in RootMetrics().sample() if name.startswith('resourcepool.')]
+    pool.close()
@@ -0,0 +1,112 @@
+from __future__ import print_function
+
+import socket
+import threading
+import time
+
+from scribe import scribe
+from thrift.protocol import TBinaryProtocol
+from thrift.server import TServer
+from thrift.transport import TSocket, TTransport
+from twitter.common import app
+from twitter.common.metrics import Metrics
+from twitter.common.rpc import BalancedClient, make_client
+
+app.add_option('--servers', type=int, default=4, help='Number of local thrift servers.')
+app.add_option('--threads', type=int, default=16, help='Number of calling threads.')
+app.add_option('--calls', type=int, default=500, help='Number of calls per thread.')
+app.add_option('--latency', type=float, default=0.001,
+               help='Seconds each server takes to handle a call.')
+
+
+class Handler(object):
+  def __init__(self, latency):
+    self._latency = latency
+    self.connections = 0
+
+  def Log(self, messages):
+    time.sleep(self._latency)
+    return scribe.ResultCode.OK
+
+
+class CountingServerSocket(TSocket.TServerSocket):
+  def __init__(self, port):
+    TSocket.TServerSocket.__init__(self, host='localhost', port=port)
+    self.accepted = 0
+
+  def accept(self):
+    client = TSocket.TServerSocket.accept(self)
+    self.accepted += 1
+    return client
+
+
+def free_port():
+  sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  sock.bind(('localhost', 0))
+  _, port = sock.getsockname()
+  sock.close()
+  return port
+
+
+def start_server(latency):
+  port = free_port()
+  server_socket = CountingServerSocket(port)
+  server = TServer.TThreadedServer(
+      scribe.Processor(Handler(latency)),
+      server_socket,
+      TTransport.TFramedTransportFactory(),
+      TBinaryProtocol.TBinaryProtocolFactory(),
+      daemon=True)
+  thread = threading.Thread(target=server.serve)
+  thread.daemon = True
+  thread.start()
+  return port, server_socket
+
+
+def timed(name, call, options, sockets):
+  accepted = sum(server_socket.accepted for server_socket in sockets)
+  latencies = []
+  def run():
+    for _ in range(options.calls):
+      start = time.time()
+      call()
+      latencies.append(time.time() - start)
+  workers = [threading.Thread(target=run) for _ in range(options.threads)]
+  start = time.time()
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+  elapsed = time.time() - start
+  latencies.sort()
+  print('%-25s %8.1f calls/sec  p50 %6.2f ms  p99 %6.2f ms  %6d connections' % (
+      name, len(latencies) / elapsed,
+      1000.0 * latencies[len(latencies) // 2],
+      1000.0 * latencies[int(len(latencies) * 0.99)],
+      sum(server_socket.accepted for server_socket in sockets) - accepted))
+
+
+def main(args, options):
+  servers = [start_server(options.latency) for _ in range(options.servers)]
+  ports = [port for port, _ in servers]
+  sockets = [server_socket for _, server_socket in servers]
+  time.sleep(0.5)
+  messages = [scribe.LogEntry(category='benchmark', message='x' * 100)]
+
+  def connection_per_call():
+    port = ports[int(time.time() * 1e6) % len(ports)]
+    client = make_client(scribe, 'localhost', port, protocol=TBinaryProtocol.TBinaryProtocol)
+    try:
+      client.Log(messages)
+    finally:
+      client._iprot.trans.close()
+  timed('make_client per call', connection_per_call, options, sockets)
+
+  for strategy in (BalancedClient.LEAST_OUTSTANDING, BalancedClient.POWER_OF_TWO):
+    client = BalancedClient(scribe, ['localhost:%d' % port for port in ports],
+        strategy=strategy, protocol=TBinaryProtocol.TBinaryProtocol, metrics=Metrics())
+    timed('BalancedClient %s' % strategy, lambda: client.Log(messages), options, sockets)
+    client.close()
+
+
+app.main()
@@ -0,0 +1,229 @@
+import socket
+from collections import namedtuple
+
+import pytest
+from thrift.transport import TTransport
+from twitter.common.metrics import Metrics, RootMetrics
+from twitter.common.rpc import Address, BalancedClient
+
+
+class FakeClock(object):
+  def __init__(self):
+    self._time = 0
+
+  def advance(self, ticks):
+    self._time += ticks
+
+  def time(self):
+    return self._time
+
+
+class FakeServers(object):
+  """A registry of fake hosts, recording connections and calls per port."""
+  def __init__(self):
+    self.down = set()
+    self.connects = {}
+    self.calls = {}
+
+  def connection(self, host, port):
+    servers = self
+    class Connection(object):
+      def open(self):
+        if port in servers.down:
+          raise TTransport.TTransportException(message='Connection refused')
+        servers.connects[port] = servers.connects.get(port, 0) + 1
+      def close(self):
+        pass
+      port_number = port
+    return Connection()
+
+  def iface(self):
+    servers = self
+    class Client(object):
+      def __init__(self, protocol):
+        self._port = protocol.port_number
+      def echo(self, value):
+        if self._port in servers.down:
+          raise socket.error('Connection reset')
+        servers.calls[self._port] = servers.calls.get(self._port, 0) + 1
+        return value
+      def fail(self):
+        raise ValueError('application error')
+    return namedtuple('Iface', 'Client')(Client)
+
+
+def make_client(servers, ports, **kw):
+  return BalancedClient(servers.iface(), ['localhost:%d' % port for port in ports],
+      connection=servers.connection, transport=lambda connection: connection,
+      protocol=lambda transport: transport, metrics=Metrics(), **kw)
+
+
+def test_reuses_connections():
+  servers = FakeServers()
+  client = make_client(servers, [1000, 1001])
+  for k in range(100):
+    assert client.echo(k) == k
+  assert sum(servers.calls.values()) == 100
+  assert sorted(servers.calls) == [1000, 1001]
+  assert servers.connects == {1000: 1, 1001: 1}
+
+
+def test_least_outstanding():
+  servers = FakeServers()
+  client = make_client(servers, [1000, 1001, 1002], strategy=BalancedClient.POWER_OF_TWO)
+  client._hosts[('localhost', 1000)].outstanding = 10
+  client._hosts[('localhost', 1001)].outstanding = 10
+  for k in range(50):
+    client.echo(k)
+  assert servers.calls.get(1002) == 50 - servers.calls.get(1000, 0) - servers.calls.get(1001, 0)
+  assert servers.calls.get(1002) > 25
+
+
+def test_application_errors_keep_connection():
+  servers = FakeServers()
+  client = make_client(servers, [1000])
+  with pytest.raises(ValueError):
+    client.fail()
+  client.echo(1)
+  assert servers.connects == {1000: 1}
+
+
+def test_failover_and_ejection():
+  servers = FakeServers()
+  clock = FakeClock()
+  client = make_client(servers, [1000, 1001], failure_threshold=2, eject_period=10,
+      clock=clock)
+  servers.down.add(1000)
+  for k in range(20):
+    assert client.echo(k) == k
+  assert servers.calls == {1001: 20}
+  assert client._ejections == 1
+  assert client._hosts[('localhost', 1000)].ejected_until == 10
+
+  servers.down.clear()
+  clock.advance(10)
+  for k in range(20):
+    client.echo(k)
+  assert servers.calls[1000] > 0
+
+
+def test_all_hosts_down():
+  servers = FakeServers()
+  client = make_client(servers, [1000, 1001])
+  servers.down.update([1000, 1001])
+  with pytest.raises(TTransport.TTransportException):
+    client.echo(1)
+  with pytest.raises(BalancedClient.NoHostsAvailable):
+    make_client(servers, []).echo(1)
+
+
+def test_membership_changes():
+  servers = FakeServers()
+  client = make_client(servers, [1000])
+  client.echo(1)
+  client.set_hosts(['localhost:1001', ('localhost', 1002)])
+  assert sorted(address.port for address in client.hosts()) == [1001, 1002]
+  client.add_host(Address('localhost', 1003))
+  client.remove_host('localhost:1001')
+  for k in range(20):
+    client.echo(k)
+  assert sorted(servers.calls) == [1000, 1002, 1003]
+  assert servers.calls[1000] == 1
+
+
+def test_follows_serverset_client():
+  Endpoint = namedtuple('Endpoint', 'host port')
+  Instance = namedtuple('Instance', 'serviceEndpoint')
+
+  class FakeServerSetClient(object):
+    def __init__(self, endpoints):
+      self.endpoints = endpoints
+      self.delta_watcher = None
+    def set_delta_watcher(self, delta_watcher):
+      previous, self.delta_watcher = self.delta_watcher, delta_watcher
+      return previous
+    def get_endpoints(self):
+      return self.endpoints
+
+  first, second = Instance(Endpoint('localhost', 1000)), Instance(Endpoint('localhost', 1001))
+  serverset = FakeServerSetClient([first])
+  deltas = []
+  serverset.set_delta_watcher(lambda endpoint, added, removed: deltas.append((added, removed)))
+  servers = FakeServers()
+  client = BalancedClient(servers.iface(), serverset,
+      connection=servers.connection, transport=lambda connection: connection,
+      protocol=lambda transport: transport, metrics=Metrics())
+  assert [address.port for address in client.hosts()] == [1000]
+  serverset.delta_watcher('/service', [second], [first])
+  assert [address.port for address in client.hosts()] == [1001]
+  assert deltas == [([second], [first])]
+  client.close()
+  serverset.delta_watcher('/service', [first], [])
+  assert client.hosts() == []
+  assert len(deltas) == 2
+
+
+def test_bounded_connections():
+  servers = FakeServers()
+  client = make_client(servers, [1000], max_connections=2)
+  host = client._hosts[('localhost', 1000)]
+  held = [host.pool.acquire() for _ in range(2)]
+  client._acquire_timeout = 0.01
+  with pytest.raises(BalancedClient.NoHostsAvailable):
+    client.echo(1)
+  for resource in held:
+    resource.release()
+  client.echo(1)
+  assert servers.connects == {1000: 2}
+
+
+def test_call_failures_are_not_retried_by_default():
+  servers = FakeServers()
+  client = make_client(servers, [1000, 1001])
+  for host in client._hosts.values():
+    host.pool.acquire().release()
+  servers.down.add(1000)
+  failures = 0
+  for k in range(10):
+    try:
+      client.echo(k)
+    except socket.error:
+      failures += 1
+  assert failures == 1
+
+  servers = FakeServers()
+  client = make_client(servers, [1000, 1001], retry_calls=True)
+  for host in client._hosts.values():
+    host.pool.acquire().release()
+  servers.down.add(1000)
+  for k in range(10):
+    assert client.echo(k) == k
+
+
+def test_host_metrics():
+  servers = FakeServers()
+  metrics = Metrics()
+  client = BalancedClient(servers.iface(), ['10.0.0.1:1000', '10.0.0.2:1000'],
+      connection=servers.connection, transport=lambda connection: connection,
+      protocol=lambda transport: transport, metrics=metrics)
+  client.remove_host('10.0.0.1:1000')
+  client.echo(1)
+  sample = metrics.sample()
+  assert sample['balanced_client.requests'] == '1'
+  assert sample['balanced_client.hosts.10_0_0_2_1000.size'] == '1'
+  assert not [name for name in sample if '10_0_0_1' in name]
+  client.close()
+  assert metrics.sample() == {}
+
+
+def test_default_metrics_are_not_exported():
+  servers = FakeServers()
+  before = RootMetrics().sample()
+  clients = [BalancedClient(servers.iface(), ['10.0.0.1:1000'],
+      connection=servers.connection, transport=lambda connection: connection,
+      protocol=lambda transport: transport) for _ in range(2)]
+  for client in clients:
+    assert client.echo(1) == 1
+  assert RootMetrics().sample() == before
+  clients[0].close()
+  assert RootMetrics().sample() == before
@@ -0,0 +1,239 @@
+import socket
+import struct
+import threading
+import time
+
+import pytest
+from thrift.Thrift import TApplicationException, TMessageType, TType
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TSocket, TTransport
+from twitter.common.quantity import Amount, Time
+from twitter.common.rpc import PipelinedClient
+
+
+class Echo(object):
+  """
+    A hand-written equivalent of the code thrift generates for:
+
+      service Echo {
+        string echo(1: string value, 2: double delay)
+        oneway void ping()
+      }
+  """
+
+  class Client(object):
+    def __init__(self, iprot, oprot=None):
+      self._iprot = self._oprot = iprot
+      if oprot is not None:
+        self._oprot = oprot
+      self._seqid = 0
+
+    def echo(self, value, delay=0):
+      self.send_echo(value, delay)
+      return self.recv_echo()
+
+    def send_echo(self, value, delay=0):
+      self._oprot.writeMessageBegin('echo', TMessageType.CALL, self._seqid)
+      self._oprot.writeStructBegin('echo_args')
+      self._oprot.writeFieldBegin('value', TType.STRING, 1)
+      self._oprot.writeString(value)
+      self._oprot.writeFieldEnd()
+      self._oprot.writeFieldBegin('delay', TType.DOUBLE, 2)
+      self._oprot.writeDouble(delay)
+      self._oprot.writeFieldEnd()
+      self._oprot.writeFieldStop()
+      self._oprot.writeStructEnd()
+      self._oprot.writeMessageEnd()
+      self._oprot.trans.flush()
+
+    def recv_echo(self):
+      fname, mtype, rseqid = self._iprot.readMessageBegin()
+      if mtype == TMessageType.EXCEPTION:
+        x = TApplicationException()
+        x.read(self._iprot)
+        self._iprot.readMessageEnd()
+        raise x
+      self._iprot.readStructBegin()
+      value = None
+      while True:
+        _, ftype, fid = self._iprot.readFieldBegin()
+        if ftype == TType.STOP:
+          break
+        if fid == 0:
+          value = self._iprot.readString()
+        else:
+          self._iprot.skip(ftype)
+        self._iprot.readFieldEnd()
+      self._iprot.readStructEnd()
+      self._iprot.readMessageEnd()
+      return value
+
+    def ping(self):
+      self.send_ping()
+
+    def send_ping(self):
+      self._oprot.writeMessageBegin('ping', TMessageType.ONEWAY, self._seqid)
+      self._oprot.writeStructBegin('ping_args')
+      self._oprot.writeFieldStop()
+      self._oprot.writeStructEnd()
+      self._oprot.writeMessageEnd()
+      self._oprot.trans.flush()
+
+
+class EchoServer(object):
+  """
+    A framed echo server that replies to each call from its own thread after the requested
+    delay, so replies may be sent out of order.
+  """
+
+  def __init__(self):
+    self._server = TSocket.TServerSocket(host='localhost', port=0)
+    self._server.listen()
+    self.port = self._server.handle.getsockname()[1]
+    self.pings = 0
+    thread = threading.Thread(target=self._serve)
+    thread.daemon = True
+    thread.start()
+
+  def _serve(self):
+    while True:
+      client = self._server.accept()
+      thread = threading.Thread(target=self._handle, args=(client,))
+      thread.daemon = True
+      thread.start()
+
+  def _handle(self, client):
+    lock = threading.Lock()
+    try:
+      while True:
+        size, = struct.unpack('>i', client.readAll(4))
+        protocol = TBinaryProtocol.TBinaryProtocol(TTransport.TMemoryBuffer(client.readAll(size)))
+        name, _, seqid = protocol.readMessageBegin()
+        if name == 'ping':
+          self.pings += 1
+          continue
+        protocol.readStructBegin()
+        protocol.readFieldBegin()
+        value = protocol.readString()
+        protocol.readFieldBegin()
+        delay = protocol.readDouble()
+        thread = threading.Thread(target=self._reply, args=(client, lock, seqid, value, delay))
+        thread.daemon = True
+        thread.start()
+    except EOFError:
+      pass
+
+  def _reply(self, client, lock, seqid, value, delay):
+    time.sleep(delay)
+    buf = TTransport.TMemoryBuffer()
+    protocol = TBinaryProtocol.TBinaryProtocol(buf)
+    if value == 'fail':
+      protocol.writeMessageBegin('echo', TMessageType.EXCEPTION, seqid)
+      TApplicationException(message='failed').write(protocol)
+    else:
+      protocol.writeMessageBegin('echo', TMessageType.REPLY, seqid)
+      protocol.writeStructBegin('echo_result')
+      protocol.writeFieldBegin('success', TType.STRING, 0)
+      protocol.writeString(value)
+      protocol.writeFieldEnd()
+      protocol.writeFieldStop()
+      protocol.writeStructEnd()
+    protocol.writeMessageEnd()
+    payload = buf.getvalue()
+    with lock:
+      client.write(struct.pack('>i', len(payload)) + payload)
+
+  def close(self):
+    self._server.close()
+
+
+@pytest.fixture
+def server():
+  server = EchoServer()
+  yield server
+  server.close()
+
+
+def make_client(server, **kw):
+  return PipelinedClient(Echo, 'localhost', server.port,
+                         protocol=TBinaryProtocol.TBinaryProtocol, **kw)
+
+
+def test_blocking_call(server):
+  client = make_client(server)
+  assert client.echo('hello') == 'hello'
+  assert client.outstanding == 0
+  client.close()
+
+
+def test_out_of_order_replies(server):
+  client = make_client(server)
+  slow = client.call_async('echo', 'slow', 0.2)
+  fast = [client.call_async('echo', str(k), 0) for k in range(100)]
+  assert [future.result(5) for future in fast] == [str(k) for k in range(100)]
+  assert not slow.done()
+  assert slow.result(5) == 'slow'
+  client.close()
+
+
+def test_many_in_flight(server):
+  client = make_client(server)
+  start = time.time()
+  futures = [client.call_async('echo', str(k), 0.1) for k in range(300)]
+  assert [future.result(10) for future in futures] == [str(k) for k in range(300)]
+  # Pipelined calls overlap rather than taking 300 * 0.1 seconds.
+  assert time.time() - start < 10
+  client.close()
+
+
+def test_application_exception(server):
+  client = make_client(server)
+  with pytest.raises(TApplicationException):
+    client.echo('fail')
+  assert client.echo('ok') == 'ok'
+  client.close()
+
+
+def test_deadline(server):
+  client = make_client(server)
+  late = client.call_async('echo', 'late', 0.5, deadline=Amount(50, Time.MILLISECONDS))
+  with pytest.raises(PipelinedClient.DeadlineExceeded):
+    late.result(5)
+  assert client.call_async('echo', 'prompt', 0, deadline=5).result(5) == 'prompt'
+  time.sleep(0.6)
+  assert client.outstanding == 0
+  assert client.echo('after') == 'after'
+  client.close()
+
+
+def test_oneway(server):
+  client = make_client(server)
+  assert client.call_async('ping').result(5) is None
+  assert client.echo('sync') == 'sync'
+  assert server.pings == 1
+  client.close()
+
+
+def test_close_fails_outstanding(server):
+  client = make_client(server)
+  future = client.call_async('echo', 'never', 5)
+  client.close()
+  with pytest.raises(PipelinedClient.ConnectionClosed):
+    future.result(5)
+  with pytest.raises(PipelinedClient.ConnectionClosed):
+    client.call_async('echo', 'closed')
+
+
+def test_codec_headers(server):
+  events = []
+  class RecordingCodec(PipelinedClient.Codec):
+    def handshake(self, protocol):
+      events.append('handshake')
+    def write_header(self, protocol):
+      events.append('write')
+    def read_header(self, protocol):
+      events.append('read')
+  client = make_client(server, codec=RecordingCodec())
+  assert client.echo('hello') == 'hello'
+  assert events == ['handshake', 'write', 'read']
+  client.close()
@@ -0,0 +1,52 @@
+from __future__ import print_function
+
+import time
+
+from twitter.common import app
+from twitter.common.string import ScanfParser, scanf
+
+app.add_option('--lines', type=int, default=20000, help='Number of lines parsed per case.')
+
+
+# The format and a line of ProcessHandleProcfs, i.e. /proc/<pid>/stat.
+STAT_FORMAT = ('%d %s %c %d %d %d %d %d %u %lu %lu %lu %lu %lu %lu %ld %ld %ld %ld %ld %ld '
+               '%llu %lu %ld %lu %lu %lu %lu %lu %lu %lu %lu %lu %lu %lu %lu %lu %d %d %u %u')
+STAT_LINE = ('17842 (cat) R 17833 17842 17833 0 -1 4194304 82 0 0 0 0 0 0 0 20 0 1 0 419104 '
+             '2703360 300 18446744073709551615 93863626395648 93863626415529 140734476350848 0 '
+             '0 0 0 0 0 0 0 0 17 0 0 0')
+
+
+def regex_parser(fmt):
+  parser = ScanfParser(fmt)
+  parser._fast = None
+  return parser
+
+
+def uncached_scanf(fmt, line):
+  ScanfParser._CACHE.clear()
+  return scanf(fmt, line)
+
+
+def measure(name, count, fn):
+  start = time.time()
+  fn()
+  elapsed = time.time() - start
+  print('%-40s %10.0f lines/s' % (name, count / elapsed))
+
+
+def main(args, options):
+  lines = [STAT_LINE] * options.lines
+  regex, fast = regex_parser(STAT_FORMAT), ScanfParser(STAT_FORMAT)
+  fields = STAT_LINE.split()
+
+  measure('stat line, regex', len(lines), lambda: [regex.parse(line) for line in lines])
+  measure('stat line, split', len(lines), lambda: [fast.parse(line) for line in lines])
+  measure('stat line, parse_many', len(lines), lambda: fast.parse_many(lines))
+  measure('stat fields, parse_fields', len(lines),
+          lambda: [fast.parse_fields(fields) for _ in lines])
+  measure('scanf(), uncompiled', len(lines),
+          lambda: [uncached_scanf('%d %s %c', '1 (init) S') for _ in lines])
+  measure('scanf(), cached', len(lines), lambda: [scanf('%d %s %c', '1 (init) S') for _ in lines])
+
+
+app.main()
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+from twitter.common.string.scanf import ScanfParser
+
+
+def regex_parser(fmt):
+  parser = ScanfParser(fmt)
+  parser._fast = None
+  return parser
+
+
+def outcome(parser, line, allow_extra):
+  try:
+    so = parser.parse(line, allow_extra)
+  except ScanfParser.ParseError:
+    return 'ParseError'
+  return so.groups(), so.ungrouped(), [type(value) for value in so.ungrouped()]
+
+
+FORMATS = [
+  '%d', '%u %d', '%c %s %lu', '%(pid)d %(comm)s %*c %llu', '%ld %lld %*s %(x)u',
+]
+
+FIELDS = ['0', '1', '-1', '+01', '4294967296', '18446744073709551616', '-9223372036854775809',
+          'a', 'ab', '(init)', 'a\x00b', '1.5', '-', '+', '\t', '']
+
+SEPARATORS = [' ', ' ', ' ', '  ', '\t', ' \t']
+
+
+def test_fast_path_taken():
+  for fmt in FORMATS:
+    assert ScanfParser(fmt)._fast is not None
+  for fmt in ('%f', '%d%d', '%d  %d', ' %d', '%d,%d', '%%', '%(a b)d', ''):
+    assert ScanfParser(fmt)._fast is None
+
+
+def test_matches_regex():
+  rng = random.Random(31337)
+  for fmt in FORMATS:
+    fast, slow = ScanfParser(fmt), regex_parser(fmt)
+    count = len(fmt.split())
+    for _ in range(2000):
+      fields = [rng.choice(FIELDS) for _ in range(count + rng.choice([-1, 0, 0, 0, 1, 2]))]
+      line = ''.join(field + rng.choice(SEPARATORS) for field in fields).rstrip(' ')
+      if rng.random() < 0.1:
+        line = rng.choice(SEPARATORS) + line
+      for allow_extra in (False, True):
+        assert outcome(fast, line, allow_extra) == outcome(slow, line, allow_extra), (fmt, line)
+
+
+def test_conversions():
+  so = ScanfParser('%(pid)d %(comm)s %*c %lu %d %u %c').parse(
+      '12 (init) S 18446744073709551615 +5 4294967297 x')
+  assert so.groups() == {'pid': 12, 'comm': '(init)'}
+  assert so.ungrouped() == [18446744073709551615, 5, 1, 'x']
+  assert ScanfParser('%s').parse('a\x00b').ungrouped() == ['a']
+
+
+def test_parse_fields():
+  parser = ScanfParser('%d %s')
+  assert parser.parse_fields(['1', 'a']).ungrouped() == [1, 'a']
+  assert parser.parse_fields(['1', 'a', 'b'], allow_extra=True).ungrouped() == [1, 'a']
+  with pytest.raises(ScanfParser.ParseError):
+    parser.parse_fields(['1', 'a', 'b'])
+  with pytest.raises(ScanfParser.ParseError):
+    parser.parse_fields(['a', 'a'])
+  assert ScanfParser('%f %s').parse_fields(['1.5', 'a']).ungrouped() == [1.5, 'a']
+
+
+def test_parse_many():
+  parser = ScanfParser('%d %d')
+  assert [so.ungrouped() for so in parser.parse_many(['1 2', '3 4'])] == [[1, 2], [3, 4]]
+  with pytest.raises(ScanfParser.ParseError):
+    parser.parse_many(['1 2', '3'])
+
+
+def test_cache():
+  ScanfParser('%d %s')
+  assert ScanfParser('%d %s')._re is ScanfParser('%d %s')._re
+  assert '%d %s' in ScanfParser._CACHE
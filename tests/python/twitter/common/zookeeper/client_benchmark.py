@@ -0,0 +1,62 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from __future__ import print_function
+
+import posixpath
+import time
+
+from twitter.common import app
+from twitter.common.zookeeper.client import ZooKeeper
+from twitter.common.zookeeper.test_server import ZookeeperServer
+
+app.add_option('--members', type=int, default=1000, help='Number of group members.')
+app.add_option('--concurrency', type=int, default=ZooKeeper.DEFAULT_CONCURRENCY,
+               help='Maximum outstanding asynchronous calls.')
+
+
+def timed(name, function, *args, **kw):
+  start = time.time()
+  result = function(*args, **kw)
+  print('%-25s %10.1f ms' % (name, (time.time() - start) * 1000.0))
+  return result
+
+
+def main(args, options):
+  group = '/benchmark/group'
+  paths = [posixpath.join(group, 'member_%08d' % k) for k in range(options.members)]
+  with ZookeeperServer() as server:
+    zk = ZooKeeper(server.ensemble)
+    print('%d members, concurrency %d:' % (options.members, options.concurrency))
+
+    def create_sequential():
+      zk.safe_create(group)
+      for path in paths:
+        zk.create(path, 'x' * 100, ZooKeeper.DEFAULT_ACL, 0)
+    timed('sequential create', create_sequential)
+    timed('sequential get', lambda: [zk.get(path) for path in paths])
+    timed('sequential delete', zk.safe_delete, '/benchmark')
+
+    timed('create_many', zk.create_many, paths, value='x' * 100,
+          concurrency=options.concurrency)
+    timed('get_many', zk.get_many, paths, concurrency=options.concurrency)
+    timed('get_children_with_data', zk.get_children_with_data, group,
+          concurrency=options.concurrency)
+    timed('delete_tree', zk.delete_tree, '/benchmark', concurrency=options.concurrency)
+    zk.stop()
+
+
+app.main()
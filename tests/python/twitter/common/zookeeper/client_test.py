@@ -212,3 +212,50 @@ def test_safe_operations():
     assert delete_event.is_set()
     assert not zk.exists('/a')
     assert not zk.exists('/foo')
+
+
+def test_get_many():
+  with ZookeeperServer() as server:
+    zk = make_zk(server)
+    paths = ['/group/member_%04d' % k for k in range(200)]
+    zk.create_many(paths, value='data', concurrency=16)
+    values = zk.get_many(paths + ['/group/missing'], concurrency=16)
+    assert sorted(values) == paths
+    assert all(data == 'data' for data, _ in values.values())
+    children = zk.get_children_with_data('/group')
+    assert sorted(children) == sorted(path.split('/')[-1] for path in paths)
+
+
+def test_create_many_existing():
+  with ZookeeperServer() as server:
+    zk = make_zk(server)
+    zk.create('/a', 'original', ZooKeeper.DEFAULT_ACL, 0)
+    zk.create_many(['/a', '/a/b/c'], value='new')
+    assert zk.get('/a')[0] == 'original'
+    assert zk.get('/a/b')[0] == ''
+    assert zk.get('/a/b/c')[0] == 'new'
+
+
+def test_delete_tree():
+  with ZookeeperServer() as server:
+    zk = make_zk(server)
+    zk.create_many('/a/b%d/c%d' % (k, j) for k in range(10) for j in range(10))
+    assert zk.delete_tree('/a', concurrency=8)
+    assert not zk.exists('/a')
+    assert zk.delete_tree('/a')
+
+
+def test_pipeline_while_headless():
+  with ZookeeperServer() as server:
+    zk = make_zk(server)
+    zk.create_many(['/a/b', '/a/c'])
+    assert server.shutdown()
+    results = []
+    class GetThread(threading.Thread):
+      def run(self):
+        results.append(zk.get_many(['/a/b', '/a/c']))
+    gt = GetThread()
+    gt.start()
+    assert server.start()
+    gt.join(MAX_EVENT_WAIT_SECS)
+    assert sorted(results[0]) == ['/a/b', '/a/c']
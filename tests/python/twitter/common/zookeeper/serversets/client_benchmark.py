@@ -0,0 +1,91 @@
+# ==================================================================================================
+# Copyright 2011 Twitter, Inc.
+# --------------------------------------------------------------------------------------------------
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this work except in compliance with the License.
+# You may obtain a copy of the License in the LICENSE file, or at:
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==================================================================================================
+
+from __future__ import print_function
+
+import posixpath
+import threading
+import time
+
+import thrift.TSerialization as codec
+import zookeeper
+from gen.twitter.thrift.endpoint.ttypes import Endpoint, ServiceInstance
+from twitter.common import app
+from twitter.common.zookeeper import ZooKeeper
+from twitter.common.zookeeper.serversets import ServerSetClient
+from twitter.common.zookeeper.test_server import ZookeeperServer
+
+app.add_option('--sizes', default='100,500,2000',
+               help='Comma-separated serverset sizes to benchmark.')
+app.add_option('--churn', default='1,10,100',
+               help='Comma-separated number of members replaced per update.')
+app.add_option('--rounds', type=int, default=10, help='Number of updates per measurement.')
+
+SERVICE_PATH = '/twitter/service/benchmark'
+
+
+def instance(port):
+  return codec.serialize(ServiceInstance(
+      status=2,
+      additionalEndpoints={},
+      serviceEndpoint=Endpoint(host='127.0.0.1', port=port)))
+
+
+def register(zk, port):
+  return zk.create(posixpath.join(SERVICE_PATH, 'member_'), instance(port),
+                   ZooKeeper.DEFAULT_ACL, zookeeper.SEQUENCE)
+
+
+def measure(zk, size, churn, rounds):
+  zk.delete_tree(SERVICE_PATH)
+  zk.safe_create(SERVICE_PATH)
+  members = [register(zk, port) for port in range(size)]
+  expected = [size]
+  updated = threading.Event()
+
+  def watcher(_, old, new):
+    if len(new) == expected[0]:
+      updated.set()
+
+  client = ServerSetClient(SERVICE_PATH, zk=zk, watcher=watcher)
+  elapsed = []
+  for round in range(rounds):
+    updated.clear()
+    replaced, members = members[:churn], members[churn:]
+    start = time.time()
+    for handle in replaced:
+      zk.delete(handle)
+    members.extend(register(zk, size + round * churn + k) for k in range(churn))
+    updated.wait(60.0)
+    elapsed.append(time.time() - start)
+  assert len(client) == size
+  client.set_watcher(None)
+  elapsed.sort()
+  print('%6d members, %4d churned: median %8.1f ms, max %8.1f ms' % (
+      size, churn, 1000.0 * elapsed[len(elapsed) // 2], 1000.0 * elapsed[-1]))
+
+
+def main(args, options):
+  with ZookeeperServer() as server:
+    zk = ZooKeeper(server.ensemble)
+    for size in map(int, options.sizes.split(',')):
+      for churn in map(int, options.churn.split(',')):
+        if churn <= size:
+          measure(zk, size, churn, options.rounds)
+    zk.stop()
+
+
+app.main()
@@ -159,6 +159,83 @@ class TestServerSet(unittest.TestCase):
 
     zk.close()
 
+  def test_client_delta_watcher(self):
+    updated = threading.Event()
+    deltas = []
+
+    def delta_watcher(service_path, added, removed):
+      deltas.append((added, removed))
+      updated.set()
+
+    zk = ZooKeeper(self._server.ensemble, timeout_secs=10, logger=sync_log)
+    service = ServerSet(zk, SERVICE_PATH)
+    instance1 = service.register(INSTANCE1)
+    client = ServerSetClient(SERVICE_PATH, zk=zk, delta_watcher=delta_watcher)
+    assert deltas == [([INSTANCE1], [])]
+    updated.clear()
+
+    service.register(INSTANCE2)
+    updated.wait(2.0)
+    assert updated.is_set()
+    assert deltas[-1] == ([INSTANCE2], [])
+    updated.clear()
+
+    service.unregister(instance1)
+    updated.wait(2.0)
+    assert updated.is_set()
+    assert deltas[-1] == ([], [INSTANCE1])
+    assert list(client) == [INSTANCE2]
+    assert len(deltas) == 3
+
+    zk.close()
+
+  def test_client_survives_watcher_errors(self):
+    updated = threading.Event()
+    calls = []
+
+    def watcher(service_path, old, new):
+      calls.append(new)
+      updated.set()
+      raise ValueError('watcher failed')
+
+    zk = ZooKeeper(self._server.ensemble, timeout_secs=10, logger=sync_log)
+    service = ServerSet(zk, SERVICE_PATH)
+    client = ServerSetClient(SERVICE_PATH, zk=zk)
+    client.set_watcher(watcher)
+
+    service.register(INSTANCE1)
+    updated.wait(2.0)
+    assert updated.is_set()
+    updated.clear()
+
+    service.register(INSTANCE2)
+    updated.wait(2.0)
+    assert updated.is_set()
+    assert calls[-1] == [INSTANCE1, INSTANCE2]
+
+    client.stop()
+    zk.close()
+
+  def test_client_stop(self):
+    updated = threading.Event()
+
+    def watcher(service_path, old, new):
+      updated.set()
+
+    zk = ZooKeeper(self._server.ensemble, timeout_secs=10, logger=sync_log)
+    service = ServerSet(zk, SERVICE_PATH)
+    client = ServerSetClient(SERVICE_PATH, zk=zk, watcher=watcher)
+    updated.clear()
+    client.stop()
+    assert not client._updater.is_alive()
+
+    service.register(INSTANCE1)
+    updated.wait(1.0)
+    assert not updated.is_set()
+    assert list(client) == [INSTANCE1]
+
+    zk.close()
+
   def test_client_handles_connection_recovery_gracefully(self):
     sync_log('test_client_handles_connection_recovery_gracefully')
 